@@ -0,0 +1,58 @@
+"""
+Exportación e importación masiva de planes de rutas.
+Exporta todas las rutas de una base SQLite (activas, inactivas y
+archivadas) con sus paradas a CSV, Parquet o Arrow IPC, e importa un plan
+exportado validando cada ruta y cargándolo por lotes, una transacción por
+lote. Parquet y Arrow requieren pyarrow.
+
+Ejemplos:
+    python bulk_routes.py export planes/ --format parquet
+    python bulk_routes.py import planes/ --db otra.db --format parquet --batch-size 5000
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Agregar src al path
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+from src.infrastructure.persistence.route_plan_files import (
+    FORMATS, export_route_plan, import_route_plan
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exportación e importación masiva de rutas")
+    parser.add_argument("command", choices=["export", "import"], help="Operación")
+    parser.add_argument("directory", help="Carpeta de los archivos del plan")
+    parser.add_argument("--db", default=str(Path(__file__).parent / "yedistribuciones.db"),
+                        help="Archivo SQLite (por defecto yedistribuciones.db)")
+    parser.add_argument("--format", default="csv", choices=FORMATS, help="Formato de los archivos")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rutas por lote")
+    args = parser.parse_args()
+    
+    repository = SqliteRouteRepository(sqlite3.connect(args.db))
+    started = time.perf_counter()
+    try:
+        if args.command == "export":
+            routes, stops = export_route_plan(repository, args.directory, args.format, args.batch_size)
+        else:
+            routes, stops = import_route_plan(repository, args.directory, args.format, args.batch_size)
+    except (ValueError, ImportError, sqlite3.Error) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        repository.close()
+    
+    elapsed = time.perf_counter() - started
+    action = "exportadas" if args.command == "export" else "importadas"
+    print(f"✅ {routes} rutas y {stops} paradas {action} en {elapsed:.2f}s "
+          f"({stops / elapsed if elapsed else 0:,.0f} paradas/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,523 @@
+"""
+Prueba de carga del servicio de rutas.
+Simula muchos despachadores trabajando a la vez sobre una misma base SQLite:
+varios procesos, cada uno con varios hilos, y cada hilo con su propia
+conexión, repositorio y RouteService. Cada sesión ejecuta una mezcla
+configurable de lecturas, asignaciones, reordenamientos, divisiones y
+fusiones sobre un conjunto de datos sintético.
+
+Reporta throughput, latencia p50/p99 por operación, errores por bloqueo
+("database is locked") y reintentos, para comparar configuraciones del
+repositorio (modo de journal, busy timeout, reintentos por conflicto,
+réplica de lectura).
+
+Ejemplos:
+    python load_generator.py --threads 8 --processes 2
+    python load_generator.py --journal-mode delete --busy-timeout 0.5 --json delete.json
+    python load_generator.py --mix read=90,assign=10 --operations 500
+    python load_generator.py --shards --db shards/ --threads 8
+"""
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Agregar src al path
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from src.domain.exceptions import ConcurrentModificationError
+from src.domain.models.route import Route, WEEK_DAYS
+from src.domain.ports.route_repository_port import RouteRepositoryPort
+from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+from src.infrastructure.persistence.replicated_route_repository import ReplicatedRouteRepository
+from src.infrastructure.persistence.write_behind_route_repository import WriteBehindRouteRepository
+from src.infrastructure.persistence.sharded_route_repository import ShardedRouteRepository
+from src.application.services.route_service import RouteService
+
+
+OPERATIONS = ('read', 'assign', 'reorder', 'divide', 'merge')
+DEFAULT_MIX = "read=60,assign=20,reorder=10,divide=5,merge=5"
+
+# Resultados posibles de una operación
+OK = 'ok'
+LOCKED = 'locked'          # "database is locked" tras agotar los reintentos
+CONFLICT = 'conflict'      # ConcurrentModificationError que llegó al usuario
+REJECTED = 'rejected'      # Validación de dominio (p. ej. la ruta ya no está activa)
+SKIPPED = 'skipped'        # No había rutas adecuadas para la operación
+ERROR = 'error'
+
+
+@dataclass(frozen=True)
+class LoadTestConfig:
+    """Parámetros de una corrida."""
+    db_path: str
+    processes: int = 1
+    threads: int = 4
+    operations: int = 200
+    mix: Dict[str, float] = field(default_factory=lambda: parse_mix(DEFAULT_MIX))
+    cedis: int = 3
+    routes_per_day: int = 4
+    clients_per_route: int = 25
+    days: int = 6
+    journal_mode: str = 'wal'
+    busy_timeout: float = 5.0
+    max_conflict_retries: int = 3
+    lock_retries: int = 3
+    lock_backoff: float = 0.01
+    # Segundos de antigüedad de la réplica de lectura; None = sin réplica
+    replica_staleness: Optional[float] = None
+    # Segundos entre guardados de la escritura diferida; None = escritura directa
+    write_behind_interval: Optional[float] = None
+    # db_path es una carpeta con un archivo SQLite por CEDIS
+    shards: bool = False
+    seed: int = 42
+
+
+@dataclass
+class WorkerResult:
+    """Muestras de una sesión: (operación, resultado, segundos)."""
+    samples: List[Tuple[str, str, float]] = field(default_factory=list)
+    lock_retries: int = 0
+    conflict_retries: int = 0
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Interpreta una mezcla de operaciones como "read=60,assign=20".
+    
+    Args:
+        text: Pares operación=peso separados por comas
+        
+    Returns:
+        Pesos por operación
+        
+    Raises:
+        ValueError: Si una operación no existe o los pesos no son válidos
+    """
+    mix: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        name, _, weight = part.partition('=')
+        name = name.strip().lower()
+        if name not in OPERATIONS:
+            raise ValueError(f"Operación desconocida: {name}. Opciones: {', '.join(OPERATIONS)}")
+        mix[name] = float(weight)
+        if mix[name] < 0:
+            raise ValueError(f"El peso de {name} no puede ser negativo")
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("La mezcla debe tener al menos una operación con peso positivo")
+    return mix
+
+
+def connect(config: LoadTestConfig, path: Optional[str] = None) -> sqlite3.Connection:
+    """Conexión configurada según la corrida (journal y busy timeout)."""
+    conn = sqlite3.connect(path or config.db_path, timeout=config.busy_timeout, check_same_thread=False)
+    conn.execute(f"PRAGMA journal_mode = {config.journal_mode}")
+    return conn
+
+
+def open_repository(config: LoadTestConfig) -> RouteRepositoryPort:
+    """Repositorio base de la corrida: un archivo o un archivo por CEDIS."""
+    if config.shards:
+        return ShardedRouteRepository.in_directory(config.db_path, lambda path: connect(config, path))
+    return SqliteRouteRepository(connect(config))
+
+
+def seed_database(config: LoadTestConfig) -> int:
+    """
+    Crea el conjunto de datos sintético en una sola transacción, si la base
+    aún no tiene rutas activas.
+    
+    Args:
+        config: Parámetros de la corrida
+        
+    Returns:
+        Número de rutas creadas (0 si se reutilizó la base existente)
+    """
+    repository = open_repository(config)
+    try:
+        if repository.get_summaries():
+            return 0
+        
+        routes = []
+        for c in range(config.cedis):
+            cedis_id = f"CEDIS_LT_{c + 1:02d}"
+            for day in WEEK_DAYS[:config.days]:
+                for r in range(config.routes_per_day):
+                    client_ids = [
+                        f"CLI_{c + 1:02d}_{day[:3]}_{r:03d}_{k:04d}"
+                        for k in range(config.clients_per_route)
+                    ]
+                    routes.append(Route(
+                        id=str(uuid.uuid4()),
+                        name=f"Ruta {cedis_id} {day} {r + 1}",
+                        cedis_id=cedis_id,
+                        day_of_week=day,
+                        client_ids=client_ids
+                    ))
+        repository.begin_transaction()
+        created = repository.save_many(routes)
+        repository.commit_transaction()
+        return created
+    finally:
+        repository.close()
+
+
+class DispatcherSession:
+    """Un despachador: su propia conexión, repositorio y servicio."""
+    
+    def __init__(self, config: LoadTestConfig, worker_id: str) -> None:
+        self._config = config
+        self._worker_id = worker_id
+        self._random = random.Random(f"{config.seed}-{worker_id}")
+        if config.replica_staleness is None:
+            self._repository = open_repository(config)
+        else:
+            self._repository = ReplicatedRouteRepository(
+                connect(config), max_staleness_seconds=config.replica_staleness
+            )
+        if config.write_behind_interval is not None:
+            self._repository = WriteBehindRouteRepository(
+                self._repository, flush_interval_seconds=config.write_behind_interval
+            )
+        self._service = RouteService(
+            repository=self._repository,
+            max_conflict_retries=config.max_conflict_retries
+        )
+        self._groups = [
+            (f"CEDIS_LT_{c + 1:02d}", day)
+            for c in range(config.cedis)
+            for day in WEEK_DAYS[:config.days]
+        ]
+        self._names, self._weights = zip(*config.mix.items())
+        self._sequence = 0
+    
+    def run(self, start: Optional[threading.Barrier] = None) -> WorkerResult:
+        """
+        Ejecuta las operaciones de la sesión.
+        
+        Args:
+            start: Barrera para que todas las sesiones empiecen a la vez
+            
+        Returns:
+            Muestras y contadores de la sesión
+        """
+        result = WorkerResult()
+        if start is not None:
+            start.wait()
+        try:
+            for _ in range(self._config.operations):
+                name = self._random.choices(self._names, self._weights)[0]
+                outcome, elapsed, retries = self._execute(getattr(self, f"_{name}"))
+                result.samples.append((name, outcome, elapsed))
+                result.lock_retries += retries
+        finally:
+            result.conflict_retries = self._service.conflict_retries
+            self._repository.close()
+        return result
+    
+    def _execute(self, operation: Callable[[], bool]) -> Tuple[str, float, int]:
+        """
+        Ejecuta una operación completa (incluida la lectura con la que el
+        despachador elige la ruta) y reintenta con espera exponencial si la
+        base está bloqueada.
+        
+        Returns:
+            Tupla (resultado, segundos, reintentos por bloqueo)
+        """
+        started = time.perf_counter()
+        retries = 0
+        while True:
+            try:
+                outcome = OK if operation() else SKIPPED
+                break
+            except sqlite3.OperationalError as e:
+                self._repository.rollback_transaction()
+                if "locked" not in str(e) and "busy" not in str(e):
+                    outcome = ERROR
+                    break
+                if retries >= self._config.lock_retries:
+                    outcome = LOCKED
+                    break
+                retries += 1
+                time.sleep(self._config.lock_backoff * 2 ** retries * self._random.random())
+            except ConcurrentModificationError:
+                self._repository.rollback_transaction()
+                outcome = CONFLICT
+                break
+            except ValueError:
+                self._repository.rollback_transaction()
+                outcome = REJECTED
+                break
+            except Exception:
+                self._repository.rollback_transaction()
+                outcome = ERROR
+                break
+        return outcome, time.perf_counter() - started, retries
+    
+    def _pick_routes(self, count: int, min_clients: int = 0) -> Optional[list]:
+        """Rutas activas al azar de un CEDIS y día al azar."""
+        cedis_id, day = self._random.choice(self._groups)
+        routes = [
+            route for route in self._service.get_routes_by_cedis_and_day(cedis_id, day)
+            if route.client_count >= min_clients
+        ]
+        if len(routes) < count:
+            return None
+        return self._random.sample(routes, count)
+    
+    def _next_name(self, suffix: str) -> str:
+        self._sequence += 1
+        return f"LT {self._worker_id}-{self._sequence}{suffix}"
+    
+    def _read(self) -> bool:
+        picked = self._pick_routes(1)
+        if picked is not None:
+            self._service.get_route_by_id(picked[0].id)
+        return True
+    
+    def _assign(self) -> bool:
+        picked = self._pick_routes(1)
+        if picked is None:
+            return False
+        self._sequence += 1
+        self._service.assign_client_to_route(picked[0].id, f"CLI_LT_{self._worker_id}_{self._sequence}")
+        return True
+    
+    def _reorder(self) -> bool:
+        picked = self._pick_routes(1, min_clients=2)
+        if picked is None:
+            return False
+        route = picked[0]
+        order = list(route.client_ids)
+        self._random.shuffle(order)
+        self._service.reorder_clients_in_route(route.id, order, expected_version=route.version)
+        return True
+    
+    def _divide(self) -> bool:
+        picked = self._pick_routes(1, min_clients=4)
+        if picked is None:
+            return False
+        route = picked[0]
+        self._service.divide_route_use_case(
+            route.id, route.client_count // 2, self._next_name("a"), self._next_name("b")
+        )
+        return True
+    
+    def _merge(self) -> bool:
+        picked = self._pick_routes(2)
+        if picked is None:
+            return False
+        self._service.merge_routes_use_case(picked[0].id, picked[1].id, self._next_name("m"))
+        return True
+
+
+def run_process(config: LoadTestConfig, process_index: int) -> List[WorkerResult]:
+    """
+    Ejecuta las sesiones de un proceso, una por hilo, y espera a que todas
+    terminen.
+    
+    Args:
+        config: Parámetros de la corrida
+        process_index: Número del proceso
+        
+    Returns:
+        Resultados de cada sesión
+    """
+    sessions = [
+        DispatcherSession(config, f"P{process_index}T{t}")
+        for t in range(config.threads)
+    ]
+    start = threading.Barrier(len(sessions))
+    with ThreadPoolExecutor(max_workers=len(sessions)) as executor:
+        return list(executor.map(lambda session: session.run(start), sessions))
+
+
+def run_load_test(config: LoadTestConfig) -> Dict:
+    """
+    Puebla la base si hace falta, ejecuta todas las sesiones y resume los
+    resultados.
+    
+    Args:
+        config: Parámetros de la corrida
+        
+    Returns:
+        Reporte con totales y métricas por operación
+    """
+    seeded = seed_database(config)
+    
+    started = time.perf_counter()
+    if config.processes == 1:
+        results = run_process(config, 0)
+    else:
+        with ProcessPoolExecutor(max_workers=config.processes) as executor:
+            futures = [executor.submit(run_process, config, p) for p in range(config.processes)]
+            results = [result for future in futures for result in future.result()]
+    wall_seconds = time.perf_counter() - started
+    
+    report = summarize(results, wall_seconds)
+    report['config'] = asdict(config)
+    report['seeded_routes'] = seeded
+    return report
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano sobre una lista ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(fraction * len(sorted_values) + 0.5))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(results: List[WorkerResult], wall_seconds: float) -> Dict:
+    """
+    Agrega las muestras de todas las sesiones.
+    
+    Args:
+        results: Resultados de las sesiones
+        wall_seconds: Duración total de la corrida
+        
+    Returns:
+        Reporte con totales y métricas por operación
+    """
+    by_operation: Dict[str, List[Tuple[str, float]]] = {}
+    for result in results:
+        for name, outcome, elapsed in result.samples:
+            by_operation.setdefault(name, []).append((outcome, elapsed))
+    
+    operations = {}
+    for name in OPERATIONS:
+        samples = by_operation.get(name)
+        if not samples:
+            continue
+        latencies = sorted(elapsed for outcome, elapsed in samples if outcome == OK)
+        outcomes = {kind: 0 for kind in (OK, LOCKED, CONFLICT, REJECTED, SKIPPED, ERROR)}
+        for outcome, _ in samples:
+            outcomes[outcome] += 1
+        operations[name] = {
+            'total': len(samples),
+            **outcomes,
+            'p50_ms': _percentile(latencies, 0.50) * 1000,
+            'p99_ms': _percentile(latencies, 0.99) * 1000,
+            'max_ms': (latencies[-1] if latencies else 0.0) * 1000
+        }
+    
+    total = sum(op['total'] for op in operations.values())
+    completed = sum(op[OK] for op in operations.values())
+    return {
+        'sessions': len(results),
+        'wall_seconds': wall_seconds,
+        'operations_total': total,
+        'operations_ok': completed,
+        'throughput_ops': completed / wall_seconds if wall_seconds > 0 else 0.0,
+        'locked_errors': sum(op[LOCKED] for op in operations.values()),
+        'lock_retries': sum(result.lock_retries for result in results),
+        'conflict_errors': sum(op[CONFLICT] for op in operations.values()),
+        'conflict_retries': sum(result.conflict_retries for result in results),
+        'operations': operations
+    }
+
+
+def print_report(report: Dict) -> None:
+    """Muestra el reporte en forma de tabla."""
+    print(f"\n📊 {report['sessions']} sesiones, {report['operations_total']} operaciones "
+          f"en {report['wall_seconds']:.2f} s")
+    print(f"🚀 Throughput: {report['throughput_ops']:.1f} operaciones exitosas/s")
+    print(f"🔒 Bloqueos: {report['locked_errors']} errores, {report['lock_retries']} reintentos")
+    print(f"🔁 Conflictos de versión: {report['conflict_errors']} errores, "
+          f"{report['conflict_retries']} reintentos del servicio\n")
+    
+    header = f"{'Operación':<10}{'Total':>7}{'OK':>7}{'Bloq.':>7}{'Confl.':>7}" \
+             f"{'Rech.':>7}{'Omit.':>7}{'Error':>7}{'p50 ms':>9}{'p99 ms':>9}{'máx ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, op in report['operations'].items():
+        print(f"{name:<10}{op['total']:>7}{op[OK]:>7}{op[LOCKED]:>7}{op[CONFLICT]:>7}"
+              f"{op[REJECTED]:>7}{op[SKIPPED]:>7}{op[ERROR]:>7}"
+              f"{op['p50_ms']:>9.2f}{op['p99_ms']:>9.2f}{op['max_ms']:>9.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de rutas")
+    parser.add_argument("--db", help="Archivo SQLite (por defecto uno temporal nuevo)")
+    parser.add_argument("--processes", type=int, default=1, help="Procesos")
+    parser.add_argument("--threads", type=int, default=4, help="Sesiones (hilos) por proceso")
+    parser.add_argument("--operations", type=int, default=200, help="Operaciones por sesión")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Pesos por operación (por defecto {DEFAULT_MIX})")
+    parser.add_argument("--cedis", type=int, default=3, help="CEDIS del conjunto sintético")
+    parser.add_argument("--routes-per-day", type=int, default=4, help="Rutas por CEDIS y día")
+    parser.add_argument("--clients-per-route", type=int, default=25, help="Clientes por ruta")
+    parser.add_argument("--days", type=int, default=6, choices=range(1, len(WEEK_DAYS) + 1),
+                        help="Días de la semana con rutas")
+    parser.add_argument("--journal-mode", default="wal", choices=["wal", "delete", "truncate", "memory"],
+                        help="Modo de journal de SQLite")
+    parser.add_argument("--busy-timeout", type=float, default=5.0,
+                        help="Segundos que SQLite espera un bloqueo antes de fallar")
+    parser.add_argument("--conflict-retries", type=int, default=3,
+                        help="Reintentos del servicio ante conflictos de versión")
+    parser.add_argument("--lock-retries", type=int, default=3,
+                        help="Reintentos de la sesión ante 'database is locked'")
+    parser.add_argument("--replica-staleness", type=float,
+                        help="Leer desde una réplica en memoria con esta antigüedad máxima (s)")
+    parser.add_argument("--write-behind", type=float, metavar="SECONDS",
+                        help="Acumular ediciones y guardarlas cada SECONDS segundos")
+    parser.add_argument("--shards", action="store_true",
+                        help="Un archivo SQLite por CEDIS; --db es entonces una carpeta")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla aleatoria")
+    parser.add_argument("--json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+    
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.shards and args.replica_staleness is not None:
+        parser.error("--replica-staleness no se puede combinar con --shards")
+    
+    db_path = args.db or str(Path(tempfile.mkdtemp(prefix="load_generator_")) / "load_generator.db")
+    config = LoadTestConfig(
+        db_path=db_path,
+        processes=args.processes,
+        threads=args.threads,
+        operations=args.operations,
+        mix=mix,
+        cedis=args.cedis,
+        routes_per_day=args.routes_per_day,
+        clients_per_route=args.clients_per_route,
+        days=args.days,
+        journal_mode=args.journal_mode,
+        busy_timeout=args.busy_timeout,
+        max_conflict_retries=args.conflict_retries,
+        lock_retries=args.lock_retries,
+        replica_staleness=args.replica_staleness,
+        write_behind_interval=args.write_behind,
+        shards=args.shards,
+        seed=args.seed
+    )
+    
+    print(f"🔧 Base de datos: {db_path}")
+    print(f"⚙️ {config.processes} proceso(s) × {config.threads} hilo(s), "
+          f"journal={config.journal_mode}, busy_timeout={config.busy_timeout}s")
+    
+    report = run_load_test(config)
+    if report['seeded_routes']:
+        print(f"📋 Conjunto sintético creado: {report['seeded_routes']} rutas")
+    print_report(report)
+    
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n💾 Reporte guardado en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ Main Entry Point - Dependency Injection / Assembler
 Este archivo ensambla todas las capas de la arquitectura hexagonal.
 Aquí se realiza la inyección de dependencias.
 """
+import os
 import sqlite3
 import sys
 from pathlib import Path
@@ -11,7 +12,11 @@ from pathlib import Path
 src_path = Path(__file__).parent / "src"
 sys.path.insert(0, str(src_path))
 
+from src.domain.ports.route_repository_port import RouteRepositoryPort
+from src.infrastructure.persistence.in_memory_route_repository import InMemoryRouteRepository
+from src.infrastructure.persistence.replicated_route_repository import ReplicatedRouteRepository
 from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+from src.infrastructure.persistence.sqlite_client_repository import SqliteClientRepository
 from src.application.services.route_service import RouteService
 from src.infrastructure.ui.streamlit_app import run_ui
 
@@ -33,12 +38,28 @@ def main() -> None:
     print(f"📊 Conectando a la base de datos: {db_path}")
     db_conn = sqlite3.connect(str(db_path), check_same_thread=False)
     
-    # Crear el repositorio (Adaptador Conducido)
-    route_repo = SqliteRouteRepository(db_conn)
+    # Crear el repositorio (Adaptador Conducido). La réplica de lectura en
+    # memoria es opcional (ROUTE_REPLICA_STALENESS = segundos de retraso
+    # tolerado): cada escritura obliga a recopiar la base completa, así que
+    # solo conviene con muchas lecturas por escritura
+    route_repo: RouteRepositoryPort
+    replica_staleness = os.environ.get("ROUTE_REPLICA_STALENESS")
+    if replica_staleness:
+        route_repo = ReplicatedRouteRepository(db_conn, max_staleness_seconds=float(replica_staleness))
+    else:
+        route_repo = SqliteRouteRepository(db_conn)
     print("✅ Repositorio de rutas inicializado")
     
+    client_repo = SqliteClientRepository(db_conn)
+    print("✅ Repositorio de clientes inicializado")
+    
     # 2. Inyectar el adaptador en el servicio de aplicación
-    route_service = RouteService(repository=route_repo)
+    # Los sandboxes de planificación trabajan sobre copias en memoria
+    route_service = RouteService(
+        repository=route_repo,
+        client_repository=client_repo,
+        workspace_factory=InMemoryRouteRepository
+    )
     print("✅ Servicio de rutas inicializado")
     
     # 3. Iniciar el adaptador de UI (Adaptador Conductor)
@@ -1,32 +1,89 @@
 """
 Data Transfer Objects (DTOs)
 Para comunicación entre la capa de UI y la capa de aplicación.
+Los DTOs usan __slots__; los de lectura además son inmutables.
 """
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence, Tuple, Union, overload
 
+from src.domain.models.route_change import ChangeCursor
 
-@dataclass
+
+class ClientIdsView(Sequence[str]):
+    """
+    Vista de solo lectura sobre la lista de clientes de una ruta.
+    Evita copiar la lista por cada ruta al construir DTOs.
+    
+    La vista no es una copia: refleja los cambios posteriores de la lista
+    que envuelve. Por eso no es hashable (define __eq__ sin __hash__);
+    quien necesite un valor fijo debe hacer tuple(view).
+    """
+    __slots__ = ('_items',)
+    
+    def __init__(self, items: Sequence[str]) -> None:
+        self._items = items
+    
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+    
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[str]: ...
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, Sequence[str]]:
+        return self._items[index]
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+    
+    def __contains__(self, client_id: object) -> bool:
+        return client_id in self._items
+    
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ClientIdsView):
+            other = other._items
+        if not isinstance(other, (list, tuple)):
+            return NotImplemented
+        return len(self._items) == len(other) and all(a == b for a, b in zip(self._items, other))
+    
+    def __repr__(self) -> str:
+        return f"ClientIdsView({list(self._items)!r})"
+
+
+@dataclass(slots=True)
 class CreateRouteDTO:
     """DTO para crear una nueva ruta."""
     name: str
     cedis_id: str
     day_of_week: str
+    capacity: Optional[float] = None
+    shift_start: int = 480
+    shift_minutes: Optional[int] = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RouteDTO:
     """DTO para representar una ruta en la UI."""
     id: str
     name: str
     cedis_id: str
     day_of_week: str
-    client_ids: List[str]
+    client_ids: ClientIdsView
     client_count: int
     is_active: bool
+    version: int
+    capacity: Optional[float] = None
+    shift_start: int = 480
+    shift_minutes: Optional[int] = None
+    distance_km: Optional[float] = None
+    duration_minutes: Optional[float] = None
+    # Restricciones que la última operación incumple (si no se rechazó)
+    warnings: Tuple[str, ...] = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class DivideRouteDTO:
     """DTO para dividir una ruta."""
     route_id_to_split: str
@@ -35,7 +92,7 @@ class DivideRouteDTO:
     new_route_name_b: str
 
 
-@dataclass
+@dataclass(slots=True)
 class MergeRoutesDTO:
     """DTO para fusionar rutas."""
     route_id_a: str
@@ -43,15 +100,260 @@ class MergeRoutesDTO:
     new_merged_route_name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class AssignClientDTO:
     """DTO para asignar un cliente a una ruta."""
     route_id: str
     client_id: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ReorderClientsDTO:
     """DTO para reordenar clientes en una ruta."""
     route_id: str
     ordered_client_ids: List[str]
+
+
+@dataclass(frozen=True, slots=True)
+class RouteSummaryDTO:
+    """DTO ligero para listados: una ruta sin su lista de clientes."""
+    id: str
+    name: str
+    cedis_id: str
+    day_of_week: str
+    client_count: int
+    is_active: bool
+    version: int
+    # Métricas guardadas; None si aún no se calcularon
+    distance_km: Optional[float] = None
+    duration_minutes: Optional[float] = None
+
+
+@dataclass(frozen=True, slots=True)
+class RouteChangeDTO:
+    """DTO para representar un cambio del registro de cambios."""
+    seq: ChangeCursor
+    route_id: str
+    operation: str
+    changed_at: str
+
+
+@dataclass(frozen=True, slots=True)
+class RouteLineageEdgeDTO:
+    """DTO para una arista del linaje de rutas."""
+    parent_id: str
+    child_id: str
+    operation: str
+    depth: int
+
+
+@dataclass(frozen=True, slots=True)
+class RouteLineageDTO:
+    """DTO con el linaje completo de una ruta."""
+    route_id: str
+    ancestors: List[RouteLineageEdgeDTO]
+    descendants: List[RouteLineageEdgeDTO]
+
+
+@dataclass(frozen=True, slots=True)
+class RouteGroupStatisticsDTO:
+    """DTO con los totales de un CEDIS en un día."""
+    cedis_id: str
+    day_of_week: str
+    active_routes: int
+    total_stops: int
+    average_stops_per_route: float
+
+
+@dataclass(frozen=True, slots=True)
+class RouteStatisticsDTO:
+    """DTO con las estadísticas para el tablero de gestión."""
+    groups: List[RouteGroupStatisticsDTO]
+    total_active_routes: int
+    total_stops: int
+    average_stops_per_route: float
+    largest_routes: List[RouteSummaryDTO]
+
+
+@dataclass(frozen=True, slots=True)
+class ClientConflictDTO:
+    """DTO de un cliente asignado a varias rutas activas el mismo día."""
+    cedis_id: str
+    day_of_week: str
+    client_id: str
+    route_ids: List[str]
+
+
+@dataclass(slots=True)
+class RegisterClientDTO:
+    """DTO para registrar o actualizar un cliente."""
+    id: str
+    name: str
+    address: str
+    cedis_id: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    demand: float = 0.0
+    service_minutes: float = 0.0
+    window_start: Optional[int] = None
+    window_end: Optional[int] = None
+    visit_frequency: int = 1
+    allowed_days: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class ClientDTO:
+    """DTO para transferir datos de cliente."""
+    id: str
+    name: str
+    address: str
+    cedis_id: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    phone: Optional[str]
+    email: Optional[str]
+    demand: float
+    service_minutes: float
+    window_start: Optional[int]
+    window_end: Optional[int]
+    visit_frequency: int = 1
+    allowed_days: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class RouteSuggestionDTO:
+    """DTO con una ruta sugerida para un cliente y el costo de incluirlo."""
+    route_id: str
+    route_name: str
+    position: int
+    added_km: float
+    nearest_client_id: str
+    nearest_distance_km: float
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduledStopDTO:
+    """DTO con la programación de una parada (minutos desde medianoche)."""
+    client_id: str
+    arrival: float
+    start: float
+    departure: float
+    load_after: float
+
+
+@dataclass(frozen=True, slots=True)
+class RouteScheduleDTO:
+    """DTO con la programación estimada de una ruta y sus incumplimientos."""
+    route_id: str
+    stops: List[ScheduledStopDTO]
+    total_load: float
+    end_time: float
+    violations: List[str]
+
+
+@dataclass(frozen=True, slots=True)
+class SimulatedStopDTO:
+    """DTO con las llegadas simuladas a una parada (minutos desde medianoche)."""
+    client_id: str
+    planned_arrival: float
+    arrival_p10: float
+    arrival_p50: float
+    arrival_p90: float
+    late_probability: float
+
+
+@dataclass(frozen=True, slots=True)
+class RouteSimulationDTO:
+    """DTO con la simulación Monte Carlo de la ejecución de una ruta."""
+    route_id: str
+    replications: int
+    stops: List[SimulatedStopDTO]
+    planned_end: float
+    end_p10: float
+    end_p50: float
+    end_p90: float
+    mean_end: float
+    # None si la ruta no tiene límite de turno
+    shift_end: Optional[float]
+    overrun_probability: float
+
+
+@dataclass(frozen=True, slots=True)
+class PlannedVisitDTO:
+    """DTO con la ruta asignada a un cliente en un día del plan semanal."""
+    client_id: str
+    day_of_week: str
+    route_id: str
+    route_name: str
+    # True si hoy el cliente no está en esa ruta ese día
+    is_change: bool
+
+
+@dataclass(frozen=True, slots=True)
+class DayLoadDTO:
+    """DTO con las paradas de un día antes y después del plan semanal."""
+    day_of_week: str
+    routes: int
+    stops_before: int
+    stops_after: int
+
+
+@dataclass(frozen=True, slots=True)
+class WeeklyPlanDTO:
+    """DTO con el plan semanal de un CEDIS."""
+    cedis_id: str
+    days: List[DayLoadDTO]
+    visits: List[PlannedVisitDTO]
+    # Clientes que no se pudieron planificar ("cliente: motivo")
+    unplanned: List[str]
+    warnings: List[str]
+    applied: bool
+
+
+@dataclass(frozen=True, slots=True)
+class SandboxPlanDTO:
+    """DTO con las rutas y métricas de una alternativa de un sandbox de planificación."""
+    cedis_id: str
+    day_of_week: str
+    routes: List[RouteSummaryDTO]
+    total_stops: int
+    # Suma de las métricas de las rutas; None si alguna no las tiene
+    distance_km: Optional[float]
+    duration_minutes: Optional[float]
+    # Clientes en más de una ruta activa del día
+    conflicts: int
+    # Rutas creadas o modificadas respecto de la base real
+    changed_routes: int
+
+
+@dataclass(frozen=True, slots=True)
+class RouteEditDTO:
+    """DTO con un cambio en el conjunto de rutas entre dos planes."""
+    # SPLIT, MERGE, REPLACE_ROUTE, ADD_ROUTE o REMOVE_ROUTE
+    operation: str
+    # Nombres de las rutas antes y después del cambio
+    before_routes: List[str]
+    after_routes: List[str]
+
+
+@dataclass(frozen=True, slots=True)
+class StopEditDTO:
+    """DTO con un cambio en una parada entre dos planes."""
+    # ADD_STOP, REMOVE_STOP, MOVE_STOP o REORDER_STOP
+    operation: str
+    client_id: str
+    # Ruta donde queda (None si se quitó) y posición en ella
+    route: Optional[str]
+    position: Optional[int]
+    # Ruta donde estaba (None si se agregó)
+    from_route: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class RoutePlanDiffDTO:
+    """DTO con las diferencias entre dos planes de rutas."""
+    route_edits: List[RouteEditDTO]
+    stop_edits: List[StopEditDTO]
+    unchanged_routes: int
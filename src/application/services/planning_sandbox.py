@@ -0,0 +1,209 @@
+"""
+Planning Sandbox - Application Layer
+Sesión de planificación sobre una copia de las rutas de un CEDIS y día:
+permite probar divisiones y fusiones, comparar alternativas y confirmar
+la elegida en la base real en una sola transacción.
+"""
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from src.domain.models.route import Route
+from src.domain.models.route_change import ChangeCursor
+from src.domain.ports.route_repository_port import RouteRepositoryPort
+from src.domain.ports.route_workspace_port import RouteWorkspacePort
+from src.domain.services.route_diff import diff_route_plans
+from src.application.dtos import RouteEditDTO, RoutePlanDiffDTO, SandboxPlanDTO, StopEditDTO
+
+if TYPE_CHECKING:
+    from src.application.services.route_service import RouteService
+
+
+class PlanningSandbox:
+    """
+    Alternativa de planificación aislada de la base real.
+    
+    Los casos de uso se ejecutan con `service`, un RouteService sobre el
+    espacio de trabajo, así que las escrituras solo cambian la copia. fork
+    crea otra alternativa a partir de esta sin copiar las rutas, y commit
+    escribe en la base real las rutas creadas o modificadas y su linaje.
+    Las rutas de la base se escriben con compare-and-swap contra la versión
+    leída al abrir el sandbox: si alguien las cambió, o ya se confirmó otra
+    alternativa, commit falla sin escribir nada.
+    """
+    
+    # Cambios leídos por página del registro del espacio de trabajo
+    _CHANGES_PAGE = 500
+    
+    def __init__(
+        self,
+        repository: RouteRepositoryPort,
+        workspace: RouteWorkspacePort,
+        base_routes: Dict[str, Route],
+        cedis_id: str,
+        day_of_week: str,
+        make_service: Callable[[RouteRepositoryPort], 'RouteService']
+    ) -> None:
+        """
+        Args:
+            repository: Repositorio real donde se confirma el plan
+            workspace: Espacio de trabajo con la copia de las rutas
+            base_routes: Rutas de la base tal como se leyeron, por ID
+            cedis_id: ID del CEDIS
+            day_of_week: Día de la semana
+            make_service: Crea un RouteService sobre un repositorio
+        """
+        self._repository = repository
+        self._workspace = workspace
+        self._base_routes = base_routes
+        self._make_service = make_service
+        self._committed = False
+        self.cedis_id = cedis_id
+        self.day_of_week = day_of_week
+        self.service = make_service(workspace)
+    
+    def fork(self) -> 'PlanningSandbox':
+        """
+        Crea otra alternativa a partir del estado actual de esta.
+        
+        Returns:
+            Sandbox independiente con la misma base
+        """
+        return PlanningSandbox(
+            self._repository,
+            self._workspace.fork(),
+            self._base_routes,
+            self.cedis_id,
+            self.day_of_week,
+            self._make_service
+        )
+    
+    def plan(self) -> SandboxPlanDTO:
+        """
+        Resume las rutas activas de la alternativa para compararla con otras.
+        
+        Returns:
+            DTO con las rutas, totales y conflictos de la alternativa
+        """
+        routes = [
+            summary for summary in self.service.get_route_summaries()
+            if summary.cedis_id == self.cedis_id and summary.day_of_week == self.day_of_week
+        ]
+        distances = [route.distance_km for route in routes if route.distance_km is not None]
+        durations = [route.duration_minutes for route in routes if route.duration_minutes is not None]
+        return SandboxPlanDTO(
+            cedis_id=self.cedis_id,
+            day_of_week=self.day_of_week,
+            routes=routes,
+            total_stops=sum(route.client_count for route in routes),
+            distance_km=sum(distances) if len(distances) == len(routes) else None,
+            duration_minutes=sum(durations) if len(durations) == len(routes) else None,
+            conflicts=len(self.service.find_conflicts(self.cedis_id, self.day_of_week)),
+            changed_routes=len(self._changed_route_ids())
+        )
+    
+    def diff(self, against: Optional['PlanningSandbox'] = None) -> RoutePlanDiffDTO:
+        """
+        Operaciones que llevan de la base (u otra alternativa) a esta:
+        divisiones, fusiones y paradas agregadas, quitadas, movidas o
+        reordenadas.
+        
+        Args:
+            against: Alternativa de referencia; None para la base real
+            
+        Returns:
+            DTO con las diferencias, con nombres de ruta
+        """
+        before = list(self._base_routes.values()) if against is None else against._routes()
+        after = self._routes()
+        names = {route.id: route.name for route in before + after}
+        
+        diff = diff_route_plans(before, after)
+        return RoutePlanDiffDTO(
+            route_edits=[
+                RouteEditDTO(
+                    operation=edit.operation,
+                    before_routes=[names[route_id] for route_id in edit.before_ids],
+                    after_routes=[names[route_id] for route_id in edit.after_ids]
+                )
+                for edit in diff.route_edits
+            ],
+            stop_edits=[
+                StopEditDTO(
+                    operation=edit.operation,
+                    client_id=edit.client_id,
+                    route=names[edit.route_id] if edit.route_id else None,
+                    position=edit.position,
+                    from_route=names[edit.from_route_id] if edit.from_route_id else None
+                )
+                for edit in diff.stop_edits
+            ],
+            unchanged_routes=diff.unchanged_routes
+        )
+    
+    def commit(self) -> int:
+        """
+        Escribe la alternativa en la base real en una sola transacción.
+        
+        Returns:
+            Número de rutas creadas o modificadas
+            
+        Raises:
+            ValueError: Si el sandbox ya se confirmó
+            ConcurrentModificationError: Si alguna ruta de la base cambió
+                desde que se abrió el sandbox
+        """
+        if self._committed:
+            raise ValueError("Este sandbox ya se confirmó")
+        
+        route_ids = self._changed_route_ids()
+        routes = {route_id: self._workspace.find_by_id(route_id) for route_id in route_ids}
+        
+        try:
+            self._repository.begin_transaction()
+            
+            for route_id, route in routes.items():
+                base = self._base_routes.get(route_id)
+                if base is None:
+                    if route is not None:
+                        self._repository.save(route)
+                elif route is None:
+                    self._repository.delete(route_id)
+                else:
+                    # Una sola escritura sobre la versión leída de la base
+                    route.version = base.version
+                    self._repository.update(route)
+            
+            # Linaje de las rutas nuevas, arista por arista
+            for route_id, route in routes.items():
+                if route is None or route_id in self._base_routes:
+                    continue
+                for edge in self._workspace.get_ancestors(route_id):
+                    if edge.depth == 1:
+                        self._repository.add_lineage([edge.parent_id], [route_id], edge.operation)
+            
+            self._repository.commit_transaction()
+        except Exception as e:
+            # Revertir en caso de error
+            self._repository.rollback_transaction()
+            raise e
+        
+        self._committed = True
+        return len(routes)
+    
+    def _routes(self) -> List[Route]:
+        """Rutas activas de la alternativa."""
+        return self._workspace.get_by_cedis_and_day(self.cedis_id, self.day_of_week)
+    
+    def _changed_route_ids(self) -> List[str]:
+        """
+        IDs de las rutas escritas en el espacio de trabajo, en orden de
+        primera escritura.
+        """
+        route_ids: Dict[str, None] = {}
+        seq: ChangeCursor = ""
+        while True:
+            changes = self._workspace.changes_since(seq, self._CHANGES_PAGE)
+            for change in changes:
+                route_ids.setdefault(change.route_id)
+            if len(changes) < self._CHANGES_PAGE:
+                return list(route_ids)
+            seq = changes[-1].seq
@@ -3,11 +3,37 @@ Route Service - Application Layer
 Implementa los casos de uso del módulo de Gestión de Rutas.
 Depende SOLO de abstracciones (puertos), NO de implementaciones concretas.
 """
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
 import uuid
-from src.domain.models.route import Route
+from src.domain.models.route import Route, WEEK_DAYS
+from src.domain.models.client import Client
+from src.domain.models.route_change import ChangeCursor
+from src.domain.models.route_lineage import RouteLineageEdge
+from src.domain.models.route_summary import RouteSummary
+from src.domain.models.route_statistics import RouteStatisticsFilter
+from src.domain.exceptions import (
+    ConcurrentModificationError, DuplicateClientAssignmentError, RouteConstraintViolationError
+)
 from src.domain.ports.route_repository_port import RouteRepositoryPort
-from src.application.dtos import RouteDTO, CreateRouteDTO, DivideRouteDTO, MergeRoutesDTO
+from src.domain.ports.client_repository_port import ClientRepositoryPort
+from src.domain.ports.route_workspace_port import RouteWorkspacePort
+from src.domain.services.route_cost import RouteCost
+from src.domain.services.route_geometry import cheapest_insertion
+from src.domain.services.route_schedule import RouteSchedule, StopProfile, schedule_route
+from src.domain.services.route_simulation import GAMMA, LOGNORMAL, TimeDistribution, simulate_schedule
+from src.domain.services.spatial_index import SpatialGridIndex
+from src.domain.services.weekly_planner import PlannedRoute, VisitRequest, WeeklyPlanner
+from src.application.dtos import (
+    RouteDTO, CreateRouteDTO, DivideRouteDTO, MergeRoutesDTO, RouteChangeDTO,
+    RouteLineageDTO, RouteLineageEdgeDTO, RouteSummaryDTO, ClientIdsView,
+    RouteStatisticsDTO, RouteGroupStatisticsDTO, ClientConflictDTO,
+    RegisterClientDTO, ClientDTO, RouteSuggestionDTO, RouteScheduleDTO, ScheduledStopDTO,
+    RouteSimulationDTO, SimulatedStopDTO, WeeklyPlanDTO, DayLoadDTO, PlannedVisitDTO
+)
+from src.application.services.planning_sandbox import PlanningSandbox
+
+# Valor en caché por ruta (programación o costo)
+CachedValue = TypeVar('CachedValue')
 
 
 class RouteService:
@@ -16,14 +42,63 @@ class RouteService:
     Orquesta los casos de uso y coordina con el dominio y los puertos.
     """
     
-    def __init__(self, repository: RouteRepositoryPort) -> None:
+    # Programaciones y costos de ruta en caché (uno por ruta y versión)
+    _ROUTE_CACHE_SIZE = 1024
+    
+    def __init__(
+        self,
+        repository: RouteRepositoryPort,
+        max_conflict_retries: int = 3,
+        enforce_unique_daily_clients: bool = False,
+        client_repository: Optional[ClientRepositoryPort] = None,
+        enforce_route_constraints: bool = False,
+        average_speed_kmh: float = 30.0,
+        workspace_factory: Optional[Callable[[List[Route]], RouteWorkspacePort]] = None
+    ) -> None:
         """
         Inyección de dependencias: recibe el puerto, NO la implementación.
         
         Args:
             repository: Puerto del repositorio de rutas
+            max_conflict_retries: Reintentos automáticos ante conflictos de
+                versión para operaciones conmutativas (agregar/eliminar cliente)
+            enforce_unique_daily_clients: Si es True, un cliente no puede estar
+                en dos rutas activas del mismo CEDIS el mismo día
+            client_repository: Puerto del repositorio de clientes; necesario
+                para registrar clientes y sugerir rutas, y fuente de la
+                demanda, tiempos de atención, ventanas y coordenadas
+            enforce_route_constraints: Si es True, se rechazan las operaciones
+                que incumplen capacidad, ventanas o turno; si es False, los
+                incumplimientos se reportan como advertencias en el DTO
+            average_speed_kmh: Velocidad promedio para estimar tiempos de viaje
+            workspace_factory: Crea un espacio de trabajo con una copia de
+                las rutas dadas; necesario para abrir sandboxes de planificación
         """
         self._repository = repository
+        self._max_conflict_retries = max_conflict_retries
+        # Conflictos de versión resueltos releyendo la ruta, sin llegar al usuario
+        self._conflict_retries = 0
+        self._enforce_unique_daily_clients = enforce_unique_daily_clients
+        self._client_repository = client_repository
+        
+        # Índices espaciales por CEDIS, construidos en la primera consulta y
+        # actualizados al registrar clientes
+        self._spatial_indexes: Dict[str, SpatialGridIndex] = {}
+        
+        self._enforce_route_constraints = enforce_route_constraints
+        self._average_speed_kmh = average_speed_kmh
+        self._workspace_factory = workspace_factory
+        
+        # Agregados por prefijo de cada ruta, por versión; se avanzan igual que los costos
+        self._schedules: Dict[str, Tuple[int, RouteSchedule]] = {}
+        # Distancia por tramo de cada ruta; tras cada cambio confirmado se
+        # aplica el mismo movimiento, que recalcula solo los tramos afectados
+        self._costs: Dict[str, Tuple[int, RouteCost]] = {}
+    
+    @property
+    def conflict_retries(self) -> int:
+        """Conflictos de versión que el servicio reintentó automáticamente."""
+        return self._conflict_retries
     
     def create_route(self, dto: CreateRouteDTO) -> RouteDTO:
         """
@@ -48,11 +123,16 @@ class RouteService:
             cedis_id=dto.cedis_id,
             day_of_week=dto.day_of_week.upper(),
             client_ids=[],
-            is_active=True
+            is_active=True,
+            capacity=dto.capacity,
+            shift_start=dto.shift_start,
+            shift_minutes=dto.shift_minutes
         )
+        self._measure(route)
         
         # Persistir
         self._repository.save(route)
+        self._repository.commit_transaction()
         
         # Retornar DTO
         return self._route_to_dto(route)
@@ -70,18 +150,29 @@ class RouteService:
             
         Raises:
             ValueError: Si la ruta no existe o el cliente ya está asignado
+            DuplicateClientAssignmentError: Si se aplica la unicidad diaria y
+                el cliente ya está en otra ruta del mismo CEDIS y día
+            RouteConstraintViolationError: Si se aplican las restricciones y
+                la ruta quedaría sin cumplirlas
+            ConcurrentModificationError: Si se agotan los reintentos por conflicto
         """
-        route = self._repository.find_by_id(route_id)
-        if route is None:
-            raise ValueError(f"Ruta {route_id} no encontrada")
+        warnings: Tuple[str, ...] = ()
+        stop = self._stop_profile(client_id)
+        position = 0
         
-        # Lógica de dominio
-        route.add_client(client_id)
+        def assign(route: Route) -> None:
+            nonlocal warnings, position
+            schedule, cost = self._schedule(route), self._cost(route)
+            route.add_client(client_id)
+            self._ensure_unique_daily_clients(route, [client_id])
+            position = len(route.client_ids) - 1
+            warnings = self._evaluate_insertion(route, schedule, cost, stop, position)
         
-        # Persistir cambios
-        self._repository.update(route)
+        # Agregar un cliente es conmutativo: ante un conflicto se reaplica
+        route = self._apply_route_change(route_id, assign, self._max_conflict_retries)
+        self._advance_caches(route, lambda cached: cached.insert(stop, position))
         
-        return self._route_to_dto(route)
+        return self._route_to_dto(route, warnings)
     
     def remove_client_from_route(self, route_id: str, client_id: str) -> RouteDTO:
         """
@@ -93,39 +184,269 @@ class RouteService:
             
         Returns:
             DTO de la ruta actualizada
+            
+        Raises:
+            ValueError: Si la ruta no existe o el cliente no está en ella
+            ConcurrentModificationError: Si se agotan los reintentos por conflicto
         """
-        route = self._repository.find_by_id(route_id)
-        if route is None:
-            raise ValueError(f"Ruta {route_id} no encontrada")
+        position = 0
+        
+        def remove(route: Route) -> None:
+            nonlocal position
+            cost = self._cost(route)
+            position = route.remove_client(client_id)
+            if cost is not None:
+                route.metrics = cost.metrics_after(
+                    cost.removal_delta(position), -cost.service_minutes_at(position)
+                )
         
-        route.remove_client(client_id)
-        self._repository.update(route)
+        route = self._apply_route_change(route_id, remove, self._max_conflict_retries)
+        self._advance_caches(route, lambda cached: cached.remove(position))
         
         return self._route_to_dto(route)
     
-    def reorder_clients_in_route(self, route_id: str, ordered_client_ids: List[str]) -> RouteDTO:
+    def insert_client_at(self, route_id: str, client_id: str, position: int) -> RouteDTO:
+        """
+        RF-RUT-02: Asignar un cliente a una ruta en una posición específica.
+        No se reintenta ante conflictos: la posición depende del orden leído.
+        
+        Args:
+            route_id: ID de la ruta
+            client_id: ID del cliente a asignar
+            position: Índice (0-based) que ocupará el cliente
+            
+        Returns:
+            DTO de la ruta actualizada
+            
+        Raises:
+            ValueError: Si la ruta no existe, el cliente ya está o la posición es inválida
+            DuplicateClientAssignmentError: Si se aplica la unicidad diaria y
+                el cliente ya está en otra ruta del mismo CEDIS y día
+            RouteConstraintViolationError: Si se aplican las restricciones y
+                la ruta quedaría sin cumplirlas
+            ConcurrentModificationError: Si la ruta cambió durante la operación
+        """
+        warnings: Tuple[str, ...] = ()
+        stop = self._stop_profile(client_id)
+        
+        def insert(route: Route) -> None:
+            nonlocal warnings
+            schedule, cost = self._schedule(route), self._cost(route)
+            route.insert_client(client_id, position)
+            self._ensure_unique_daily_clients(route, [client_id])
+            warnings = self._evaluate_insertion(route, schedule, cost, stop, position)
+        
+        route = self._apply_route_change(route_id, insert, retries=0)
+        self._advance_caches(route, lambda cached: cached.insert(stop, position))
+        
+        return self._route_to_dto(route, warnings)
+    
+    def move_client(
+        self,
+        client_id: str,
+        from_route_id: str,
+        to_route_id: str,
+        position: Optional[int] = None
+    ) -> tuple[RouteDTO, RouteDTO]:
+        """
+        Mueve un cliente de una ruta a otra en una sola transacción corta.
+        Ambas escrituras usan compare-and-swap: si otro usuario modificó
+        alguna de las rutas, no se aplica ninguna de las dos.
+        
+        Args:
+            client_id: ID del cliente a mover
+            from_route_id: ID de la ruta de origen
+            to_route_id: ID de la ruta de destino (puede ser la misma)
+            position: Índice (0-based) en la ruta de destino; None para el final
+            
+        Returns:
+            Tupla con los DTOs de la ruta de origen y la de destino
+            
+        Raises:
+            ValueError: Si alguna ruta no existe o el movimiento es inválido
+            DuplicateClientAssignmentError: Si se aplica la unicidad diaria y
+                el cliente ya está en otra ruta del mismo CEDIS y día que el destino
+            RouteConstraintViolationError: Si se aplican las restricciones y
+                la ruta de destino quedaría sin cumplirlas
+            ConcurrentModificationError: Si persiste un conflicto de versión
+        """
+        # Agregar al final es conmutativo; insertar en una posición no
+        retries = self._max_conflict_retries if position is None else 0
+        attempt = 0
+        stop = self._stop_profile(client_id)
+        
+        while True:
+            try:
+                self._repository.begin_transaction()
+                
+                from_route = self._repository.find_by_id(from_route_id)
+                if from_route is None:
+                    raise ValueError(f"Ruta {from_route_id} no encontrada")
+                
+                to_route = (
+                    from_route if to_route_id == from_route_id
+                    else self._repository.find_by_id(to_route_id)
+                )
+                if to_route is None:
+                    raise ValueError(f"Ruta {to_route_id} no encontrada")
+                
+                # Quitar una parada nunca incumple restricciones; basta con
+                # verificar la inserción en el destino
+                to_schedule = self._schedule(to_route) if to_route is not from_route else None
+                from_cost = self._cost(from_route)
+                to_cost = self._cost(to_route) if to_route is not from_route else None
+                
+                # Lógica de dominio
+                source_position = from_route.remove_client(client_id)
+                target_position = len(to_route.client_ids) if position is None else position
+                to_route.insert_client(client_id, target_position)
+                
+                if to_schedule is not None:
+                    warnings = self._evaluate_insertion(to_route, to_schedule, to_cost, stop, target_position)
+                    if from_cost is not None:
+                        from_route.metrics = from_cost.metrics_after(
+                            from_cost.removal_delta(source_position),
+                            -from_cost.service_minutes_at(source_position)
+                        )
+                else:
+                    warnings = self._route_warnings(to_route)
+                    if from_cost is not None:
+                        from_route.metrics = from_cost.metrics_after(
+                            from_cost.relocation_delta(source_position, target_position)
+                        )
+                
+                self._repository.update(from_route)
+                if to_route is not from_route:
+                    # El origen ya no tiene al cliente, así que no cuenta como conflicto
+                    self._ensure_unique_daily_clients(to_route, [client_id])
+                    self._repository.update(to_route)
+                
+                self._repository.commit_transaction()
+                
+                if to_route is from_route:
+                    self._advance_caches(
+                        from_route, lambda cached: cached.relocate(source_position, target_position)
+                    )
+                else:
+                    self._advance_caches(from_route, lambda cached: cached.remove(source_position))
+                    self._advance_caches(to_route, lambda cached: cached.insert(stop, target_position))
+                
+                return self._route_to_dto(from_route), self._route_to_dto(to_route, warnings)
+            
+            except ConcurrentModificationError:
+                self._repository.rollback_transaction()
+                if attempt >= retries:
+                    raise
+                attempt += 1
+                self._conflict_retries += 1
+            
+            except Exception as e:
+                # Revertir en caso de error
+                self._repository.rollback_transaction()
+                raise e
+    
+    def reorder_clients_in_route(
+        self,
+        route_id: str,
+        ordered_client_ids: List[str],
+        expected_version: Optional[int] = None
+    ) -> RouteDTO:
         """
         RF-RUT-03: Reordenar clientes en una ruta.
+        Un reordenamiento no es conmutativo, por lo que nunca se reintenta.
         
         Args:
             route_id: ID de la ruta
             ordered_client_ids: Nueva lista ordenada de IDs de clientes
+            expected_version: Versión de la ruta sobre la que se calculó el
+                nuevo orden (la que vio el usuario); None para no verificarla
             
         Returns:
             DTO de la ruta actualizada
             
         Raises:
             ValueError: Si la ruta no existe o la lista de clientes es inválida
+            RouteConstraintViolationError: Si se aplican las restricciones y
+                el nuevo orden no las cumple
+            ConcurrentModificationError: Si la ruta cambió desde expected_version
         """
+        warnings: Tuple[str, ...] = ()
+        cost: Optional[RouteCost] = None
+        schedule: Optional[RouteSchedule] = None
+        
+        def reorder(route: Route) -> None:
+            nonlocal warnings, cost, schedule
+            if expected_version is not None and route.version != expected_version:
+                raise ConcurrentModificationError(route_id, expected_version)
+            # Lógica de dominio
+            route.reorder_clients(ordered_client_ids)
+            # Un orden nuevo cambia todos los tiempos y tramos: se recalcula completo
+            schedule = self._route_schedule(route)
+            warnings = self._constraint_warnings(route.id, schedule.violations())
+            cost = self._measure(route)
+        
+        route = self._apply_route_change(route_id, reorder, retries=0)
+        if schedule is not None:
+            self._remember(self._schedules, route, schedule)
+        if cost is not None:
+            self._remember(self._costs, route, cost)
+        
+        return self._route_to_dto(route, warnings)
+    
+    def move_stop(
+        self,
+        route_id: str,
+        client_id: str,
+        before: Optional[str],
+        after: Optional[str],
+        expected_version: Optional[int] = None
+    ) -> RouteDTO:
+        """
+        Mueve una sola parada entre dos vecinas (arrastrar y soltar). Solo se
+        escribe la parada movida, no la lista completa. Como el resultado
+        depende de los vecinos que vio el usuario, nunca se reintenta.
+        
+        Args:
+            route_id: ID de la ruta
+            client_id: Cliente a mover
+            before: Cliente que quedará inmediatamente antes (None = inicio)
+            after: Cliente que quedará inmediatamente después (None = final)
+            expected_version: Versión de la ruta que vio el usuario; None
+                para no verificarla
+            
+        Returns:
+            DTO de la ruta actualizada
+            
+        Raises:
+            ValueError: Si la ruta o los clientes no existen, o before y
+                after no son vecinos
+            ConcurrentModificationError: Si la ruta cambió desde expected_version
+        """
+        relocation: Optional[Tuple[int, int]] = None
+        try:
+            self._repository.begin_transaction()
+            
+            # Las métricas nuevas se obtienen en O(1) a partir de las posiciones
+            metrics = None
+            route = self._repository.find_by_id(route_id)
+            cost = self._cost(route) if route is not None else None
+            if route is not None and cost is not None:
+                relocation = self._relocation_positions(route.client_ids, client_id, before, after)
+                if relocation is not None:
+                    metrics = cost.metrics_after(cost.relocation_delta(*relocation))
+            
+            self._repository.move_stop(route_id, client_id, before, after, expected_version, metrics)
+            self._repository.commit_transaction()
+        except Exception as e:
+            # Revertir en caso de error
+            self._repository.rollback_transaction()
+            raise e
+        
         route = self._repository.find_by_id(route_id)
         if route is None:
             raise ValueError(f"Ruta {route_id} no encontrada")
-        
-        # Lógica de dominio
-        route.reorder_clients(ordered_client_ids)
-        
-        # Persistir cambios
-        self._repository.update(route)
+        if relocation is not None:
+            self._advance_caches(route, lambda cached: cached.relocate(*relocation))
         
         return self._route_to_dto(route)
     
@@ -151,6 +472,10 @@ class RouteService:
             
         Raises:
             ValueError: Si la ruta no existe o la división falla
+            DuplicateClientAssignmentError: Si se aplica la unicidad diaria y
+                algún cliente ya está en otra ruta activa del mismo día
+            RouteConstraintViolationError: Si se aplican las restricciones y
+                alguna parte no las cumple
         """
         try:
             # Iniciar transacción
@@ -164,6 +489,16 @@ class RouteService:
             # Lógica de dominio: dividir
             route_a, route_b = original_route.divide_route(split_point)
             
+            # Factibilidad de ambas partes a partir de los agregados de la original
+            violations_a, violations_b = self._schedule(original_route).split_violations(split_point)
+            warnings_a = self._constraint_warnings(original_route.id, violations_a)
+            warnings_b = self._constraint_warnings(original_route.id, violations_b)
+            
+            # Métricas de ambas partes a partir de los tramos de la original
+            cost = self._cost(original_route)
+            if cost is not None:
+                route_a.metrics, route_b.metrics = cost.split(split_point)
+            
             # Personalizar nombres
             route_a.name = new_route_name_a
             route_b.name = new_route_name_b
@@ -176,14 +511,23 @@ class RouteService:
             original_route.deactivate()
             self._repository.update(original_route)
             
+            # Con la original desactivada, solo cuentan otras rutas del día
+            self._ensure_unique_daily_clients(route_a, route_a.client_ids)
+            self._ensure_unique_daily_clients(route_b, route_b.client_ids)
+            
             # Guardar nuevas rutas
             self._repository.save(route_a)
             self._repository.save(route_b)
             
+            # Registrar linaje en la misma transacción
+            self._repository.add_lineage(
+                [original_route.id], [route_a.id, route_b.id], RouteLineageEdge.DIVIDE
+            )
+            
             # Confirmar transacción
             self._repository.commit_transaction()
             
-            return self._route_to_dto(route_a), self._route_to_dto(route_b)
+            return self._route_to_dto(route_a, warnings_a), self._route_to_dto(route_b, warnings_b)
         
         except Exception as e:
             # Revertir en caso de error
@@ -210,6 +554,10 @@ class RouteService:
             
         Raises:
             ValueError: Si alguna ruta no existe o la fusión falla
+            DuplicateClientAssignmentError: Si se aplica la unicidad diaria y
+                algún cliente ya está en otra ruta activa del mismo día
+            RouteConstraintViolationError: Si se aplican las restricciones y
+                la ruta fusionada no las cumple
         """
         try:
             # Iniciar transacción
@@ -227,6 +575,18 @@ class RouteService:
             # Lógica de dominio: fusionar
             merged_route = route_a.merge_routes(route_b)
             
+            # La fusión recorre A y luego B; con clientes repetidos B cambia y
+            # hay que reprogramar la ruta completa
+            if len(merged_route.client_ids) == len(route_a.client_ids) + len(route_b.client_ids):
+                violations = self._schedule(route_a).concatenation_violations(self._schedule(route_b))
+                cost_a, cost_b = self._cost(route_a), self._cost(route_b)
+                if cost_a is not None and cost_b is not None:
+                    merged_route.metrics = cost_a.concatenation(cost_b)
+            else:
+                violations = self._route_schedule(merged_route).violations()
+                self._measure(merged_route)
+            warnings = self._constraint_warnings(route_a.id, violations)
+            
             # Personalizar nombre y generar ID único
             merged_route.name = new_merged_route_name
             merged_route.id = str(uuid.uuid4())
@@ -237,19 +597,57 @@ class RouteService:
             self._repository.update(route_a)
             self._repository.update(route_b)
             
+            # Con las originales desactivadas, solo cuentan otras rutas del día
+            self._ensure_unique_daily_clients(merged_route, merged_route.client_ids)
+            
             # Guardar ruta fusionada
             self._repository.save(merged_route)
             
+            # Registrar linaje en la misma transacción
+            self._repository.add_lineage(
+                [route_a.id, route_b.id], [merged_route.id], RouteLineageEdge.MERGE
+            )
+            
             # Confirmar transacción
             self._repository.commit_transaction()
             
-            return self._route_to_dto(merged_route)
+            return self._route_to_dto(merged_route, warnings)
         
         except Exception as e:
             # Revertir en caso de error
             self._repository.rollback_transaction()
             raise e
     
+    def open_sandbox(self, cedis_id: str, day_of_week: str) -> PlanningSandbox:
+        """
+        Abre un sandbox de planificación con las rutas activas de un CEDIS y
+        día. Las divisiones y fusiones hechas en él no tocan la base hasta
+        que se confirma.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            day_of_week: Día de la semana
+            
+        Returns:
+            Sandbox con una copia de las rutas
+            
+        Raises:
+            ValueError: Si el servicio se creó sin workspace_factory
+        """
+        if self._workspace_factory is None:
+            raise ValueError("No hay un espacio de trabajo configurado para sandboxes")
+        
+        day_of_week = day_of_week.upper()
+        routes = self._repository.get_by_cedis_and_day(cedis_id, day_of_week)
+        return PlanningSandbox(
+            repository=self._repository,
+            workspace=self._workspace_factory(routes),
+            base_routes={route.id: route for route in routes},
+            cedis_id=cedis_id,
+            day_of_week=day_of_week,
+            make_service=self._with_repository
+        )
+    
     def get_route_by_id(self, route_id: str) -> Optional[RouteDTO]:
         """
         Obtener una ruta por su ID.
@@ -280,6 +678,74 @@ class RouteService:
         
         return [self._route_to_dto(route) for route in routes]
     
+    def get_route_summaries(self, include_inactive: bool = False) -> List[RouteSummaryDTO]:
+        """
+        RF-RUT-04: Listar rutas sin cargar sus clientes.
+        Preferible a get_all_routes en pantallas que solo muestran totales.
+        
+        Args:
+            include_inactive: Si incluir rutas inactivas
+            
+        Returns:
+            Lista de DTOs de resumen
+        """
+        summaries = self._repository.get_summaries(include_inactive)
+        return [self._summary_to_dto(summary) for summary in summaries]
+    
+    def search_routes(self, query: str, limit: int = 20) -> List[RouteSummaryDTO]:
+        """
+        Busca rutas activas por nombre, CEDIS o ID de cliente.
+        Pensado para búsqueda mientras se escribe: solo retorna los mejores resultados.
+        
+        Args:
+            query: Texto de búsqueda
+            limit: Número máximo de resultados
+            
+        Returns:
+            Lista de DTOs de resumen ordenados por relevancia
+        """
+        summaries = self._repository.search_routes(query, limit)
+        return [self._summary_to_dto(summary) for summary in summaries]
+    
+    def get_statistics(
+        self,
+        cedis_id: Optional[str] = None,
+        day_of_week: Optional[str] = None,
+        top_n: int = 5
+    ) -> RouteStatisticsDTO:
+        """
+        Obtiene los indicadores del tablero de gestión: rutas y paradas
+        activas por CEDIS y día, promedio de paradas y rutas más grandes.
+        
+        Args:
+            cedis_id: CEDIS a consultar (None para todos)
+            day_of_week: Día a consultar (None para todos)
+            top_n: Cantidad de rutas más grandes a incluir
+            
+        Returns:
+            DTO con las estadísticas
+        """
+        statistics = self._repository.get_statistics(
+            RouteStatisticsFilter(cedis_id=cedis_id, day_of_week=day_of_week, top_n=top_n)
+        )
+        
+        return RouteStatisticsDTO(
+            groups=[
+                RouteGroupStatisticsDTO(
+                    cedis_id=group.cedis_id,
+                    day_of_week=group.day_of_week,
+                    active_routes=group.active_routes,
+                    total_stops=group.total_stops,
+                    average_stops_per_route=group.average_stops_per_route
+                )
+                for group in statistics.groups
+            ],
+            total_active_routes=statistics.total_active_routes,
+            total_stops=statistics.total_stops,
+            average_stops_per_route=statistics.average_stops_per_route,
+            largest_routes=[self._summary_to_dto(r) for r in statistics.largest_routes]
+        )
+    
     def get_routes_by_cedis_and_day(self, cedis_id: str, day_of_week: str) -> List[RouteDTO]:
         """
         Obtener rutas de un CEDIS en un día específico.
@@ -294,6 +760,54 @@ class RouteService:
         routes = self._repository.get_by_cedis_and_day(cedis_id, day_of_week.upper())
         return [self._route_to_dto(route) for route in routes]
     
+    def get_route_lineage(self, route_id: str) -> RouteLineageDTO:
+        """
+        Obtiene de qué rutas proviene una ruta y qué rutas surgieron de ella.
+        
+        Args:
+            route_id: ID de la ruta
+            
+        Returns:
+            DTO con las aristas de ancestros y descendientes
+        """
+        def to_dto(edge: RouteLineageEdge) -> RouteLineageEdgeDTO:
+            return RouteLineageEdgeDTO(
+                parent_id=edge.parent_id,
+                child_id=edge.child_id,
+                operation=edge.operation,
+                depth=edge.depth
+            )
+        
+        return RouteLineageDTO(
+            route_id=route_id,
+            ancestors=[to_dto(e) for e in self._repository.get_ancestors(route_id)],
+            descendants=[to_dto(e) for e in self._repository.get_descendants(route_id)]
+        )
+    
+    def get_changes_since(self, seq: ChangeCursor, limit: int = 100) -> List[RouteChangeDTO]:
+        """
+        Obtiene los cambios de rutas posteriores a una secuencia.
+        Permite a los sistemas externos (apps de conductores, facturación)
+        sincronizarse sin releer todas las rutas.
+        
+        Args:
+            seq: Última secuencia procesada por el consumidor
+            limit: Número máximo de cambios a retornar
+            
+        Returns:
+            Lista de DTOs de cambios ordenados por secuencia
+        """
+        changes = self._repository.changes_since(seq, limit)
+        return [
+            RouteChangeDTO(
+                seq=change.seq,
+                route_id=change.route_id,
+                operation=change.operation,
+                changed_at=change.changed_at
+            )
+            for change in changes
+        ]
+    
     def deactivate_route(self, route_id: str) -> RouteDTO:
         """
         Desactivar una ruta (soft delete).
@@ -304,12 +818,7 @@ class RouteService:
         Returns:
             DTO de la ruta desactivada
         """
-        route = self._repository.find_by_id(route_id)
-        if route is None:
-            raise ValueError(f"Ruta {route_id} no encontrada")
-        
-        route.deactivate()
-        self._repository.update(route)
+        route = self._apply_route_change(route_id, lambda r: r.deactivate(), retries=0)
         
         return self._route_to_dto(route)
     
@@ -322,22 +831,822 @@ class RouteService:
             
         Returns:
             DTO de la ruta activada
+            
+        Raises:
+            DuplicateClientAssignmentError: Si se aplica la unicidad diaria y
+                algún cliente ya está en otra ruta activa del mismo día
+        """
+        def activate(route: Route) -> None:
+            route.activate()
+            self._ensure_unique_daily_clients(route, route.client_ids)
+        
+        route = self._apply_route_change(route_id, activate, retries=0)
+        
+        return self._route_to_dto(route)
+    
+    def archive_inactive_routes(self, older_than_days: int = 30) -> int:
+        """
+        Archiva las rutas inactivas que no cambian desde hace un tiempo,
+        para que las consultas de rutas activas no recorran las que quedan
+        de divisiones y fusiones. Siguen visibles entre las inactivas y
+        reactivarlas las restaura.
+        
+        Args:
+            older_than_days: Días sin modificaciones para archivar una ruta
+            
+        Returns:
+            Número de rutas archivadas
+            
+        Raises:
+            ValueError: Si older_than_days es negativo
+        """
+        if older_than_days < 0:
+            raise ValueError("Los días de antigüedad no pueden ser negativos")
+        
+        try:
+            self._repository.begin_transaction()
+            archived = self._repository.archive_inactive_routes(older_than_days)
+            self._repository.commit_transaction()
+        except Exception:
+            self._repository.rollback_transaction()
+            raise
+        
+        return archived
+    
+    def register_client(self, dto: RegisterClientDTO) -> ClientDTO:
+        """
+        Registra un cliente nuevo o actualiza su perfil y coordenadas.
+        El índice espacial de su CEDIS se actualiza sin reconstruirse.
+        
+        Args:
+            dto: Datos del cliente
+            
+        Returns:
+            DTO del cliente registrado
+            
+        Raises:
+            ValueError: Si los datos son inválidos o no hay repositorio de clientes
+        """
+        clients = self._require_client_repository()
+        
+        client = Client(
+            id=dto.id,
+            name=dto.name,
+            address=dto.address,
+            phone=dto.phone,
+            email=dto.email,
+            cedis_id=dto.cedis_id,
+            latitude=dto.latitude,
+            longitude=dto.longitude,
+            demand=dto.demand,
+            service_minutes=dto.service_minutes,
+            window_start=dto.window_start,
+            window_end=dto.window_end,
+            visit_frequency=dto.visit_frequency,
+            allowed_days=tuple(day.upper() for day in dto.allowed_days)
+        )
+        
+        previous = clients.find_by_id(client.id)
+        try:
+            clients.save(client)
+            clients.commit_transaction()
+        except Exception as e:
+            # Revertir en caso de error
+            clients.rollback_transaction()
+            raise e
+        
+        # Las programaciones y costos en caché pueden depender del perfil anterior
+        self._schedules.clear()
+        self._costs.clear()
+        
+        # Mantener al día los índices ya construidos
+        if previous is not None and previous.cedis_id in self._spatial_indexes:
+            self._spatial_indexes[previous.cedis_id].remove(previous.id)
+        if (client.latitude is not None and client.longitude is not None
+                and client.cedis_id in self._spatial_indexes):
+            self._spatial_indexes[client.cedis_id].add(client.id, client.latitude, client.longitude)
+        
+        return self._client_to_dto(client)
+    
+    def get_client(self, client_id: str) -> Optional[ClientDTO]:
+        """
+        Obtener un cliente por su ID.
+        
+        Args:
+            client_id: ID del cliente
+            
+        Returns:
+            DTO del cliente o None si no existe
+        """
+        client = self._require_client_repository().find_by_id(client_id)
+        return self._client_to_dto(client) if client else None
+    
+    def suggest_routes_for_client(
+        self,
+        client_id: str,
+        day_of_week: str,
+        k: int = 3,
+        neighbors: int = 20
+    ) -> List[RouteSuggestionDTO]:
+        """
+        Sugiere en qué rutas activas del CEDIS y día del cliente conviene
+        incluirlo. Solo se evalúan las rutas que visitan a sus vecinos más
+        cercanos (índice espacial), no todas las rutas del día; cada
+        candidata se ordena por los kilómetros que agrega la inserción más
+        barata.
+        
+        Args:
+            client_id: ID del cliente (debe tener CEDIS y coordenadas)
+            day_of_week: Día de la semana
+            k: Número de rutas a sugerir
+            neighbors: Vecinos a consultar inicialmente; se amplía si no
+                alcanzan para k rutas
+            
+        Returns:
+            Sugerencias ordenadas de menor a mayor costo
+            
+        Raises:
+            ValueError: Si el cliente no existe, no está geocodificado o no
+                hay repositorio de clientes
+        """
+        clients = self._require_client_repository()
+        
+        client = clients.find_by_id(client_id)
+        if client is None:
+            raise ValueError(f"Cliente {client_id} no encontrado")
+        if client.latitude is None or client.longitude is None or not client.cedis_id:
+            raise ValueError(f"El cliente {client_id} no tiene CEDIS o coordenadas")
+        
+        day_of_week = day_of_week.upper()
+        index = self._spatial_index(client.cedis_id, client.latitude)
+        
+        # Ampliar la vecindad hasta cubrir k rutas o agotar el índice
+        nearest_by_route: Dict[str, Tuple[str, float]] = {}
+        while True:
+            nearby = index.nearest(
+                client.latitude, client.longitude, neighbors,
+                accept=lambda other: other != client_id
+            )
+            routes_by_client = self._repository.find_client_routes(
+                client.cedis_id, day_of_week, [other for other, _ in nearby]
+            )
+            nearest_by_route = {}
+            for other, distance in nearby:
+                for route_id in routes_by_client.get(other, ()):
+                    nearest_by_route.setdefault(route_id, (other, distance))
+            
+            if len(nearest_by_route) >= k or len(nearby) < neighbors:
+                break
+            neighbors *= 2
+        
+        found = [self._repository.find_by_id(route_id) for route_id in nearest_by_route]
+        candidates = [route for route in found if route and client_id not in route.client_ids]
+        
+        stop_ids = {stop for route in candidates for stop in route.client_ids}
+        located = {
+            stop.id: (stop.latitude, stop.longitude)
+            for stop in clients.find_by_ids(stop_ids).values()
+            if stop.latitude is not None and stop.longitude is not None
+        }
+        
+        suggestions = []
+        for route in candidates:
+            # Solo las paradas con coordenadas; la posición se traduce a la ruta completa
+            positions = [i for i, stop in enumerate(route.client_ids) if stop in located]
+            located_position, added_km = cheapest_insertion(
+                [located[route.client_ids[i]] for i in positions],
+                (client.latitude, client.longitude)
+            )
+            position = (
+                positions[located_position] if located_position < len(positions)
+                else len(route.client_ids)
+            )
+            nearest_client_id, nearest_distance = nearest_by_route[route.id]
+            suggestions.append(RouteSuggestionDTO(
+                route_id=route.id,
+                route_name=route.name,
+                position=position,
+                added_km=added_km,
+                nearest_client_id=nearest_client_id,
+                nearest_distance_km=nearest_distance
+            ))
+        
+        suggestions.sort(key=lambda suggestion: suggestion.added_km)
+        return suggestions[:k]
+    
+    def get_route_schedule(self, route_id: str) -> RouteScheduleDTO:
+        """
+        Programación estimada de una ruta: llegada, atención y carga en cada
+        parada, y las restricciones que incumple.
+        
+        Args:
+            route_id: ID de la ruta
+            
+        Returns:
+            DTO con la programación
+            
+        Raises:
+            ValueError: Si la ruta no existe
         """
         route = self._repository.find_by_id(route_id)
         if route is None:
             raise ValueError(f"Ruta {route_id} no encontrada")
         
-        route.activate()
-        self._repository.update(route)
+        schedule = self._schedule(route)
+        return RouteScheduleDTO(
+            route_id=route.id,
+            stops=[
+                ScheduledStopDTO(
+                    client_id=stop.client_id,
+                    arrival=schedule.arrival[i],
+                    start=schedule.start[i],
+                    departure=schedule.departure[i],
+                    load_after=schedule.load[i + 1]
+                )
+                for i, stop in enumerate(schedule.stops)
+            ],
+            total_load=schedule.total_load,
+            end_time=schedule.end_time,
+            violations=schedule.violations()
+        )
+    
+    def simulate_route(
+        self,
+        route_id: str,
+        replications: int = 2000,
+        travel_cv: float = 0.25,
+        service_cv: float = 0.3,
+        travel_distribution: str = LOGNORMAL,
+        service_distribution: str = GAMMA,
+        seed: Optional[int] = None
+    ) -> RouteSimulationDTO:
+        """
+        Simula muchas veces la ejecución de una ruta variando los tiempos de
+        viaje y de atención alrededor de su programación estimada.
         
-        return self._route_to_dto(route)
+        Args:
+            route_id: ID de la ruta
+            replications: Número de replicaciones
+            travel_cv: Coeficiente de variación de los tiempos de viaje
+            service_cv: Coeficiente de variación de los tiempos de atención
+            travel_distribution: Distribución de los tiempos de viaje
+            service_distribution: Distribución de los tiempos de atención
+            seed: Semilla para reproducir la simulación
+            
+        Returns:
+            DTO con los percentiles de llegada por parada, del fin de la ruta
+            y la probabilidad de exceder el turno
+            
+        Raises:
+            ValueError: Si la ruta no existe o la configuración es inválida
+            ImportError: Si numpy no está instalado
+        """
+        route = self._repository.find_by_id(route_id)
+        if route is None:
+            raise ValueError(f"Ruta {route_id} no encontrada")
+        
+        schedule = self._schedule(route)
+        simulation = simulate_schedule(
+            schedule,
+            travel=TimeDistribution(travel_distribution, travel_cv),
+            service=TimeDistribution(service_distribution, service_cv),
+            replications=replications,
+            seed=seed
+        )
+        return RouteSimulationDTO(
+            route_id=route.id,
+            replications=simulation.replications,
+            stops=[
+                SimulatedStopDTO(
+                    client_id=stop.client_id,
+                    planned_arrival=schedule.arrival[i],
+                    arrival_p10=stop.arrival[0],
+                    arrival_p50=stop.arrival[1],
+                    arrival_p90=stop.arrival[2],
+                    late_probability=stop.late_probability
+                )
+                for i, stop in enumerate(simulation.stops)
+            ],
+            planned_end=schedule.end_time,
+            end_p10=simulation.end_time[0],
+            end_p50=simulation.end_time[1],
+            end_p90=simulation.end_time[2],
+            mean_end=simulation.mean_end_time,
+            shift_end=None if route.shift_minutes is None else schedule.shift_end,
+            overrun_probability=simulation.overrun_probability
+        )
+    
+    def plan_week(
+        self,
+        cedis_id: str,
+        apply: bool = False,
+        change_penalty: float = 0.5
+    ) -> WeeklyPlanDTO:
+        """
+        Planificación semanal de un CEDIS: reparte las visitas de sus
+        clientes registrados (según frecuencia y días permitidos) entre los
+        días y las rutas activas para nivelar las paradas. Los clientes de
+        las rutas que no están registrados en el CEDIS se dejan donde están.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            apply: Si es True, reescribe las rutas en una sola transacción;
+                si es False, solo retorna la propuesta
+            change_penalty: Penalización por mover un cliente a un día en
+                que hoy no se le visita (en paradas por ruta)
+            
+        Returns:
+            DTO con la carga por día y la ruta de cada visita
+            
+        Raises:
+            ValueError: Si no hay repositorio de clientes
+            ConcurrentModificationError: Si alguna ruta cambió mientras se aplicaba
+        """
+        clients = {client.id: client for client in self._require_client_repository().get_by_cedis(cedis_id)}
+        routes = [
+            route
+            for day in WEEK_DAYS
+            for route in self._repository.get_by_cedis_and_day(cedis_id, day)
+        ]
+        
+        current: Dict[str, List[Tuple[str, str]]] = {}
+        for route in routes:
+            for client_id in route.client_ids:
+                current.setdefault(client_id, []).append((route.day_of_week, route.id))
+        
+        planned_routes = [
+            PlannedRoute(
+                route_id=route.id,
+                day_of_week=route.day_of_week,
+                capacity=route.capacity,
+                fixed_stops=sum(1 for client_id in route.client_ids if client_id not in clients)
+            )
+            for route in routes
+        ]
+        plan = WeeklyPlanner(planned_routes, change_penalty).plan([
+            VisitRequest(
+                client_id=client.id,
+                frequency=client.visit_frequency,
+                allowed_days=client.allowed_days,
+                demand=client.demand,
+                current_routes=tuple(current.get(client.id, ()))
+            )
+            for client in clients.values()
+        ])
+        
+        if apply:
+            self._apply_weekly_plan(routes, set(clients), plan.assignments)
+        
+        stops_after = plan.day_stops(planned_routes)
+        names = {route.id: route.name for route in routes}
+        days_with_routes = [day for day in WEEK_DAYS if any(r.day_of_week == day for r in routes)]
+        return WeeklyPlanDTO(
+            cedis_id=cedis_id,
+            days=[
+                DayLoadDTO(
+                    day_of_week=day,
+                    routes=sum(1 for route in routes if route.day_of_week == day),
+                    stops_before=sum(len(r.client_ids) for r in routes if r.day_of_week == day),
+                    stops_after=stops_after.get(day, 0)
+                )
+                for day in days_with_routes
+            ],
+            visits=[
+                PlannedVisitDTO(
+                    client_id=client_id,
+                    day_of_week=day,
+                    route_id=route_id,
+                    route_name=names[route_id],
+                    is_change=(day, route_id) not in current.get(client_id, ())
+                )
+                for client_id, by_day in sorted(plan.assignments.items())
+                for day, route_id in sorted(by_day.items(), key=lambda item: WEEK_DAYS.index(item[0]))
+            ],
+            unplanned=[f"{client_id}: {reason}" for client_id, reason in sorted(plan.unplanned.items())],
+            warnings=plan.warnings,
+            applied=apply
+        )
     
-    def _route_to_dto(self, route: Route) -> RouteDTO:
+    def find_conflicts(self, cedis_id: str, day_of_week: str) -> List[ClientConflictDTO]:
+        """
+        Auditoría: clientes asignados a más de una ruta activa de un CEDIS
+        el mismo día.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            day_of_week: Día de la semana
+            
+        Returns:
+            Lista de DTOs de conflicto ordenados por cliente
+        """
+        conflicts = self._repository.find_conflicts(cedis_id, day_of_week.upper())
+        return [
+            ClientConflictDTO(
+                cedis_id=conflict.cedis_id,
+                day_of_week=conflict.day_of_week,
+                client_id=conflict.client_id,
+                route_ids=list(conflict.route_ids)
+            )
+            for conflict in conflicts
+        ]
+    
+    def _stop_profiles(self, client_ids: List[str]) -> List[StopProfile]:
+        """
+        Perfiles de parada de los clientes; sin repositorio de clientes, o
+        para clientes no registrados, el perfil no tiene restricciones.
+        
+        Args:
+            client_ids: IDs de los clientes en orden
+            
+        Returns:
+            Perfiles en el mismo orden
+        """
+        if self._client_repository is None:
+            return [StopProfile(client_id) for client_id in client_ids]
+        
+        clients = self._client_repository.find_by_ids(client_ids)
+        return [
+            StopProfile.from_client(clients[client_id]) if client_id in clients
+            else StopProfile(client_id)
+            for client_id in client_ids
+        ]
+    
+    def _apply_weekly_plan(
+        self,
+        routes: List[Route],
+        planned_clients: Iterable[str],
+        assignments: Dict[str, Dict[str, str]]
+    ) -> None:
+        """
+        Reescribe las rutas según un plan semanal en una sola transacción.
+        Los clientes que siguen en su ruta conservan su orden; los nuevos se
+        agregan al final. Cada ruta se escribe con compare-and-swap.
+        
+        Args:
+            routes: Rutas activas del CEDIS tal como se leyeron para el plan
+            planned_clients: Clientes que el plan puede mover
+            assignments: Ruta de cada cliente en cada día
+            
+        Raises:
+            ConcurrentModificationError: Si alguna ruta cambió desde la lectura
+        """
+        planned_clients = set(planned_clients)
+        clients_by_route: Dict[str, List[str]] = {route.id: [] for route in routes}
+        for client_id, by_day in assignments.items():
+            for route_id in by_day.values():
+                clients_by_route[route_id].append(client_id)
+        
+        try:
+            self._repository.begin_transaction()
+            
+            for route in routes:
+                assigned = clients_by_route[route.id]
+                assigned_set = set(assigned)
+                kept = [
+                    client_id for client_id in route.client_ids
+                    if client_id not in planned_clients or client_id in assigned_set
+                ]
+                kept_set = set(kept)
+                new_client_ids = kept + [client_id for client_id in assigned if client_id not in kept_set]
+                if new_client_ids == route.client_ids:
+                    continue
+                
+                route.client_ids = new_client_ids
+                self._measure(route)
+                self._repository.update(route)
+            
+            self._repository.commit_transaction()
+        except Exception as e:
+            # Revertir en caso de error
+            self._repository.rollback_transaction()
+            raise e
+    
+    def _stop_profile(self, client_id: str) -> StopProfile:
+        """Perfil de parada de un solo cliente."""
+        return self._stop_profiles([client_id])[0]
+    
+    def _route_schedule(self, route: Route) -> RouteSchedule:
+        """Construye la programación de una ruta (O(n))."""
+        return schedule_route(route, self._stop_profiles(route.client_ids), self._average_speed_kmh)
+    
+    def _schedule(self, route: Route) -> RouteSchedule:
+        """
+        Programación de una ruta tal como está almacenada, desde la caché si
+        su versión no cambió. Debe llamarse antes de modificar la entidad.
+        
+        Args:
+            route: Ruta recién leída del repositorio
+            
+        Returns:
+            Programación con los agregados por prefijo
+        """
+        return self._cached(self._schedules, route, self._route_schedule)
+    
+    def _cost(self, route: Route) -> Optional[RouteCost]:
+        """
+        Costo por tramos de una ruta tal como está almacenada, desde la caché
+        si su versión no cambió. Debe llamarse antes de modificar la entidad.
+        Sin repositorio de clientes no hay ubicaciones ni tiempos de atención,
+        así que las métricas no se calculan.
+        
+        Args:
+            route: Ruta recién leída del repositorio
+            
+        Returns:
+            Costo de la ruta, o None si no hay repositorio de clientes
+        """
+        if self._client_repository is None:
+            return None
+        return self._cached(
+            self._costs, route,
+            lambda r: RouteCost(self._stop_profiles(r.client_ids), self._average_speed_kmh)
+        )
+    
+    def _measure(self, route: Route) -> Optional[RouteCost]:
+        """
+        Recalcula en O(n) las métricas de una ruta y las asigna a la entidad.
+        
+        Args:
+            route: Ruta con sus clientes en el orden final
+            
+        Returns:
+            Costo calculado, o None si no hay repositorio de clientes
+        """
+        if self._client_repository is None:
+            return None
+        cost = RouteCost(self._stop_profiles(route.client_ids), self._average_speed_kmh)
+        route.metrics = cost.metrics
+        return cost
+    
+    def _advance_caches(
+        self,
+        route: Route,
+        move: Callable[[Union[RouteCost, RouteSchedule]], None]
+    ) -> None:
+        """
+        Tras confirmar un cambio, aplica el mismo movimiento al costo y a la
+        programación en caché de la versión anterior y los guarda con la
+        versión nueva. Lo que no corresponda a la versión anterior se
+        descarta y se recalculará cuando haga falta.
+        
+        Args:
+            route: Ruta actualizada (su versión ya fue incrementada)
+            move: Movimiento a aplicar (RouteCost y RouteSchedule tienen
+                los mismos insert, remove y relocate)
+        """
+        self._advance(self._costs, route, move)
+        self._advance(self._schedules, route, move)
+    
+    def _advance(
+        self,
+        cache: Dict[str, Tuple[int, CachedValue]],
+        route: Route,
+        move: Callable[[CachedValue], None]
+    ) -> None:
+        """Aplica el movimiento al valor de la versión anterior, si lo hay."""
+        cached = cache.pop(route.id, None)
+        if cached is not None and cached[0] == route.version - 1:
+            move(cached[1])
+            self._remember(cache, route, cached[1])
+    
+    def _cached(
+        self,
+        cache: Dict[str, Tuple[int, CachedValue]],
+        route: Route,
+        build: Callable[[Route], CachedValue]
+    ) -> CachedValue:
+        """Valor en caché para la versión de la ruta, construyéndolo si falta."""
+        cached = cache.get(route.id)
+        if cached is not None and cached[0] == route.version:
+            return cached[1]
+        
+        value = build(route)
+        self._remember(cache, route, value)
+        return value
+    
+    def _remember(self, cache: Dict[str, Tuple[int, CachedValue]], route: Route, value: CachedValue) -> None:
+        """Guarda un valor para la versión actual de la ruta."""
+        cache.pop(route.id, None)
+        if len(cache) >= self._ROUTE_CACHE_SIZE:
+            # Descartar la entrada más antigua
+            del cache[next(iter(cache))]
+        cache[route.id] = (route.version, value)
+    
+    def _evaluate_insertion(
+        self,
+        route: Route,
+        schedule: RouteSchedule,
+        cost: Optional[RouteCost],
+        stop: StopProfile,
+        position: int
+    ) -> Tuple[str, ...]:
+        """
+        Evalúa en O(1) una inserción ya aplicada a la entidad: verifica las
+        restricciones con la programación previa y actualiza las métricas.
+        
+        Args:
+            route: Ruta con el cliente ya insertado
+            schedule: Programación de la ruta antes de la inserción
+            cost: Costo de la ruta antes de la inserción (None si no se mide)
+            stop: Perfil del cliente insertado
+            position: Posición que ocupa
+            
+        Returns:
+            Advertencias para el DTO
+        """
+        if cost is not None:
+            route.metrics = cost.metrics_after(cost.insertion_delta(stop, position), stop.service_minutes)
+        return self._constraint_warnings(route.id, schedule.insertion_violations(stop, position))
+    
+    @staticmethod
+    def _relocation_positions(
+        client_ids: List[str],
+        client_id: str,
+        before: Optional[str],
+        after: Optional[str]
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Posiciones de origen y destino al mover una parada junto a una vecina.
+        
+        Args:
+            client_ids: Clientes de la ruta en orden
+            client_id: Cliente a mover
+            before: Cliente que quedará inmediatamente antes (None = inicio)
+            after: Cliente que quedará inmediatamente después (None = final)
+            
+        Returns:
+            Tupla (origen, destino), o None si el movimiento es inválido
+            (el repositorio lo rechazará)
+        """
+        if client_id not in client_ids or client_id in (before, after):
+            return None
+        source = client_ids.index(client_id)
+        if before is not None and before in client_ids:
+            anchor = client_ids.index(before)
+            return source, anchor + 1 if anchor < source else anchor
+        if before is None and after is not None and after in client_ids:
+            anchor = client_ids.index(after)
+            return source, anchor if anchor < source else anchor - 1
+        return None
+    
+    def _route_warnings(self, route: Route) -> Tuple[str, ...]:
+        """Verifica una ruta completa reprogramándola (O(n))."""
+        return self._constraint_warnings(route.id, self._route_schedule(route).violations())
+    
+    def _constraint_warnings(self, route_id: str, violations: List[str]) -> Tuple[str, ...]:
+        """
+        Aplica la política de restricciones a los incumplimientos encontrados.
+        
+        Args:
+            route_id: Ruta afectada
+            violations: Mensajes de incumplimiento
+            
+        Returns:
+            Advertencias para el DTO (vacías si no hay incumplimientos)
+            
+        Raises:
+            RouteConstraintViolationError: Si se aplican las restricciones
+                y hay incumplimientos
+        """
+        if violations and self._enforce_route_constraints:
+            raise RouteConstraintViolationError(route_id, violations)
+        return tuple(violations)
+    
+    def _require_client_repository(self) -> ClientRepositoryPort:
+        """
+        Retorna el repositorio de clientes.
+        
+        Raises:
+            ValueError: Si el servicio se creó sin repositorio de clientes
+        """
+        if self._client_repository is None:
+            raise ValueError("No hay un repositorio de clientes configurado")
+        return self._client_repository
+    
+    def _with_repository(self, repository: RouteRepositoryPort) -> 'RouteService':
+        """
+        Crea un servicio con la misma configuración sobre otro repositorio
+        de rutas (p. ej. el espacio de trabajo de un sandbox).
+        
+        Args:
+            repository: Repositorio de rutas del nuevo servicio
+            
+        Returns:
+            Servicio configurado
+        """
+        return RouteService(
+            repository=repository,
+            max_conflict_retries=self._max_conflict_retries,
+            enforce_unique_daily_clients=self._enforce_unique_daily_clients,
+            client_repository=self._client_repository,
+            enforce_route_constraints=self._enforce_route_constraints,
+            average_speed_kmh=self._average_speed_kmh
+        )
+    
+    def _spatial_index(self, cedis_id: str, reference_latitude: float) -> SpatialGridIndex:
+        """
+        Retorna el índice espacial de un CEDIS, construyéndolo con sus
+        clientes geocodificados la primera vez.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            reference_latitude: Latitud de referencia si hay que construirlo
+            
+        Returns:
+            Índice espacial del CEDIS
+        """
+        index = self._spatial_indexes.get(cedis_id)
+        if index is None:
+            index = SpatialGridIndex(reference_latitude)
+            for client in self._require_client_repository().get_by_cedis(cedis_id):
+                if client.latitude is not None and client.longitude is not None:
+                    index.add(client.id, client.latitude, client.longitude)
+            self._spatial_indexes[cedis_id] = index
+        return index
+    
+    def _ensure_unique_daily_clients(self, route: Route, client_ids: Iterable[str]) -> None:
+        """
+        Verifica que los clientes no estén en otra ruta activa del mismo CEDIS
+        y día. Se omite si la unicidad diaria no está activada o la ruta está
+        inactiva. Las rutas que se desactivan en la misma transacción deben
+        actualizarse antes de llamar a esta verificación.
+        
+        Args:
+            route: Ruta que recibirá a los clientes
+            client_ids: Clientes a verificar
+            
+        Raises:
+            DuplicateClientAssignmentError: Si algún cliente ya está asignado
+        """
+        if not self._enforce_unique_daily_clients or not route.is_active:
+            return
+        
+        routes_by_client = self._repository.find_client_routes(
+            route.cedis_id, route.day_of_week, client_ids
+        )
+        for client_id, route_ids in routes_by_client.items():
+            others = [other for other in route_ids if other != route.id]
+            if others:
+                raise DuplicateClientAssignmentError(
+                    client_id, route.cedis_id, route.day_of_week, others
+                )
+    
+    def _apply_route_change(
+        self,
+        route_id: str,
+        change: Callable[[Route], None],
+        retries: int
+    ) -> Route:
+        """
+        Lee una ruta, aplica un cambio de dominio y lo persiste con
+        compare-and-swap en una transacción corta (sin bloqueos entre lecturas).
+        Ante un conflicto de versión, relee la ruta y reaplica el cambio
+        hasta `retries` veces.
+        
+        Args:
+            route_id: ID de la ruta
+            change: Función que modifica la entidad de dominio. Se ejecuta
+                fuera de la transacción, así que no debe usar el repositorio
+            retries: Número de reintentos permitidos ante conflictos
+            
+        Returns:
+            La ruta actualizada
+            
+        Raises:
+            ValueError: Si la ruta no existe o el cambio es inválido
+            ConcurrentModificationError: Si persiste el conflicto
+        """
+        attempt = 0
+        while True:
+            route = self._repository.find_by_id(route_id)
+            if route is None:
+                raise ValueError(f"Ruta {route_id} no encontrada")
+            
+            change(route)
+            
+            try:
+                self._repository.update(route)
+                self._repository.commit_transaction()
+                return route
+            except ConcurrentModificationError:
+                self._repository.rollback_transaction()
+                if attempt >= retries:
+                    raise
+                attempt += 1
+                self._conflict_retries += 1
+            except Exception as e:
+                # Revertir en caso de error
+                self._repository.rollback_transaction()
+                raise e
+    
+    def _route_to_dto(self, route: Route, warnings: Tuple[str, ...] = ()) -> RouteDTO:
         """
         Convierte una entidad de dominio Route a un DTO.
+        Los clientes se exponen como vista de solo lectura, sin copiar la lista.
         
         Args:
             route: Entidad de dominio
+            warnings: Restricciones incumplidas por la operación
             
         Returns:
             DTO para la UI
@@ -347,7 +1656,63 @@ class RouteService:
             name=route.name,
             cedis_id=route.cedis_id,
             day_of_week=route.day_of_week,
-            client_ids=route.client_ids.copy(),
+            client_ids=ClientIdsView(route.client_ids),
             client_count=len(route.client_ids),
-            is_active=route.is_active
+            is_active=route.is_active,
+            version=route.version,
+            capacity=route.capacity,
+            shift_start=route.shift_start,
+            shift_minutes=route.shift_minutes,
+            distance_km=route.metrics.distance_km if route.metrics else None,
+            duration_minutes=route.metrics.duration_minutes if route.metrics else None,
+            warnings=warnings
+        )
+    
+    def _client_to_dto(self, client: Client) -> ClientDTO:
+        """
+        Convierte una entidad de dominio Client a un DTO.
+        
+        Args:
+            client: Entidad de dominio
+            
+        Returns:
+            DTO para la UI
+        """
+        return ClientDTO(
+            id=client.id,
+            name=client.name,
+            address=client.address,
+            cedis_id=client.cedis_id,
+            latitude=client.latitude,
+            longitude=client.longitude,
+            phone=client.phone,
+            email=client.email,
+            demand=client.demand,
+            service_minutes=client.service_minutes,
+            window_start=client.window_start,
+            window_end=client.window_end,
+            visit_frequency=client.visit_frequency,
+            allowed_days=client.allowed_days
+        )
+    
+    def _summary_to_dto(self, summary: RouteSummary) -> RouteSummaryDTO:
+        """
+        Convierte un resumen de dominio a un DTO de resumen.
+        
+        Args:
+            summary: Resumen de la ruta
+            
+        Returns:
+            DTO de resumen para la UI
+        """
+        return RouteSummaryDTO(
+            id=summary.id,
+            name=summary.name,
+            cedis_id=summary.cedis_id,
+            day_of_week=summary.day_of_week,
+            client_count=summary.client_count,
+            is_active=summary.is_active,
+            version=summary.version,
+            distance_km=summary.metrics.distance_km if summary.metrics else None,
+            duration_minutes=summary.metrics.duration_minutes if summary.metrics else None
         )
@@ -0,0 +1,51 @@
+"""
+Domain Exceptions
+Errores de negocio tipados que las capas superiores pueden distinguir.
+"""
+from typing import List
+
+
+class ConcurrentModificationError(ValueError):
+    """
+    La ruta fue modificada por otro usuario desde que fue leída.
+    Hereda de ValueError para que los manejadores existentes la muestren
+    como un error de validación.
+    """
+    
+    def __init__(self, route_id: str, expected_version: int) -> None:
+        self.route_id = route_id
+        self.expected_version = expected_version
+        super().__init__(
+            f"La ruta {route_id} fue modificada por otro usuario "
+            f"(versión esperada {expected_version}). Recargue e intente de nuevo"
+        )
+
+
+class DuplicateClientAssignmentError(ValueError):
+    """
+    El cliente ya está asignado a otra ruta activa del mismo CEDIS y día.
+    Solo se lanza cuando el servicio aplica la unicidad diaria de clientes.
+    """
+    
+    def __init__(self, client_id: str, cedis_id: str, day_of_week: str, route_ids: List[str]) -> None:
+        self.client_id = client_id
+        self.cedis_id = cedis_id
+        self.day_of_week = day_of_week
+        self.route_ids = route_ids
+        super().__init__(
+            f"El cliente {client_id} ya está asignado el {day_of_week} en {cedis_id} "
+            f"a la ruta {', '.join(route_ids)}"
+        )
+
+
+class RouteConstraintViolationError(ValueError):
+    """
+    La operación dejaría una ruta sin cumplir su capacidad, las ventanas de
+    entrega de sus clientes o su turno. Solo se lanza cuando el servicio
+    aplica las restricciones operativas; si no, se reportan como advertencias.
+    """
+    
+    def __init__(self, route_id: str, violations: List[str]) -> None:
+        self.route_id = route_id
+        self.violations = violations
+        super().__init__("; ".join(violations))
@@ -1,5 +1,12 @@
 # Domain models
 from src.domain.models.route import Route
 from src.domain.models.client import Client
+from src.domain.models.route_change import RouteChange
+from src.domain.models.route_lineage import RouteLineageEdge
+from src.domain.models.route_summary import RouteSummary
+from src.domain.models.route_statistics import RouteStatistics, RouteStatisticsFilter, RouteGroupStatistics
+from src.domain.models.client_conflict import ClientConflict
+from src.domain.models.route_metrics import RouteMetrics
 
-__all__ = ['Route', 'Client']
+__all__ = ['Route', 'Client', 'RouteChange', 'RouteLineageEdge', 'RouteSummary',
+           'RouteStatistics', 'RouteStatisticsFilter', 'RouteGroupStatistics', 'ClientConflict', 'RouteMetrics']
@@ -2,9 +2,11 @@
 Client Domain Model
 Representa un cliente en el dominio de negocio.
 """
-from typing import Optional
+from typing import Optional, Tuple
 from dataclasses import dataclass
 
+from src.domain.models.route import WEEK_DAYS
+
 
 @dataclass(frozen=True)
 class Client:
@@ -17,6 +19,24 @@ class Client:
     address: str
     phone: Optional[str] = None
     email: Optional[str] = None
+    cedis_id: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    # Perfil operativo: demanda por visita, minutos de atención y ventana
+    # de entrega en minutos desde medianoche (None = sin límite)
+    demand: float = 0.0
+    service_minutes: float = 0.0
+    window_start: Optional[int] = None
+    window_end: Optional[int] = None
+    # Planificación semanal: visitas por semana y días en que se le puede
+    # visitar (vacío = cualquier día)
+    visit_frequency: int = 1
+    allowed_days: Tuple[str, ...] = ()
+    
+    @property
+    def is_geocoded(self) -> bool:
+        """Indica si el cliente tiene coordenadas."""
+        return self.latitude is not None and self.longitude is not None
     
     def __post_init__(self) -> None:
         """Validaciones de negocio."""
@@ -26,3 +46,23 @@ class Client:
             raise ValueError("El nombre del cliente es obligatorio")
         if not self.address or not self.address.strip():
             raise ValueError("La dirección del cliente es obligatoria")
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("La latitud y la longitud deben indicarse juntas")
+        if self.latitude is not None and not -90 <= self.latitude <= 90:
+            raise ValueError("La latitud debe estar entre -90 y 90")
+        if self.longitude is not None and not -180 <= self.longitude <= 180:
+            raise ValueError("La longitud debe estar entre -180 y 180")
+        if self.demand < 0:
+            raise ValueError("La demanda no puede ser negativa")
+        if self.service_minutes < 0:
+            raise ValueError("El tiempo de atención no puede ser negativo")
+        if (self.window_start is not None and self.window_end is not None
+                and self.window_start > self.window_end):
+            raise ValueError("La ventana de entrega debe iniciar antes de terminar")
+        if not 1 <= self.visit_frequency <= len(WEEK_DAYS):
+            raise ValueError(f"La frecuencia de visita debe estar entre 1 y {len(WEEK_DAYS)} por semana")
+        invalid_days = [day for day in self.allowed_days if day not in WEEK_DAYS]
+        if invalid_days:
+            raise ValueError(f"Días permitidos inválidos: {', '.join(invalid_days)}")
+        if self.allowed_days and len(set(self.allowed_days)) < self.visit_frequency:
+            raise ValueError("Los días permitidos no alcanzan para la frecuencia de visita")
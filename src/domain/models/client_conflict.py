@@ -0,0 +1,18 @@
+"""
+Client Conflict Domain Model
+Un cliente asignado a más de una ruta activa del mismo CEDIS el mismo día.
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class ClientConflict:
+    """
+    Conflicto de asignación diaria de un cliente.
+    route_ids contiene todas las rutas activas que lo visitan ese día.
+    """
+    cedis_id: str
+    day_of_week: str
+    client_id: str
+    route_ids: Tuple[str, ...]
@@ -3,16 +3,22 @@ Route Domain Model
 Contiene la lógica de negocio pura para la gestión de rutas.
 Este modelo NO depende de ninguna tecnología de persistencia.
 """
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from dataclasses import dataclass, field
 from copy import deepcopy
 
+from src.domain.models.route_metrics import RouteMetrics
 
-@dataclass
+# Días de la semana en orden
+WEEK_DAYS = ('LUNES', 'MARTES', 'MIÉRCOLES', 'JUEVES', 'VIERNES', 'SÁBADO', 'DOMINGO')
+
+
+@dataclass(slots=True)
 class Route:
     """
     Entidad Route del dominio.
     Contiene la lógica de negocio para operaciones de rutas.
+    Usa __slots__ para no reservar un __dict__ por instancia en listados grandes.
     """
     id: str
     name: str
@@ -20,19 +26,32 @@ class Route:
     day_of_week: str
     client_ids: List[str] = field(default_factory=list)
     is_active: bool = True
+    version: int = 1
+    # Restricciones operativas opcionales: capacidad del vehículo (en las
+    # mismas unidades que la demanda de los clientes), hora de salida y
+    # duración del turno en minutos desde medianoche
+    capacity: Optional[float] = None
+    shift_start: int = 480
+    shift_minutes: Optional[int] = None
+    # Distancia y duración calculadas por la aplicación; None si se desconocen
+    metrics: Optional[RouteMetrics] = None
     
     def __post_init__(self) -> None:
         """Validaciones de negocio."""
-        valid_days = ['LUNES', 'MARTES', 'MIÉRCOLES', 'JUEVES', 'VIERNES', 'SÁBADO', 'DOMINGO']
-        
         if not self.id or not self.id.strip():
             raise ValueError("El ID de la ruta es obligatorio")
         if not self.name or not self.name.strip():
             raise ValueError("El nombre de la ruta es obligatorio")
         if not self.cedis_id or not self.cedis_id.strip():
             raise ValueError("El CEDIS es obligatorio")
-        if self.day_of_week.upper() not in valid_days:
-            raise ValueError(f"Día de la semana inválido. Debe ser uno de: {', '.join(valid_days)}")
+        if self.day_of_week.upper() not in WEEK_DAYS:
+            raise ValueError(f"Día de la semana inválido. Debe ser uno de: {', '.join(WEEK_DAYS)}")
+        if self.capacity is not None and self.capacity <= 0:
+            raise ValueError("La capacidad debe ser positiva")
+        if not 0 <= self.shift_start < 24 * 60:
+            raise ValueError("La hora de salida debe estar entre 00:00 y 23:59")
+        if self.shift_minutes is not None and self.shift_minutes <= 0:
+            raise ValueError("La duración del turno debe ser positiva")
     
     def add_client(self, client_id: str) -> None:
         """
@@ -52,20 +71,50 @@ class Route:
         
         self.client_ids.append(client_id)
     
-    def remove_client(self, client_id: str) -> None:
+    def insert_client(self, client_id: str, position: int) -> None:
+        """
+        Inserta un cliente en una posición de la ruta.
+        
+        Args:
+            client_id: ID del cliente a insertar
+            position: Índice (0-based) que ocupará el cliente; len(client_ids)
+                equivale a agregarlo al final
+            
+        Raises:
+            ValueError: Si el cliente ya existe o la posición es inválida
+        """
+        if not client_id or not client_id.strip():
+            raise ValueError("El ID del cliente es obligatorio")
+        
+        if client_id in self.client_ids:
+            raise ValueError(f"El cliente {client_id} ya está en la ruta")
+        
+        if position < 0 or position > len(self.client_ids):
+            raise ValueError(
+                f"Posición inválida. Debe estar entre 0 y {len(self.client_ids)}"
+            )
+        
+        self.client_ids.insert(position, client_id)
+    
+    def remove_client(self, client_id: str) -> int:
         """
         Elimina un cliente de la ruta.
         
         Args:
             client_id: ID del cliente a eliminar
             
+        Returns:
+            Posición (0-based) que ocupaba el cliente
+            
         Raises:
             ValueError: Si el cliente no existe en la ruta
         """
         if client_id not in self.client_ids:
             raise ValueError(f"El cliente {client_id} no está en la ruta")
         
-        self.client_ids.remove(client_id)
+        position = self.client_ids.index(client_id)
+        del self.client_ids[position]
+        return position
     
     def reorder_clients(self, ordered_client_ids: List[str]) -> None:
         """
@@ -77,7 +126,8 @@ class Route:
         Raises:
             ValueError: Si la lista no contiene los mismos clientes
         """
-        if set(ordered_client_ids) != set(self.client_ids):
+        if (len(ordered_client_ids) != len(self.client_ids)
+                or set(ordered_client_ids) != set(self.client_ids)):
             raise ValueError("La lista de clientes debe contener exactamente los mismos clientes")
         
         self.client_ids = ordered_client_ids.copy()
@@ -115,7 +165,10 @@ class Route:
             cedis_id=self.cedis_id,
             day_of_week=self.day_of_week,
             client_ids=clients_part_a.copy(),
-            is_active=True
+            is_active=True,
+            capacity=self.capacity,
+            shift_start=self.shift_start,
+            shift_minutes=self.shift_minutes
         )
         
         # Crear nueva ruta B (segunda parte)
@@ -125,7 +178,10 @@ class Route:
             cedis_id=self.cedis_id,
             day_of_week=self.day_of_week,
             client_ids=clients_part_b.copy(),
-            is_active=True
+            is_active=True,
+            capacity=self.capacity,
+            shift_start=self.shift_start,
+            shift_minutes=self.shift_minutes
         )
         
         return route_a, route_b
@@ -160,14 +216,17 @@ class Route:
             if client_id not in merged_client_ids:
                 merged_client_ids.append(client_id)
         
-        # Crear nueva ruta fusionada
+        # Crear nueva ruta fusionada (conserva las restricciones de esta ruta)
         merged_route = Route(
             id=f"{self.id}_MERGED",
             name=f"{self.name}_MERGED",
             cedis_id=self.cedis_id,
             day_of_week=self.day_of_week,
             client_ids=merged_client_ids,
-            is_active=True
+            is_active=True,
+            capacity=self.capacity,
+            shift_start=self.shift_start,
+            shift_minutes=self.shift_minutes
         )
         
         return merged_route
@@ -0,0 +1,48 @@
+"""
+Route Change Domain Model
+Representa una entrada del registro de cambios (change feed) de rutas.
+Permite a los sistemas externos sincronizarse solo con los deltas.
+"""
+from dataclasses import dataclass
+
+# Posición en el registro de cambios. Es opaca para el consumidor: se
+# guarda tal cual y se devuelve a changes_since ("" para empezar). Los
+# repositorios de un solo registro usan su secuencia en hexadecimal de
+# ancho fijo; el particionado, la de cada shard separadas por puntos.
+ChangeCursor = str
+
+_CURSOR_DIGITS = 16
+
+
+def sequence_cursor(seq: int) -> ChangeCursor:
+    """Cursor de una secuencia entera, ordenable también como cadena."""
+    return f"{seq:0{_CURSOR_DIGITS}x}"
+
+
+def cursor_sequence(cursor: ChangeCursor) -> int:
+    """
+    Secuencia entera de un cursor (0 para el cursor vacío).
+    
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        return int(cursor, 16) if cursor else 0
+    except ValueError:
+        raise ValueError(f"Cursor de cambios inválido: {cursor!r}") from None
+
+
+@dataclass(frozen=True)
+class RouteChange:
+    """
+    Cambio registrado sobre una ruta.
+    Inmutable: el registro de cambios solo admite inserciones.
+    """
+    seq: ChangeCursor
+    route_id: str
+    operation: str
+    changed_at: str
+    
+    INSERT = "INSERT"
+    UPDATE = "UPDATE"
+    DELETE = "DELETE"
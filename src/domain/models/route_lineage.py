@@ -0,0 +1,21 @@
+"""
+Route Lineage Domain Model
+Representa el vínculo entre una ruta original y las rutas que resultaron
+de dividirla o fusionarla.
+"""
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RouteLineageEdge:
+    """
+    Arista del grafo de linaje: parent_id dio origen a child_id.
+    depth indica la distancia (en generaciones) a la ruta consultada.
+    """
+    parent_id: str
+    child_id: str
+    operation: str
+    depth: int = 1
+    
+    DIVIDE = "DIVIDE"
+    MERGE = "MERGE"
@@ -0,0 +1,16 @@
+"""
+Route Metrics Domain Model
+Costo de recorrer una ruta: distancia y duración estimadas.
+"""
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class RouteMetrics:
+    """
+    Métricas de una ruta, guardadas junto a ella para que los listados no
+    tengan que recalcularlas. La duración suma el viaje y la atención en
+    cada parada, sin esperas por ventanas de entrega.
+    """
+    distance_km: float
+    duration_minutes: float
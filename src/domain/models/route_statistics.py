@@ -0,0 +1,60 @@
+"""
+Route Statistics Domain Model
+Indicadores agregados de rutas para tableros de gestión.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+from src.domain.models.route_summary import RouteSummary
+
+
+@dataclass(frozen=True, slots=True)
+class RouteStatisticsFilter:
+    """
+    Filtros para consultar estadísticas.
+    Un valor None significa "todos".
+    """
+    cedis_id: Optional[str] = None
+    day_of_week: Optional[str] = None
+    top_n: int = 5
+    
+    def __post_init__(self) -> None:
+        """Validaciones de negocio."""
+        if self.top_n < 0:
+            raise ValueError("El número de rutas más grandes no puede ser negativo")
+
+
+@dataclass(frozen=True, slots=True)
+class RouteGroupStatistics:
+    """Totales de rutas activas para un CEDIS en un día."""
+    cedis_id: str
+    day_of_week: str
+    active_routes: int
+    total_stops: int
+    
+    @property
+    def average_stops_per_route(self) -> float:
+        """Promedio de paradas por ruta activa del grupo."""
+        return self.total_stops / self.active_routes if self.active_routes else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class RouteStatistics:
+    """Resultado de una consulta de estadísticas."""
+    groups: List[RouteGroupStatistics] = field(default_factory=list)
+    largest_routes: List[RouteSummary] = field(default_factory=list)
+    
+    @property
+    def total_active_routes(self) -> int:
+        """Total de rutas activas en los grupos consultados."""
+        return sum(group.active_routes for group in self.groups)
+    
+    @property
+    def total_stops(self) -> int:
+        """Total de paradas en los grupos consultados."""
+        return sum(group.total_stops for group in self.groups)
+    
+    @property
+    def average_stops_per_route(self) -> float:
+        """Promedio global de paradas por ruta activa."""
+        routes = self.total_active_routes
+        return self.total_stops / routes if routes else 0.0
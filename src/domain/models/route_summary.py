@@ -0,0 +1,24 @@
+"""
+Route Summary Domain Model
+Vista ligera de una ruta para listados: no incluye la lista de paradas.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from src.domain.models.route_metrics import RouteMetrics
+
+
+@dataclass(frozen=True, slots=True)
+class RouteSummary:
+    """
+    Resumen inmutable de una ruta.
+    Los repositorios pueden construirlo sin decodificar las paradas.
+    """
+    id: str
+    name: str
+    cedis_id: str
+    day_of_week: str
+    client_count: int
+    is_active: bool
+    version: int
+    metrics: Optional[RouteMetrics] = None
@@ -1,4 +1,6 @@
 # Domain ports - Output interfaces
 from src.domain.ports.route_repository_port import RouteRepositoryPort
+from src.domain.ports.client_repository_port import ClientRepositoryPort
+from src.domain.ports.route_workspace_port import RouteWorkspacePort
 
-__all__ = ['RouteRepositoryPort']
+__all__ = ['RouteRepositoryPort', 'ClientRepositoryPort', 'RouteWorkspacePort']
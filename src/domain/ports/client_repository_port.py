@@ -0,0 +1,73 @@
+"""
+Client Repository Port (Output Port)
+Define el contrato que debe cumplir cualquier repositorio de clientes.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+from src.domain.models.client import Client
+
+
+class ClientRepositoryPort(ABC):
+    """
+    Puerto de salida para la persistencia de clientes.
+    Guarda el perfil del cliente, incluido su CEDIS y sus coordenadas.
+    """
+    
+    @abstractmethod
+    def save(self, client: Client) -> None:
+        """
+        Guarda un cliente nuevo o reemplaza uno existente.
+        
+        Args:
+            client: El cliente a guardar
+        """
+        pass
+    
+    @abstractmethod
+    def find_by_id(self, client_id: str) -> Optional[Client]:
+        """
+        Busca un cliente por su ID.
+        
+        Args:
+            client_id: ID del cliente
+            
+        Returns:
+            El cliente si existe, None en caso contrario
+        """
+        pass
+    
+    @abstractmethod
+    def find_by_ids(self, client_ids: Iterable[str]) -> Dict[str, Client]:
+        """
+        Busca varios clientes en una sola consulta.
+        
+        Args:
+            client_ids: IDs de los clientes
+            
+        Returns:
+            Clientes encontrados por ID; los inexistentes no aparecen
+        """
+        pass
+    
+    @abstractmethod
+    def get_by_cedis(self, cedis_id: str) -> List[Client]:
+        """
+        Obtiene todos los clientes de un CEDIS.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            
+        Returns:
+            Lista de clientes del CEDIS
+        """
+        pass
+    
+    @abstractmethod
+    def commit_transaction(self) -> None:
+        """Confirma los cambios pendientes."""
+        pass
+    
+    @abstractmethod
+    def rollback_transaction(self) -> None:
+        """Revierte los cambios pendientes."""
+        pass
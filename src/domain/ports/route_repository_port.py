@@ -4,8 +4,14 @@ Define el contrato que debe cumplir cualquier repositorio de rutas.
 Esta es una abstracción que permite la inversión de dependencias (DIP).
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 from src.domain.models.route import Route
+from src.domain.models.route_metrics import RouteMetrics
+from src.domain.models.route_change import ChangeCursor, RouteChange
+from src.domain.models.route_lineage import RouteLineageEdge
+from src.domain.models.route_summary import RouteSummary
+from src.domain.models.route_statistics import RouteStatistics, RouteStatisticsFilter
+from src.domain.models.client_conflict import ClientConflict
 
 
 class RouteRepositoryPort(ABC):
@@ -28,19 +34,73 @@ class RouteRepositoryPort(ABC):
         """
         pass
     
+    def save_many(self, routes: Iterable[Route]) -> int:
+        """
+        Guarda varias rutas nuevas dentro de la transacción en curso.
+        Las implementaciones pueden escribirlas por lotes; por defecto se
+        guardan una por una.
+        
+        Args:
+            routes: Rutas a guardar
+            
+        Returns:
+            Número de rutas guardadas
+        """
+        count = 0
+        for route in routes:
+            self.save(route)
+            count += 1
+        return count
+    
     @abstractmethod
-    def update(self, route: Route) -> None:
+    def update(self, route: Route, expected_version: Optional[int] = None) -> None:
         """
         Actualiza una ruta existente en el repositorio.
+        Debe aplicar control de concurrencia optimista: la escritura solo
+        procede si la versión almacenada coincide con la esperada, y en
+        ese caso guarda route.version + 1 (también en la entidad recibida).
         
         Args:
             route: La ruta a actualizar
+            expected_version: Versión almacenada esperada; None = route.version.
+                Permite guardar de una vez varias ediciones acumuladas
             
         Raises:
+            ConcurrentModificationError: Si la ruta cambió desde que se leyó
             Exception: Si la ruta no existe o hay error al actualizar
         """
         pass
     
+    @abstractmethod
+    def move_stop(
+        self,
+        route_id: str,
+        client_id: str,
+        before: Optional[str],
+        after: Optional[str],
+        expected_version: Optional[int] = None,
+        metrics: Optional[RouteMetrics] = None
+    ) -> None:
+        """
+        Mueve una parada de la ruta para que quede entre dos paradas vecinas,
+        sin reescribir el resto de la ruta. Incrementa la versión de la ruta.
+        
+        Args:
+            route_id: ID de la ruta
+            client_id: Cliente a mover
+            before: Cliente que quedará inmediatamente antes (None = inicio)
+            after: Cliente que quedará inmediatamente después (None = final)
+            expected_version: Versión vista por el usuario; None para no verificarla
+            metrics: Métricas de la ruta con la parada movida; None para
+                conservar las guardadas
+            
+        Raises:
+            ValueError: Si la ruta o los clientes no existen, o before y
+                after no son vecinos
+            ConcurrentModificationError: Si la ruta cambió desde expected_version
+        """
+        pass
+    
     @abstractmethod
     def find_by_id(self, route_id: str) -> Optional[Route]:
         """
@@ -74,6 +134,35 @@ class RouteRepositoryPort(ABC):
         """
         pass
     
+    def iter_routes(self, batch_size: int = 500) -> Iterator[Route]:
+        """
+        Recorre todas las rutas (activas e inactivas). Las implementaciones
+        pueden leerlas por páginas para no cargarlas todas en memoria; por
+        defecto usa get_all_including_inactive.
+        
+        Args:
+            batch_size: Rutas leídas por página
+            
+        Returns:
+            Iterador de rutas
+        """
+        return iter(self.get_all_including_inactive())
+    
+    @abstractmethod
+    def get_summaries(self, include_inactive: bool = False) -> List[RouteSummary]:
+        """
+        Obtiene un resumen de las rutas sin cargar sus paradas.
+        Pensado para pantallas de listado.
+        
+        Args:
+            include_inactive: Si incluir rutas inactivas
+            
+        Returns:
+            Lista de resúmenes, con el mismo orden que get_all o
+            get_all_including_inactive
+        """
+        pass
+    
     @abstractmethod
     def delete(self, route_id: str) -> None:
         """
@@ -101,6 +190,147 @@ class RouteRepositoryPort(ABC):
         """
         pass
     
+    @abstractmethod
+    def find_client_routes(
+        self,
+        cedis_id: str,
+        day_of_week: str,
+        client_ids: Iterable[str]
+    ) -> Dict[str, List[str]]:
+        """
+        Obtiene las rutas activas de un CEDIS y día que visitan cada cliente.
+        Debe resolverse con búsquedas indexadas, no recorriendo las rutas.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            day_of_week: Día de la semana
+            client_ids: Clientes a consultar
+            
+        Returns:
+            IDs de ruta por cliente; los clientes sin rutas no aparecen
+        """
+        pass
+    
+    @abstractmethod
+    def find_conflicts(self, cedis_id: str, day_of_week: str) -> List[ClientConflict]:
+        """
+        Obtiene los clientes asignados a más de una ruta activa de un CEDIS
+        el mismo día, en una sola pasada indexada.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            day_of_week: Día de la semana
+            
+        Returns:
+            Conflictos ordenados por cliente
+        """
+        pass
+    
+    @abstractmethod
+    def search_routes(self, query: str, limit: int = 20) -> List[RouteSummary]:
+        """
+        Busca rutas activas por nombre, CEDIS o IDs de clientes.
+        Cada término se interpreta como prefijo, para búsqueda mientras se escribe.
+        
+        Args:
+            query: Texto ingresado por el usuario
+            limit: Número máximo de resultados
+            
+        Returns:
+            Resúmenes de las rutas más relevantes
+        """
+        pass
+    
+    @abstractmethod
+    def get_statistics(self, filters: RouteStatisticsFilter) -> RouteStatistics:
+        """
+        Obtiene indicadores de rutas activas por CEDIS y día, y las rutas
+        con más paradas. Las implementaciones deben mantener los agregados
+        de forma incremental para no recorrer todas las rutas.
+        
+        Args:
+            filters: CEDIS, día y cantidad de rutas más grandes a incluir
+            
+        Returns:
+            Estadísticas agregadas
+        """
+        pass
+    
+    @abstractmethod
+    def changes_since(self, seq: ChangeCursor, limit: int = 100) -> List[RouteChange]:
+        """
+        Obtiene los cambios registrados después de una secuencia dada.
+        Cada escritura (save, update, delete) agrega una entrada al registro
+        con una secuencia monótona creciente. La secuencia es un cursor
+        opaco de texto (ChangeCursor): el consumidor debe guardarlo tal cual
+        y solo compararlo con otros del mismo repositorio.
+        
+        Args:
+            seq: Última secuencia ya procesada por el consumidor ("" para empezar)
+            limit: Número máximo de cambios a retornar
+            
+        Returns:
+            Lista de cambios ordenados por secuencia ascendente
+            
+        Raises:
+            ValueError: Si el límite no es positivo o el cursor no es válido
+        """
+        pass
+    
+    @abstractmethod
+    def add_lineage(self, parent_ids: List[str], child_ids: List[str], operation: str) -> None:
+        """
+        Registra que las rutas padre dieron origen a las rutas hijas.
+        Debe llamarse dentro de la misma transacción que la división o fusión.
+        
+        Args:
+            parent_ids: IDs de las rutas originales
+            child_ids: IDs de las rutas resultantes
+            operation: Operación que originó el vínculo (DIVIDE o MERGE)
+        """
+        pass
+    
+    @abstractmethod
+    def get_ancestors(self, route_id: str) -> List[RouteLineageEdge]:
+        """
+        Obtiene todas las aristas de linaje que llevan hacia una ruta.
+        
+        Args:
+            route_id: ID de la ruta consultada
+            
+        Returns:
+            Aristas de ancestros ordenadas por profundidad
+        """
+        pass
+    
+    @abstractmethod
+    def get_descendants(self, route_id: str) -> List[RouteLineageEdge]:
+        """
+        Obtiene todas las aristas de linaje que parten de una ruta.
+        
+        Args:
+            route_id: ID de la ruta consultada
+            
+        Returns:
+            Aristas de descendientes ordenadas por profundidad
+        """
+        pass
+    
+    @abstractmethod
+    def archive_inactive_routes(self, older_than_days: int) -> int:
+        """
+        Archiva las rutas inactivas sin modificaciones en los últimos días.
+        Las rutas archivadas se siguen encontrando por ID y en los listados
+        que incluyen inactivas; actualizarlas las restaura.
+        
+        Args:
+            older_than_days: Días sin modificaciones para archivar una ruta
+            
+        Returns:
+            Número de rutas archivadas
+        """
+        pass
+    
     @abstractmethod
     def begin_transaction(self) -> None:
         """
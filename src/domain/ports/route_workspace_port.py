@@ -0,0 +1,26 @@
+"""
+Route Workspace Port (Output Port)
+Define el contrato de un espacio de trabajo de rutas: un repositorio que
+puede bifurcarse para probar alternativas sin tocar la base real.
+"""
+from abc import abstractmethod
+from src.domain.ports.route_repository_port import RouteRepositoryPort
+
+
+class RouteWorkspacePort(RouteRepositoryPort):
+    """
+    Repositorio de rutas de trabajo, sin persistencia propia.
+    """
+    
+    @abstractmethod
+    def fork(self) -> 'RouteWorkspacePort':
+        """
+        Crea un espacio de trabajo independiente con el estado confirmado
+        de este, su linaje y su registro de cambios. Las escrituras en uno
+        no se ven en el otro. Debe ser barato: las rutas no se copian hasta
+        que alguno de los dos las modifica.
+        
+        Returns:
+            Espacio de trabajo bifurcado
+        """
+        pass
@@ -0,0 +1,12 @@
+# Domain services - Business logic that spans several entities
+from src.domain.services.route_geometry import haversine_km, cheapest_insertion
+from src.domain.services.spatial_index import SpatialGridIndex
+from src.domain.services.route_schedule import RouteSchedule, StopProfile, schedule_route
+from src.domain.services.route_cost import RouteCost
+from src.domain.services.route_diff import RouteEdit, StopEdit, RoutePlanDiff, diff_route_plans
+from src.domain.services.route_simulation import TimeDistribution, RouteSimulation, simulate_schedule
+
+__all__ = ['haversine_km', 'cheapest_insertion', 'SpatialGridIndex',
+           'RouteSchedule', 'StopProfile', 'schedule_route', 'RouteCost',
+           'RouteEdit', 'StopEdit', 'RoutePlanDiff', 'diff_route_plans',
+           'TimeDistribution', 'RouteSimulation', 'simulate_schedule']
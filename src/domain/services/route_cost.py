@@ -0,0 +1,279 @@
+"""
+Route Cost Domain Service
+Distancia y duración de una ruta con evaluación incremental de movimientos.
+Guarda la distancia de cada tramo para que insertar, quitar o reubicar una
+parada, o invertir un segmento (2-opt), se evalúe sin recorrer la ruta.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+from src.domain.models.route_metrics import RouteMetrics
+from src.domain.services.route_geometry import Point, haversine_km
+from src.domain.services.route_schedule import StopProfile
+
+
+def _leg_km(origin: Optional[Point], destination: Optional[Point]) -> float:
+    """Distancia de un tramo; 0 si alguna parada no tiene ubicación."""
+    if origin is None or destination is None:
+        return 0.0
+    return haversine_km(origin, destination)
+
+
+class RouteCost:
+    """
+    Costo de una ruta abierta (sin regreso al CEDIS), igual que en la
+    programación: una parada sin ubicación no suma distancia.
+    
+    Los métodos *_delta calculan en O(1), con a lo sumo cuatro distancias
+    nuevas, cuántos kilómetros cambiaría la ruta con un movimiento. Los
+    métodos que aplican el movimiento recalculan solo esos tramos, pero
+    desplazan las listas internas igual que la lista de clientes de la
+    ruta (o invierten el segmento, en two_opt), así que cuestan O(n).
+    """
+    
+    def __init__(self, stops: Sequence[StopProfile], speed_kmh: float = 30.0) -> None:
+        """
+        Args:
+            stops: Perfiles de las paradas en orden
+            speed_kmh: Velocidad promedio para convertir distancias en minutos
+        """
+        if speed_kmh <= 0:
+            raise ValueError("La velocidad promedio debe ser positiva")
+        
+        self._speed_kmh = speed_kmh
+        self._points: List[Optional[Point]] = [stop.location for stop in stops]
+        self._service: List[float] = [stop.service_minutes for stop in stops]
+        # _legs[k] = distancia entre las paradas k y k + 1
+        self._legs: List[float] = [
+            _leg_km(origin, destination)
+            for origin, destination in zip(self._points, self._points[1:])
+        ]
+        self.distance_km = sum(self._legs)
+        self.service_minutes = sum(self._service)
+    
+    def __len__(self) -> int:
+        return len(self._points)
+    
+    @property
+    def metrics(self) -> RouteMetrics:
+        """Métricas actuales de la ruta."""
+        return self.metrics_after(0.0)
+    
+    def metrics_after(self, distance_delta: float, service_delta: float = 0.0) -> RouteMetrics:
+        """
+        Métricas que tendría la ruta tras un movimiento, sin aplicarlo.
+        
+        Args:
+            distance_delta: Kilómetros que agrega el movimiento (negativo si ahorra)
+            service_delta: Minutos de atención que agrega el movimiento
+        
+        Returns:
+            Métricas resultantes
+        """
+        return self._metrics(self.distance_km + distance_delta, self.service_minutes + service_delta)
+    
+    def service_minutes_at(self, position: int) -> float:
+        """Minutos de atención de la parada en una posición."""
+        return self._service[position]
+    
+    def insertion_delta(self, stop: StopProfile, position: int) -> float:
+        """
+        Kilómetros que agrega insertar una parada, en O(1).
+        
+        Args:
+            stop: Perfil de la parada
+            position: Índice (0-based) que ocuparía
+        
+        Returns:
+            Diferencia de distancia
+        """
+        n = len(self._points)
+        if position < 0 or position > n:
+            raise ValueError(f"Posición inválida. Debe estar entre 0 y {n}")
+        
+        previous = self._points[position - 1] if position > 0 else None
+        following = self._points[position] if position < n else None
+        replaced = self._legs[position - 1] if 0 < position < n else 0.0
+        return _leg_km(previous, stop.location) + _leg_km(stop.location, following) - replaced
+    
+    def removal_delta(self, position: int) -> float:
+        """
+        Kilómetros que agrega (normalmente negativos) quitar una parada, en O(1).
+        
+        Args:
+            position: Índice (0-based) de la parada
+        
+        Returns:
+            Diferencia de distancia
+        """
+        n = self._check_position(position)
+        
+        previous = self._points[position - 1] if position > 0 else None
+        following = self._points[position + 1] if position < n - 1 else None
+        removed = (
+            (self._legs[position - 1] if position > 0 else 0.0)
+            + (self._legs[position] if position < n - 1 else 0.0)
+        )
+        return _leg_km(previous, following) - removed
+    
+    def relocation_delta(self, source: int, target: int) -> float:
+        """
+        Kilómetros que agrega mover una parada a otra posición, en O(1).
+        
+        Args:
+            source: Índice actual de la parada
+            target: Índice que ocupará una vez movida
+        
+        Returns:
+            Diferencia de distancia
+        """
+        n = self._check_position(source)
+        self._check_position(target)
+        if source == target:
+            return 0.0
+        
+        # Vecinos en la ruta sin la parada movida
+        def remaining(k: int) -> Optional[Point]:
+            return self._points[k if k < source else k + 1]
+        
+        location = self._points[source]
+        previous = remaining(target - 1) if target > 0 else None
+        following = remaining(target) if target < n - 1 else None
+        return (
+            self.removal_delta(source)
+            + _leg_km(previous, location) + _leg_km(location, following)
+            - _leg_km(previous, following)
+        )
+    
+    def two_opt_delta(self, first: int, last: int) -> float:
+        """
+        Kilómetros que agrega invertir el segmento first..last (2-opt), en O(1).
+        Las distancias son simétricas, así que solo cambian los dos tramos
+        que unen el segmento con el resto de la ruta.
+        
+        Args:
+            first: Índice de la primera parada del segmento
+            last: Índice de la última parada del segmento (inclusive)
+        
+        Returns:
+            Diferencia de distancia
+        """
+        n = self._check_segment(first, last)
+        
+        delta = 0.0
+        if first > 0:
+            delta += _leg_km(self._points[first - 1], self._points[last]) - self._legs[first - 1]
+        if last < n - 1:
+            delta += _leg_km(self._points[first], self._points[last + 1]) - self._legs[last]
+        return delta
+    
+    def insert(self, stop: StopProfile, position: int) -> None:
+        """Aplica una inserción (ver insertion_delta); desplaza las listas en O(n)."""
+        n = len(self._points)
+        if position < 0 or position > n:
+            raise ValueError(f"Posición inválida. Debe estar entre 0 y {n}")
+        self._insert(stop.location, stop.service_minutes, position)
+    
+    def remove(self, position: int) -> None:
+        """Aplica una eliminación (ver removal_delta); desplaza las listas en O(n)."""
+        self._check_position(position)
+        self._remove(position)
+    
+    def relocate(self, source: int, target: int) -> None:
+        """Aplica una reubicación (ver relocation_delta); desplaza las listas en O(n)."""
+        self._check_position(source)
+        self._check_position(target)
+        location, service = self._points[source], self._service[source]
+        self._remove(source)
+        self._insert(location, service, target)
+    
+    def two_opt(self, first: int, last: int) -> None:
+        """Aplica una inversión de segmento (ver two_opt_delta)."""
+        n = self._check_segment(first, last)
+        
+        self._points[first:last + 1] = self._points[first:last + 1][::-1]
+        self._service[first:last + 1] = self._service[first:last + 1][::-1]
+        self._legs[first:last] = self._legs[first:last][::-1]
+        if first > 0:
+            self._relink(first - 1, 1, first)
+        if last < n - 1:
+            self._relink(last, 1, last + 1)
+    
+    def split(self, split_index: int) -> Tuple[RouteMetrics, RouteMetrics]:
+        """
+        Métricas de las dos partes al dividir la ruta, sin recalcular distancias.
+        
+        Args:
+            split_index: Primera parada de la segunda parte
+        
+        Returns:
+            Tupla (métricas de la primera parte, métricas de la segunda)
+        """
+        head_km = sum(self._legs[:split_index - 1])
+        tail_km = sum(self._legs[split_index:])
+        head_service = sum(self._service[:split_index])
+        return (
+            self._metrics(head_km, head_service),
+            self._metrics(tail_km, self.service_minutes - head_service)
+        )
+    
+    def concatenation(self, other: 'RouteCost') -> RouteMetrics:
+        """
+        Métricas de recorrer esta ruta y a continuación otra, en O(1).
+        
+        Args:
+            other: Ruta que se recorre después
+        
+        Returns:
+            Métricas de la ruta concatenada
+        """
+        joint = _leg_km(self._points[-1], other._points[0]) if self._points and other._points else 0.0
+        return self._metrics(
+            self.distance_km + joint + other.distance_km,
+            self.service_minutes + other.service_minutes
+        )
+    
+    def _metrics(self, distance_km: float, service_minutes: float) -> RouteMetrics:
+        return RouteMetrics(
+            distance_km=distance_km,
+            duration_minutes=distance_km / self._speed_kmh * 60 + service_minutes
+        )
+    
+    def _insert(self, location: Optional[Point], service: float, position: int) -> None:
+        n = len(self._points)
+        self._points.insert(position, location)
+        self._service.insert(position, service)
+        self.service_minutes += service
+        first = max(position - 1, 0)
+        self._relink(first, 1 if 0 < position < n else 0, min(position + 1, n))
+    
+    def _remove(self, position: int) -> None:
+        n = len(self._points)
+        self._points.pop(position)
+        self.service_minutes -= self._service.pop(position)
+        first = max(position - 1, 0)
+        replaced = (1 if position > 0 else 0) + (1 if position < n - 1 else 0)
+        self._relink(first, replaced, first + (1 if 0 < position < n - 1 else 0))
+    
+    def _relink(self, first: int, replaced: int, last: int) -> None:
+        """
+        Reemplaza `replaced` tramos desde first por los tramos first..last-1
+        de las paradas actuales y ajusta la distancia total.
+        """
+        legs = [
+            _leg_km(self._points[k], self._points[k + 1])
+            for k in range(first, last)
+        ]
+        self.distance_km += sum(legs) - sum(self._legs[first:first + replaced])
+        self._legs[first:first + replaced] = legs
+    
+    def _check_position(self, position: int) -> int:
+        n = len(self._points)
+        if position < 0 or position >= n:
+            raise ValueError(f"Posición inválida. Debe estar entre 0 y {n - 1}")
+        return n
+    
+    def _check_segment(self, first: int, last: int) -> int:
+        n = len(self._points)
+        if not 0 <= first < last < n:
+            raise ValueError("El segmento debe cumplir 0 <= inicio < fin < número de paradas")
+        return n
@@ -0,0 +1,264 @@
+"""
+Route Diff Domain Service
+Compara dos planes de rutas y reporta las operaciones mínimas que llevan
+de uno al otro: rutas divididas, fusionadas, creadas o retiradas, y paradas
+agregadas, quitadas, movidas entre rutas o reordenadas.
+Las rutas se emparejan por ID y las paradas por cliente con diccionarios;
+el orden se compara con la subsecuencia creciente más larga (algoritmo de
+paciencia), así que el costo es O(paradas × log(paradas por ruta)).
+"""
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from src.domain.models.route import Route
+
+
+@dataclass(frozen=True, slots=True)
+class RouteEdit:
+    """
+    Cambio en el conjunto de rutas. SPLIT tiene una ruta antes y varias
+    después; MERGE, varias antes y una después; REPLACE, una y una (la
+    ruta se recreó con otro ID); ADD y REMOVE, solo un lado.
+    """
+    operation: str
+    before_ids: Tuple[str, ...]
+    after_ids: Tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class StopEdit:
+    """
+    Cambio en una parada. route_id es la ruta donde queda (None si se
+    quitó) y position su índice en ella; from_route_id, la ruta donde
+    estaba (None si se agregó).
+    """
+    operation: str
+    client_id: str
+    route_id: Optional[str]
+    from_route_id: Optional[str]
+    position: Optional[int]
+
+
+@dataclass(slots=True)
+class RoutePlanDiff:
+    """Diferencias entre dos planes de rutas."""
+    route_edits: List[RouteEdit] = field(default_factory=list)
+    stop_edits: List[StopEdit] = field(default_factory=list)
+    # Rutas presentes en ambos planes con las mismas paradas en el mismo orden
+    unchanged_routes: int = 0
+    
+    @property
+    def is_empty(self) -> bool:
+        """True si los planes tienen las mismas rutas y paradas."""
+        return not self.route_edits and not self.stop_edits
+
+
+# Operaciones sobre rutas
+SPLIT = "SPLIT"
+MERGE = "MERGE"
+ADD_ROUTE = "ADD_ROUTE"
+REPLACE_ROUTE = "REPLACE_ROUTE"
+REMOVE_ROUTE = "REMOVE_ROUTE"
+
+# Operaciones sobre paradas
+ADD_STOP = "ADD_STOP"
+REMOVE_STOP = "REMOVE_STOP"
+MOVE_STOP = "MOVE_STOP"
+REORDER_STOP = "REORDER_STOP"
+
+
+def longest_increasing_run(positions: Sequence[int]) -> List[int]:
+    """
+    Índices de la subsecuencia estrictamente creciente más larga
+    (algoritmo de paciencia, O(n log n)). Las posiciones negativas
+    (elementos nuevos) nunca forman parte de ella.
+    
+    Con las posiciones anteriores de los elementos de una secuencia sin
+    repetidos, es la subsecuencia común más larga: los demás elementos son
+    el mínimo que hay que mover.
+    
+    Args:
+        positions: Posición anterior de cada elemento del nuevo orden
+        
+    Returns:
+        Índices, en orden, de los elementos que conservan su orden relativo
+    """
+    tails: List[int] = []
+    tail_indices: List[int] = []
+    previous = [-1] * len(positions)
+    
+    for index, position in enumerate(positions):
+        if position < 0:
+            continue
+        slot = bisect_left(tails, position)
+        if slot > 0:
+            previous[index] = tail_indices[slot - 1]
+        if slot == len(tails):
+            tails.append(position)
+            tail_indices.append(index)
+        else:
+            tails[slot] = position
+            tail_indices[slot] = index
+    
+    run: List[int] = []
+    index = tail_indices[-1] if tail_indices else -1
+    while index >= 0:
+        run.append(index)
+        index = previous[index]
+    run.reverse()
+    return run
+
+
+def diff_route_plans(before: Iterable[Route], after: Iterable[Route]) -> RoutePlanDiff:
+    """
+    Compara dos planes de rutas. Solo cuentan las rutas activas: una ruta
+    desactivada (p. ej. la original de una división) se considera retirada.
+    
+    Una ruta retirada cuyas paradas fueron a dar mayormente a dos o más
+    rutas nuevas se reporta como división, una ruta nueva armada
+    mayormente con paradas de dos o más rutas retiradas, como fusión, y
+    una retirada cuyas paradas pasaron a una sola nueva, como reemplazo;
+    las paradas que siguieron ese camino no se reportan una por una. En las
+    rutas presentes en ambos planes, las paradas reordenadas son las que
+    quedan fuera de la subsecuencia común más larga.
+    
+    Args:
+        before: Rutas del plan original
+        after: Rutas del plan nuevo
+        
+    Returns:
+        Diferencias entre los planes
+    """
+    before_routes = {route.id: route for route in before if route.is_active}
+    after_routes = {route.id: route for route in after if route.is_active}
+    
+    diff = RoutePlanDiff()
+    # Paradas que dejaron una ruta y que llegaron a otra, por cliente
+    departures: Dict[str, List[str]] = {}
+    arrivals: Dict[str, List[Tuple[str, int]]] = {}
+    
+    for route_id, old in before_routes.items():
+        new = after_routes.get(route_id)
+        if new is None:
+            for client_id in old.client_ids:
+                departures.setdefault(client_id, []).append(route_id)
+            continue
+        if new.client_ids == old.client_ids:
+            diff.unchanged_routes += 1
+            continue
+        
+        old_positions = {client_id: i for i, client_id in enumerate(old.client_ids)}
+        new_clients = set(new.client_ids)
+        for client_id in old.client_ids:
+            if client_id not in new_clients:
+                departures.setdefault(client_id, []).append(route_id)
+        
+        kept = set(longest_increasing_run([old_positions.get(c, -1) for c in new.client_ids]))
+        for position, client_id in enumerate(new.client_ids):
+            if client_id not in old_positions:
+                arrivals.setdefault(client_id, []).append((route_id, position))
+            elif position not in kept:
+                diff.stop_edits.append(StopEdit(REORDER_STOP, client_id, route_id, route_id, position))
+    
+    for route_id, new in after_routes.items():
+        if route_id not in before_routes:
+            for position, client_id in enumerate(new.client_ids):
+                arrivals.setdefault(client_id, []).append((route_id, position))
+    
+    # Cada salida se empareja con una llegada del mismo cliente
+    moves: List[Tuple[str, str, str, int]] = []
+    for client_id, from_route_ids in departures.items():
+        to_routes = arrivals.pop(client_id, [])
+        for from_route_id, (to_route_id, position) in zip(from_route_ids, to_routes):
+            moves.append((client_id, from_route_id, to_route_id, position))
+        for from_route_id in from_route_ids[len(to_routes):]:
+            diff.stop_edits.append(StopEdit(REMOVE_STOP, client_id, None, from_route_id, None))
+        for to_route_id, position in to_routes[len(from_route_ids):]:
+            diff.stop_edits.append(StopEdit(ADD_STOP, client_id, to_route_id, None, position))
+    for client_id, to_routes in arrivals.items():
+        for to_route_id, position in to_routes:
+            diff.stop_edits.append(StopEdit(ADD_STOP, client_id, to_route_id, None, position))
+    
+    removed = [route_id for route_id in before_routes if route_id not in after_routes]
+    added = [route_id for route_id in after_routes if route_id not in before_routes]
+    structural = _structural_edits(removed, added, moves)
+    diff.route_edits.extend(structural)
+    
+    # Los movimientos explicados por una división, fusión o reemplazo no se reportan
+    absorbed: Set[Tuple[str, str]] = {
+        (parent_id, child_id)
+        for edit in structural
+        for parent_id in edit.before_ids
+        for child_id in edit.after_ids
+    }
+    diff.stop_edits.extend(
+        StopEdit(MOVE_STOP, client_id, to_route_id, from_route_id, position)
+        for client_id, from_route_id, to_route_id, position in moves
+        if (from_route_id, to_route_id) not in absorbed
+    )
+    
+    involved = {route_id for edit in structural for route_id in edit.before_ids + edit.after_ids}
+    diff.route_edits.extend(RouteEdit(ADD_ROUTE, (), (r,)) for r in added if r not in involved)
+    diff.route_edits.extend(RouteEdit(REMOVE_ROUTE, (r,), ()) for r in removed if r not in involved)
+    
+    diff.stop_edits.sort(
+        key=lambda edit: (edit.route_id or edit.from_route_id or "", edit.position or 0, edit.client_id)
+    )
+    return diff
+
+
+def _structural_edits(
+    removed: List[str],
+    added: List[str],
+    moves: List[Tuple[str, str, str, int]]
+) -> List[RouteEdit]:
+    """
+    Detecta divisiones, fusiones y reemplazos con los movimientos de paradas entre
+    rutas retiradas y rutas nuevas: la fuente principal de una ruta nueva
+    es la retirada que más paradas le aportó, y el destino principal de una
+    retirada, la nueva que más paradas recibió de ella.
+    """
+    removed_set, added_set = set(removed), set(added)
+    flows: Dict[Tuple[str, str], int] = {}
+    for _, from_route_id, to_route_id, _ in moves:
+        if from_route_id in removed_set and to_route_id in added_set:
+            flows[(from_route_id, to_route_id)] = flows.get((from_route_id, to_route_id), 0) + 1
+    
+    main_source: Dict[str, Tuple[int, str]] = {}
+    main_destination: Dict[str, Tuple[int, str]] = {}
+    for (from_route_id, to_route_id), count in sorted(flows.items()):
+        if count > main_source.get(to_route_id, (0, ""))[0]:
+            main_source[to_route_id] = (count, from_route_id)
+        if count > main_destination.get(from_route_id, (0, ""))[0]:
+            main_destination[from_route_id] = (count, to_route_id)
+    
+    # Hijas de cada retirada y padres de cada nueva, en el orden de los planes
+    children_of: Dict[str, List[str]] = {}
+    for child_id in added:
+        if child_id in main_source:
+            children_of.setdefault(main_source[child_id][1], []).append(child_id)
+    parents_of: Dict[str, List[str]] = {}
+    for parent_id in removed:
+        if parent_id in main_destination:
+            parents_of.setdefault(main_destination[parent_id][1], []).append(parent_id)
+    
+    edits: List[RouteEdit] = []
+    for parent_id in removed:
+        children = children_of.get(parent_id, [])
+        if len(children) >= 2:
+            edits.append(RouteEdit(SPLIT, (parent_id,), tuple(children)))
+    for child_id in added:
+        parents = parents_of.get(child_id, [])
+        if len(parents) >= 2:
+            edits.append(RouteEdit(MERGE, tuple(parents), (child_id,)))
+    
+    involved = {route_id for edit in edits for route_id in edit.before_ids + edit.after_ids}
+    for parent_id in removed:
+        child_id = main_destination.get(parent_id, (0, ""))[1]
+        if (
+            child_id and parent_id not in involved and child_id not in involved
+            and main_source[child_id][1] == parent_id
+        ):
+            edits.append(RouteEdit(REPLACE_ROUTE, (parent_id,), (child_id,)))
+    return edits
@@ -0,0 +1,63 @@
+"""
+Route Geometry Domain Service
+Distancias entre clientes y costo de insertar una parada en una ruta.
+"""
+from math import asin, cos, radians, sin, sqrt
+from typing import List, Tuple
+
+# Radio medio de la Tierra en kilómetros
+EARTH_RADIUS_KM = 6371.0088
+
+Point = Tuple[float, float]
+
+
+def haversine_km(a: Point, b: Point) -> float:
+    """
+    Distancia de círculo máximo entre dos puntos (latitud, longitud).
+    
+    Args:
+        a: Primer punto en grados
+        b: Segundo punto en grados
+        
+    Returns:
+        Distancia en kilómetros
+    """
+    lat_a, lon_a = radians(a[0]), radians(a[1])
+    lat_b, lon_b = radians(b[0]), radians(b[1])
+    h = sin((lat_b - lat_a) / 2) ** 2 + cos(lat_a) * cos(lat_b) * sin((lon_b - lon_a) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(h)))
+
+
+def cheapest_insertion(stops: List[Point], point: Point) -> Tuple[int, float]:
+    """
+    Busca la posición donde insertar un punto alarga menos el recorrido.
+    El recorrido se considera abierto: insertar al inicio o al final solo
+    agrega un tramo.
+    
+    Args:
+        stops: Coordenadas de las paradas en orden
+        point: Coordenadas del punto a insertar
+        
+    Returns:
+        Tupla (posición, kilómetros adicionales); (0, 0.0) si no hay paradas
+    """
+    if not stops:
+        return 0, 0.0
+    
+    best_position = 0
+    best_cost = haversine_km(point, stops[0])
+    
+    previous = stops[0]
+    to_previous = best_cost
+    for position in range(1, len(stops)):
+        following = stops[position]
+        to_following = haversine_km(point, following)
+        cost = to_previous + to_following - haversine_km(previous, following)
+        if cost < best_cost:
+            best_position, best_cost = position, cost
+        previous, to_previous = following, to_following
+    
+    if to_previous < best_cost:
+        best_position, best_cost = len(stops), to_previous
+    
+    return best_position, best_cost
@@ -0,0 +1,390 @@
+"""
+Route Schedule Domain Service
+Factibilidad de capacidad, ventanas de entrega y turno de una ruta.
+Precalcula agregados por prefijo (carga, llegada, holgura hacia adelante)
+para verificar inserciones, divisiones y fusiones sin recorrer la ruta.
+"""
+from dataclasses import dataclass
+from math import inf
+from typing import List, Optional, Sequence, Tuple
+
+from src.domain.models.client import Client
+from src.domain.models.route import Route
+from src.domain.services.route_geometry import Point, haversine_km
+
+# Tolerancia para comparar minutos calculados con distancias reales
+_EPSILON = 1e-9
+
+
+@dataclass(frozen=True, slots=True)
+class StopProfile:
+    """
+    Lo que la programación de una ruta necesita saber de una parada.
+    Una parada sin ubicación no suma tiempo de viaje.
+    """
+    client_id: str
+    demand: float = 0.0
+    service_minutes: float = 0.0
+    window_start: Optional[float] = None
+    window_end: Optional[float] = None
+    location: Optional[Point] = None
+    
+    @classmethod
+    def from_client(cls, client: Client) -> 'StopProfile':
+        """
+        Construye el perfil a partir de la entidad Client.
+        
+        Args:
+            client: Cliente del dominio
+        
+        Returns:
+            Perfil de parada
+        """
+        return cls(
+            client_id=client.id,
+            demand=client.demand,
+            service_minutes=client.service_minutes,
+            window_start=client.window_start,
+            window_end=client.window_end,
+            location=(
+                (client.latitude, client.longitude)
+                if client.latitude is not None and client.longitude is not None else None
+            )
+        )
+
+
+def format_minutes(minutes: float) -> str:
+    """Formatea minutos desde medianoche como HH:MM."""
+    minutes = int(round(minutes))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class RouteSchedule:
+    """
+    Programación de una ruta abierta que sale a la hora de inicio del turno.
+    
+    Para cada parada i se guardan la carga acumulada, la llegada, el inicio
+    de atención (esperando si se llega antes de la ventana), la salida y la
+    holgura hacia adelante: cuánto puede retrasarse el inicio de i sin que
+    ninguna parada posterior ni el fin del turno queden fuera de plazo
+    (Savelsbergh). Con esos agregados, verificar una inserción, una división
+    o una concatenación cuesta O(1). Construirla cuesta O(n).
+    
+    insert, remove y relocate aplican un movimiento ya confirmado, igual
+    que RouteCost: los tiempos se recalculan desde la posición afectada y
+    las holguras en una pasada, sin volver a consultar los perfiles.
+    """
+    
+    def __init__(
+        self,
+        stops: Sequence[StopProfile],
+        capacity: Optional[float] = None,
+        shift_start: float = 480,
+        shift_minutes: Optional[float] = None,
+        speed_kmh: float = 30.0
+    ) -> None:
+        """
+        Args:
+            stops: Perfiles de las paradas en orden
+            capacity: Capacidad del vehículo; None para no limitarla
+            shift_start: Hora de salida en minutos desde medianoche
+            shift_minutes: Duración del turno; None para no limitarla
+            speed_kmh: Velocidad promedio para convertir distancias en minutos
+        """
+        if speed_kmh <= 0:
+            raise ValueError("La velocidad promedio debe ser positiva")
+        
+        self.stops = list(stops)
+        self.capacity = capacity
+        self.shift_start = shift_start
+        self.shift_end = inf if shift_minutes is None else shift_start + shift_minutes
+        self._speed_kmh = speed_kmh
+        
+        # load[i] = demanda de las paradas anteriores a i
+        self.load = [0.0]
+        self.arrival: List[float] = []
+        self.start: List[float] = []
+        self.departure: List[float] = []
+        self._recompute(0)
+    
+    @property
+    def total_load(self) -> float:
+        """Demanda total de la ruta."""
+        return self.load[-1]
+    
+    def travel_minutes(self, origin: Optional[StopProfile], destination: Optional[StopProfile]) -> float:
+        """
+        Minutos de viaje entre dos paradas; 0 si alguna no tiene ubicación.
+        
+        Args:
+            origin: Parada de origen (None = salida del turno)
+            destination: Parada de destino
+        
+        Returns:
+            Minutos de viaje
+        """
+        if origin is None or destination is None or origin.location is None or destination.location is None:
+            return 0.0
+        return haversine_km(origin.location, destination.location) / self._speed_kmh * 60
+    
+    def violations(self) -> List[str]:
+        """
+        Incumplimientos de la ruta tal como está. Cuesta O(n).
+        
+        Returns:
+            Mensajes de incumplimiento; lista vacía si la ruta es factible
+        """
+        messages = self._capacity_violations(self.total_load)
+        for i, stop in enumerate(self.stops):
+            if self.start[i] > self._latest(stop) + _EPSILON:
+                messages.append(self._late_message(stop, self.start[i]))
+        if self.end_time > self.shift_end + _EPSILON:
+            messages.append(self._shift_message(self.end_time))
+        return messages
+    
+    def insertion_violations(self, stop: StopProfile, position: int) -> List[str]:
+        """
+        Incumplimientos que causaría insertar una parada, en O(1).
+        Solo reporta lo que la inserción rompe: si la ruta ya incumplía
+        algo, eso se obtiene con violations().
+        
+        Args:
+            stop: Perfil de la parada a insertar
+            position: Índice (0-based) que ocuparía
+        
+        Returns:
+            Mensajes de incumplimiento; lista vacía si la inserción es factible
+        """
+        n = len(self.stops)
+        if position < 0 or position > n:
+            raise ValueError(f"Posición inválida. Debe estar entre 0 y {n}")
+        
+        messages = []
+        if self.capacity is not None and self.total_load <= self.capacity + _EPSILON:
+            messages.extend(self._capacity_violations(self.total_load + stop.demand))
+        
+        previous = self.stops[position - 1] if position > 0 else None
+        departure = self.departure[position - 1] if position > 0 else self.shift_start
+        start = max(departure + self.travel_minutes(previous, stop), self._earliest(stop))
+        if start > self._latest(stop) + _EPSILON:
+            messages.append(self._late_message(stop, start))
+        
+        leave = start + stop.service_minutes
+        if position < n:
+            following = self.stops[position]
+            arrival = leave + self.travel_minutes(stop, following)
+            push = max(arrival, self._earliest(following)) - self.start[position]
+            if push > max(self.forward_slack[position], 0.0) + _EPSILON:
+                messages.append(
+                    f"Insertar a {stop.client_id} retrasa {push:.0f} min las paradas "
+                    f"siguientes y deja alguna fuera de su ventana o del turno"
+                )
+        elif leave > self.shift_end + _EPSILON and self.end_time <= self.shift_end + _EPSILON:
+            messages.append(self._shift_message(leave))
+        
+        return messages
+    
+    def split_violations(self, split_index: int) -> Tuple[List[str], List[str]]:
+        """
+        Incumplimientos de las dos rutas que resultarían de dividir en
+        split_index (ambas salen a la hora de inicio del turno).
+        La primera parte y la carga de ambas se verifican en O(1). La segunda
+        parte sale antes de lo que llegaba en la ruta original, así que si
+        allí cumplía sigue cumpliendo; solo si no, se reprograma en O(n).
+        
+        Args:
+            split_index: Índice de división (0-based)
+        
+        Returns:
+            Tupla con los incumplimientos de cada parte
+        """
+        first = self._capacity_violations(self.load[split_index])
+        if self.late_before[split_index]:
+            first.extend(
+                self._late_message(stop, self.start[i])
+                for i, stop in enumerate(self.stops[:split_index])
+                if self.start[i] > self._latest(stop) + _EPSILON
+            )
+        first_end = self.departure[split_index - 1] if split_index > 0 else self.shift_start
+        if first_end > self.shift_end + _EPSILON:
+            first.append(self._shift_message(first_end))
+        
+        if not self.late_from[split_index] and self.end_time <= self.shift_end + _EPSILON:
+            second = self._capacity_violations(self.total_load - self.load[split_index])
+        else:
+            second = self._rescheduled(self.stops[split_index:]).violations()
+        
+        return first, second
+    
+    def concatenation_violations(self, other: 'RouteSchedule') -> List[str]:
+        """
+        Incumplimientos de la ruta que resulta de recorrer esta ruta y luego
+        la otra, en O(1) cuando ambas cumplen sus plazos. La otra
+        programación debe tener el mismo turno; si no, se reprograma en O(n).
+        
+        Args:
+            other: Programación de la ruta que va a continuación
+        
+        Returns:
+            Mensajes de incumplimiento; lista vacía si la unión es factible
+        """
+        if (other.shift_start, other.shift_end) != (self.shift_start, self.shift_end):
+            return self._rescheduled(self.stops + other.stops).violations()
+        if not self.stops or not other.stops:
+            return self._rescheduled(self.stops + other.stops).violations()
+        
+        messages = self._capacity_violations(self.total_load + other.total_load)
+        if self.late_before[len(self.stops)] or other.late_before[len(other.stops)]:
+            # Alguna ruta ya incumplía: sus atrasos se enumeran
+            return messages + [
+                message for message in self._rescheduled(self.stops + other.stops).violations()
+                if message not in messages
+            ]
+        
+        # La segunda ruta empieza cuando termina la primera, no a la hora de salida
+        first = other.stops[0]
+        arrival = self.end_time + self.travel_minutes(self.stops[-1], first)
+        push = max(arrival, other._earliest(first)) - other.start[0]
+        if push > other.forward_slack[0] + _EPSILON:
+            messages.append(
+                f"Al unir las rutas, las paradas desde {first.client_id} se retrasan "
+                f"{push:.0f} min y alguna queda fuera de su ventana o del turno"
+            )
+        
+        return messages
+    
+    def insert(self, stop: StopProfile, position: int) -> None:
+        """Aplica una inserción (ver insertion_violations)."""
+        n = len(self.stops)
+        if position < 0 or position > n:
+            raise ValueError(f"Posición inválida. Debe estar entre 0 y {n}")
+        self.stops.insert(position, stop)
+        self._recompute(position)
+    
+    def remove(self, position: int) -> None:
+        """Aplica la eliminación de la parada en una posición."""
+        self._check_position(position)
+        self.stops.pop(position)
+        self._recompute(position)
+    
+    def relocate(self, source: int, target: int) -> None:
+        """Aplica el movimiento de una parada a otra posición."""
+        self._check_position(source)
+        self._check_position(target)
+        self.stops.insert(target, self.stops.pop(source))
+        self._recompute(min(source, target))
+    
+    def _recompute(self, first: int) -> None:
+        """
+        Recalcula los tiempos desde la parada `first` (los anteriores no
+        cambian) y luego las holguras y los atrasos.
+        
+        Args:
+            first: Primera posición cuyas paradas cambiaron
+        """
+        n = len(self.stops)
+        del self.load[first + 1:]
+        del self.arrival[first:]
+        del self.start[first:]
+        del self.departure[first:]
+        
+        time = self.departure[first - 1] if first > 0 else self.shift_start
+        previous = self.stops[first - 1] if first > 0 else None
+        for i in range(first, n):
+            stop = self.stops[i]
+            self.load.append(self.load[i] + stop.demand)
+            self.arrival.append(time + self.travel_minutes(previous, stop))
+            self.start.append(max(self.arrival[i], self._earliest(stop)))
+            self.departure.append(self.start[i] + stop.service_minutes)
+            time = self.departure[i]
+            previous = stop
+        
+        self.end_time = time
+        
+        # Holgura hacia adelante; la posición n es el fin del turno
+        self.forward_slack = [0.0] * (n + 1)
+        self.forward_slack[n] = self.shift_end - self.end_time
+        for i in range(n - 1, -1, -1):
+            waiting_after = (
+                self.start[i + 1] - self.arrival[i + 1] if i + 1 < n else 0.0
+            )
+            self.forward_slack[i] = min(
+                self._latest(self.stops[i]) - self.start[i],
+                waiting_after + self.forward_slack[i + 1]
+            )
+        
+        # late_before[i] / late_from[i]: alguna parada anterior a i / desde i
+        # se atiende fuera de plazo
+        late = [self.start[i] > self._latest(stop) + _EPSILON for i, stop in enumerate(self.stops)]
+        self.late_before = [False] * (n + 1)
+        self.late_from = [False] * (n + 1)
+        for i in range(n):
+            self.late_before[i + 1] = self.late_before[i] or late[i]
+        for i in range(n - 1, -1, -1):
+            self.late_from[i] = self.late_from[i + 1] or late[i]
+    
+    def _check_position(self, position: int) -> None:
+        n = len(self.stops)
+        if position < 0 or position >= n:
+            raise ValueError(f"Posición inválida. Debe estar entre 0 y {n - 1}")
+    
+    def _rescheduled(self, stops: Sequence[StopProfile]) -> 'RouteSchedule':
+        """Programación de otras paradas con las mismas restricciones."""
+        return RouteSchedule(
+            stops,
+            capacity=self.capacity,
+            shift_start=self.shift_start,
+            shift_minutes=None if self.shift_end == inf else self.shift_end - self.shift_start,
+            speed_kmh=self._speed_kmh
+        )
+    
+    def _capacity_violations(self, load: float) -> List[str]:
+        """Mensaje de capacidad excedida para una carga, si corresponde."""
+        if self.capacity is not None and load > self.capacity + _EPSILON:
+            return [f"Capacidad excedida: carga {load:g} de {self.capacity:g}"]
+        return []
+    
+    def _late_message(self, stop: StopProfile, start: float) -> str:
+        return (
+            f"El cliente {stop.client_id} se atendería a las {format_minutes(start)}, "
+            f"después de su ventana ({format_minutes(self._latest(stop))})"
+        )
+    
+    def _shift_message(self, end_time: float) -> str:
+        return (
+            f"La ruta terminaría a las {format_minutes(end_time)}, "
+            f"después del fin del turno ({format_minutes(self.shift_end)})"
+        )
+    
+    @staticmethod
+    def _earliest(stop: StopProfile) -> float:
+        return -inf if stop.window_start is None else stop.window_start
+    
+    @staticmethod
+    def _latest(stop: StopProfile) -> float:
+        return inf if stop.window_end is None else stop.window_end
+
+
+def schedule_route(
+    route: Route,
+    profiles: Sequence[StopProfile],
+    speed_kmh: float = 30.0
+) -> RouteSchedule:
+    """
+    Construye la programación de una ruta con sus propias restricciones.
+    
+    Args:
+        route: Ruta del dominio
+        profiles: Perfiles de sus paradas, en el orden de la ruta
+        speed_kmh: Velocidad promedio
+    
+    Returns:
+        Programación de la ruta
+    """
+    return RouteSchedule(
+        profiles,
+        capacity=route.capacity,
+        shift_start=route.shift_start,
+        shift_minutes=route.shift_minutes,
+        speed_kmh=speed_kmh
+    )
@@ -0,0 +1,192 @@
+"""
+Route Simulation Domain Service
+Simulación Monte Carlo de la ejecución de una ruta: muestrea tiempos de
+viaje y de atención alrededor de la programación estimada para obtener
+percentiles de llegada por parada y la probabilidad de exceder el turno.
+"""
+from dataclasses import dataclass
+from math import inf, log, sqrt
+from typing import Any, List, Optional, Tuple
+
+from src.domain.services.route_schedule import RouteSchedule, StopProfile
+
+# Distribuciones disponibles para los tiempos
+LOGNORMAL = 'lognormal'
+GAMMA = 'gamma'
+UNIFORM = 'uniform'
+FIXED = 'fixed'
+DISTRIBUTIONS = (LOGNORMAL, GAMMA, UNIFORM, FIXED)
+
+# Percentiles reportados para las llegadas y el fin de la ruta
+PERCENTILES = (10, 50, 90)
+
+# Tolerancia para comparar minutos simulados con ventanas y turno
+_EPSILON = 1e-9
+
+
+@dataclass(frozen=True, slots=True)
+class TimeDistribution:
+    """
+    Variabilidad de un tiempo alrededor de su valor estimado.
+    
+    Cada muestra es el valor estimado por un factor de media 1 y coeficiente
+    de variación `cv`, así que la media simulada coincide con la programación
+    determinista. La uniforme admite cv hasta 1/√3 para no producir tiempos
+    negativos; `fixed` no varía.
+    """
+    kind: str = LOGNORMAL
+    cv: float = 0.25
+    
+    def __post_init__(self) -> None:
+        if self.kind not in DISTRIBUTIONS:
+            raise ValueError(f"Distribución inválida. Debe ser una de: {', '.join(DISTRIBUTIONS)}")
+        if self.cv < 0:
+            raise ValueError("El coeficiente de variación no puede ser negativo")
+        if self.kind == UNIFORM and self.cv * sqrt(3) > 1:
+            raise ValueError("La distribución uniforme admite un coeficiente de variación de hasta 0.577")
+    
+    def sample(self, rng: Any, shape: Tuple[int, int]) -> Any:
+        """
+        Muestrea factores de media 1.
+        
+        Args:
+            rng: Generador de numpy (numpy.random.Generator)
+            shape: Forma de la matriz (replicaciones, paradas)
+            
+        Returns:
+            Matriz de numpy con los factores
+        """
+        if self.kind == FIXED or self.cv == 0:
+            return _numpy().ones(shape)
+        if self.kind == LOGNORMAL:
+            sigma = sqrt(log(1 + self.cv ** 2))
+            return rng.lognormal(-sigma ** 2 / 2, sigma, shape)
+        if self.kind == GAMMA:
+            return rng.gamma(1 / self.cv ** 2, self.cv ** 2, shape)
+        half_width = self.cv * sqrt(3)
+        return rng.uniform(1 - half_width, 1 + half_width, shape)
+
+
+@dataclass(frozen=True, slots=True)
+class SimulatedStop:
+    """Llegadas simuladas a una parada (minutos desde medianoche)."""
+    client_id: str
+    # Percentiles de la llegada, en el orden de PERCENTILES
+    arrival: Tuple[float, ...]
+    # Fracción de replicaciones que atienden después de la ventana
+    late_probability: float
+
+
+@dataclass(frozen=True, slots=True)
+class RouteSimulation:
+    """Resultado de simular una ruta muchas veces."""
+    replications: int
+    stops: Tuple[SimulatedStop, ...]
+    # Percentiles del fin de la ruta, en el orden de PERCENTILES
+    end_time: Tuple[float, ...]
+    mean_end_time: float
+    # Fracción de replicaciones que terminan después del fin del turno
+    overrun_probability: float
+
+
+def simulate_schedule(
+    schedule: RouteSchedule,
+    travel: TimeDistribution = TimeDistribution(),
+    service: TimeDistribution = TimeDistribution(GAMMA, 0.3),
+    replications: int = 2000,
+    seed: Optional[int] = None
+) -> RouteSimulation:
+    """
+    Simula la ejecución de una ruta alrededor de su programación.
+    
+    Las replicaciones se calculan juntas como matrices (replicaciones x
+    paradas): sin ventanas de entrega las llegadas son sumas acumuladas por
+    fila; con ventanas se avanza parada por parada esperando, en todas las
+    replicaciones a la vez, a que abra la ventana. Con miles de
+    replicaciones una ruta se simula en milisegundos.
+    
+    Args:
+        schedule: Programación determinista de la ruta
+        travel: Variabilidad de los tiempos de viaje
+        service: Variabilidad de los tiempos de atención
+        replications: Número de replicaciones
+        seed: Semilla para reproducir la simulación
+        
+    Returns:
+        Percentiles de llegada por parada, del fin de la ruta y la
+        probabilidad de exceder el turno
+        
+    Raises:
+        ValueError: Si el número de replicaciones no es positivo
+        ImportError: Si numpy no está instalado
+    """
+    if replications < 1:
+        raise ValueError("El número de replicaciones debe ser positivo")
+    
+    np = _numpy()
+    stops = schedule.stops
+    n = len(stops)
+    
+    if n == 0:
+        return RouteSimulation(
+            replications=replications,
+            stops=(),
+            end_time=(schedule.shift_start,) * len(PERCENTILES),
+            mean_end_time=schedule.shift_start,
+            overrun_probability=float(schedule.shift_start > schedule.shift_end + _EPSILON)
+        )
+    
+    previous: List[Optional[StopProfile]] = [None] + stops[:-1]
+    travel_means = np.array([schedule.travel_minutes(origin, stop) for origin, stop in zip(previous, stops)])
+    service_means = np.array([stop.service_minutes for stop in stops])
+    
+    rng = np.random.default_rng(seed)
+    shape = (replications, n)
+    travel_times = travel_means * travel.sample(rng, shape)
+    service_times = service_means * service.sample(rng, shape)
+    
+    if all(stop.window_start is None for stop in stops):
+        # Sin esperas: cada salida es la suma acumulada de viajes y atenciones
+        departures = schedule.shift_start + np.cumsum(travel_times + service_times, axis=1)
+        arrivals = departures - service_times
+        starts = arrivals
+        end = departures[:, -1]
+    else:
+        arrivals = np.empty(shape)
+        starts = np.empty(shape)
+        end = np.full(replications, float(schedule.shift_start))
+        for i, stop in enumerate(stops):
+            arrivals[:, i] = end + travel_times[:, i]
+            starts[:, i] = (
+                arrivals[:, i] if stop.window_start is None
+                else np.maximum(arrivals[:, i], stop.window_start)
+            )
+            end = starts[:, i] + service_times[:, i]
+    
+    latest = np.array([inf if stop.window_end is None else stop.window_end for stop in stops])
+    late = (starts > latest + _EPSILON).mean(axis=0)
+    arrival_percentiles = np.percentile(arrivals, PERCENTILES, axis=0)
+    
+    return RouteSimulation(
+        replications=replications,
+        stops=tuple(
+            SimulatedStop(
+                client_id=stop.client_id,
+                arrival=tuple(float(value) for value in arrival_percentiles[:, i]),
+                late_probability=float(late[i])
+            )
+            for i, stop in enumerate(stops)
+        ),
+        end_time=tuple(float(value) for value in np.percentile(end, PERCENTILES)),
+        mean_end_time=float(end.mean()),
+        overrun_probability=float((end > schedule.shift_end + _EPSILON).mean())
+    )
+
+
+def _numpy() -> Any:
+    """Importa numpy, que solo se necesita para simular."""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("La simulación de rutas requiere numpy (pip install numpy)") from e
+    return numpy
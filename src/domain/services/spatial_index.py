@@ -0,0 +1,177 @@
+"""
+Spatial Grid Index Domain Service
+Índice espacial en memoria para buscar los clientes más cercanos a un punto.
+"""
+import heapq
+from math import cos, floor, radians
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.domain.services.route_geometry import haversine_km
+
+# Kilómetros por grado de latitud (aproximación local)
+KM_PER_DEGREE = 111.32
+
+
+class SpatialGridIndex:
+    """
+    Rejilla uniforme sobre una proyección equirectangular local.
+    Los clientes de un CEDIS están en una misma ciudad, donde la proyección
+    es precisa y la rejilla reparte los puntos de forma pareja. Agregar,
+    mover o quitar un punto cuesta O(1); una búsqueda de k vecinos recorre
+    anillos de celdas alrededor del punto hasta que ninguna celda más
+    lejana puede mejorar el resultado.
+    """
+    
+    def __init__(self, reference_latitude: float, cell_km: float = 1.0) -> None:
+        """
+        Args:
+            reference_latitude: Latitud de referencia de la proyección
+                (p. ej. la del CEDIS o la de su primer cliente)
+            cell_km: Lado de cada celda en kilómetros
+            
+        Raises:
+            ValueError: Si el tamaño de celda no es positivo
+        """
+        if cell_km <= 0:
+            raise ValueError("El tamaño de celda debe ser positivo")
+        
+        self._cell_km = cell_km
+        self._km_per_degree_lon = KM_PER_DEGREE * cos(radians(reference_latitude))
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._points: Dict[str, Tuple[float, float]] = {}
+        # Caja de las celdas ocupadas (fila mín., fila máx., columna mín.,
+        # columna máx.); None si hay que recalcularla
+        self._bounds: Optional[Tuple[int, int, int, int]] = None
+    
+    def __len__(self) -> int:
+        return len(self._points)
+    
+    def __contains__(self, point_id: str) -> bool:
+        return point_id in self._points
+    
+    def add(self, point_id: str, latitude: float, longitude: float) -> None:
+        """
+        Agrega un punto o lo mueve si ya estaba.
+        
+        Args:
+            point_id: Identificador del punto (ID del cliente)
+            latitude: Latitud en grados
+            longitude: Longitud en grados
+        """
+        if point_id in self._points:
+            self.remove(point_id)
+        
+        self._points[point_id] = (latitude, longitude)
+        row, col = self._cell_of(latitude, longitude)
+        self._cells.setdefault((row, col), set()).add(point_id)
+        if len(self._points) == 1:
+            self._bounds = (row, row, col, col)
+        elif self._bounds is not None:
+            min_row, max_row, min_col, max_col = self._bounds
+            self._bounds = (min(min_row, row), max(max_row, row), min(min_col, col), max(max_col, col))
+    
+    def remove(self, point_id: str) -> None:
+        """
+        Quita un punto del índice; no hace nada si no estaba.
+        
+        Args:
+            point_id: Identificador del punto
+        """
+        point = self._points.pop(point_id, None)
+        if point is None:
+            return
+        
+        cell = self._cell_of(*point)
+        members = self._cells[cell]
+        members.discard(point_id)
+        if not members:
+            del self._cells[cell]
+            # Vaciar una celda del borde puede encoger la caja; se recalcula
+            # en la siguiente búsqueda
+            if self._bounds is not None:
+                min_row, max_row, min_col, max_col = self._bounds
+                if cell[0] in (min_row, max_row) or cell[1] in (min_col, max_col):
+                    self._bounds = None
+    
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Busca los k puntos más cercanos.
+        
+        Args:
+            latitude: Latitud del punto de consulta
+            longitude: Longitud del punto de consulta
+            k: Número de vecinos a retornar
+            accept: Filtro opcional; los puntos rechazados no cuentan como vecinos
+            
+        Returns:
+            Lista de (ID, kilómetros) ordenada de más cercano a más lejano
+        """
+        if k <= 0 or not self._points:
+            return []
+        
+        origin = (latitude, longitude)
+        center_row, center_col = self._cell_of(latitude, longitude)
+        min_row, max_row, min_col, max_col = self._occupied_bounds()
+        max_ring = max(
+            center_row - min_row, max_row - center_row,
+            center_col - min_col, max_col - center_col, 0
+        )
+        
+        # Montículo de máximos (distancias negadas) con los k mejores
+        best: List[Tuple[float, str]] = []
+        
+        for ring in range(max_ring + 1):
+            # Cualquier punto de este anillo está al menos a (ring - 1) celdas
+            if len(best) == k and -best[0][0] <= (ring - 1) * self._cell_km:
+                break
+            
+            for cell in self._ring_cells(center_row, center_col, ring):
+                for point_id in self._cells.get(cell, ()):
+                    if accept is not None and not accept(point_id):
+                        continue
+                    distance = haversine_km(origin, self._points[point_id])
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, point_id))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, point_id))
+        
+        return [(point_id, -negated) for negated, point_id in sorted(best, reverse=True)]
+    
+    def _occupied_bounds(self) -> Tuple[int, int, int, int]:
+        """
+        Caja de las celdas ocupadas. Se mantiene en O(1) al agregar puntos;
+        solo se recorre la rejilla tras vaciar una celda del borde.
+        """
+        if self._bounds is None:
+            rows = [row for row, _ in self._cells]
+            cols = [col for _, col in self._cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+        return self._bounds
+    
+    def _cell_of(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        """Celda que contiene un punto."""
+        return (
+            floor(latitude * KM_PER_DEGREE / self._cell_km),
+            floor(longitude * self._km_per_degree_lon / self._cell_km)
+        )
+    
+    @staticmethod
+    def _ring_cells(row: int, col: int, ring: int) -> List[Tuple[int, int]]:
+        """Celdas a distancia de Chebyshev exactamente `ring` de (row, col)."""
+        if ring == 0:
+            return [(row, col)]
+        
+        cells = []
+        for offset in range(-ring, ring + 1):
+            cells.append((row - ring, col + offset))
+            cells.append((row + ring, col + offset))
+        for offset in range(-ring + 1, ring):
+            cells.append((row + offset, col - ring))
+            cells.append((row + offset, col + ring))
+        return cells
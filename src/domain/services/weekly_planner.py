@@ -0,0 +1,243 @@
+"""
+Weekly Planner Domain Service
+Reparte las visitas semanales de los clientes de un CEDIS entre los días y
+las rutas para nivelar la cantidad de paradas.
+Heurística voraz: O(clientes × combinaciones de días × frecuencia) para
+elegir los días y O(visitas × rutas del día) para elegir las rutas.
+"""
+from dataclasses import dataclass, field
+from itertools import combinations
+from math import ceil
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.domain.models.route import WEEK_DAYS
+
+
+@dataclass(frozen=True, slots=True)
+class PlannedRoute:
+    """
+    Ruta disponible para el plan. Las paradas fijas son visitas que el plan
+    no mueve (clientes sin perfil registrado en el CEDIS).
+    """
+    route_id: str
+    day_of_week: str
+    capacity: Optional[float] = None
+    fixed_stops: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class VisitRequest:
+    """
+    Visitas que necesita un cliente en la semana.
+    current_routes contiene pares (día, ruta) de su asignación actual.
+    """
+    client_id: str
+    frequency: int = 1
+    allowed_days: Tuple[str, ...] = ()
+    demand: float = 0.0
+    current_routes: Tuple[Tuple[str, str], ...] = ()
+
+
+@dataclass(slots=True)
+class WeeklyPlan:
+    """Resultado del plan: ruta de cada cliente en cada día asignado."""
+    # assignments[client_id][día] = route_id
+    assignments: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    # Paradas por ruta una vez aplicado el plan (incluye las fijas)
+    route_stops: Dict[str, int] = field(default_factory=dict)
+    # Clientes que no se pudieron planificar, con el motivo
+    unplanned: Dict[str, str] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+    
+    def day_stops(self, routes: Sequence[PlannedRoute]) -> Dict[str, int]:
+        """Paradas por día según el plan."""
+        totals: Dict[str, int] = {}
+        for route in routes:
+            stops = self.route_stops.get(route.route_id, 0)
+            totals[route.day_of_week] = totals.get(route.day_of_week, 0) + stops
+        return totals
+
+
+class WeeklyPlanner:
+    """
+    Planificador semanal.
+    
+    Primero elige los días de cada cliente: entre las combinaciones de sus
+    días permitidos con la mejor separación entre visitas (p. ej. lunes y
+    jueves para 2 por semana), la que cae en los días con menos paradas por
+    ruta. Los clientes más restringidos se planifican primero. La carga de
+    cada día parte de la asignación actual y cada cliente se evalúa sin sus
+    propias visitas; cambiar un día tiene una penalización, así que un
+    cliente solo cambia de días si la mejora supera esa penalización.
+    
+    Después, en cada día, los clientes se quedan en su ruta actual mientras
+    no supere el promedio del día; el resto va a la ruta con menos paradas
+    donde quepa su demanda.
+    """
+    
+    def __init__(self, routes: Sequence[PlannedRoute], change_penalty: float = 0.5) -> None:
+        """
+        Args:
+            routes: Rutas activas del CEDIS en toda la semana
+            change_penalty: Paradas por ruta que "cuesta" visitar a un
+                cliente un día en que hoy no se le visita
+        """
+        self._routes = list(routes)
+        self._change_penalty = change_penalty
+        self._routes_by_day: Dict[str, List[PlannedRoute]] = {}
+        for route in self._routes:
+            self._routes_by_day.setdefault(route.day_of_week, []).append(route)
+        # Días con rutas, en orden de la semana
+        self._days = [day for day in WEEK_DAYS if day in self._routes_by_day]
+        self._patterns: Dict[Tuple[int, Tuple[str, ...]], List[Tuple[str, ...]]] = {}
+    
+    def plan(self, requests: Sequence[VisitRequest]) -> WeeklyPlan:
+        """
+        Asigna días y rutas a todos los clientes.
+        
+        Args:
+            requests: Visitas requeridas por cliente
+        
+        Returns:
+            Plan semanal
+        """
+        plan = WeeklyPlan()
+        fixed = {route.route_id: route.fixed_stops for route in self._routes}
+        
+        candidates = []
+        for request in requests:
+            patterns = self._day_patterns(request.frequency, request.allowed_days)
+            if patterns:
+                candidates.append((request, patterns))
+                continue
+            # Sin días posibles, el cliente se conserva donde está
+            plan.unplanned[request.client_id] = (
+                f"No hay {request.frequency} día(s) con rutas entre sus días permitidos"
+            )
+            kept = {day: route_id for day, route_id in request.current_routes if route_id in fixed}
+            for route_id in kept.values():
+                fixed[route_id] += 1
+            if kept:
+                plan.assignments[request.client_id] = kept
+        
+        # Carga inicial: paradas fijas más la asignación actual
+        current_days: Dict[str, Tuple[str, ...]] = {}
+        for request, _ in candidates:
+            visited = {day for day, route_id in request.current_routes if route_id in fixed}
+            current_days[request.client_id] = tuple(day for day in self._days if day in visited)
+        day_load = {
+            day: float(sum(fixed[route.route_id] for route in routes))
+            for day, routes in self._routes_by_day.items()
+        }
+        for days in current_days.values():
+            for day in days:
+                day_load[day] += 1
+        route_count = {day: len(routes) for day, routes in self._routes_by_day.items()}
+        
+        # Los más restringidos primero; a igualdad, los de más visitas
+        candidates.sort(key=lambda item: (len(item[1]), -item[0].frequency, -item[0].demand))
+        
+        visits_by_day: Dict[str, List[VisitRequest]] = {day: [] for day in self._days}
+        for request, patterns in candidates:
+            current = current_days[request.client_id]
+            for day in current:
+                day_load[day] -= 1
+            
+            def cost(pattern: Tuple[str, ...]) -> float:
+                return sum(
+                    (day_load[day] + 1) / route_count[day]
+                    + (0.0 if day in current else self._change_penalty)
+                    for day in pattern
+                )
+            
+            best = min(patterns, key=cost)
+            # Ante un empate se conservan los días actuales
+            if current in patterns and cost(current) <= cost(best):
+                best = current
+            plan.assignments[request.client_id] = {}
+            for day in best:
+                day_load[day] += 1
+                visits_by_day[day].append(request)
+        
+        for day, visits in visits_by_day.items():
+            self._assign_routes(day, visits, fixed, plan)
+        
+        return plan
+    
+    def _assign_routes(
+        self,
+        day: str,
+        visits: List[VisitRequest],
+        fixed: Dict[str, int],
+        plan: WeeklyPlan
+    ) -> None:
+        """Reparte las visitas de un día entre sus rutas."""
+        routes = self._routes_by_day[day]
+        stops = {route.route_id: fixed[route.route_id] for route in routes}
+        demand = {route.route_id: 0.0 for route in routes}
+        capacity = {route.route_id: route.capacity for route in routes}
+        target = ceil((sum(stops.values()) + len(visits)) / len(routes))
+        
+        def fits(route_id: str, request: VisitRequest) -> bool:
+            limit = capacity[route_id]
+            return limit is None or demand[route_id] + request.demand <= limit
+        
+        def place(request: VisitRequest, route_id: str) -> None:
+            stops[route_id] += 1
+            demand[route_id] += request.demand
+            plan.assignments[request.client_id][day] = route_id
+        
+        # Quien ya está en una ruta de este día se queda si no la sobrecarga
+        pending = []
+        for request in visits:
+            current = dict(request.current_routes).get(day)
+            if current in stops and stops[current] < target and fits(current, request):
+                place(request, current)
+            else:
+                pending.append(request)
+        
+        # El resto, de mayor a menor demanda, a la ruta con menos paradas
+        pending.sort(key=lambda request: -request.demand)
+        for request in pending:
+            feasible = [route_id for route_id in stops if fits(route_id, request)]
+            if not feasible:
+                feasible = list(stops)
+                plan.warnings.append(
+                    f"El cliente {request.client_id} excede la capacidad de las rutas del {day}"
+                )
+            place(request, min(feasible, key=lambda route_id: stops[route_id]))
+        
+        plan.route_stops.update(stops)
+    
+    def _day_patterns(self, frequency: int, allowed_days: Tuple[str, ...]) -> List[Tuple[str, ...]]:
+        """
+        Combinaciones de días para una frecuencia con la mayor separación
+        mínima entre visitas consecutivas (contando el cambio de semana).
+        
+        Args:
+            frequency: Visitas por semana
+            allowed_days: Días permitidos (vacío = todos)
+        
+        Returns:
+            Combinaciones candidatas; vacía si no hay días suficientes
+        """
+        key = (frequency, allowed_days)
+        if key not in self._patterns:
+            days = [day for day in self._days if not allowed_days or day in allowed_days]
+            patterns = list(combinations(days, frequency)) if frequency <= len(days) else []
+            if patterns:
+                gaps = {pattern: self._min_gap(pattern) for pattern in patterns}
+                widest = max(gaps.values())
+                patterns = [pattern for pattern in patterns if gaps[pattern] == widest]
+            self._patterns[key] = patterns
+        return self._patterns[key]
+    
+    @staticmethod
+    def _min_gap(pattern: Tuple[str, ...]) -> int:
+        """Menor cantidad de días entre dos visitas consecutivas del patrón."""
+        indexes = [WEEK_DAYS.index(day) for day in pattern]
+        if len(indexes) == 1:
+            return len(WEEK_DAYS)
+        gaps = [b - a for a, b in zip(indexes, indexes[1:])]
+        gaps.append(len(WEEK_DAYS) - indexes[-1] + indexes[0])
+        return min(gaps)
@@ -1,4 +1,10 @@
 # Persistence adapters
 from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+from src.infrastructure.persistence.sqlite_client_repository import SqliteClientRepository
+from src.infrastructure.persistence.in_memory_route_repository import InMemoryRouteRepository
+from src.infrastructure.persistence.replicated_route_repository import ReplicatedRouteRepository
+from src.infrastructure.persistence.write_behind_route_repository import WriteBehindRouteRepository
+from src.infrastructure.persistence.sharded_route_repository import ShardedRouteRepository
 
-__all__ = ['SqliteRouteRepository']
+__all__ = ['SqliteRouteRepository', 'SqliteClientRepository', 'InMemoryRouteRepository',
+           'ReplicatedRouteRepository', 'WriteBehindRouteRepository', 'ShardedRouteRepository']
@@ -0,0 +1,105 @@
+"""
+Fractional Index - Infrastructure Layer
+Claves de orden fraccionales para las paradas de una ruta.
+Una clave es una fracción en base 62 escrita como texto (sin el "0."), de
+modo que el orden lexicográfico de SQLite coincide con el orden numérico y
+siempre existe una clave entre dos claves dadas.
+"""
+from typing import List, Optional
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_BASE = len(DIGITS)
+_VALUES = {digit: value for value, digit in enumerate(DIGITS)}
+
+
+def key_between(lower: Optional[str], upper: Optional[str]) -> str:
+    """
+    Genera una clave estrictamente entre dos claves.
+    
+    Args:
+        lower: Clave inferior (None para el inicio)
+        upper: Clave superior (None para el final)
+        
+    Returns:
+        Clave nueva, sin ceros finales
+        
+    Raises:
+        ValueError: Si lower no es menor que upper
+    """
+    lower = lower or ""
+    if upper is not None and lower >= upper:
+        raise ValueError(f"La clave inferior {lower!r} debe ser menor que {upper!r}")
+    return _midpoint(lower, upper)
+
+
+def _midpoint(lower: str, upper: Optional[str]) -> str:
+    """Punto medio entre dos fracciones (lower puede ser "", upper None = 1)."""
+    if upper is not None:
+        # Conservar el prefijo común (lower se completa con ceros)
+        prefix = 0
+        while prefix < len(upper) and (lower[prefix] if prefix < len(lower) else "0") == upper[prefix]:
+            prefix += 1
+        if prefix > 0:
+            return upper[:prefix] + _midpoint(lower[prefix:], upper[prefix:])
+    
+    digit_lower = _VALUES[lower[0]] if lower else 0
+    digit_upper = _VALUES[upper[0]] if upper is not None else _BASE
+    
+    if digit_upper - digit_lower > 1:
+        return DIGITS[(digit_lower + digit_upper + 1) // 2]
+    
+    # Dígitos consecutivos: se necesita un dígito más
+    if upper is not None and len(upper) > 1:
+        return upper[0]
+    return DIGITS[digit_lower] + _midpoint(lower[1:], None)
+
+
+def keys_between(lower: Optional[str], upper: Optional[str], count: int) -> List[str]:
+    """
+    Genera `count` claves ordenadas entre dos claves, repartidas por
+    bisección para que su longitud crezca solo logarítmicamente.
+    
+    Args:
+        lower: Clave inferior (None para el inicio)
+        upper: Clave superior (None para el final)
+        count: Número de claves a generar
+        
+    Returns:
+        Lista ordenada de claves
+    """
+    if count <= 0:
+        return []
+    middle = key_between(lower, upper)
+    left = count // 2
+    return (
+        keys_between(lower, middle, left)
+        + [middle]
+        + keys_between(middle, upper, count - left - 1)
+    )
+
+
+def spread_keys(count: int) -> List[str]:
+    """
+    Genera `count` claves cortas y equiespaciadas, para rutas nuevas o
+    para renormalizar las claves de una ruta.
+    
+    Args:
+        count: Número de claves
+        
+    Returns:
+        Lista ordenada de claves
+    """
+    width = 1
+    while _BASE ** width < 2 * (count + 1):
+        width += 1
+    step = _BASE ** width // (count + 1)
+    
+    keys = []
+    for position in range(1, count + 1):
+        value = position * step
+        digits = []
+        for _ in range(width):
+            value, remainder = divmod(value, _BASE)
+            digits.append(DIGITS[remainder])
+        keys.append("".join(reversed(digits)).rstrip("0"))
+    return keys
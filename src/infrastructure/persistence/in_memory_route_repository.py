@@ -0,0 +1,731 @@
+"""
+In-Memory Route Repository - Infrastructure Layer
+Adaptador que implementa RouteRepositoryPort sin base de datos: las rutas
+viven en diccionarios con índices hash secundarios. También sirve como
+espacio de trabajo bifurcable (RouteWorkspacePort).
+"""
+import heapq
+import re
+import time
+from dataclasses import dataclass, fields, replace
+from typing import (
+    Any, Callable, Dict, FrozenSet, Generic, Iterable, Iterator, List, MutableMapping, Optional,
+    Tuple, TypeVar
+)
+
+from src.domain.exceptions import ConcurrentModificationError
+from src.domain.models.route import Route
+from src.domain.models.route_metrics import RouteMetrics
+from src.domain.models.route_change import ChangeCursor, RouteChange, cursor_sequence, sequence_cursor
+from src.domain.models.route_lineage import RouteLineageEdge
+from src.domain.models.route_summary import RouteSummary
+from src.domain.models.route_statistics import (
+    RouteStatistics, RouteStatisticsFilter, RouteGroupStatistics
+)
+from src.domain.models.client_conflict import ClientConflict
+from src.domain.ports.route_workspace_port import RouteWorkspacePort
+
+
+# Clave de los índices por grupo: (cedis_id, day_of_week)
+GroupKey = Tuple[str, str]
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+# Marca de una clave borrada en una capa que tapa a otras
+_DELETED: Any = object()
+
+
+def _copy(route: Route) -> Route:
+    """Copia de una ruta que no comparte la lista de paradas."""
+    return replace(route, client_ids=list(route.client_ids))
+
+
+class _LayeredDict(MutableMapping[K, V], Generic[K, V]):
+    """
+    Diccionario por capas. Las escrituras van a la primera capa y las
+    lecturas buscan de la más nueva a la más vieja; un borrado deja una
+    marca si alguna capa inferior tiene la clave. Solo la primera capa se
+    modifica, así que las inferiores pueden compartirse entre estados y
+    apilar una capa nueva cuesta O(1).
+    """
+    __slots__ = ('_layers',)
+    
+    def __init__(self, layers: Optional[List[Dict[K, V]]] = None) -> None:
+        self._layers: List[Dict[K, V]] = layers if layers is not None else [{}]
+    
+    def __getitem__(self, key: K) -> V:
+        for layer in self._layers:
+            if key in layer:
+                value = layer[key]
+                if value is _DELETED:
+                    break
+                return value
+        raise KeyError(key)
+    
+    def __contains__(self, key: Any) -> bool:
+        for layer in self._layers:
+            if key in layer:
+                return layer[key] is not _DELETED
+        return False
+    
+    def __setitem__(self, key: K, value: V) -> None:
+        self._layers[0][key] = value
+    
+    def __delitem__(self, key: K) -> None:
+        if key not in self:
+            raise KeyError(key)
+        if len(self._layers) == 1:
+            del self._layers[0][key]
+        else:
+            self._layers[0][key] = _DELETED
+    
+    def __iter__(self) -> Iterator[K]:
+        if len(self._layers) == 1:
+            return iter(self._layers[0])
+        return self._iter_layers()
+    
+    def _iter_layers(self) -> Iterator[K]:
+        seen = set()
+        for layer in self._layers:
+            for key, value in layer.items():
+                if key not in seen:
+                    seen.add(key)
+                    if value is not _DELETED:
+                        yield key
+    
+    def __len__(self) -> int:
+        if len(self._layers) == 1:
+            return len(self._layers[0])
+        return sum(1 for _ in self._iter_layers())
+    
+    @property
+    def depth(self) -> int:
+        return len(self._layers)
+    
+    def pushed(self) -> '_LayeredDict[K, V]':
+        """Vista con una capa vacía encima; esta queda de solo lectura."""
+        return _LayeredDict([{}] + self._layers)
+    
+    def on(self, below: '_LayeredDict[K, V]') -> '_LayeredDict[K, V]':
+        """La primera capa de esta vista sobre las capas de otra."""
+        return _LayeredDict([self._layers[0]] + below._layers)
+    
+    def merged(self) -> '_LayeredDict[K, V]':
+        """
+        Vuelca la primera capa en la segunda, que debe ser propia, y la
+        retira. Cuesta O(claves de la primera capa).
+        """
+        top, below = self._layers[0], self._layers[1]
+        bottom = len(self._layers) == 2
+        for key, value in top.items():
+            if value is _DELETED and bottom:
+                below.pop(key, None)
+            else:
+                below[key] = value
+        return _LayeredDict(self._layers[1:])
+    
+    def flattened(self) -> '_LayeredDict[K, V]':
+        """Copia en una sola capa, en O(n)."""
+        return _LayeredDict([dict(self.items())])
+
+
+@dataclass(slots=True)
+class _State:
+    """
+    Contenido del repositorio. Las rutas guardadas nunca se modifican (cada
+    escritura guarda otra), y los conjuntos de los índices son inmutables,
+    así que basta con que las tablas sean diccionarios por capas: una
+    transacción o un repositorio bifurcado escribe en su propia capa sobre
+    las del estado confirmado, sin copiarlas.
+    """
+    routes: _LayeredDict[str, Route]
+    # Momento de la última escritura de cada ruta, para archivar
+    updated_at: _LayeredDict[str, float]
+    # IDs de las rutas archivadas (valor sin uso)
+    archived: _LayeredDict[str, None]
+    # Índices de rutas activas, como los índices parciales de SQLite
+    groups: _LayeredDict[GroupKey, FrozenSet[str]]
+    clients: _LayeredDict[str, FrozenSet[str]]
+    # Agregados por grupo: (rutas activas, paradas)
+    stats: _LayeredDict[GroupKey, Tuple[int, int]]
+    # Linaje por hijo y por padre
+    parents: _LayeredDict[str, Tuple[RouteLineageEdge, ...]]
+    children: _LayeredDict[str, Tuple[RouteLineageEdge, ...]]
+    
+    @classmethod
+    def empty(cls) -> '_State':
+        return cls(**{field.name: _LayeredDict() for field in fields(cls)})
+    
+    def map(self, table: Callable[[_LayeredDict], _LayeredDict]) -> '_State':
+        """Estado con la función aplicada a cada tabla."""
+        return _State(**{field.name: table(getattr(self, field.name)) for field in fields(self)})
+
+
+class InMemoryRouteRepository(RouteWorkspacePort):
+    """
+    Implementación del repositorio de rutas en memoria.
+    
+    Mantiene índices hash por ID, por (cedis_id, day_of_week) y por
+    cliente, y los agregados de estadísticas, actualizados en cada
+    escritura. Sirve como doble de pruebas rápido y como espacio de trabajo
+    para planificar antes de guardar en SQLite.
+    
+    Las transacciones siguen a las de sqlite3: una escritura fuera de
+    begin_transaction abre una transacción implícita que termina con
+    commit_transaction o rollback_transaction. Al abrirla se apila una capa
+    vacía sobre cada tabla confirmada y las escrituras van a esa capa;
+    commit la vuelca en la capa propia del repositorio y rollback la
+    descarta, ambos en O(claves escritas).
+    
+    fork congela las capas confirmadas, que pasan a compartirse, y da a
+    cada repositorio una capa propia encima, en O(1) por tabla. Para que
+    las lecturas no recorran demasiadas capas, al superar _MAX_LAYERS el
+    estado se aplana en una sola capa nueva antes de bifurcar.
+    
+    No es seguro entre hilos, igual que una conexión SQLite.
+    """
+    
+    # Capas por tabla a partir de las cuales fork aplana el estado
+    _MAX_LAYERS = 8
+    
+    def __init__(self, routes: Iterable[Route] = (), clock: Callable[[], float] = time.time) -> None:
+        """
+        Args:
+            routes: Rutas iniciales, ya confirmadas y sin registro de cambios
+            clock: Reloj en segundos desde la época, para fechas de cambios y archivo
+        """
+        self._clock = clock
+        self._state = _State.empty()
+        self._changes: List[RouteChange] = []
+        
+        # Estado confirmado mientras hay una transacción abierta y largo
+        # del registro de cambios al abrirla
+        self._committed: Optional[_State] = None
+        self._changes_mark = 0
+        
+        for route in routes:
+            self._store(route)
+        self.commit_transaction()
+    
+    def _begin(self) -> None:
+        """Conserva el estado confirmado y apila la capa de la transacción."""
+        self._committed = self._state
+        self._state = self._state.map(_LayeredDict.pushed)
+        self._changes_mark = len(self._changes)
+    
+    def _table(self, name: str) -> Any:
+        """
+        Tabla del estado lista para modificarse: abre una transacción
+        implícita si no hay una.
+        """
+        if self._committed is None:
+            self._begin()
+        return getattr(self._state, name)
+    
+    def _store(self, route: Route) -> None:
+        """Guarda una copia de la ruta y actualiza los índices."""
+        stored = _copy(route)
+        previous = self._state.routes.get(route.id)
+        self._table('routes')[route.id] = stored
+        self._table('updated_at')[route.id] = self._clock()
+        self._reindex(previous, stored)
+    
+    def _index(self, route: Route) -> None:
+        """Agrega una ruta activa a los índices y agregados."""
+        if not route.is_active:
+            return
+        
+        key = (route.cedis_id, route.day_of_week)
+        groups = self._table('groups')
+        groups[key] = groups.get(key, frozenset()) | {route.id}
+        self._index_clients(route.id, route.client_ids, add=True)
+        self._add_stats(key, 1, len(route.client_ids))
+    
+    def _unindex(self, route: Route) -> None:
+        """Retira una ruta activa de los índices y agregados."""
+        if not route.is_active:
+            return
+        
+        key = (route.cedis_id, route.day_of_week)
+        groups = self._table('groups')
+        remaining = groups[key] - {route.id}
+        if remaining:
+            groups[key] = remaining
+        else:
+            del groups[key]
+        self._index_clients(route.id, route.client_ids, add=False)
+        self._add_stats(key, -1, -len(route.client_ids))
+    
+    def _reindex(self, previous: Optional[Route], route: Optional[Route]) -> None:
+        """
+        Actualiza los índices al reemplazar una ruta. Si sigue activa en el
+        mismo grupo, solo se tocan los clientes agregados o quitados.
+        """
+        if (
+            previous is not None and route is not None
+            and previous.is_active and route.is_active
+            and (previous.cedis_id, previous.day_of_week) == (route.cedis_id, route.day_of_week)
+        ):
+            before, after = set(previous.client_ids), set(route.client_ids)
+            self._index_clients(route.id, after - before, add=True)
+            self._index_clients(route.id, before - after, add=False)
+            self._add_stats((route.cedis_id, route.day_of_week), 0, len(after) - len(before))
+            return
+        
+        if previous is not None:
+            self._unindex(previous)
+        if route is not None:
+            self._index(route)
+    
+    def _index_clients(self, route_id: str, client_ids: Iterable[str], add: bool) -> None:
+        clients = self._table('clients')
+        for client_id in client_ids:
+            route_ids = clients.get(client_id, frozenset())
+            route_ids = route_ids | {route_id} if add else route_ids - {route_id}
+            if route_ids:
+                clients[client_id] = route_ids
+            else:
+                clients.pop(client_id, None)
+    
+    def _add_stats(self, key: GroupKey, routes: int, stops: int) -> None:
+        stats = self._table('stats')
+        active_routes, total_stops = stats.get(key, (0, 0))
+        if active_routes + routes:
+            stats[key] = (active_routes + routes, total_stops + stops)
+        else:
+            stats.pop(key, None)
+    
+    def _record_change(self, route_id: str, operation: str) -> None:
+        seq = sequence_cursor(len(self._changes) + 1)
+        changed_at = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(self._clock()))
+        self._changes.append(RouteChange(seq=seq, route_id=route_id, operation=operation, changed_at=changed_at))
+    
+    @staticmethod
+    def _summary(route: Route) -> RouteSummary:
+        return RouteSummary(
+            id=route.id,
+            name=route.name,
+            cedis_id=route.cedis_id,
+            day_of_week=route.day_of_week,
+            client_count=len(route.client_ids),
+            is_active=route.is_active,
+            version=route.version,
+            metrics=route.metrics
+        )
+    
+    def _active_routes(self) -> List[Route]:
+        return sorted(
+            (route for route in self._state.routes.values() if route.is_active),
+            key=lambda route: route.name
+        )
+    
+    def _all_routes(self) -> List[Route]:
+        return sorted(self._state.routes.values(), key=lambda route: (not route.is_active, route.name))
+    
+    def save(self, route: Route) -> None:
+        """
+        Guarda una nueva ruta.
+        
+        Args:
+            route: La ruta a guardar
+            
+        Raises:
+            ValueError: Si la ruta ya existe
+        """
+        if route.id in self._state.routes:
+            raise ValueError(f"La ruta {route.id} ya existe")
+        
+        self._store(route)
+        self._record_change(route.id, RouteChange.INSERT)
+    
+    def update(self, route: Route, expected_version: Optional[int] = None) -> None:
+        """
+        Actualiza una ruta con el mismo compare-and-swap de versión que SQLite.
+        Si la ruta estaba archivada, deja de estarlo.
+        
+        Args:
+            route: La ruta a actualizar
+            expected_version: Versión almacenada esperada; None = route.version
+            
+        Raises:
+            ValueError: Si la ruta no existe
+            ConcurrentModificationError: Si otro usuario modificó la ruta
+        """
+        if expected_version is None:
+            expected_version = route.version
+        
+        stored = self._state.routes.get(route.id)
+        if stored is None:
+            raise ValueError(f"Ruta {route.id} no encontrada para actualizar")
+        if stored.version != expected_version:
+            raise ConcurrentModificationError(route.id, expected_version)
+        
+        route.version += 1
+        if route.id in self._state.archived:
+            del self._table('archived')[route.id]
+        self._store(route)
+        self._record_change(route.id, RouteChange.UPDATE)
+    
+    def move_stop(
+        self,
+        route_id: str,
+        client_id: str,
+        before: Optional[str],
+        after: Optional[str],
+        expected_version: Optional[int] = None,
+        metrics: Optional[RouteMetrics] = None
+    ) -> None:
+        """
+        Mueve una parada entre dos paradas vecinas. Si ya está en esa
+        posición, no cambia la ruta ni su versión.
+        
+        Args:
+            route_id: ID de la ruta
+            client_id: Cliente a mover
+            before: Cliente que quedará inmediatamente antes (None = inicio)
+            after: Cliente que quedará inmediatamente después (None = final)
+            expected_version: Versión vista por el usuario; None para no verificarla
+            metrics: Métricas de la ruta con la parada movida; None para
+                conservar las guardadas
+            
+        Raises:
+            ValueError: Si la ruta o los clientes no existen, o before y
+                after no son vecinos
+            ConcurrentModificationError: Si la ruta cambió desde expected_version
+        """
+        stored = self._state.routes.get(route_id)
+        if stored is None:
+            raise ValueError(f"Ruta {route_id} no encontrada")
+        if expected_version is not None and stored.version != expected_version:
+            raise ConcurrentModificationError(route_id, expected_version)
+        
+        if client_id in (before, after):
+            raise ValueError("Un cliente no puede ser vecino de sí mismo")
+        
+        for stop in (client_id, before, after):
+            if stop is not None and stop not in stored.client_ids:
+                raise ValueError(f"El cliente {stop} no está en la ruta")
+        
+        client_ids = [c for c in stored.client_ids if c != client_id]
+        if before is not None:
+            position = client_ids.index(before) + 1
+            if after is not None and client_ids[position:position + 1] != [after]:
+                raise ValueError(f"Los clientes {before} y {after} no son consecutivos")
+        elif after is not None:
+            position = client_ids.index(after)
+        else:
+            raise ValueError("Debe indicar el cliente anterior o el siguiente")
+        client_ids.insert(position, client_id)
+        
+        if client_ids == stored.client_ids:
+            return
+        
+        self._store(replace(
+            stored,
+            client_ids=client_ids,
+            version=stored.version + 1,
+            metrics=metrics if metrics is not None else stored.metrics
+        ))
+        self._record_change(route_id, RouteChange.UPDATE)
+    
+    def find_by_id(self, route_id: str) -> Optional[Route]:
+        route = self._state.routes.get(route_id)
+        return _copy(route) if route is not None else None
+    
+    def get_all(self) -> List[Route]:
+        return [_copy(route) for route in self._active_routes()]
+    
+    def get_all_including_inactive(self) -> List[Route]:
+        return [_copy(route) for route in self._all_routes()]
+    
+    def get_summaries(self, include_inactive: bool = False) -> List[RouteSummary]:
+        routes = self._all_routes() if include_inactive else self._active_routes()
+        return [self._summary(route) for route in routes]
+    
+    def delete(self, route_id: str) -> None:
+        """
+        Elimina una ruta.
+        
+        Args:
+            route_id: ID de la ruta a eliminar
+            
+        Raises:
+            ValueError: Si la ruta no existe
+        """
+        route = self._state.routes.get(route_id)
+        if route is None:
+            raise ValueError(f"Ruta {route_id} no encontrada para eliminar")
+        
+        del self._table('routes')[route_id]
+        del self._table('updated_at')[route_id]
+        if route_id in self._state.archived:
+            del self._table('archived')[route_id]
+        self._reindex(route, None)
+        self._record_change(route_id, RouteChange.DELETE)
+    
+    def get_by_cedis_and_day(self, cedis_id: str, day_of_week: str) -> List[Route]:
+        route_ids = self._state.groups.get((cedis_id, day_of_week.upper()), frozenset())
+        routes = sorted((self._state.routes[route_id] for route_id in route_ids), key=lambda route: route.name)
+        return [_copy(route) for route in routes]
+    
+    def find_client_routes(
+        self,
+        cedis_id: str,
+        day_of_week: str,
+        client_ids: Iterable[str]
+    ) -> Dict[str, List[str]]:
+        """
+        Obtiene las rutas activas de un CEDIS y día que visitan cada cliente,
+        cruzando el índice por cliente con el índice por grupo.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            day_of_week: Día de la semana
+            client_ids: Clientes a consultar
+            
+        Returns:
+            IDs de ruta por cliente; los clientes sin rutas no aparecen
+        """
+        group = self._state.groups.get((cedis_id, day_of_week.upper()), frozenset())
+        routes_by_client: Dict[str, List[str]] = {}
+        for client_id in dict.fromkeys(client_ids):
+            route_ids = self._state.clients.get(client_id, frozenset()) & group
+            if route_ids:
+                routes_by_client[client_id] = sorted(route_ids)
+        return routes_by_client
+    
+    def find_conflicts(self, cedis_id: str, day_of_week: str) -> List[ClientConflict]:
+        """
+        Obtiene los clientes asignados a más de una ruta activa de un CEDIS
+        el mismo día, recorriendo solo las paradas de las rutas del grupo.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            day_of_week: Día de la semana
+            
+        Returns:
+            Conflictos ordenados por cliente
+        """
+        day_of_week = day_of_week.upper()
+        route_ids_by_client: Dict[str, List[str]] = {}
+        for route_id in self._state.groups.get((cedis_id, day_of_week), frozenset()):
+            for client_id in self._state.routes[route_id].client_ids:
+                route_ids_by_client.setdefault(client_id, []).append(route_id)
+        
+        return [
+            ClientConflict(
+                cedis_id=cedis_id,
+                day_of_week=day_of_week,
+                client_id=client_id,
+                route_ids=tuple(sorted(route_ids))
+            )
+            for client_id, route_ids in sorted(route_ids_by_client.items())
+            if len(route_ids) > 1
+        ]
+    
+    def search_routes(self, query: str, limit: int = 20) -> List[RouteSummary]:
+        """
+        Busca rutas activas cuyo nombre, CEDIS o clientes tengan una palabra
+        que empiece por cada término. Sin índice de texto, el resultado se
+        ordena por nombre.
+        
+        Args:
+            query: Texto ingresado por el usuario
+            limit: Número máximo de resultados
+            
+        Returns:
+            Resúmenes de rutas coincidentes
+        """
+        # Se descartan los términos sin letras ni dígitos (p. ej. "-"): no producen tokens
+        terms = [term.lower() for term in re.findall(r"[\w-]*\w[\w-]*", query)]
+        if not terms or limit <= 0:
+            return []
+        
+        matches = []
+        for route in self._active_routes():
+            words = [word.lower() for word in (*route.name.split(), route.cedis_id, *route.client_ids)]
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                matches.append(self._summary(route))
+                if len(matches) == limit:
+                    break
+        return matches
+    
+    def get_statistics(self, filters: RouteStatisticsFilter) -> RouteStatistics:
+        """
+        Obtiene estadísticas desde los agregados por grupo; las rutas más
+        grandes se eligen solo entre las rutas activas de los grupos filtrados.
+        
+        Args:
+            filters: CEDIS, día y cantidad de rutas más grandes
+            
+        Returns:
+            Estadísticas agregadas
+        """
+        day_of_week = filters.day_of_week.upper() if filters.day_of_week else None
+        keys = sorted(
+            key for key in self._state.stats
+            if (not filters.cedis_id or key[0] == filters.cedis_id)
+            and (not day_of_week or key[1] == day_of_week)
+        )
+        
+        groups = [
+            RouteGroupStatistics(
+                cedis_id=cedis_id,
+                day_of_week=day,
+                active_routes=self._state.stats[(cedis_id, day)][0],
+                total_stops=self._state.stats[(cedis_id, day)][1]
+            )
+            for cedis_id, day in keys
+        ]
+        
+        candidates = (self._state.routes[route_id] for key in keys for route_id in self._state.groups[key])
+        largest = heapq.nlargest(filters.top_n, candidates, key=lambda route: len(route.client_ids))
+        
+        return RouteStatistics(groups=groups, largest_routes=[self._summary(route) for route in largest])
+    
+    def changes_since(self, seq: ChangeCursor, limit: int = 100) -> List[RouteChange]:
+        """
+        Obtiene los cambios posteriores a una secuencia. Las secuencias son
+        consecutivas desde 1, así que el primer cambio se ubica por posición.
+        
+        Args:
+            seq: Última secuencia procesada por el consumidor
+            limit: Número máximo de cambios a retornar
+            
+        Returns:
+            Lista de cambios ordenados por secuencia
+            
+        Raises:
+            ValueError: Si el límite no es positivo o el cursor no es válido
+        """
+        if limit <= 0:
+            raise ValueError("El límite debe ser mayor que cero")
+        start = cursor_sequence(seq)
+        return self._changes[start:start + limit]
+    
+    def add_lineage(self, parent_ids: List[str], child_ids: List[str], operation: str) -> None:
+        parents = self._table('parents')
+        children = self._table('children')
+        for parent_id in parent_ids:
+            for child_id in child_ids:
+                edge = RouteLineageEdge(parent_id=parent_id, child_id=child_id, operation=operation)
+                parents[child_id] = parents.get(child_id, ()) + (edge,)
+                children[parent_id] = children.get(parent_id, ()) + (edge,)
+    
+    def get_ancestors(self, route_id: str) -> List[RouteLineageEdge]:
+        return self._edges_by_depth(route_id, towards_parents=True)
+    
+    def get_descendants(self, route_id: str) -> List[RouteLineageEdge]:
+        return self._edges_by_depth(route_id, towards_parents=False)
+    
+    def _edges_by_depth(self, route_id: str, towards_parents: bool) -> List[RouteLineageEdge]:
+        """
+        Recorre el linaje en anchura desde una ruta; cada ruta se expande una
+        sola vez aunque haya varios caminos hasta ella.
+        """
+        adjacency = self._state.parents if towards_parents else self._state.children
+        
+        edges: List[RouteLineageEdge] = []
+        visited = {route_id}
+        frontier = [route_id]
+        depth = 1
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for edge in adjacency.get(node, ()):
+                    edges.append(replace(edge, depth=depth))
+                    far = edge.parent_id if towards_parents else edge.child_id
+                    if far not in visited:
+                        visited.add(far)
+                        next_frontier.append(far)
+            frontier = next_frontier
+            depth += 1
+        
+        return edges
+    
+    def archive_inactive_routes(self, older_than_days: int) -> int:
+        """
+        Marca como archivadas las rutas inactivas sin escrituras en los
+        últimos días. En memoria no hay otra tabla adonde moverlas: siguen
+        disponibles por ID y en los listados que incluyen inactivas, y
+        actualizarlas las desarchiva.
+        
+        Args:
+            older_than_days: Días sin modificaciones para archivar una ruta
+            
+        Returns:
+            Número de rutas archivadas
+        """
+        cutoff = self._clock() - older_than_days * 86400
+        route_ids = [
+            route.id for route in self._state.routes.values()
+            if not route.is_active
+            and route.id not in self._state.archived
+            and self._state.updated_at[route.id] <= cutoff
+        ]
+        if route_ids:
+            self._table('archived').update(dict.fromkeys(route_ids))
+        return len(route_ids)
+    
+    def fork(self) -> 'InMemoryRouteRepository':
+        """
+        Crea un repositorio que comparte el estado confirmado de este; cada
+        uno escribe en su propia capa encima. Los cambios de una transacción
+        abierta no pasan al bifurcado.
+        
+        Returns:
+            Repositorio bifurcado
+        """
+        committed = self._committed if self._committed is not None else self._state
+        if committed.routes.depth >= self._MAX_LAYERS:
+            committed = committed.map(_LayeredDict.flattened)
+        
+        forked = InMemoryRouteRepository(clock=self._clock)
+        forked._state = committed.map(_LayeredDict.pushed)
+        if self._committed is None:
+            forked._changes = list(self._changes)
+        else:
+            forked._changes = self._changes[:self._changes_mark]
+        
+        # Las capas confirmadas quedan compartidas: este repositorio también
+        # pasa a escribir sobre una capa propia
+        own = committed.map(_LayeredDict.pushed)
+        if self._committed is None:
+            self._state = own
+        else:
+            self._committed = own
+            self._state = _State(**{
+                field.name: getattr(self._state, field.name).on(getattr(own, field.name))
+                for field in fields(_State)
+            })
+        return forked
+    
+    def begin_transaction(self) -> None:
+        """
+        Inicia una transacción conservando el estado confirmado. Si ya hay
+        una abierta (explícita o implícita), continúa en ella.
+        """
+        if self._committed is None:
+            self._begin()
+    
+    def commit_transaction(self) -> None:
+        """
+        Confirma la transacción actual: su capa se vuelca en la del estado
+        confirmado.
+        """
+        if self._committed is None:
+            return
+        self._state = self._state.map(_LayeredDict.merged)
+        self._committed = None
+    
+    def rollback_transaction(self) -> None:
+        """
+        Vuelve al estado confirmado y descarta los cambios registrados
+        durante la transacción.
+        """
+        if self._committed is None:
+            return
+        self._state = self._committed
+        del self._changes[self._changes_mark:]
+        self._committed = None
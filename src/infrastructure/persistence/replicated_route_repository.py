@@ -0,0 +1,198 @@
+"""
+Replicated Route Repository - Infrastructure Layer
+Adaptador de persistencia que sirve las lecturas desde una réplica SQLite en
+memoria y envía las escrituras a la base principal.
+"""
+import sqlite3
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from src.domain.models.route import Route
+from src.domain.models.route_metrics import RouteMetrics
+from src.domain.models.route_change import ChangeCursor, RouteChange
+from src.domain.models.route_lineage import RouteLineageEdge
+from src.domain.models.route_summary import RouteSummary
+from src.domain.models.route_statistics import RouteStatistics, RouteStatisticsFilter
+from src.domain.models.client_conflict import ClientConflict
+from src.domain.ports.route_repository_port import RouteRepositoryPort
+from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+
+
+class ReplicatedRouteRepository(RouteRepositoryPort):
+    """
+    Repositorio con réplica de lectura en memoria.
+    
+    La réplica es una copia completa de la base principal hecha con la API
+    de backup de sqlite3, así que tiene los mismos índices, estadísticas y
+    búsqueda que la principal y se consulta con el mismo código. Mientras
+    tenga menos de max_staleness_seconds, las lecturas no tocan el archivo.
+    Al vencer, solo se vuelve a copiar si PRAGMA data_version indica que
+    otra conexión confirmó cambios.
+    
+    Las escrituras van a la principal y marcan la réplica como desactualizada,
+    de modo que quien escribe lee sus propios cambios. Durante una transacción
+    las lecturas también van a la principal, porque deben ver la versión
+    vigente para el compare-and-swap; un conflicto por leer una réplica vieja
+    fuera de transacción termina en rollback, que fuerza la actualización
+    antes del reintento.
+    
+    Cada actualización copia la base completa, así que solo conviene cuando
+    las lecturas superan con creces a las escrituras; por eso es opcional y
+    no el repositorio por defecto.
+    """
+    
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        max_staleness_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """
+        Inicializa el repositorio principal y hace la primera copia.
+        
+        Args:
+            connection: Conexión a la base de datos principal
+            max_staleness_seconds: Antigüedad máxima de la réplica antes de
+                comprobar si hay cambios de otras conexiones
+            clock: Reloj monótono en segundos
+            
+        Raises:
+            ValueError: Si max_staleness_seconds es negativo
+        """
+        if max_staleness_seconds < 0:
+            raise ValueError("La antigüedad máxima de la réplica no puede ser negativa")
+        
+        self._primary = SqliteRouteRepository(connection)
+        self._primary_conn = connection
+        self._max_staleness = max_staleness_seconds
+        self._clock = clock
+        
+        self._replica_conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._copy_primary()
+        # Se crea después de la copia: el esquema ya está al día y no ejecuta DDL
+        self._replica = SqliteRouteRepository(self._replica_conn)
+    
+    def _copy_primary(self) -> None:
+        """Copia la base principal completa sobre la réplica."""
+        self._primary_conn.backup(self._replica_conn)
+        self._data_version = self._primary_conn.execute("PRAGMA data_version").fetchone()[0]
+        self._refreshed_at = self._clock()
+        self._dirty = False
+    
+    def _reader(self) -> SqliteRouteRepository:
+        """
+        Repositorio desde el que se lee: la principal si hay una transacción
+        abierta, si no la réplica, actualizada si venció o hubo escrituras.
+        """
+        if self._primary_conn.in_transaction:
+            return self._primary
+        
+        if self._dirty:
+            self._copy_primary()
+        elif self._clock() - self._refreshed_at >= self._max_staleness:
+            data_version = self._primary_conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._copy_primary()
+            else:
+                self._refreshed_at = self._clock()
+        
+        return self._replica
+    
+    def save(self, route: Route) -> None:
+        self._dirty = True
+        self._primary.save(route)
+    
+    def save_many(self, routes: Iterable[Route]) -> int:
+        self._dirty = True
+        return self._primary.save_many(routes)
+    
+    def update(self, route: Route, expected_version: Optional[int] = None) -> None:
+        self._dirty = True
+        self._primary.update(route, expected_version)
+    
+    def move_stop(
+        self,
+        route_id: str,
+        client_id: str,
+        before: Optional[str],
+        after: Optional[str],
+        expected_version: Optional[int] = None,
+        metrics: Optional[RouteMetrics] = None
+    ) -> None:
+        self._dirty = True
+        self._primary.move_stop(route_id, client_id, before, after, expected_version, metrics)
+    
+    def delete(self, route_id: str) -> None:
+        self._dirty = True
+        self._primary.delete(route_id)
+    
+    def add_lineage(self, parent_ids: List[str], child_ids: List[str], operation: str) -> None:
+        self._dirty = True
+        self._primary.add_lineage(parent_ids, child_ids, operation)
+    
+    def archive_inactive_routes(self, older_than_days: int) -> int:
+        self._dirty = True
+        return self._primary.archive_inactive_routes(older_than_days)
+    
+    def find_by_id(self, route_id: str) -> Optional[Route]:
+        return self._reader().find_by_id(route_id)
+    
+    def get_all(self) -> List[Route]:
+        return self._reader().get_all()
+    
+    def get_all_including_inactive(self) -> List[Route]:
+        return self._reader().get_all_including_inactive()
+    
+    def iter_routes(self, batch_size: int = 500) -> Iterator[Route]:
+        return self._reader().iter_routes(batch_size)
+    
+    def get_summaries(self, include_inactive: bool = False) -> List[RouteSummary]:
+        return self._reader().get_summaries(include_inactive)
+    
+    def get_by_cedis_and_day(self, cedis_id: str, day_of_week: str) -> List[Route]:
+        return self._reader().get_by_cedis_and_day(cedis_id, day_of_week)
+    
+    def find_client_routes(
+        self,
+        cedis_id: str,
+        day_of_week: str,
+        client_ids: Iterable[str]
+    ) -> Dict[str, List[str]]:
+        return self._reader().find_client_routes(cedis_id, day_of_week, client_ids)
+    
+    def find_conflicts(self, cedis_id: str, day_of_week: str) -> List[ClientConflict]:
+        return self._reader().find_conflicts(cedis_id, day_of_week)
+    
+    def search_routes(self, query: str, limit: int = 20) -> List[RouteSummary]:
+        return self._reader().search_routes(query, limit)
+    
+    def get_statistics(self, filters: RouteStatisticsFilter) -> RouteStatistics:
+        return self._reader().get_statistics(filters)
+    
+    def changes_since(self, seq: ChangeCursor, limit: int = 100) -> List[RouteChange]:
+        return self._reader().changes_since(seq, limit)
+    
+    def get_ancestors(self, route_id: str) -> List[RouteLineageEdge]:
+        return self._reader().get_ancestors(route_id)
+    
+    def get_descendants(self, route_id: str) -> List[RouteLineageEdge]:
+        return self._reader().get_descendants(route_id)
+    
+    def begin_transaction(self) -> None:
+        self._primary.begin_transaction()
+    
+    def commit_transaction(self) -> None:
+        self._primary.commit_transaction()
+    
+    def rollback_transaction(self) -> None:
+        # Un rollback suele seguir a un conflicto de versión: la siguiente
+        # lectura debe ver la versión vigente
+        self._dirty = True
+        self._primary.rollback_transaction()
+    
+    def close(self) -> None:
+        """
+        Cierra la réplica y la conexión a la base principal.
+        """
+        self._replica_conn.close()
+        self._primary.close()
@@ -0,0 +1,374 @@
+"""
+Route Plan Files - Infrastructure Layer
+Exportación e importación masiva de planes de rutas en archivos.
+
+Un plan son dos tablas: routes (una fila por ruta) y stops (una fila por
+parada, con la posición dentro de la ruta). Las paradas se escriben en el
+mismo orden que las rutas, así que ambos archivos se leen a la par sin
+cargar el plan completo: la memoria usada depende del tamaño del lote, no
+del plan.
+
+Formatos:
+    csv: routes.csv y stops.csv, con encabezado
+    parquet: routes.parquet y stops.parquet (requiere pyarrow)
+    arrow: routes.arrow y stops.arrow en formato Arrow IPC (requiere pyarrow)
+"""
+import csv
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.domain.models.route import Route
+from src.domain.models.route_metrics import RouteMetrics
+from src.domain.ports.route_repository_port import RouteRepositoryPort
+
+FORMATS = ('csv', 'parquet', 'arrow')
+
+ROUTE_COLUMNS = (
+    'id', 'name', 'cedis_id', 'day_of_week', 'is_active', 'version',
+    'capacity', 'shift_start', 'shift_minutes', 'distance_km', 'duration_minutes'
+)
+STOP_COLUMNS = ('route_id', 'position', 'client_id')
+
+# Fábricas de tipos de pyarrow para cada columna (pa.bool_, pa.string, ...)
+_ROUTE_TYPES = (
+    'string', 'string', 'string', 'string', 'bool_', 'int64',
+    'float64', 'int64', 'int64', 'float64', 'float64'
+)
+_STOP_TYPES = ('string', 'int64', 'string')
+
+PathLike = Union[str, Path]
+
+
+def export_route_plan(
+    repository: RouteRepositoryPort,
+    directory: PathLike,
+    file_format: str = 'csv',
+    batch_size: int = 1000
+) -> Tuple[int, int]:
+    """
+    Exporta todas las rutas del repositorio (activas, inactivas y
+    archivadas) y sus paradas, leyéndolas y escribiéndolas por lotes.
+    
+    Args:
+        repository: Repositorio de origen
+        directory: Carpeta donde se crean los archivos (se crea si no existe)
+        file_format: 'csv', 'parquet' o 'arrow'
+        batch_size: Rutas por lote
+        
+    Returns:
+        Número de rutas y de paradas exportadas
+        
+    Raises:
+        ValueError: Si el formato no existe
+        ImportError: Si el formato requiere pyarrow y no está instalado
+    """
+    _extension(file_format)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    routes_writer = _open_writer(directory, 'routes', file_format, ROUTE_COLUMNS, _ROUTE_TYPES)
+    try:
+        stops_writer = _open_writer(directory, 'stops', file_format, STOP_COLUMNS, _STOP_TYPES)
+    except Exception:
+        routes_writer.close()
+        raise
+    
+    route_count = stop_count = 0
+    try:
+        routes = repository.iter_routes(batch_size)
+        while True:
+            batch = list(islice(routes, batch_size))
+            if not batch:
+                break
+            stops = [
+                (route.id, position, client_id)
+                for route in batch
+                for position, client_id in enumerate(route.client_ids)
+            ]
+            routes_writer.write([_route_row(route) for route in batch])
+            stops_writer.write(stops)
+            route_count += len(batch)
+            stop_count += len(stops)
+    finally:
+        routes_writer.close()
+        stops_writer.close()
+    
+    return route_count, stop_count
+
+
+def read_route_plan(
+    directory: PathLike,
+    file_format: str = 'csv',
+    batch_size: int = 1000
+) -> Iterator[Route]:
+    """
+    Lee un plan exportado, ruta por ruta. Cada ruta se valida con las
+    invariantes de Route: campos obligatorios, día válido, restricciones
+    operativas y clientes no vacíos ni repetidos.
+    
+    Args:
+        directory: Carpeta con los archivos del plan
+        file_format: 'csv', 'parquet' o 'arrow'
+        batch_size: Filas leídas por lote de cada archivo
+        
+    Returns:
+        Iterador de rutas
+        
+    Raises:
+        ValueError: Si el formato no existe, o una fila es inválida o las
+            paradas no siguen el orden de las rutas
+        ImportError: Si el formato requiere pyarrow y no está instalado
+    """
+    directory = Path(directory)
+    routes = _read_rows(directory, 'routes', file_format, ROUTE_COLUMNS, batch_size)
+    stops = _read_rows(directory, 'stops', file_format, STOP_COLUMNS, batch_size)
+    pending = next(stops, None)
+    
+    for number, row in enumerate(routes, start=1):
+        try:
+            route = _row_route(row)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Ruta {number} inválida: {e}") from e
+        
+        while pending is not None and pending[0] == route.id:
+            _, position, client_id = pending
+            if int(position) != len(route.client_ids):
+                raise ValueError(
+                    f"Ruta {route.id}: se esperaba la posición {len(route.client_ids)} "
+                    f"y se encontró {position}"
+                )
+            try:
+                route.add_client(client_id)
+            except ValueError as e:
+                raise ValueError(f"Ruta {route.id}: {e}") from e
+            pending = next(stops, None)
+        
+        yield route
+    
+    if pending is not None:
+        raise ValueError(
+            f"Parada de la ruta {pending[0]} fuera de orden o de una ruta que no está en el plan"
+        )
+
+
+def import_route_plan(
+    repository: RouteRepositoryPort,
+    directory: PathLike,
+    file_format: str = 'csv',
+    batch_size: int = 1000
+) -> Tuple[int, int]:
+    """
+    Importa un plan exportado. Las rutas se guardan por lotes con
+    save_many dentro de una sola transacción: las paradas fuera de orden
+    solo se detectan al terminar de leer, así que ante cualquier error se
+    revierte la carga completa y no quedan rutas sin sus paradas.
+    
+    Args:
+        repository: Repositorio de destino
+        directory: Carpeta con los archivos del plan
+        file_format: 'csv', 'parquet' o 'arrow'
+        batch_size: Rutas por lote
+        
+    Returns:
+        Número de rutas y de paradas importadas
+        
+    Raises:
+        ValueError: Si el plan es inválido (ver read_route_plan)
+        ImportError: Si el formato requiere pyarrow y no está instalado
+        Exception: Si alguna ruta ya existe en el repositorio
+    """
+    routes = read_route_plan(directory, file_format, batch_size)
+    route_count = stop_count = 0
+    
+    try:
+        repository.begin_transaction()
+        while True:
+            batch = list(islice(routes, batch_size))
+            if not batch:
+                break
+            repository.save_many(batch)
+            route_count += len(batch)
+            stop_count += sum(len(route.client_ids) for route in batch)
+        repository.commit_transaction()
+    except Exception as e:
+        # Revertir en caso de error
+        repository.rollback_transaction()
+        raise e
+    
+    return route_count, stop_count
+
+
+def _route_row(route: Route) -> Tuple[Any, ...]:
+    """Valores de una ruta en el orden de ROUTE_COLUMNS."""
+    metrics = route.metrics
+    return (
+        route.id, route.name, route.cedis_id, route.day_of_week, route.is_active, route.version,
+        route.capacity, route.shift_start, route.shift_minutes,
+        None if metrics is None else metrics.distance_km,
+        None if metrics is None else metrics.duration_minutes
+    )
+
+
+def _row_route(row: Sequence[Any]) -> Route:
+    """
+    Ruta sin paradas a partir de una fila en el orden de ROUTE_COLUMNS.
+    Acepta los valores tipados de Arrow y las cadenas de CSV (vacía = nulo).
+    """
+    (route_id, name, cedis_id, day_of_week, is_active, version,
+     capacity, shift_start, shift_minutes, distance_km, duration_minutes) = row
+    distance_km = _optional(distance_km, float)
+    return Route(
+        id=route_id,
+        name=name,
+        cedis_id=cedis_id,
+        day_of_week=day_of_week,
+        is_active=_flag(is_active),
+        version=int(version),
+        capacity=_optional(capacity, float),
+        shift_start=int(shift_start),
+        shift_minutes=_optional(shift_minutes, int),
+        metrics=None if distance_km is None else RouteMetrics(
+            distance_km=distance_km, duration_minutes=float(duration_minutes)
+        )
+    )
+
+
+def _optional(value: Any, cast: Callable[[Any], Any]) -> Any:
+    """Convierte un valor que puede ser nulo (None o cadena vacía)."""
+    if value is None or value == '':
+        return None
+    return cast(value)
+
+
+def _flag(value: Any) -> bool:
+    """Booleano de Arrow o true/false (también 1/0) de CSV."""
+    if isinstance(value, str):
+        if value.lower() not in ('1', '0', 'true', 'false'):
+            raise ValueError(f"is_active inválido: {value!r}")
+        return value.lower() in ('1', 'true')
+    return bool(value)
+
+
+class _CsvWriter:
+    """Escribe filas en un CSV con encabezado."""
+    
+    def __init__(self, path: Path, columns: Sequence[str]) -> None:
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+    
+    def write(self, rows: List[Tuple[Any, ...]]) -> None:
+        # csv escribe None como celda vacía y los booleanos como True/False
+        self._writer.writerows(rows)
+    
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ArrowWriter:
+    """Escribe cada lote de filas como un record batch de Parquet o Arrow IPC."""
+    
+    def __init__(self, path: Path, file_format: str, columns: Sequence[str], types: Sequence[str]) -> None:
+        pa = _pyarrow()
+        self._pa = pa
+        self._schema = pa.schema([(column, getattr(pa, name)()) for column, name in zip(columns, types)])
+        self._parquet = file_format == 'parquet'
+        if self._parquet:
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(str(path), self._schema)
+        else:
+            self._writer = pa.ipc.new_file(str(path), self._schema)
+    
+    def write(self, rows: List[Tuple[Any, ...]]) -> None:
+        if not rows:
+            return
+        columns = [
+            self._pa.array(values, type=field.type)
+            for values, field in zip(zip(*rows), self._schema)
+        ]
+        batch = self._pa.record_batch(columns, schema=self._schema)
+        if self._parquet:
+            self._writer.write_table(self._pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+    
+    def close(self) -> None:
+        self._writer.close()
+
+
+def _open_writer(
+    directory: Path,
+    table: str,
+    file_format: str,
+    columns: Sequence[str],
+    types: Sequence[str]
+) -> Union[_CsvWriter, _ArrowWriter]:
+    """Abre el archivo de una tabla del plan para escribir."""
+    path = directory / f"{table}.{_extension(file_format)}"
+    if file_format == 'csv':
+        return _CsvWriter(path, columns)
+    return _ArrowWriter(path, file_format, columns, types)
+
+
+def _read_rows(
+    directory: Path,
+    table: str,
+    file_format: str,
+    columns: Sequence[str],
+    batch_size: int
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    Filas de una tabla del plan, en el orden de `columns`, leídas por lotes.
+    
+    Raises:
+        ValueError: Si faltan columnas
+    """
+    path = directory / f"{table}.{_extension(file_format)}"
+    
+    if file_format == 'csv':
+        with open(path, newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            indexes = _column_indexes(path, header, columns)
+            for row in reader:
+                yield tuple(row[i] for i in indexes)
+        return
+    
+    pa = _pyarrow()
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(str(path))
+        _column_indexes(path, parquet_file.schema_arrow.names, columns)
+        batches: Iterable[Any] = parquet_file.iter_batches(batch_size=batch_size, columns=list(columns))
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(str(path)))
+        _column_indexes(path, reader.schema.names, columns)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    
+    for batch in batches:
+        yield from zip(*(batch.column(column).to_pylist() for column in columns))
+
+
+def _column_indexes(path: Path, header: Sequence[str], columns: Sequence[str]) -> List[int]:
+    """Posición de cada columna esperada en el encabezado del archivo."""
+    missing = [column for column in columns if column not in header]
+    if missing:
+        raise ValueError(f"{path.name}: faltan las columnas {', '.join(missing)}")
+    return [list(header).index(column) for column in columns]
+
+
+def _extension(file_format: Optional[str]) -> str:
+    """Extensión de archivo de un formato."""
+    if file_format not in FORMATS:
+        raise ValueError(f"Formato inválido. Debe ser uno de: {', '.join(FORMATS)}")
+    return file_format
+
+
+def _pyarrow() -> Any:
+    """Importa pyarrow, que solo se necesita para Parquet y Arrow."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Los formatos parquet y arrow requieren pyarrow (pip install pyarrow)") from e
+    return pyarrow
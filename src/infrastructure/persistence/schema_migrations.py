@@ -0,0 +1,626 @@
+"""
+Schema Migrations - Infrastructure Layer
+Versionado del esquema SQLite con PRAGMA user_version.
+Cada migración se aplica en su propia transacción junto con el cambio de
+versión, así que una base nunca queda a medio migrar. Si el esquema está al
+día, abrir un repositorio solo lee la versión y no ejecuta DDL.
+
+Las migraciones 1 a 7 forman el esquema base. Las bases creadas antes del
+versionado tienen user_version = 0 y pueden tener parte de ese esquema, por
+eso esos pasos son idempotentes y actualizan las estructuras antiguas. Las
+migraciones que se agreguen después se aplican una sola vez y no lo necesitan.
+"""
+import json
+import sqlite3
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Set
+
+from src.infrastructure.persistence.fractional_index import spread_keys
+
+
+@dataclass(frozen=True, slots=True)
+class Migration:
+    """Paso del esquema: lleva la base de la versión anterior a `version`."""
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Cursor], None]
+
+
+def _columns(cursor: sqlite3.Cursor, table: str) -> Set[str]:
+    """Columnas actuales de una tabla."""
+    return {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+
+
+def _table_exists(cursor: sqlite3.Cursor, table: str) -> bool:
+    return cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def _create_routes(cursor: sqlite3.Cursor) -> None:
+    """
+    Rutas, diccionario de clientes y paradas ordenadas por clave fraccional.
+    RNF-RUT-03: Garantiza estructura de datos adecuada.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS routes (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            cedis_id TEXT NOT NULL,
+            day_of_week TEXT NOT NULL,
+            stop_count INTEGER NOT NULL DEFAULT 0,
+            is_active INTEGER NOT NULL DEFAULT 1,
+            version INTEGER NOT NULL DEFAULT 1,
+            capacity REAL,
+            shift_start INTEGER NOT NULL DEFAULT 480,
+            shift_minutes INTEGER,
+            distance_km REAL,
+            duration_minutes REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Diccionario de clientes: cada ID externo se guarda una sola vez y las
+    # rutas referencian su clave entera
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS client_keys (
+            key INTEGER PRIMARY KEY,
+            client_id TEXT NOT NULL UNIQUE
+        )
+    """)
+    
+    # Paradas: una fila por cliente, ordenadas por una clave fraccional.
+    # La clave primaria agrupa físicamente las paradas de cada ruta en
+    # orden; el índice único localiza la parada de un cliente.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS route_stops (
+            route_id TEXT NOT NULL,
+            sort_key TEXT NOT NULL,
+            client_key INTEGER NOT NULL,
+            PRIMARY KEY (route_id, sort_key)
+        ) WITHOUT ROWID
+    """)
+    
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_route_stops_client
+        ON route_stops(route_id, client_key)
+    """)
+    
+    # Bases de datos creadas antes del control de concurrencia optimista
+    columns = _columns(cursor, "routes")
+    if 'version' not in columns:
+        cursor.execute("ALTER TABLE routes ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    
+    # Bases de datos que guardaban las paradas dentro de la fila de la ruta
+    # (lista JSON o arreglo empaquetado)
+    if 'client_ids' in columns or 'client_keys' in columns:
+        _migrate_embedded_stops(cursor, columns)
+    
+    # Bases de datos creadas antes de las restricciones operativas
+    columns = _columns(cursor, "routes")
+    if 'capacity' not in columns:
+        cursor.execute("ALTER TABLE routes ADD COLUMN capacity REAL")
+        cursor.execute("ALTER TABLE routes ADD COLUMN shift_start INTEGER NOT NULL DEFAULT 480")
+        cursor.execute("ALTER TABLE routes ADD COLUMN shift_minutes INTEGER")
+    
+    # Bases de datos creadas antes de guardar las métricas de costo
+    if 'distance_km' not in columns:
+        cursor.execute("ALTER TABLE routes ADD COLUMN distance_km REAL")
+        cursor.execute("ALTER TABLE routes ADD COLUMN duration_minutes REAL")
+
+
+def _migrate_embedded_stops(cursor: sqlite3.Cursor, columns: Set[str]) -> None:
+    """
+    Mueve las paradas guardadas dentro de la fila de la ruta (columna JSON
+    client_ids o arreglo empaquetado client_keys) a la tabla route_stops.
+    La tabla de rutas se reconstruye sin la columna antigua; al hacerlo
+    SQLite elimina sus índices y triggers, que crean las migraciones siguientes.
+    
+    Args:
+        cursor: Cursor de la base de datos
+        columns: Columnas actuales de la tabla routes
+    """
+    stops: Dict[str, List[int]] = {}
+    if 'client_keys' in columns:
+        for route_id, blob in cursor.execute("SELECT id, client_keys FROM routes").fetchall():
+            keys = array('I')
+            keys.frombytes(blob)
+            if sys.byteorder == 'big':
+                keys.byteswap()
+            stops[route_id] = keys.tolist()
+    else:
+        client_ids = {
+            route_id: json.loads(ids)
+            for route_id, ids in cursor.execute("SELECT id, client_ids FROM routes").fetchall()
+        }
+        cursor.executemany(
+            "INSERT OR IGNORE INTO client_keys (client_id) VALUES (?)",
+            [(client_id,) for ids in client_ids.values() for client_id in ids]
+        )
+        keys_by_client_id = dict(cursor.execute("SELECT client_id, key FROM client_keys"))
+        stops = {
+            route_id: [keys_by_client_id[client_id] for client_id in ids]
+            for route_id, ids in client_ids.items()
+        }
+    
+    cursor.execute("""
+        CREATE TABLE routes_migrated (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            cedis_id TEXT NOT NULL,
+            day_of_week TEXT NOT NULL,
+            stop_count INTEGER NOT NULL DEFAULT 0,
+            is_active INTEGER NOT NULL DEFAULT 1,
+            version INTEGER NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Las bases más antiguas no tienen todas las columnas de auditoría
+    copied = ", ".join(
+        column for column in (
+            'id', 'name', 'cedis_id', 'day_of_week', 'is_active',
+            'version', 'created_at', 'updated_at'
+        )
+        if column in columns or column == 'version'
+    )
+    cursor.execute(f"INSERT INTO routes_migrated ({copied}) SELECT {copied} FROM routes")
+    cursor.execute("DROP TABLE routes")
+    cursor.execute("ALTER TABLE routes_migrated RENAME TO routes")
+    
+    # Paradas con claves equiespaciadas
+    cursor.executemany(
+        "INSERT INTO route_stops (route_id, sort_key, client_key) VALUES (?, ?, ?)",
+        [
+            (route_id, sort_key, client_key)
+            for route_id, client_keys in stops.items()
+            for sort_key, client_key in zip(spread_keys(len(client_keys)), client_keys)
+        ]
+    )
+    cursor.executemany(
+        "UPDATE routes SET stop_count = ? WHERE id = ?",
+        [(len(client_keys), route_id) for route_id, client_keys in stops.items()]
+    )
+
+
+def _create_change_feed_and_lineage(cursor: sqlite3.Cursor) -> None:
+    """Registro de cambios y grafo de linaje de divisiones y fusiones."""
+    # AUTOINCREMENT garantiza secuencias monótonas que nunca se reutilizan
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS route_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            route_id TEXT NOT NULL,
+            operation TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # La clave primaria cubre la búsqueda de descendientes y el índice por
+    # hijo la de ancestros
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS route_lineage (
+            parent_id TEXT NOT NULL,
+            child_id TEXT NOT NULL,
+            operation TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (parent_id, child_id)
+        ) WITHOUT ROWID
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_route_lineage_child
+        ON route_lineage(child_id, parent_id)
+    """)
+
+
+def _create_statistics(cursor: sqlite3.Cursor) -> None:
+    """
+    Estadísticas materializadas por CEDIS y día y los triggers que las
+    mantienen al insertar, actualizar o eliminar rutas. Cada escritura
+    ajusta solo su grupo, así que consultar el tablero cuesta O(grupos) y
+    no O(rutas).
+    """
+    if not _table_exists(cursor, "route_stats"):
+        cursor.execute("""
+            CREATE TABLE route_stats (
+                cedis_id TEXT NOT NULL,
+                day_of_week TEXT NOT NULL,
+                active_routes INTEGER NOT NULL DEFAULT 0,
+                total_stops INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (cedis_id, day_of_week)
+            ) WITHOUT ROWID
+        """)
+        
+        # Poblar a partir de las rutas existentes
+        cursor.execute("""
+            INSERT INTO route_stats (cedis_id, day_of_week, active_routes, total_stops)
+            SELECT cedis_id, day_of_week, SUM(is_active), SUM(is_active * stop_count)
+            FROM routes
+            GROUP BY cedis_id, day_of_week
+        """)
+    
+    # is_active vale 0 o 1, así que multiplica la contribución de cada fila
+    add_new = """
+        INSERT INTO route_stats (cedis_id, day_of_week, active_routes, total_stops)
+        VALUES (NEW.cedis_id, NEW.day_of_week, NEW.is_active,
+                NEW.is_active * NEW.stop_count)
+        ON CONFLICT (cedis_id, day_of_week) DO UPDATE SET
+            active_routes = active_routes + excluded.active_routes,
+            total_stops = total_stops + excluded.total_stops;
+    """
+    remove_old = """
+        UPDATE route_stats SET
+            active_routes = active_routes - OLD.is_active,
+            total_stops = total_stops - OLD.is_active * OLD.stop_count
+        WHERE cedis_id = OLD.cedis_id AND day_of_week = OLD.day_of_week;
+    """
+    
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_routes_stats_insert
+        AFTER INSERT ON routes
+        BEGIN {add_new} END
+    """)
+    
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_routes_stats_update
+        AFTER UPDATE OF cedis_id, day_of_week, stop_count, is_active ON routes
+        BEGIN {remove_old} {add_new} END
+    """)
+    
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_routes_stats_delete
+        AFTER DELETE ON routes
+        BEGIN {remove_old} END
+    """)
+    
+    # Índice parcial por tamaño para obtener las rutas más grandes
+    # sin ordenar toda la tabla
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_routes_active_size
+        ON routes(stop_count DESC)
+        WHERE is_active = 1
+    """)
+
+
+def _create_daily_assignments(cursor: sqlite3.Cursor) -> None:
+    """
+    Índice de asignaciones diarias: una fila por parada de cada ruta activa,
+    con clave (cedis_id, day_of_week, client_key, route_id). Los triggers
+    sobre routes y route_stops lo mantienen, así que saber qué rutas visitan
+    a un cliente un día es una búsqueda por clave.
+    """
+    if not _table_exists(cursor, "daily_assignments"):
+        cursor.execute("""
+            CREATE TABLE daily_assignments (
+                cedis_id TEXT NOT NULL,
+                day_of_week TEXT NOT NULL,
+                client_key INTEGER NOT NULL,
+                route_id TEXT NOT NULL,
+                PRIMARY KEY (cedis_id, day_of_week, client_key, route_id)
+            ) WITHOUT ROWID
+        """)
+        
+        # Poblar a partir de las rutas existentes
+        cursor.execute("""
+            INSERT INTO daily_assignments (cedis_id, day_of_week, client_key, route_id)
+            SELECT r.cedis_id, r.day_of_week, s.client_key, r.id
+            FROM routes r JOIN route_stops s ON s.route_id = r.id
+            WHERE r.is_active = 1
+        """)
+    
+    # El índice por ruta permite retirar sus filas sin recorrer la tabla
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_daily_assignments_route
+        ON daily_assignments(route_id)
+    """)
+    
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_stops_assignment_insert
+        AFTER INSERT ON route_stops
+        BEGIN
+            INSERT INTO daily_assignments (cedis_id, day_of_week, client_key, route_id)
+            SELECT cedis_id, day_of_week, NEW.client_key, id
+            FROM routes WHERE id = NEW.route_id AND is_active = 1;
+        END
+    """)
+    
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_stops_assignment_delete
+        AFTER DELETE ON route_stops
+        BEGIN
+            DELETE FROM daily_assignments
+            WHERE route_id = OLD.route_id AND client_key = OLD.client_key;
+        END
+    """)
+    
+    # Activar, desactivar o cambiar de CEDIS/día reemplaza las filas de la ruta
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_routes_assignment_update
+        AFTER UPDATE OF cedis_id, day_of_week, is_active ON routes
+        BEGIN
+            DELETE FROM daily_assignments WHERE route_id = OLD.id;
+            INSERT INTO daily_assignments (cedis_id, day_of_week, client_key, route_id)
+            SELECT NEW.cedis_id, NEW.day_of_week, client_key, NEW.id
+            FROM route_stops WHERE route_id = NEW.id AND NEW.is_active = 1;
+        END
+    """)
+    
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_routes_assignment_delete
+        AFTER DELETE ON routes
+        BEGIN
+            DELETE FROM daily_assignments WHERE route_id = OLD.id;
+        END
+    """)
+
+
+def _create_search_index(cursor: sqlite3.Cursor) -> None:
+    """
+    Índice FTS5 de búsqueda sobre nombre, CEDIS y clientes. route_id también
+    se indexa para poder reemplazar la entrada de una ruta con una búsqueda
+    indexada en lugar de recorrer la tabla. FTS5 es opcional: si SQLite se
+    compiló sin él, la búsqueda usa LIKE.
+    """
+    if _table_exists(cursor, "routes_fts"):
+        return
+    
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE routes_fts USING fts5(
+                route_id, name, cedis_id, client_ids,
+                tokenize = "unicode61 remove_diacritics 2 tokenchars '_-'"
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite compilado sin FTS5
+        return
+    
+    # Poblar a partir de las rutas existentes; el orden de los clientes no
+    # importa para la búsqueda
+    cursor.execute("""
+        INSERT INTO routes_fts (route_id, name, cedis_id, client_ids)
+        SELECT r.id, r.name, r.cedis_id, COALESCE((
+            SELECT group_concat(k.client_id, ' ')
+            FROM route_stops s JOIN client_keys k ON k.key = s.client_key
+            WHERE s.route_id = r.id
+        ), '')
+        FROM routes r
+    """)
+
+
+def _key_search_index_by_rowid(cursor: sqlite3.Cursor) -> None:
+    """
+    Reconstruye el índice de búsqueda con route_id sin indexar. Cada entrada
+    usa como rowid el de su fila en routes, así que reemplazarla es una
+    búsqueda exacta por rowid: buscar route_id con MATCH tokeniza e ignora
+    mayúsculas, y al actualizar 'abc' también borraba 'ABC' o 'abc.d'.
+    """
+    cursor.execute("DROP TABLE IF EXISTS routes_fts")
+    
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE routes_fts USING fts5(
+                route_id UNINDEXED, name, cedis_id, client_ids,
+                tokenize = "unicode61 remove_diacritics 2 tokenchars '_-'"
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite compilado sin FTS5
+        return
+    
+    # Solo las rutas de la tabla principal: las archivadas no se buscan
+    cursor.execute("""
+        INSERT INTO routes_fts (rowid, route_id, name, cedis_id, client_ids)
+        SELECT r.rowid, r.id, r.name, r.cedis_id, COALESCE((
+            SELECT group_concat(k.client_id, ' ')
+            FROM route_stops s JOIN client_keys k ON k.key = s.client_key
+            WHERE s.route_id = r.id
+        ), '')
+        FROM routes r
+    """)
+
+
+def _add_route_keys(cursor: sqlite3.Cursor) -> None:
+    """
+    Reconstruye routes con una clave entera explícita (key INTEGER PRIMARY
+    KEY) y el ID como columna única. El índice de búsqueda usa la clave
+    como rowid: el rowid implícito de una tabla con clave de texto puede
+    cambiar con VACUUM, y la base es un archivo que se puede compactar
+    fuera de la aplicación. Al reconstruir, SQLite elimina los índices y
+    triggers de routes; los recrean los pasos anteriores, que son
+    idempotentes.
+    """
+    # Trigger de otra tabla que lee routes: se recrea con las asignaciones
+    cursor.execute("DROP TRIGGER IF EXISTS trg_stops_assignment_insert")
+    
+    cursor.execute("""
+        CREATE TABLE routes_keyed (
+            key INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            cedis_id TEXT NOT NULL,
+            day_of_week TEXT NOT NULL,
+            stop_count INTEGER NOT NULL DEFAULT 0,
+            is_active INTEGER NOT NULL DEFAULT 1,
+            version INTEGER NOT NULL DEFAULT 1,
+            capacity REAL,
+            shift_start INTEGER NOT NULL DEFAULT 480,
+            shift_minutes INTEGER,
+            distance_km REAL,
+            duration_minutes REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    copied = (
+        "id, name, cedis_id, day_of_week, stop_count, is_active, version, capacity, "
+        "shift_start, shift_minutes, distance_km, duration_minutes, created_at, updated_at"
+    )
+    cursor.execute(f"INSERT INTO routes_keyed ({copied}) SELECT {copied} FROM routes ORDER BY rowid")
+    cursor.execute("DROP TABLE routes")
+    cursor.execute("ALTER TABLE routes_keyed RENAME TO routes")
+    
+    _create_statistics(cursor)
+    _create_daily_assignments(cursor)
+    _create_archive(cursor)
+    # El rowid de routes ahora es la clave explícita
+    _key_search_index_by_rowid(cursor)
+
+
+def _create_archive(cursor: sqlite3.Cursor) -> None:
+    """
+    Archivo de rutas inactivas antiguas e índices parciales sobre las rutas
+    activas (RNF-RUT-02), que reemplazan a los índices completos anteriores.
+    """
+    cursor.execute("DROP INDEX IF EXISTS idx_routes_cedis_day")
+    cursor.execute("DROP INDEX IF EXISTS idx_routes_active")
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_routes_active_cedis_day
+        ON routes(cedis_id, day_of_week)
+        WHERE is_active = 1
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_routes_active_name
+        ON routes(name)
+        WHERE is_active = 1
+    """)
+    
+    # Las inactivas solo se buscan por antigüedad para archivarlas
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_routes_inactive_updated
+        ON routes(updated_at)
+        WHERE is_active = 0
+    """)
+    
+    # Las paradas se guardan empaquetadas (uint32 little-endian) porque las
+    # rutas archivadas ya no se editan
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS routes_archive (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            cedis_id TEXT NOT NULL,
+            day_of_week TEXT NOT NULL,
+            stop_count INTEGER NOT NULL DEFAULT 0,
+            version INTEGER NOT NULL DEFAULT 1,
+            capacity REAL,
+            shift_start INTEGER,
+            shift_minutes INTEGER,
+            distance_km REAL,
+            duration_minutes REAL,
+            client_keys BLOB NOT NULL,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _create_clients(cursor: sqlite3.Cursor) -> None:
+    """Perfil operativo de los clientes."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS clients (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            address TEXT NOT NULL,
+            phone TEXT,
+            email TEXT,
+            cedis_id TEXT,
+            latitude REAL,
+            longitude REAL,
+            demand REAL NOT NULL DEFAULT 0,
+            service_minutes REAL NOT NULL DEFAULT 0,
+            window_start INTEGER,
+            window_end INTEGER,
+            visit_frequency INTEGER NOT NULL DEFAULT 1,
+            allowed_days TEXT NOT NULL DEFAULT ''
+        )
+    """)
+    
+    # Bases de datos creadas antes del perfil operativo
+    columns = _columns(cursor, "clients")
+    if 'demand' not in columns:
+        cursor.execute("ALTER TABLE clients ADD COLUMN demand REAL NOT NULL DEFAULT 0")
+        cursor.execute("ALTER TABLE clients ADD COLUMN service_minutes REAL NOT NULL DEFAULT 0")
+        cursor.execute("ALTER TABLE clients ADD COLUMN window_start INTEGER")
+        cursor.execute("ALTER TABLE clients ADD COLUMN window_end INTEGER")
+    
+    # Bases de datos creadas antes de la planificación semanal
+    if 'visit_frequency' not in columns:
+        cursor.execute("ALTER TABLE clients ADD COLUMN visit_frequency INTEGER NOT NULL DEFAULT 1")
+        cursor.execute("ALTER TABLE clients ADD COLUMN allowed_days TEXT NOT NULL DEFAULT ''")
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_clients_cedis
+        ON clients(cedis_id)
+    """)
+
+
+# Migraciones en orden. Para cambiar el esquema se agrega un paso al final
+# con la versión siguiente; los pasos existentes no se modifican.
+MIGRATIONS: Sequence[Migration] = (
+    Migration(1, "Rutas, diccionario de clientes y paradas", _create_routes),
+    Migration(2, "Registro de cambios y linaje", _create_change_feed_and_lineage),
+    Migration(3, "Estadísticas materializadas", _create_statistics),
+    Migration(4, "Asignaciones diarias", _create_daily_assignments),
+    Migration(5, "Índice de búsqueda", _create_search_index),
+    Migration(6, "Archivo de rutas inactivas e índices parciales", _create_archive),
+    Migration(7, "Perfil de clientes", _create_clients),
+    Migration(8, "Índice de búsqueda por rowid de la ruta", _key_search_index_by_rowid),
+    Migration(9, "Clave entera explícita de las rutas", _add_route_keys),
+)
+
+
+def migrate(connection: sqlite3.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> int:
+    """
+    Aplica las migraciones pendientes según PRAGMA user_version.
+    Con el esquema al día solo se lee la versión. Cada paso se ejecuta en
+    una transacción BEGIN IMMEDIATE y la versión se vuelve a leer tras
+    tomar el bloqueo, así que si varios procesos abren la base a la vez
+    solo uno aplica cada migración.
+    
+    Args:
+        connection: Conexión a la base de datos SQLite
+        migrations: Migraciones ordenadas por versión
+        
+    Returns:
+        Número de migraciones aplicadas
+        
+    Raises:
+        ValueError: Si la base tiene una versión más nueva que la última migración
+    """
+    latest = migrations[-1].version if migrations else 0
+    current = connection.execute("PRAGMA user_version").fetchone()[0]
+    if current == latest:
+        return 0
+    if current > latest:
+        raise ValueError(
+            f"La base de datos tiene el esquema {current}, más nuevo que el soportado ({latest})"
+        )
+    
+    # El DDL necesita su propia transacción; se confirma lo pendiente
+    if connection.in_transaction:
+        connection.commit()
+    
+    applied = 0
+    cursor = connection.cursor()
+    for migration in migrations:
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            current = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if migration.version <= current:
+                connection.rollback()
+                continue
+            migration.apply(cursor)
+            cursor.execute(f"PRAGMA user_version = {int(migration.version)}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        applied += 1
+    
+    return applied
@@ -0,0 +1,458 @@
+"""
+Sharded Route Repository - Infrastructure Layer
+Adaptador de persistencia que reparte las rutas en un repositorio por CEDIS
+(un archivo SQLite por centro de distribución) y ejecuta en paralelo las
+consultas que abarcan varios CEDIS.
+"""
+import hashlib
+import heapq
+import json
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice, zip_longest
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TypeVar, Union
+
+from src.domain.models.route import Route
+from src.domain.models.route_metrics import RouteMetrics
+from src.domain.models.route_change import ChangeCursor, RouteChange, cursor_sequence, sequence_cursor
+from src.domain.models.route_lineage import RouteLineageEdge
+from src.domain.models.route_summary import RouteSummary
+from src.domain.models.route_statistics import RouteStatistics, RouteStatisticsFilter
+from src.domain.models.client_conflict import ClientConflict
+from src.domain.ports.route_repository_port import RouteRepositoryPort
+from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+
+T = TypeVar('T')
+
+
+class ShardedRouteRepository(RouteRepositoryPort):
+    """
+    Repositorio particionado por CEDIS.
+    
+    Cada CEDIS tiene su propio repositorio (shard), así que una ráfaga de
+    escrituras en un centro de distribución no bloquea a los despachadores
+    de los demás. Las operaciones con cedis_id van a un solo shard; las que
+    solo tienen el ID de la ruta usan un catálogo en memoria ID -> CEDIS,
+    que se llena al guardar y al leer, y si el ID no está en él se busca en
+    todos los shards a la vez. El CEDIS de una ruta no cambia, ni lo
+    cambian las operaciones del dominio.
+    
+    Las lecturas que abarcan varios CEDIS (listados, estadísticas, búsqueda,
+    archivado) se ejecutan en paralelo en un pool de hilos y sus resultados
+    ya ordenados se combinan con heapq.merge, sin volver a ordenarlos.
+    
+    Una transacción inicia la transacción de cada shard la primera vez que
+    se escribe en él, y commit confirma los shards escritos uno tras otro:
+    es atómica dentro de un CEDIS, no entre varios. El linaje se guarda en
+    el shard de las rutas hijas.
+    
+    El registro de cambios combina el de cada shard por fecha. La secuencia
+    de cada cambio es un cursor de texto con el cursor leído de cada shard
+    separados por puntos (en el orden en que se registraron), así que crece
+    con cada cambio y pasada a changes_since retoma cada shard donde quedó.
+    No se empaqueta en un entero porque con dos shards ya no cabría en un
+    INTEGER de SQLite.
+    
+    Los shards se usan desde los hilos del pool, por lo que sus conexiones
+    deben admitir varios hilos (check_same_thread=False).
+    """
+    
+    def __init__(
+        self,
+        open_shard: Callable[[str], RouteRepositoryPort],
+        cedis_ids: Iterable[str] = (),
+        max_workers: int = 8
+    ) -> None:
+        """
+        Inicializa el repositorio y abre los shards existentes.
+        
+        Args:
+            open_shard: Abre (o crea) el repositorio de un CEDIS
+            cedis_ids: CEDIS que ya tienen shard, en orden de registro
+            max_workers: Hilos para las consultas en paralelo
+            
+        Raises:
+            ValueError: Si max_workers no es positivo
+        """
+        if max_workers <= 0:
+            raise ValueError("El número de hilos debe ser mayor que cero")
+        
+        self._open_shard = open_shard
+        # Shards en orden de registro; el orden define la secuencia de cambios
+        self._shards: Dict[str, RouteRepositoryPort] = {}
+        self._shards_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="route-shard")
+        
+        # Catálogo ID de ruta -> CEDIS, y las rutas guardadas en la
+        # transacción en curso, que se olvidan si hay rollback
+        self._locations: Dict[str, str] = {}
+        self._saved_ids: List[str] = []
+        
+        # Shards escritos desde el último commit o rollback, y los que ya
+        # iniciaron la transacción explícita en curso
+        self._in_transaction = False
+        self._begun: Set[str] = set()
+        self._dirty: Set[str] = set()
+        
+        for cedis_id in cedis_ids:
+            self._shard(cedis_id)
+    
+    @classmethod
+    def in_directory(
+        cls,
+        directory: Union[str, Path],
+        connect: Optional[Callable[[str], sqlite3.Connection]] = None,
+        max_workers: int = 8
+    ) -> 'ShardedRouteRepository':
+        """
+        Repositorio con un archivo SQLite por CEDIS dentro de una carpeta.
+        El manifiesto shards.json guarda los CEDIS en orden de registro.
+        
+        Args:
+            directory: Carpeta de los shards (se crea si no existe)
+            connect: Abre la conexión de un archivo; por defecto
+                sqlite3.connect con check_same_thread=False
+            max_workers: Hilos para las consultas en paralelo
+            
+        Returns:
+            Repositorio particionado
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        manifest = directory / "shards.json"
+        cedis_ids: List[str] = json.loads(manifest.read_text(encoding="utf-8")) if manifest.exists() else []
+        
+        connect = connect or _connect
+        
+        def open_shard(cedis_id: str) -> RouteRepositoryPort:
+            repository = SqliteRouteRepository(connect(str(directory / f"{shard_file_stem(cedis_id)}.db")))
+            if cedis_id not in cedis_ids:
+                cedis_ids.append(cedis_id)
+                # Reemplazo atómico: el manifiesto nunca queda a medio escribir
+                temporary = manifest.with_suffix(".json.tmp")
+                temporary.write_text(json.dumps(cedis_ids, ensure_ascii=False), encoding="utf-8")
+                os.replace(temporary, manifest)
+            return repository
+        
+        return cls(open_shard, list(cedis_ids), max_workers)
+    
+    def save(self, route: Route) -> None:
+        self._writer(route.cedis_id).save(route)
+        self._locations[route.id] = route.cedis_id
+        self._saved_ids.append(route.id)
+    
+    def save_many(self, routes: Iterable[Route]) -> int:
+        """Guarda las rutas agrupadas por CEDIS, con los shards en paralelo."""
+        by_cedis: Dict[str, List[Route]] = {}
+        for route in routes:
+            by_cedis.setdefault(route.cedis_id, []).append(route)
+        writers = {cedis_id: self._writer(cedis_id) for cedis_id in by_cedis}
+        
+        saved = sum(self._map(
+            lambda cedis_id: writers[cedis_id].save_many(by_cedis[cedis_id]), list(by_cedis)
+        ))
+        for cedis_id, group in by_cedis.items():
+            for route in group:
+                self._locations[route.id] = cedis_id
+                self._saved_ids.append(route.id)
+        return saved
+    
+    def update(self, route: Route, expected_version: Optional[int] = None) -> None:
+        self._writer(route.cedis_id).update(route, expected_version)
+        self._locations[route.id] = route.cedis_id
+    
+    def move_stop(
+        self,
+        route_id: str,
+        client_id: str,
+        before: Optional[str],
+        after: Optional[str],
+        expected_version: Optional[int] = None,
+        metrics: Optional[RouteMetrics] = None
+    ) -> None:
+        cedis_id = self._locate(route_id)
+        if cedis_id is None:
+            raise ValueError(f"Ruta {route_id} no encontrada")
+        self._writer(cedis_id).move_stop(route_id, client_id, before, after, expected_version, metrics)
+    
+    def find_by_id(self, route_id: str) -> Optional[Route]:
+        cedis_id = self._locations.get(route_id)
+        if cedis_id is not None:
+            route = self._shards[cedis_id].find_by_id(route_id)
+            if route is not None:
+                return route
+        
+        # Fuera del catálogo: se busca en todos los shards a la vez
+        found = [route for route in self._fan_out(lambda shard: shard.find_by_id(route_id)) if route]
+        if not found:
+            self._locations.pop(route_id, None)
+            return None
+        self._locations[route_id] = found[0].cedis_id
+        return found[0]
+    
+    def get_all(self) -> List[Route]:
+        return self._remember(self._merge(
+            self._fan_out(lambda shard: shard.get_all()), key=lambda route: route.name
+        ))
+    
+    def get_all_including_inactive(self) -> List[Route]:
+        return self._remember(self._merge(
+            self._fan_out(lambda shard: shard.get_all_including_inactive()),
+            key=lambda route: (not route.is_active, route.name)
+        ))
+    
+    def iter_routes(self, batch_size: int = 500) -> Iterator[Route]:
+        """Recorre los shards uno tras otro, cada uno por páginas."""
+        return chain.from_iterable(
+            shard.iter_routes(batch_size) for shard in list(self._shards.values())
+        )
+    
+    def get_summaries(self, include_inactive: bool = False) -> List[RouteSummary]:
+        if include_inactive:
+            key = lambda summary: (not summary.is_active, summary.name)
+        else:
+            key = lambda summary: summary.name
+        return self._merge(self._fan_out(lambda shard: shard.get_summaries(include_inactive)), key=key)
+    
+    def delete(self, route_id: str) -> None:
+        cedis_id = self._locate(route_id)
+        if cedis_id is None:
+            raise ValueError(f"Ruta {route_id} no encontrada para eliminar")
+        self._writer(cedis_id).delete(route_id)
+        self._locations.pop(route_id, None)
+    
+    def get_by_cedis_and_day(self, cedis_id: str, day_of_week: str) -> List[Route]:
+        shard = self._shards.get(cedis_id)
+        if shard is None:
+            return []
+        return self._remember(shard.get_by_cedis_and_day(cedis_id, day_of_week))
+    
+    def find_client_routes(
+        self,
+        cedis_id: str,
+        day_of_week: str,
+        client_ids: Iterable[str]
+    ) -> Dict[str, List[str]]:
+        shard = self._shards.get(cedis_id)
+        if shard is None:
+            return {}
+        return shard.find_client_routes(cedis_id, day_of_week, client_ids)
+    
+    def find_conflicts(self, cedis_id: str, day_of_week: str) -> List[ClientConflict]:
+        shard = self._shards.get(cedis_id)
+        if shard is None:
+            return []
+        return shard.find_conflicts(cedis_id, day_of_week)
+    
+    def search_routes(self, query: str, limit: int = 20) -> List[RouteSummary]:
+        """
+        Busca en todos los shards. La relevancia de cada shard no se puede
+        comparar con la de otro, así que los resultados se intercalan: el
+        mejor de cada shard, luego el segundo de cada uno, y así.
+        """
+        results = self._fan_out(lambda shard: shard.search_routes(query, limit))
+        interleaved = (s for row in zip_longest(*results) for s in row if s is not None)
+        return list(islice(interleaved, max(limit, 0)))
+    
+    def get_statistics(self, filters: RouteStatisticsFilter) -> RouteStatistics:
+        if filters.cedis_id:
+            shard = self._shards.get(filters.cedis_id)
+            return shard.get_statistics(filters) if shard is not None else RouteStatistics()
+        
+        results = self._fan_out(lambda shard: shard.get_statistics(filters))
+        # Los grupos de cada shard ya vienen por (CEDIS, día) y las rutas
+        # más grandes por tamaño descendente
+        groups = self._merge(
+            [result.groups for result in results],
+            key=lambda group: (group.cedis_id, group.day_of_week)
+        )
+        largest = heapq.merge(
+            *(result.largest_routes for result in results),
+            key=lambda summary: -summary.client_count
+        )
+        return RouteStatistics(groups=groups, largest_routes=list(islice(largest, filters.top_n)))
+    
+    def changes_since(self, seq: ChangeCursor, limit: int = 100) -> List[RouteChange]:
+        """
+        Cambios posteriores a un cursor, combinando los registros de los
+        shards por fecha y, a igual fecha, por orden de registro del shard.
+        
+        Raises:
+            ValueError: Si el límite no es positivo o el cursor no es válido
+        """
+        if limit <= 0:
+            raise ValueError("El límite debe ser mayor que cero")
+        
+        positions = self._unpack_cursor(seq)
+        shards = list(self._shards.values())
+        positions.extend([0] * (len(shards) - len(positions)))
+        feeds = self._map(
+            lambda index: shards[index].changes_since(sequence_cursor(positions[index]), limit),
+            range(len(shards))
+        )
+        
+        merged = heapq.merge(
+            *([(change.changed_at, index, change) for change in feed] for index, feed in enumerate(feeds))
+        )
+        changes: List[RouteChange] = []
+        for _, index, change in islice(merged, limit):
+            positions[index] = cursor_sequence(change.seq)
+            changes.append(RouteChange(
+                seq=self._pack_cursor(positions),
+                route_id=change.route_id,
+                operation=change.operation,
+                changed_at=change.changed_at
+            ))
+        return changes
+    
+    def add_lineage(self, parent_ids: List[str], child_ids: List[str], operation: str) -> None:
+        cedis_id = self._locate(child_ids[0]) if child_ids else None
+        if cedis_id is None:
+            raise ValueError("Las rutas hijas del linaje deben existir")
+        self._writer(cedis_id).add_lineage(parent_ids, child_ids, operation)
+    
+    def get_ancestors(self, route_id: str) -> List[RouteLineageEdge]:
+        cedis_id = self._locate(route_id)
+        return self._shards[cedis_id].get_ancestors(route_id) if cedis_id is not None else []
+    
+    def get_descendants(self, route_id: str) -> List[RouteLineageEdge]:
+        cedis_id = self._locate(route_id)
+        return self._shards[cedis_id].get_descendants(route_id) if cedis_id is not None else []
+    
+    def archive_inactive_routes(self, older_than_days: int) -> int:
+        writers = [self._writer(cedis_id) for cedis_id in list(self._shards)]
+        return sum(self._map(lambda shard: shard.archive_inactive_routes(older_than_days), writers))
+    
+    def begin_transaction(self) -> None:
+        # Cada shard inicia su transacción al recibir la primera escritura
+        self._in_transaction = True
+    
+    def commit_transaction(self) -> None:
+        dirty = [cedis_id for cedis_id in self._shards if cedis_id in self._dirty]
+        self._in_transaction = False
+        self._begun.clear()
+        self._dirty.clear()
+        self._saved_ids.clear()
+        for cedis_id in dirty:
+            self._shards[cedis_id].commit_transaction()
+    
+    def rollback_transaction(self) -> None:
+        dirty = [cedis_id for cedis_id in self._shards if cedis_id in self._dirty]
+        self._in_transaction = False
+        self._begun.clear()
+        self._dirty.clear()
+        for route_id in self._saved_ids:
+            self._locations.pop(route_id, None)
+        self._saved_ids.clear()
+        for cedis_id in dirty:
+            self._shards[cedis_id].rollback_transaction()
+    
+    def close(self) -> None:
+        """Cierra los shards y el pool de hilos."""
+        self._executor.shutdown(wait=True)
+        for shard in self._shards.values():
+            close = getattr(shard, 'close', None)
+            if close is not None:
+                close()
+    
+    def _shard(self, cedis_id: str) -> RouteRepositoryPort:
+        """Shard de un CEDIS; lo abre y registra si aún no existe."""
+        shard = self._shards.get(cedis_id)
+        if shard is None:
+            with self._shards_lock:
+                shard = self._shards.get(cedis_id)
+                if shard is None:
+                    shard = self._open_shard(cedis_id)
+                    self._shards[cedis_id] = shard
+        return shard
+    
+    def _writer(self, cedis_id: str) -> RouteRepositoryPort:
+        """
+        Shard donde se va a escribir: dentro de una transacción explícita
+        inicia la suya la primera vez.
+        """
+        shard = self._shard(cedis_id)
+        if self._in_transaction and cedis_id not in self._begun:
+            shard.begin_transaction()
+            self._begun.add(cedis_id)
+        self._dirty.add(cedis_id)
+        return shard
+    
+    def _locate(self, route_id: str) -> Optional[str]:
+        """CEDIS de una ruta según el catálogo o, si no está, buscándola."""
+        cedis_id = self._locations.get(route_id)
+        if cedis_id is not None:
+            return cedis_id
+        route = self.find_by_id(route_id)
+        return route.cedis_id if route is not None else None
+    
+    def _remember(self, routes: List[Route]) -> List[Route]:
+        """Agrega al catálogo las rutas leídas."""
+        for route in routes:
+            self._locations[route.id] = route.cedis_id
+        return routes
+    
+    def _fan_out(self, query: Callable[[RouteRepositoryPort], T]) -> List[T]:
+        """Ejecuta una consulta en todos los shards; resultados en orden de registro."""
+        return self._map(query, list(self._shards.values()))
+    
+    def _map(self, function: Callable[..., T], items: Iterable) -> List[T]:
+        """
+        Aplica una función a cada elemento en el pool, salvo que haya uno
+        solo. Si alguna falla, la excepción se propaga después de esperar
+        a las demás, para no dejar un shard en uso.
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [function(item) for item in items]
+        futures = [self._executor.submit(function, item) for item in items]
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+        return [future.result() for future in futures]
+    
+    @staticmethod
+    def _merge(results: Iterable[List[T]], key: Callable[[T], Any]) -> List[T]:
+        """Combina listas ya ordenadas por `key` sin volver a ordenarlas."""
+        return list(heapq.merge(*results, key=key))
+    
+    @staticmethod
+    def _pack_cursor(positions: List[int]) -> ChangeCursor:
+        """
+        Cursor con el de cada shard separados por puntos. Son de ancho fijo,
+        así que el orden de las cadenas sigue al de los cambios.
+        """
+        return ".".join(sequence_cursor(position) for position in positions)
+    
+    @staticmethod
+    def _unpack_cursor(seq: ChangeCursor) -> List[int]:
+        """Posición de cada shard a partir de un cursor ("" para empezar)."""
+        return [cursor_sequence(part) for part in seq.split(".")] if seq else []
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    """Conexión de un shard, usable desde los hilos del pool."""
+    return sqlite3.connect(path, check_same_thread=False)
+
+
+def shard_file_stem(cedis_id: str) -> str:
+    """
+    Nombre de archivo del shard de un CEDIS. Si el ID tiene caracteres no
+    válidos en un nombre de archivo, se reemplazan y se agrega un hash para
+    que dos CEDIS distintos no compartan archivo.
+    
+    Args:
+        cedis_id: ID del CEDIS
+        
+    Returns:
+        Nombre de archivo sin extensión
+    """
+    stem = re.sub(r"[^\w-]", "_", cedis_id)
+    if stem == cedis_id:
+        return stem
+    return f"{stem}_{hashlib.sha1(cedis_id.encode('utf-8')).hexdigest()[:8]}"
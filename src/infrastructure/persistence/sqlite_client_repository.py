@@ -0,0 +1,166 @@
+"""
+SQLite Client Repository - Infrastructure Layer
+Adaptador de persistencia para el perfil de los clientes.
+Implementa el puerto ClientRepositoryPort.
+"""
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+from src.domain.models.client import Client
+from src.domain.ports.client_repository_port import ClientRepositoryPort
+from src.infrastructure.persistence.schema_migrations import migrate
+
+
+class SqliteClientRepository(ClientRepositoryPort):
+    """
+    Implementación concreta del repositorio de clientes usando SQLite.
+    Puede compartir la conexión con SqliteRouteRepository.
+    """
+    
+    # Parámetros por consulta IN (el límite de SQLite antiguo es 999)
+    _BATCH_SIZE = 500
+    
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        """
+        Inicializa el repositorio con una conexión SQLite.
+        
+        Args:
+            connection: Conexión a la base de datos SQLite
+        """
+        self._conn = connection
+        self._conn.row_factory = sqlite3.Row
+        migrate(self._conn)
+    
+    def save(self, client: Client) -> None:
+        """
+        Guarda un cliente nuevo o reemplaza uno existente.
+        
+        Args:
+            client: El cliente a guardar
+        """
+        self._conn.execute("""
+            INSERT INTO clients (id, name, address, phone, email, cedis_id, latitude, longitude,
+                                 demand, service_minutes, window_start, window_end,
+                                 visit_frequency, allowed_days)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                name = excluded.name,
+                address = excluded.address,
+                phone = excluded.phone,
+                email = excluded.email,
+                cedis_id = excluded.cedis_id,
+                latitude = excluded.latitude,
+                longitude = excluded.longitude,
+                demand = excluded.demand,
+                service_minutes = excluded.service_minutes,
+                window_start = excluded.window_start,
+                window_end = excluded.window_end,
+                visit_frequency = excluded.visit_frequency,
+                allowed_days = excluded.allowed_days
+        """, (
+            client.id,
+            client.name,
+            client.address,
+            client.phone,
+            client.email,
+            client.cedis_id,
+            client.latitude,
+            client.longitude,
+            client.demand,
+            client.service_minutes,
+            client.window_start,
+            client.window_end,
+            client.visit_frequency,
+            # Días permitidos separados por comas; vacío = cualquier día
+            ",".join(client.allowed_days)
+        ))
+    
+    def find_by_id(self, client_id: str) -> Optional[Client]:
+        """
+        Busca un cliente por su ID.
+        
+        Args:
+            client_id: ID del cliente
+            
+        Returns:
+            El cliente si existe, None en caso contrario
+        """
+        row = self._conn.execute("SELECT * FROM clients WHERE id = ?", (client_id,)).fetchone()
+        return self._row_to_client(row) if row else None
+    
+    def find_by_ids(self, client_ids: Iterable[str]) -> Dict[str, Client]:
+        """
+        Busca varios clientes, en lotes para respetar el límite de
+        parámetros de SQLite.
+        
+        Args:
+            client_ids: IDs de los clientes
+            
+        Returns:
+            Clientes encontrados por ID; los inexistentes no aparecen
+        """
+        client_ids = list(dict.fromkeys(client_ids))
+        clients: Dict[str, Client] = {}
+        
+        for start in range(0, len(client_ids), self._BATCH_SIZE):
+            batch = client_ids[start:start + self._BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            for row in self._conn.execute(
+                f"SELECT * FROM clients WHERE id IN ({placeholders})", batch
+            ):
+                clients[row['id']] = self._row_to_client(row)
+        
+        return clients
+    
+    def get_by_cedis(self, cedis_id: str) -> List[Client]:
+        """
+        Obtiene todos los clientes de un CEDIS.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            
+        Returns:
+            Lista de clientes del CEDIS ordenada por ID
+        """
+        rows = self._conn.execute(
+            "SELECT * FROM clients WHERE cedis_id = ? ORDER BY id", (cedis_id,)
+        ).fetchall()
+        return [self._row_to_client(row) for row in rows]
+    
+    def commit_transaction(self) -> None:
+        """
+        Confirma la transacción actual.
+        """
+        self._conn.commit()
+    
+    def rollback_transaction(self) -> None:
+        """
+        Revierte la transacción actual.
+        """
+        self._conn.rollback()
+    
+    def _row_to_client(self, row: sqlite3.Row) -> Client:
+        """
+        Convierte una fila de base de datos a una entidad Client del dominio.
+        
+        Args:
+            row: Fila de SQLite
+            
+        Returns:
+            Entidad Client
+        """
+        return Client(
+            id=row['id'],
+            name=row['name'],
+            address=row['address'],
+            phone=row['phone'],
+            email=row['email'],
+            cedis_id=row['cedis_id'],
+            latitude=row['latitude'],
+            longitude=row['longitude'],
+            demand=row['demand'],
+            service_minutes=row['service_minutes'],
+            window_start=row['window_start'],
+            window_end=row['window_end'],
+            visit_frequency=row['visit_frequency'],
+            allowed_days=tuple(day for day in row['allowed_days'].split(",") if day)
+        )
@@ -3,11 +3,25 @@ SQLite Route Repository - Infrastructure Layer
 Adaptador de persistencia que implementa el puerto RouteRepositoryPort.
 Esta es la implementación técnica concreta de la abstracción del dominio.
 """
+import re
 import sqlite3
-from typing import List, Optional
-import json
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from src.domain.models.route import Route
+from src.domain.models.route_metrics import RouteMetrics
+from src.domain.models.route_change import ChangeCursor, RouteChange, cursor_sequence, sequence_cursor
+from src.domain.models.route_lineage import RouteLineageEdge
+from src.domain.models.route_summary import RouteSummary
+from src.domain.models.route_statistics import (
+    RouteStatistics, RouteStatisticsFilter, RouteGroupStatistics
+)
+from src.domain.models.client_conflict import ClientConflict
+from src.domain.exceptions import ConcurrentModificationError
 from src.domain.ports.route_repository_port import RouteRepositoryPort
+from src.domain.services.route_diff import longest_increasing_run
+from src.infrastructure.persistence.fractional_index import key_between, keys_between, spread_keys
+from src.infrastructure.persistence.schema_migrations import migrate
 
 
 class SqliteRouteRepository(RouteRepositoryPort):
@@ -16,6 +30,33 @@ class SqliteRouteRepository(RouteRepositoryPort):
     Cumple con el contrato definido por RouteRepositoryPort.
     """
     
+    # Códigos compactos de operación para el registro de cambios
+    _OPERATION_CODES = {
+        RouteChange.INSERT: 'I',
+        RouteChange.UPDATE: 'U',
+        RouteChange.DELETE: 'D'
+    }
+    _OPERATION_NAMES = {code: name for name, code in _OPERATION_CODES.items()}
+    
+    # Longitud a partir de la cual las claves de orden de una ruta se renormalizan
+    _MAX_SORT_KEY_LENGTH = 12
+    
+    # La renormalización se difiere hasta juntar este número de rutas o hasta
+    # que alguna clave supere la longitud límite; mientras tanto las claves
+    # largas siguen ordenando bien, solo ocupan más
+    _RENORMALIZE_BATCH = 16
+    _RENORMALIZE_KEY_LENGTH = 64
+    
+    # Parámetros por consulta IN (el límite de SQLite antiguo es 999)
+    _BATCH_SIZE = 500
+    
+    # Columnas de routes_archive con los mismos nombres que las de routes
+    _ARCHIVE_COLUMNS = """
+        id, name, cedis_id, day_of_week, 0 AS is_active, version,
+        capacity, shift_start, shift_minutes, distance_km, duration_minutes,
+        client_keys
+    """
+    
     def __init__(self, connection: sqlite3.Connection) -> None:
         """
         Inicializa el repositorio con una conexión SQLite.
@@ -25,41 +66,28 @@ class SqliteRouteRepository(RouteRepositoryPort):
         """
         self._conn = connection
         self._conn.row_factory = sqlite3.Row  # Para acceso por nombre de columna
-        self._initialize_database()
-    
-    def _initialize_database(self) -> None:
-        """
-        Crea las tablas necesarias si no existen.
-        RNF-RUT-03: Garantiza estructura de datos adecuada.
-        """
-        cursor = self._conn.cursor()
         
-        # Tabla de rutas
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS routes (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                cedis_id TEXT NOT NULL,
-                day_of_week TEXT NOT NULL,
-                client_ids TEXT NOT NULL,
-                is_active INTEGER NOT NULL DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        # Diccionario de IDs de cliente <-> claves enteras. Las cadenas se
+        # internan, así todas las rutas cargadas comparten un único objeto por
+        # cliente. Las claves asignadas en la transacción en curso se registran
+        # aparte para olvidarlas si hay rollback.
+        self._client_ids_by_key: Dict[int, str] = {}
+        self._keys_by_client_id: Dict[str, int] = {}
+        self._uncommitted_keys: List[int] = []
         
-        # Índices para mejorar rendimiento (RNF-RUT-02)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_routes_cedis_day 
-            ON routes(cedis_id, day_of_week)
-        """)
+        # Rutas cuyas claves de orden crecieron demasiado, con su clave más
+        # larga; se renormalizan después de un commit, fuera de la
+        # transacción que las originó
+        self._routes_to_renormalize: Dict[str, int] = {}
         
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_routes_active 
-            ON routes(is_active)
-        """)
+        # El esquema se crea o actualiza por migraciones; si está al día
+        # solo se lee su versión
+        migrate(self._conn)
         
-        self._conn.commit()
+        # FTS5 es opcional en SQLite; sin él la búsqueda usa LIKE
+        self._fts_enabled = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'routes_fts'"
+        ).fetchone() is not None
     
     def save(self, route: Route) -> None:
         """
@@ -73,58 +101,172 @@ class SqliteRouteRepository(RouteRepositoryPort):
         """
         cursor = self._conn.cursor()
         
-        # Serializar lista de client_ids a JSON
-        client_ids_json = json.dumps(route.client_ids)
-        
         cursor.execute("""
-            INSERT INTO routes (id, name, cedis_id, day_of_week, client_ids, is_active)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO routes (id, name, cedis_id, day_of_week, stop_count, is_active, version,
+                                capacity, shift_start, shift_minutes, distance_km, duration_minutes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             route.id,
             route.name,
             route.cedis_id,
             route.day_of_week,
-            client_ids_json,
-            1 if route.is_active else 0
+            len(route.client_ids),
+            1 if route.is_active else 0,
+            route.version,
+            route.capacity,
+            route.shift_start,
+            route.shift_minutes,
+            *self._metrics_values(route.metrics)
         ))
         
+        # Paradas con claves equiespaciadas
+        self._insert_stops(route.id, self._client_keys_for(route.client_ids))
+        
+        self._record_change(route.id, RouteChange.INSERT)
+        self._index_route(route)
+        
         # No hacer commit aquí si estamos en una transacción
         # El commit se hace desde el servicio o manualmente
     
-    def update(self, route: Route) -> None:
+    def save_many(self, routes: Iterable[Route]) -> int:
         """
-        Actualiza una ruta existente.
+        Guarda varias rutas nuevas con una sentencia executemany por tabla:
+        rutas, diccionario de clientes, paradas, registro de cambios e
+        índice de búsqueda. Pensado para cargas masivas por lotes.
+        
+        Args:
+            routes: Rutas a guardar
+            
+        Returns:
+            Número de rutas guardadas
+            
+        Raises:
+            sqlite3.IntegrityError: Si alguna ruta ya existe
+        """
+        routes = list(routes)
+        if not routes:
+            return 0
+        
+        self._conn.executemany("""
+            INSERT INTO routes (id, name, cedis_id, day_of_week, stop_count, is_active, version,
+                                capacity, shift_start, shift_minutes, distance_km, duration_minutes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                route.id, route.name, route.cedis_id, route.day_of_week, len(route.client_ids),
+                0, route.version, route.capacity, route.shift_start,
+                route.shift_minutes, *self._metrics_values(route.metrics)
+            )
+            for route in routes
+        ])
+        
+        # Claves de cliente de todo el lote en una sola pasada
+        client_keys = self._client_keys_for([c for route in routes for c in route.client_ids])
+        sort_keys: Dict[int, List[str]] = {}
+        stops: List[Tuple[str, str, int]] = []
+        offset = 0
+        for route in routes:
+            count = len(route.client_ids)
+            if count not in sort_keys:
+                sort_keys[count] = spread_keys(count)
+            stops.extend(zip([route.id] * count, sort_keys[count], client_keys[offset:offset + count]))
+            offset += count
+        self._conn.executemany(
+            "INSERT INTO route_stops (route_id, sort_key, client_key) VALUES (?, ?, ?)", stops
+        )
+        
+        # Las rutas se insertan inactivas y se activan después de sus
+        # paradas: así el trigger de asignaciones diarias copia las paradas
+        # de cada ruta con un INSERT ... SELECT en lugar de una búsqueda por
+        # parada, y las estadísticas se ajustan una vez por ruta
+        self._conn.executemany(
+            "UPDATE routes SET is_active = 1 WHERE id = ?",
+            [(route.id,) for route in routes if route.is_active]
+        )
+        
+        self._conn.executemany(
+            "INSERT INTO route_changes (route_id, operation) VALUES (?, ?)",
+            [(route.id, self._OPERATION_CODES[RouteChange.INSERT]) for route in routes]
+        )
+        if self._fts_enabled:
+            self._conn.executemany("""
+                INSERT INTO routes_fts (rowid, route_id, name, cedis_id, client_ids)
+                SELECT key, id, ?, ?, ? FROM routes WHERE id = ?
+            """, [(route.name, route.cedis_id, " ".join(route.client_ids), route.id) for route in routes])
+        
+        return len(routes)
+    
+    def update(self, route: Route, expected_version: Optional[int] = None) -> None:
+        """
+        Actualiza una ruta existente con control de concurrencia optimista.
+        La escritura solo se aplica si la versión almacenada coincide con la
+        versión leída (compare-and-swap); al aplicarse, se guarda
+        route.version + 1. Solo se escriben las paradas agregadas, eliminadas o movidas.
+        Si la ruta estaba archivada, se restaura antes de actualizarla.
         
         Args:
             route: La ruta a actualizar
+            expected_version: Versión almacenada esperada; None = route.version
             
         Raises:
             ValueError: Si la ruta no existe
+            ConcurrentModificationError: Si otro usuario modificó la ruta
         """
-        cursor = self._conn.cursor()
+        if expected_version is None:
+            expected_version = route.version
         
-        client_ids_json = json.dumps(route.client_ids)
+        cursor = self._conn.cursor()
         
-        cursor.execute("""
+        statement = """
             UPDATE routes 
             SET name = ?, 
                 cedis_id = ?, 
                 day_of_week = ?, 
-                client_ids = ?, 
+                stop_count = ?, 
                 is_active = ?,
+                capacity = ?,
+                shift_start = ?,
+                shift_minutes = ?,
+                distance_km = ?,
+                duration_minutes = ?,
+                version = ?,
                 updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (
+            WHERE id = ? AND version = ?
+        """
+        params = (
             route.name,
             route.cedis_id,
             route.day_of_week,
-            client_ids_json,
+            len(route.client_ids),
             1 if route.is_active else 0,
-            route.id
-        ))
+            route.capacity,
+            route.shift_start,
+            route.shift_minutes,
+            *self._metrics_values(route.metrics),
+            route.version + 1,
+            route.id,
+            expected_version
+        )
+        cursor.execute(statement, params)
+        
+        # Modificar una ruta archivada (p. ej. reactivarla) la devuelve
+        # primero a la tabla principal
+        if cursor.rowcount == 0 and self._restore_archived_route(route.id):
+            cursor.execute(statement, params)
         
         if cursor.rowcount == 0:
-            raise ValueError(f"Ruta {route.id} no encontrada para actualizar")
+            cursor.execute("SELECT 1 FROM routes WHERE id = ?", (route.id,))
+            if cursor.fetchone() is None:
+                raise ValueError(f"Ruta {route.id} no encontrada para actualizar")
+            raise ConcurrentModificationError(route.id, expected_version)
+        
+        route.version += 1
+        
+        self._write_stop_changes(route.id, self._client_keys_for(route.client_ids))
+        
+        self._record_change(route.id, RouteChange.UPDATE)
+        self._unindex_route(route.id)
+        self._index_route(route)
     
     def find_by_id(self, route_id: str) -> Optional[Route]:
         """
@@ -134,22 +276,31 @@ class SqliteRouteRepository(RouteRepositoryPort):
             route_id: ID de la ruta
             
         Returns:
-            La ruta si existe, None en caso contrario
+            La ruta si existe (también si está archivada), None en caso contrario
         """
         cursor = self._conn.cursor()
         
         cursor.execute("""
-            SELECT id, name, cedis_id, day_of_week, client_ids, is_active
+            SELECT id, name, cedis_id, day_of_week, is_active, version,
+                   capacity, shift_start, shift_minutes, distance_km, duration_minutes
             FROM routes
             WHERE id = ?
         """, (route_id,))
         
         row = cursor.fetchone()
         
+        if row is None:
+            cursor.execute(f"""
+                SELECT {self._ARCHIVE_COLUMNS}
+                FROM routes_archive
+                WHERE id = ?
+            """, (route_id,))
+            row = cursor.fetchone()
+        
         if row is None:
             return None
         
-        return self._row_to_route(row)
+        return self._rows_to_routes([row])[0]
     
     def get_all(self) -> List[Route]:
         """
@@ -161,32 +312,205 @@ class SqliteRouteRepository(RouteRepositoryPort):
         cursor = self._conn.cursor()
         
         cursor.execute("""
-            SELECT id, name, cedis_id, day_of_week, client_ids, is_active
+            SELECT id, name, cedis_id, day_of_week, is_active, version,
+                   capacity, shift_start, shift_minutes, distance_km, duration_minutes
             FROM routes
             WHERE is_active = 1
             ORDER BY name
         """)
         
         rows = cursor.fetchall()
-        return [self._row_to_route(row) for row in rows]
+        return self._rows_to_routes(rows)
     
     def get_all_including_inactive(self) -> List[Route]:
         """
-        Obtiene todas las rutas (activas e inactivas).
+        Obtiene todas las rutas (activas e inactivas), incluidas las archivadas.
         
         Returns:
             Lista de todas las rutas
         """
         cursor = self._conn.cursor()
         
-        cursor.execute("""
-            SELECT id, name, cedis_id, day_of_week, client_ids, is_active
+        cursor.execute(f"""
+            SELECT id, name, cedis_id, day_of_week, is_active, version,
+                   capacity, shift_start, shift_minutes, distance_km, duration_minutes,
+                   NULL AS client_keys
             FROM routes
+            UNION ALL
+            SELECT {self._ARCHIVE_COLUMNS}
+            FROM routes_archive
             ORDER BY is_active DESC, name
         """)
         
         rows = cursor.fetchall()
-        return [self._row_to_route(row) for row in rows]
+        return self._rows_to_routes(rows)
+    
+    def iter_routes(self, batch_size: int = 500) -> Iterator[Route]:
+        """
+        Recorre todas las rutas, incluidas las archivadas, por páginas en
+        orden de ID (paginación por clave): en memoria solo hay una página
+        a la vez, además de la caché de IDs de cliente.
+        
+        Args:
+            batch_size: Rutas leídas por página
+            
+        Returns:
+            Iterador de rutas; primero las de la tabla principal y luego
+            las archivadas
+        """
+        sources = (
+            ("routes", """
+                id, name, cedis_id, day_of_week, is_active, version,
+                capacity, shift_start, shift_minutes, distance_km, duration_minutes
+            """),
+            ("routes_archive", self._ARCHIVE_COLUMNS),
+        )
+        for table, columns in sources:
+            last_id = ""
+            while True:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                yield from self._rows_to_routes(rows)
+                last_id = rows[-1]['id']
+    
+    def get_summaries(self, include_inactive: bool = False) -> List[RouteSummary]:
+        """
+        Obtiene resúmenes de rutas sin leer las paradas: el total de
+        clientes se toma de la columna stop_count.
+        
+        Args:
+            include_inactive: Si incluir rutas inactivas (también las archivadas)
+            
+        Returns:
+            Lista de resúmenes de rutas
+        """
+        cursor = self._conn.cursor()
+        
+        if include_inactive:
+            where, order = "", "is_active DESC, name"
+            archived = """
+                UNION ALL
+                SELECT id, name, cedis_id, day_of_week,
+                       stop_count AS client_count, 0 AS is_active, version,
+                       distance_km, duration_minutes
+                FROM routes_archive
+            """
+        else:
+            where, order, archived = "WHERE is_active = 1", "name", ""
+        
+        cursor.execute(f"""
+            SELECT id, name, cedis_id, day_of_week,
+                   stop_count AS client_count, is_active, version,
+                   distance_km, duration_minutes
+            FROM routes
+            {where}
+            {archived}
+            ORDER BY {order}
+        """)
+        
+        return [self._row_to_summary(row) for row in cursor.fetchall()]
+    
+    def search_routes(self, query: str, limit: int = 20) -> List[RouteSummary]:
+        """
+        Busca rutas activas con el índice FTS5, ordenadas por relevancia (bm25).
+        Cada término del usuario se busca como prefijo en nombre, CEDIS y
+        clientes; todos los términos deben coincidir.
+        
+        Args:
+            query: Texto ingresado por el usuario
+            limit: Número máximo de resultados
+            
+        Returns:
+            Resúmenes de las rutas más relevantes
+        """
+        # Se descartan los términos sin letras ni dígitos (p. ej. "-"): no producen tokens
+        terms = re.findall(r"[\w-]*\w[\w-]*", query)
+        if not terms or limit <= 0:
+            return []
+        
+        if not self._fts_enabled:
+            return self._search_routes_without_index(terms, limit)
+        
+        cursor = self._conn.cursor()
+        
+        match = "{name cedis_id client_ids} : (" + " ".join(f'"{term}"*' for term in terms) + ")"
+        
+        cursor.execute("""
+            SELECT r.id, r.name, r.cedis_id, r.day_of_week,
+                   r.stop_count AS client_count, r.is_active, r.version,
+                   r.distance_km, r.duration_minutes
+            FROM routes_fts f
+            JOIN routes r ON r.key = f.rowid
+            WHERE routes_fts MATCH ? AND r.is_active = 1
+            ORDER BY f.rank
+            LIMIT ?
+        """, (match, limit))
+        
+        return [self._row_to_summary(row) for row in cursor.fetchall()]
+    
+    def get_statistics(self, filters: RouteStatisticsFilter) -> RouteStatistics:
+        """
+        Obtiene estadísticas desde la tabla materializada route_stats.
+        Las rutas más grandes se leen del índice parcial por tamaño.
+        
+        Args:
+            filters: CEDIS, día y cantidad de rutas más grandes
+            
+        Returns:
+            Estadísticas agregadas
+        """
+        conditions = []
+        params: List[str] = []
+        if filters.cedis_id:
+            conditions.append("cedis_id = ?")
+            params.append(filters.cedis_id)
+        if filters.day_of_week:
+            conditions.append("day_of_week = ?")
+            params.append(filters.day_of_week.upper())
+        
+        cursor = self._conn.cursor()
+        
+        group_where = " AND ".join(conditions + ["active_routes > 0"])
+        cursor.execute(f"""
+            SELECT cedis_id, day_of_week, active_routes, total_stops
+            FROM route_stats
+            WHERE {group_where}
+            ORDER BY cedis_id, day_of_week
+        """, params)
+        
+        groups = [
+            RouteGroupStatistics(
+                cedis_id=row['cedis_id'],
+                day_of_week=row['day_of_week'],
+                active_routes=row['active_routes'],
+                total_stops=row['total_stops']
+            )
+            for row in cursor.fetchall()
+        ]
+        
+        largest_routes: List[RouteSummary] = []
+        if filters.top_n > 0:
+            route_where = " AND ".join(conditions + ["is_active = 1"])
+            # Sin filtros el índice por tamaño entrega el top-N sin ordenar;
+            # con CEDIS o día conviene que el planificador use el índice por
+            # CEDIS y día y ordene solo ese grupo
+            index_hint = "" if conditions else "INDEXED BY idx_routes_active_size"
+            cursor.execute(f"""
+                SELECT id, name, cedis_id, day_of_week,
+                       stop_count AS client_count, is_active, version,
+                       distance_km, duration_minutes
+                FROM routes {index_hint}
+                WHERE {route_where}
+                ORDER BY stop_count DESC
+                LIMIT ?
+            """, params + [filters.top_n])
+            largest_routes = [self._row_to_summary(row) for row in cursor.fetchall()]
+        
+        return RouteStatistics(groups=groups, largest_routes=largest_routes)
     
     def delete(self, route_id: str) -> None:
         """
@@ -200,10 +524,18 @@ class SqliteRouteRepository(RouteRepositoryPort):
         """
         cursor = self._conn.cursor()
         
+        self._unindex_route(route_id)
         cursor.execute("DELETE FROM routes WHERE id = ?", (route_id,))
         
+        if cursor.rowcount == 0:
+            cursor.execute("DELETE FROM routes_archive WHERE id = ?", (route_id,))
+        
         if cursor.rowcount == 0:
             raise ValueError(f"Ruta {route_id} no encontrada para eliminar")
+        
+        cursor.execute("DELETE FROM route_stops WHERE route_id = ?", (route_id,))
+        
+        self._record_change(route_id, RouteChange.DELETE)
     
     def get_by_cedis_and_day(self, cedis_id: str, day_of_week: str) -> List[Route]:
         """
@@ -219,14 +551,303 @@ class SqliteRouteRepository(RouteRepositoryPort):
         cursor = self._conn.cursor()
         
         cursor.execute("""
-            SELECT id, name, cedis_id, day_of_week, client_ids, is_active
+            SELECT id, name, cedis_id, day_of_week, is_active, version,
+                   capacity, shift_start, shift_minutes, distance_km, duration_minutes
             FROM routes
             WHERE cedis_id = ? AND day_of_week = ? AND is_active = 1
             ORDER BY name
         """, (cedis_id, day_of_week.upper()))
         
         rows = cursor.fetchall()
-        return [self._row_to_route(row) for row in rows]
+        return self._rows_to_routes(rows)
+    
+    def find_client_routes(
+        self,
+        cedis_id: str,
+        day_of_week: str,
+        client_ids: Iterable[str]
+    ) -> Dict[str, List[str]]:
+        """
+        Obtiene las rutas activas de un CEDIS y día que visitan cada cliente,
+        buscando por la clave primaria de daily_assignments.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            day_of_week: Día de la semana
+            client_ids: Clientes a consultar
+            
+        Returns:
+            IDs de ruta por cliente; los clientes sin rutas no aparecen
+        """
+        client_ids = list(dict.fromkeys(client_ids))
+        
+        # Un cliente que no está en el diccionario no tiene paradas
+        missing = [c for c in client_ids if c not in self._keys_by_client_id]
+        if missing:
+            self._load_client_keys("client_id", missing)
+        client_keys = [self._keys_by_client_id[c] for c in client_ids if c in self._keys_by_client_id]
+        
+        routes_by_client: Dict[str, List[str]] = {}
+        for start in range(0, len(client_keys), self._BATCH_SIZE):
+            batch = client_keys[start:start + self._BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            for row in self._conn.execute(f"""
+                SELECT client_key, route_id FROM daily_assignments
+                WHERE cedis_id = ? AND day_of_week = ? AND client_key IN ({placeholders})
+                ORDER BY client_key, route_id
+            """, [cedis_id, day_of_week.upper(), *batch]):
+                client_id = self._client_ids_by_key[row['client_key']]
+                routes_by_client.setdefault(client_id, []).append(row['route_id'])
+        
+        return routes_by_client
+    
+    def find_conflicts(self, cedis_id: str, day_of_week: str) -> List[ClientConflict]:
+        """
+        Obtiene los clientes asignados a más de una ruta activa de un CEDIS
+        el mismo día. Recorre solo el rango (cedis_id, day_of_week) de la
+        clave primaria, ya agrupado por cliente.
+        
+        Args:
+            cedis_id: ID del CEDIS
+            day_of_week: Día de la semana
+            
+        Returns:
+            Conflictos ordenados por cliente
+        """
+        day_of_week = day_of_week.upper()
+        rows = self._conn.execute("""
+            SELECT client_key, route_id FROM daily_assignments
+            WHERE cedis_id = ? AND day_of_week = ? AND client_key IN (
+                SELECT client_key FROM daily_assignments
+                WHERE cedis_id = ? AND day_of_week = ?
+                GROUP BY client_key
+                HAVING COUNT(*) > 1
+            )
+            ORDER BY client_key, route_id
+        """, (cedis_id, day_of_week, cedis_id, day_of_week)).fetchall()
+        
+        missing = {row['client_key'] for row in rows} - self._client_ids_by_key.keys()
+        if missing:
+            self._load_client_keys("key", missing)
+        
+        route_ids_by_key: Dict[int, List[str]] = {}
+        for row in rows:
+            route_ids_by_key.setdefault(row['client_key'], []).append(row['route_id'])
+        
+        conflicts = [
+            ClientConflict(
+                cedis_id=cedis_id,
+                day_of_week=day_of_week,
+                client_id=self._client_ids_by_key[client_key],
+                route_ids=tuple(route_ids)
+            )
+            for client_key, route_ids in route_ids_by_key.items()
+        ]
+        conflicts.sort(key=lambda conflict: conflict.client_id)
+        return conflicts
+    
+    def changes_since(self, seq: ChangeCursor, limit: int = 100) -> List[RouteChange]:
+        """
+        Obtiene los cambios posteriores a una secuencia.
+        La consulta usa la clave primaria (seq), por lo que su costo
+        depende solo del número de cambios retornados.
+        
+        Args:
+            seq: Última secuencia procesada por el consumidor
+            limit: Número máximo de cambios a retornar
+            
+        Returns:
+            Lista de cambios ordenados por secuencia
+            
+        Raises:
+            ValueError: Si el límite no es positivo o el cursor no es válido
+        """
+        if limit <= 0:
+            raise ValueError("El límite debe ser mayor que cero")
+        
+        cursor = self._conn.cursor()
+        
+        cursor.execute("""
+            SELECT seq, route_id, operation, changed_at
+            FROM route_changes
+            WHERE seq > ?
+            ORDER BY seq
+            LIMIT ?
+        """, (cursor_sequence(seq), limit))
+        
+        return [
+            RouteChange(
+                seq=sequence_cursor(row['seq']),
+                route_id=row['route_id'],
+                operation=self._OPERATION_NAMES[row['operation']],
+                changed_at=row['changed_at']
+            )
+            for row in cursor.fetchall()
+        ]
+    
+    def add_lineage(self, parent_ids: List[str], child_ids: List[str], operation: str) -> None:
+        """
+        Registra las aristas padre -> hijo de una división o fusión.
+        No hace commit: participa en la transacción del caso de uso.
+        
+        Args:
+            parent_ids: IDs de las rutas originales
+            child_ids: IDs de las rutas resultantes
+            operation: DIVIDE o MERGE
+        """
+        self._conn.executemany("""
+            INSERT INTO route_lineage (parent_id, child_id, operation)
+            VALUES (?, ?, ?)
+        """, [
+            (parent_id, child_id, operation)
+            for parent_id in parent_ids
+            for child_id in child_ids
+        ])
+    
+    def get_ancestors(self, route_id: str) -> List[RouteLineageEdge]:
+        """
+        Obtiene las aristas de ancestros con un CTE recursivo.
+        La recursión avanza por nodos y UNION descarta los ya visitados,
+        así cada ruta se expande una sola vez aunque el grafo tenga
+        caminos repetidos por fusiones.
+        
+        Args:
+            route_id: ID de la ruta consultada
+            
+        Returns:
+            Aristas de ancestros ordenadas por profundidad
+        """
+        cursor = self._conn.cursor()
+        
+        cursor.execute("""
+            WITH RECURSIVE ancestors(id) AS (
+                SELECT ?
+                UNION
+                SELECT l.parent_id
+                FROM route_lineage l
+                JOIN ancestors a ON l.child_id = a.id
+            )
+            SELECT l.parent_id, l.child_id, l.operation
+            FROM route_lineage l
+            WHERE l.child_id IN (SELECT id FROM ancestors)
+        """, (route_id,))
+        
+        return self._edges_by_depth(cursor.fetchall(), route_id, towards_parents=True)
+    
+    def get_descendants(self, route_id: str) -> List[RouteLineageEdge]:
+        """
+        Obtiene las aristas de descendientes con un CTE recursivo.
+        
+        Args:
+            route_id: ID de la ruta consultada
+            
+        Returns:
+            Aristas de descendientes ordenadas por profundidad
+        """
+        cursor = self._conn.cursor()
+        
+        cursor.execute("""
+            WITH RECURSIVE descendants(id) AS (
+                SELECT ?
+                UNION
+                SELECT l.child_id
+                FROM route_lineage l
+                JOIN descendants d ON l.parent_id = d.id
+            )
+            SELECT l.parent_id, l.child_id, l.operation
+            FROM route_lineage l
+            WHERE l.parent_id IN (SELECT id FROM descendants)
+        """, (route_id,))
+        
+        return self._edges_by_depth(cursor.fetchall(), route_id, towards_parents=False)
+    
+    def archive_inactive_routes(self, older_than_days: int) -> int:
+        """
+        Mueve a routes_archive las rutas inactivas que no se modifican desde
+        hace al menos older_than_days días, junto con sus paradas. Así la
+        tabla principal solo conserva las rutas vigentes y las inactivas
+        recientes. Las rutas archivadas siguen disponibles por ID y en los
+        listados que incluyen inactivas.
+        
+        Args:
+            older_than_days: Días sin modificaciones para archivar una ruta
+            
+        Returns:
+            Número de rutas archivadas
+        """
+        cursor = self._conn.cursor()
+        
+        route_ids = [row['id'] for row in cursor.execute("""
+            SELECT id FROM routes INDEXED BY idx_routes_inactive_updated
+            WHERE is_active = 0 AND updated_at <= datetime('now', ?)
+        """, (f"-{older_than_days} days",))]
+        
+        for start in range(0, len(route_ids), self._BATCH_SIZE):
+            batch = route_ids[start:start + self._BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            
+            stops: Dict[str, List[int]] = {route_id: [] for route_id in batch}
+            for stop in cursor.execute(f"""
+                SELECT route_id, client_key FROM route_stops
+                WHERE route_id IN ({placeholders})
+                ORDER BY route_id, sort_key
+            """, batch).fetchall():
+                stops[stop['route_id']].append(stop['client_key'])
+            
+            cursor.executemany("""
+                INSERT INTO routes_archive (
+                    id, name, cedis_id, day_of_week, stop_count, version,
+                    capacity, shift_start, shift_minutes, distance_km, duration_minutes,
+                    client_keys, created_at, updated_at
+                )
+                SELECT id, name, cedis_id, day_of_week, stop_count, version,
+                       capacity, shift_start, shift_minutes, distance_km, duration_minutes,
+                       ?, created_at, updated_at
+                FROM routes WHERE id = ?
+            """, [
+                (self._pack_client_keys(client_keys), route_id)
+                for route_id, client_keys in stops.items()
+            ])
+            
+            for route_id in batch:
+                self._unindex_route(route_id)
+            cursor.execute(f"DELETE FROM route_stops WHERE route_id IN ({placeholders})", batch)
+            cursor.execute(f"DELETE FROM routes WHERE id IN ({placeholders})", batch)
+        
+        return len(route_ids)
+    
+    def _restore_archived_route(self, route_id: str) -> bool:
+        """
+        Devuelve una ruta archivada a la tabla principal, inactiva y con la
+        misma versión, para que pueda actualizarse.
+        
+        Args:
+            route_id: ID de la ruta
+            
+        Returns:
+            True si la ruta estaba archivada
+        """
+        cursor = self._conn.cursor()
+        
+        row = cursor.execute(
+            "SELECT client_keys FROM routes_archive WHERE id = ?", (route_id,)
+        ).fetchone()
+        if row is None:
+            return False
+        
+        cursor.execute("""
+            INSERT INTO routes (id, name, cedis_id, day_of_week, stop_count, is_active, version,
+                                capacity, shift_start, shift_minutes, distance_km, duration_minutes,
+                                created_at, updated_at)
+            SELECT id, name, cedis_id, day_of_week, stop_count, 0, version,
+                   capacity, shift_start, shift_minutes, distance_km, duration_minutes,
+                   created_at, updated_at
+            FROM routes_archive WHERE id = ?
+        """, (route_id,))
+        self._insert_stops(route_id, self._unpack_client_keys(row['client_keys']).tolist())
+        cursor.execute("DELETE FROM routes_archive WHERE id = ?", (route_id,))
+        
+        return True
     
     def begin_transaction(self) -> None:
         """
@@ -241,25 +862,575 @@ class SqliteRouteRepository(RouteRepositoryPort):
         Confirma la transacción actual.
         """
         self._conn.commit()
+        self._uncommitted_keys.clear()
+        
+        pending = self._routes_to_renormalize
+        if pending and (
+            len(pending) >= self._RENORMALIZE_BATCH
+            or max(pending.values()) > self._RENORMALIZE_KEY_LENGTH
+        ):
+            self.renormalize_sort_keys()
     
     def rollback_transaction(self) -> None:
         """
         Revierte la transacción actual.
+        Las claves de cliente asignadas en ella se retiran de la caché,
+        porque otra conexión podría reutilizarlas.
         """
         self._conn.rollback()
+        for key in self._uncommitted_keys:
+            client_id = self._client_ids_by_key.pop(key, None)
+            if client_id is not None:
+                self._keys_by_client_id.pop(client_id, None)
+        self._uncommitted_keys.clear()
+        self._routes_to_renormalize.clear()
+    
+    def _record_change(self, route_id: str, operation: str) -> None:
+        """
+        Agrega una entrada al registro de cambios.
+        Se ejecuta en la misma transacción que la escritura que la origina,
+        por lo que un rollback también descarta la entrada.
+        
+        Args:
+            route_id: ID de la ruta modificada
+            operation: Tipo de operación (INSERT, UPDATE, DELETE)
+        """
+        self._conn.execute(
+            "INSERT INTO route_changes (route_id, operation) VALUES (?, ?)",
+            (route_id, self._OPERATION_CODES[operation])
+        )
+    
+    def _index_route(self, route: Route) -> None:
+        """
+        Agrega una ruta al índice de búsqueda, con la clave entera de su
+        fila en routes como rowid.
+        
+        Args:
+            route: Ruta a indexar
+        """
+        if not self._fts_enabled:
+            return
+        
+        self._conn.execute("""
+            INSERT INTO routes_fts (rowid, route_id, name, cedis_id, client_ids)
+            SELECT key, id, ?, ?, ? FROM routes WHERE id = ?
+        """, (route.name, route.cedis_id, " ".join(route.client_ids), route.id))
+    
+    def _unindex_route(self, route_id: str) -> None:
+        """
+        Retira una ruta del índice de búsqueda por la clave entera de su
+        fila en routes, así que debe llamarse antes de eliminar la fila.
+        
+        Args:
+            route_id: ID de la ruta
+        """
+        if not self._fts_enabled:
+            return
+        
+        self._conn.execute("""
+            DELETE FROM routes_fts
+            WHERE rowid = (SELECT key FROM routes WHERE id = ?)
+        """, (route_id,))
+    
+    def _search_routes_without_index(self, terms: List[str], limit: int) -> List[RouteSummary]:
+        """
+        Búsqueda de respaldo por coincidencia parcial con LIKE cuando no hay FTS5.
+        Solo cubre nombre y CEDIS: los clientes están empaquetados.
+        
+        Args:
+            terms: Términos de búsqueda
+            limit: Número máximo de resultados
+            
+        Returns:
+            Resúmenes de rutas coincidentes
+        """
+        conditions = []
+        params: List[object] = []
+        for term in terms:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            conditions.append("(name LIKE ? ESCAPE '\\' OR cedis_id LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+        
+        cursor = self._conn.cursor()
+        cursor.execute(f"""
+            SELECT id, name, cedis_id, day_of_week,
+                   stop_count AS client_count, is_active, version,
+                   distance_km, duration_minutes
+            FROM routes
+            WHERE is_active = 1 AND {" AND ".join(conditions)}
+            ORDER BY name
+            LIMIT ?
+        """, params + [limit])
+        
+        return [self._row_to_summary(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _edges_by_depth(
+        rows: List[sqlite3.Row],
+        route_id: str,
+        towards_parents: bool
+    ) -> List[RouteLineageEdge]:
+        """
+        Asigna a cada arista su profundidad (generaciones desde la ruta
+        consultada) con un recorrido en anchura en memoria.
+        
+        Args:
+            rows: Aristas retornadas por el CTE recursivo
+            route_id: ID de la ruta consultada
+            towards_parents: True para ancestros, False para descendientes
+            
+        Returns:
+            Aristas ordenadas por profundidad
+        """
+        near_key, far_key = ('child_id', 'parent_id') if towards_parents else ('parent_id', 'child_id')
+        
+        adjacency: Dict[str, List[sqlite3.Row]] = {}
+        for row in rows:
+            adjacency.setdefault(row[near_key], []).append(row)
+        
+        edges: List[RouteLineageEdge] = []
+        visited = {route_id}
+        frontier = [route_id]
+        depth = 1
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for row in adjacency.get(node, []):
+                    edges.append(RouteLineageEdge(
+                        parent_id=row['parent_id'],
+                        child_id=row['child_id'],
+                        operation=row['operation'],
+                        depth=depth
+                    ))
+                    if row[far_key] not in visited:
+                        visited.add(row[far_key])
+                        next_frontier.append(row[far_key])
+            frontier = next_frontier
+            depth += 1
+        
+        return edges
+    
+    def move_stop(
+        self,
+        route_id: str,
+        client_id: str,
+        before: Optional[str],
+        after: Optional[str],
+        expected_version: Optional[int] = None,
+        metrics: Optional[RouteMetrics] = None
+    ) -> None:
+        """
+        Mueve una parada entre dos paradas vecinas escribiendo una sola fila
+        de route_stops: la parada recibe una clave fraccional entre las de
+        sus nuevos vecinos. La cabecera de la ruta solo incrementa su versión.
+        
+        Args:
+            route_id: ID de la ruta
+            client_id: Cliente a mover
+            before: Cliente que quedará inmediatamente antes (None = inicio)
+            after: Cliente que quedará inmediatamente después (None = final)
+            expected_version: Versión vista por el usuario; None para no verificarla
+            metrics: Métricas de la ruta con la parada movida; None para
+                conservar las guardadas
+            
+        Raises:
+            ValueError: Si la ruta o los clientes no existen, o before y
+                after no son vecinos
+            ConcurrentModificationError: Si la ruta cambió desde expected_version
+        """
+        cursor = self._conn.cursor()
+        
+        row = cursor.execute("SELECT version FROM routes WHERE id = ?", (route_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Ruta {route_id} no encontrada")
+        version = row['version']
+        if expected_version is not None and version != expected_version:
+            raise ConcurrentModificationError(route_id, expected_version)
+        
+        if client_id in (before, after):
+            raise ValueError("Un cliente no puede ser vecino de sí mismo")
+        
+        client_key = self._stop_client_key(client_id)
+        current_key = self._stop_sort_key(route_id, client_key)
+        
+        # Vecinos efectivos, sin contar la parada que se mueve
+        lower: Optional[str]
+        upper: Optional[str]
+        if before is not None:
+            lower = self._stop_sort_key(route_id, self._stop_client_key(before))
+            upper = self._neighbor_sort_key(route_id, lower, client_key, following=True)
+            if after is not None:
+                after_key = self._stop_sort_key(route_id, self._stop_client_key(after))
+                if after_key != upper:
+                    raise ValueError(f"Los clientes {before} y {after} no son consecutivos")
+        elif after is not None:
+            upper = self._stop_sort_key(route_id, self._stop_client_key(after))
+            lower = self._neighbor_sort_key(route_id, upper, client_key, following=False)
+        else:
+            raise ValueError("Debe indicar el cliente anterior o el siguiente")
+        
+        # La parada ya está en esa posición
+        if (lower is None or lower < current_key) and (upper is None or current_key < upper):
+            return
+        
+        new_key = key_between(lower, upper)
+        cursor.execute(
+            "UPDATE route_stops SET sort_key = ? WHERE route_id = ? AND client_key = ?",
+            (new_key, route_id, client_key)
+        )
+        
+        distance_km, duration_minutes = self._metrics_values(metrics)
+        cursor.execute("""
+            UPDATE routes SET version = version + 1, updated_at = CURRENT_TIMESTAMP,
+                              distance_km = COALESCE(?, distance_km),
+                              duration_minutes = COALESCE(?, duration_minutes)
+            WHERE id = ? AND version = ?
+        """, (distance_km, duration_minutes, route_id, version))
+        if cursor.rowcount == 0:
+            raise ConcurrentModificationError(route_id, version)
+        
+        self._record_change(route_id, RouteChange.UPDATE)
+        
+        if len(new_key) > self._MAX_SORT_KEY_LENGTH:
+            self._mark_for_renormalization(route_id, len(new_key))
+    
+    def _stop_client_key(self, client_id: str) -> int:
+        """
+        Obtiene la clave entera de un cliente que debe estar en la ruta.
+        
+        Raises:
+            ValueError: Si el cliente no está en la ruta
+        """
+        key = self._keys_by_client_id.get(client_id)
+        if key is None:
+            loaded = self._load_client_keys("client_id", [client_id])
+            if not loaded:
+                raise ValueError(f"El cliente {client_id} no está en la ruta")
+            key = loaded[0]
+        return key
+    
+    def _stop_sort_key(self, route_id: str, client_key: int) -> str:
+        """
+        Obtiene la clave de orden de la parada de un cliente.
+        
+        Raises:
+            ValueError: Si el cliente no está en la ruta
+        """
+        row = self._conn.execute(
+            "SELECT sort_key FROM route_stops WHERE route_id = ? AND client_key = ?",
+            (route_id, client_key)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"El cliente {self._client_ids_by_key[client_key]} no está en la ruta")
+        return row['sort_key']
+    
+    def _neighbor_sort_key(
+        self,
+        route_id: str,
+        sort_key: str,
+        excluded_client_key: int,
+        following: bool
+    ) -> Optional[str]:
+        """
+        Obtiene la clave de la parada siguiente (o anterior) a una clave,
+        ignorando la parada excluida. Es una búsqueda por la clave primaria.
+        
+        Returns:
+            Clave vecina o None si no hay más paradas en esa dirección
+        """
+        if following:
+            query = """
+                SELECT sort_key FROM route_stops
+                WHERE route_id = ? AND sort_key > ? AND client_key != ?
+                ORDER BY sort_key LIMIT 1
+            """
+        else:
+            query = """
+                SELECT sort_key FROM route_stops
+                WHERE route_id = ? AND sort_key < ? AND client_key != ?
+                ORDER BY sort_key DESC LIMIT 1
+            """
+        row = self._conn.execute(query, (route_id, sort_key, excluded_client_key)).fetchone()
+        return row['sort_key'] if row else None
+    
+    def _insert_stops(self, route_id: str, client_keys: List[int]) -> None:
+        """
+        Inserta las paradas de una ruta sin paradas, con claves equiespaciadas.
+        
+        Args:
+            route_id: ID de la ruta
+            client_keys: Claves de cliente en orden
+        """
+        self._conn.executemany(
+            "INSERT INTO route_stops (route_id, sort_key, client_key) VALUES (?, ?, ?)",
+            [
+                (route_id, sort_key, client_key)
+                for sort_key, client_key in zip(spread_keys(len(client_keys)), client_keys)
+            ]
+        )
+    
+    def _write_stop_changes(self, route_id: str, client_keys: List[int]) -> None:
+        """
+        Ajusta las paradas almacenadas al nuevo orden escribiendo solo las
+        filas necesarias. Las paradas que forman la subsecuencia creciente
+        más larga del orden anterior conservan su clave; las demás (movidas o
+        nuevas) reciben claves entre sus vecinas conservadas, y las que ya no
+        están se eliminan. Agregar, quitar o arrastrar una parada escribe
+        una sola fila.
+        
+        Args:
+            route_id: ID de la ruta
+            client_keys: Claves de cliente en el nuevo orden
+        """
+        stored = self._conn.execute(
+            "SELECT sort_key, client_key FROM route_stops WHERE route_id = ? ORDER BY sort_key",
+            (route_id,)
+        ).fetchall()
+        stored_position = {row['client_key']: i for i, row in enumerate(stored)}
+        
+        kept = longest_increasing_run(
+            [stored_position.get(client_key, -1) for client_key in client_keys]
+        )
+        
+        new_sort_keys: List[Optional[str]] = [None] * len(client_keys)
+        for index in kept:
+            new_sort_keys[index] = stored[stored_position[client_keys[index]]]['sort_key']
+        
+        # Completar los tramos entre paradas conservadas
+        index = 0
+        while index < len(client_keys):
+            if new_sort_keys[index] is not None:
+                index += 1
+                continue
+            end = index
+            while end < len(client_keys) and new_sort_keys[end] is None:
+                end += 1
+            lower = new_sort_keys[index - 1] if index > 0 else None
+            upper = new_sort_keys[end] if end < len(client_keys) else None
+            keys = keys_between(lower, upper, end - index)
+            new_sort_keys[index:end] = keys
+            longest = max(len(key) for key in keys)
+            if longest > self._MAX_SORT_KEY_LENGTH:
+                self._mark_for_renormalization(route_id, longest)
+            index = end
+        
+        kept_keys = {client_keys[i] for i in kept}
+        rewritten = [k for k in client_keys if k not in kept_keys]
+        current_keys = set(client_keys)
+        removed = [row['client_key'] for row in stored if row['client_key'] not in current_keys]
+        
+        # Primero se borran las filas movidas para no chocar con sus claves nuevas
+        self._conn.executemany(
+            "DELETE FROM route_stops WHERE route_id = ? AND client_key = ?",
+            [(route_id, k) for k in removed + [k for k in rewritten if k in stored_position]]
+        )
+        self._conn.executemany(
+            "INSERT INTO route_stops (route_id, sort_key, client_key) VALUES (?, ?, ?)",
+            [
+                (route_id, new_sort_keys[i], k)
+                for i, k in enumerate(client_keys)
+                if k not in kept_keys
+            ]
+        )
+    
+    def _mark_for_renormalization(self, route_id: str, key_length: int) -> None:
+        """Registra una ruta con claves de orden largas."""
+        pending = self._routes_to_renormalize
+        pending[route_id] = max(pending.get(route_id, 0), key_length)
+    
+    def renormalize_sort_keys(self) -> None:
+        """
+        Reescribe con claves cortas y equiespaciadas las paradas de las rutas
+        cuyas claves superaron la longitud máxima. Es mantenimiento: commit
+        lo ejecuta solo al juntar varias rutas o si alguna clave es muy
+        larga, y un proceso periódico puede llamarlo para no esperar.
+        Usa una transacción propia, así que debe llamarse fuera de una
+        transacción, y no cambia el orden ni la versión de las rutas.
+        """
+        route_ids = list(self._routes_to_renormalize)
+        self._routes_to_renormalize.clear()
+        
+        try:
+            for route_id in route_ids:
+                client_keys = [
+                    row['client_key']
+                    for row in self._conn.execute(
+                        "SELECT client_key FROM route_stops WHERE route_id = ? ORDER BY sort_key",
+                        (route_id,)
+                    )
+                ]
+                self._conn.execute("DELETE FROM route_stops WHERE route_id = ?", (route_id,))
+                self._insert_stops(route_id, client_keys)
+            self._conn.commit()
+        except sqlite3.Error:
+            # Es solo mantenimiento: si falla (p. ej. base bloqueada) se reintenta
+            # la próxima vez que las claves vuelvan a crecer
+            self._conn.rollback()
+    
+    def _client_keys_for(self, client_ids: List[str]) -> List[int]:
+        """
+        Traduce IDs de cliente a claves enteras, asignando claves nuevas en
+        el diccionario si hace falta.
+        
+        Args:
+            client_ids: IDs externos de los clientes, en orden
+            
+        Returns:
+            Claves enteras en el mismo orden
+        """
+        missing = [c for c in dict.fromkeys(client_ids) if c not in self._keys_by_client_id]
+        if missing:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO client_keys (client_id) VALUES (?)",
+                [(client_id,) for client_id in missing]
+            )
+            new_keys = self._load_client_keys("client_id", missing)
+            self._uncommitted_keys.extend(new_keys)
+        
+        return [self._keys_by_client_id[c] for c in client_ids]
+    
+    @staticmethod
+    def _pack_client_keys(client_keys: Iterable[int]) -> bytes:
+        """
+        Empaqueta claves de cliente como uint32 little-endian.
+        
+        Args:
+            client_keys: Claves enteras
+            
+        Returns:
+            Bytes del arreglo empaquetado
+        """
+        keys = array('I', client_keys)
+        if sys.byteorder == 'big':
+            keys.byteswap()
+        return keys.tobytes()
+    
+    def _unpack_client_keys(self, blob: bytes) -> array:
+        """
+        Desempaqueta un arreglo de claves de cliente (uint32 little-endian).
+        
+        Args:
+            blob: Bytes del arreglo empaquetado
+            
+        Returns:
+            Arreglo de claves enteras
+        """
+        keys = array('I')
+        keys.frombytes(blob)
+        if sys.byteorder == 'big':
+            keys.byteswap()
+        return keys
+    
+    def _load_client_keys(self, column: str, values: Iterable) -> List[int]:
+        """
+        Carga en la caché las entradas del diccionario de clientes que
+        coinciden con los valores dados, en lotes para respetar el límite
+        de parámetros de SQLite.
+        
+        Args:
+            column: Columna de búsqueda ('key' o 'client_id')
+            values: Valores a buscar
+            
+        Returns:
+            Claves cargadas
+        """
+        values = list(values)
+        loaded: List[int] = []
+        
+        for start in range(0, len(values), self._BATCH_SIZE):
+            batch = values[start:start + self._BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, client_id FROM client_keys WHERE {column} IN ({placeholders})",
+                batch
+            ).fetchall()
+            for row in rows:
+                client_id = sys.intern(row['client_id'])
+                self._client_ids_by_key[row['key']] = client_id
+                self._keys_by_client_id[client_id] = row['key']
+                loaded.append(row['key'])
+        
+        return loaded
     
-    def _row_to_route(self, row: sqlite3.Row) -> Route:
+    def _row_to_summary(self, row: sqlite3.Row) -> RouteSummary:
+        """
+        Convierte una fila con client_count calculado en un resumen de ruta.
+        
+        Args:
+            row: Fila de SQLite
+            
+        Returns:
+            Resumen de la ruta
+        """
+        return RouteSummary(
+            id=row['id'],
+            name=row['name'],
+            cedis_id=row['cedis_id'],
+            day_of_week=row['day_of_week'],
+            client_count=row['client_count'],
+            is_active=bool(row['is_active']),
+            version=row['version'],
+            metrics=self._row_to_metrics(row)
+        )
+    
+    def _rows_to_routes(self, rows: List[sqlite3.Row]) -> List[Route]:
+        """
+        Convierte filas de base de datos a entidades Route. Las paradas se
+        leen por lotes de rutas en el orden de la clave primaria (las de
+        rutas archivadas vienen empaquetadas en la propia fila), y las
+        claves de cliente que aún no están en caché se resuelven en una
+        sola pasada.
+        
+        Args:
+            rows: Filas de SQLite
+            
+        Returns:
+            Entidades Route
+        """
+        stops: Dict[str, List[int]] = {row['id']: [] for row in rows}
+        route_ids = list(stops)
+        
+        # Las rutas archivadas traen sus paradas empaquetadas en la fila
+        if rows and 'client_keys' in rows[0].keys():
+            archived = [row for row in rows if row['client_keys'] is not None]
+            for row in archived:
+                stops[row['id']] = self._unpack_client_keys(row['client_keys']).tolist()
+            if archived:
+                archived_ids = {row['id'] for row in archived}
+                route_ids = [route_id for route_id in route_ids if route_id not in archived_ids]
+        
+        for start in range(0, len(route_ids), self._BATCH_SIZE):
+            batch = route_ids[start:start + self._BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            for stop in self._conn.execute(f"""
+                SELECT route_id, client_key FROM route_stops
+                WHERE route_id IN ({placeholders})
+                ORDER BY route_id, sort_key
+            """, batch):
+                stops[stop['route_id']].append(stop['client_key'])
+        
+        missing: Set[int] = set()
+        for client_keys in stops.values():
+            missing.update(k for k in client_keys if k not in self._client_ids_by_key)
+        if missing:
+            self._load_client_keys("key", missing)
+        
+        return [self._row_to_route(row, stops[row['id']]) for row in rows]
+    
+    def _row_to_route(self, row: sqlite3.Row, client_keys: List[int]) -> Route:
         """
         Convierte una fila de base de datos a una entidad Route del dominio.
         
         Args:
             row: Fila de SQLite
+            client_keys: Claves de cliente de sus paradas, en orden
             
         Returns:
             Entidad Route
         """
-        # Deserializar client_ids de JSON
-        client_ids = json.loads(row['client_ids'])
+        # Las claves se traducen a las cadenas internadas de la caché
+        client_ids_by_key = self._client_ids_by_key
+        client_ids = [client_ids_by_key[key] for key in client_keys]
         
         return Route(
             id=row['id'],
@@ -267,9 +1438,28 @@ class SqliteRouteRepository(RouteRepositoryPort):
             cedis_id=row['cedis_id'],
             day_of_week=row['day_of_week'],
             client_ids=client_ids,
-            is_active=bool(row['is_active'])
+            is_active=bool(row['is_active']),
+            version=row['version'],
+            capacity=row['capacity'],
+            shift_start=row['shift_start'],
+            shift_minutes=row['shift_minutes'],
+            metrics=self._row_to_metrics(row)
         )
     
+    @staticmethod
+    def _row_to_metrics(row: sqlite3.Row) -> Optional[RouteMetrics]:
+        """Métricas guardadas en la fila; None si aún no se calcularon."""
+        if row['distance_km'] is None:
+            return None
+        return RouteMetrics(distance_km=row['distance_km'], duration_minutes=row['duration_minutes'])
+    
+    @staticmethod
+    def _metrics_values(metrics: Optional[RouteMetrics]) -> Tuple[Optional[float], Optional[float]]:
+        """Valores de las columnas distance_km y duration_minutes."""
+        if metrics is None:
+            return None, None
+        return metrics.distance_km, metrics.duration_minutes
+    
     def close(self) -> None:
         """
         Cierra la conexión a la base de datos.
@@ -0,0 +1,443 @@
+"""
+Write-Behind Route Repository - Infrastructure Layer
+Adaptador opcional que acumula las ediciones sucesivas de una misma ruta y
+las guarda en una sola escritura sobre el repositorio subyacente.
+"""
+import atexit
+import threading
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.domain.exceptions import ConcurrentModificationError
+from src.domain.models.route import Route
+from src.domain.models.route_metrics import RouteMetrics
+from src.domain.models.route_change import ChangeCursor, RouteChange
+from src.domain.models.route_lineage import RouteLineageEdge
+from src.domain.models.route_summary import RouteSummary
+from src.domain.models.route_statistics import RouteStatistics, RouteStatisticsFilter
+from src.domain.models.client_conflict import ClientConflict
+from src.domain.ports.route_repository_port import RouteRepositoryPort
+
+
+# Atributos de la ruta que una edición puede cambiar, además de las paradas
+_ROUTE_ATTRIBUTES = ('name', 'cedis_id', 'day_of_week', 'is_active', 'capacity', 'shift_start', 'shift_minutes')
+
+
+def _copy(route: Route) -> Route:
+    """Copia de una ruta que no comparte la lista de paradas."""
+    return replace(route, client_ids=list(route.client_ids))
+
+
+class WriteBehindFlushError(RuntimeError):
+    """
+    No se pudieron guardar algunas rutas pendientes. Las demás sí se
+    guardaron; las fallidas siguen pendientes para el próximo guardado.
+    """
+    
+    def __init__(self, errors: Dict[str, Exception]) -> None:
+        self.errors = errors
+        details = "; ".join(f"{route_id}: {error}" for route_id, error in errors.items())
+        super().__init__(f"No se pudieron guardar {len(errors)} rutas pendientes ({details})")
+
+
+@dataclass(slots=True)
+class _PendingWrite:
+    """Ediciones acumuladas de una ruta."""
+    # La ruta tal como está guardada en el repositorio subyacente
+    base: Route
+    # La ruta con todas las ediciones, con la versión que tendrá al guardarse
+    route: Route
+
+
+class WriteBehindRouteRepository(RouteRepositoryPort):
+    """
+    Repositorio con escritura diferida.
+    
+    Fuera de una transacción explícita, update no escribe: guarda la ruta
+    editada en memoria, con el mismo compare-and-swap de versión, y las
+    ediciones siguientes de la misma ruta reemplazan a la anterior. Un hilo
+    en segundo plano guarda cada ruta pendiente con un solo update cada
+    flush_interval_seconds. También se guardan al iniciar una transacción,
+    antes de las lecturas que no pueden combinarse con lo pendiente y al
+    cerrar (o al terminar el intérprete), así que nada confirmado se pierde
+    en un cierre ordenado.
+    
+    find_by_id y los listados devuelven las rutas pendientes, por lo que se
+    leen las propias escrituras. Si otra conexión cambió la ruta antes del
+    guardado, las ediciones se reaplican sobre la versión vigente: se
+    conservan las paradas que agregó o quitó cada parte, en el orden propio,
+    y los atributos editados aquí.
+    
+    El repositorio subyacente se usa desde el hilo de guardado, por lo que
+    su conexión debe admitir varios hilos (check_same_thread=False).
+    """
+    
+    def __init__(
+        self,
+        repository: RouteRepositoryPort,
+        flush_interval_seconds: float = 0.2,
+        background: bool = True
+    ) -> None:
+        """
+        Args:
+            repository: Repositorio donde se guardan las rutas
+            flush_interval_seconds: Cada cuánto se guardan las rutas pendientes
+            background: Si iniciar el hilo de guardado (sin él, solo se
+                guarda con flush o en los límites de transacción)
+            
+        Raises:
+            ValueError: Si flush_interval_seconds no es positivo
+        """
+        if flush_interval_seconds <= 0:
+            raise ValueError("El intervalo de guardado debe ser positivo")
+        
+        self._repository = repository
+        self._flush_interval = flush_interval_seconds
+        self._lock = threading.RLock()
+        self._pending: Dict[str, _PendingWrite] = {}
+        self._in_transaction = False
+        
+        # Rutas guardadas reaplicando ediciones por un cambio concurrente y
+        # último error del hilo de guardado (las rutas siguen pendientes)
+        self.rebased_writes = 0
+        self.last_flush_error: Optional[Exception] = None
+        
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name="route-write-behind", daemon=True)
+            self._thread.start()
+        atexit.register(self.flush)
+    
+    @property
+    def pending_count(self) -> int:
+        """Rutas con ediciones sin guardar."""
+        return len(self._pending)
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self._flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.last_flush_error = e
+    
+    def flush(self) -> int:
+        """
+        Guarda todas las rutas pendientes, cada una en su propia transacción.
+        Una ruta que falla no detiene a las demás: queda pendiente y el error
+        se reporta al final. Dentro de una transacción explícita no hace
+        nada: lo pendiente ya se guardó al iniciarla.
+        
+        Returns:
+            Número de rutas guardadas
+            
+        Raises:
+            WriteBehindFlushError: Si alguna ruta no se pudo guardar
+        """
+        with self._lock:
+            if self._in_transaction:
+                return 0
+            
+            written = 0
+            errors: Dict[str, Exception] = {}
+            for route_id in list(self._pending):
+                pending = self._pending[route_id]
+                self._repository.begin_transaction()
+                try:
+                    self._write(pending)
+                    self._repository.commit_transaction()
+                except Exception as e:
+                    self._repository.rollback_transaction()
+                    errors[route_id] = e
+                    continue
+                del self._pending[route_id]
+                written += 1
+            
+            if errors:
+                raise WriteBehindFlushError(errors)
+            return written
+    
+    def _write(self, pending: _PendingWrite) -> None:
+        """
+        Guarda una ruta pendiente con la versión acumulada o, si otra
+        conexión la cambió, reaplicando las ediciones sobre la vigente.
+        """
+        route = _copy(pending.route)
+        route.version -= 1
+        try:
+            self._repository.update(route, expected_version=pending.base.version)
+            return
+        except ConcurrentModificationError:
+            pass
+        
+        current = self._repository.find_by_id(route.id)
+        if current is None:
+            # Otra conexión la eliminó; no queda nada que actualizar
+            return
+        
+        merged = self._rebase(pending.base, pending.route, current)
+        # Una versión nueva para todos: mayor que la vigente y que la local
+        merged.version = max(current.version, pending.route.version)
+        self._repository.update(merged, expected_version=current.version)
+        self.rebased_writes += 1
+    
+    @staticmethod
+    def _rebase(base: Route, local: Route, current: Route) -> Route:
+        """
+        Combina las ediciones locales (base -> local) con la ruta vigente.
+        
+        Args:
+            base: Ruta sobre la que se hicieron las ediciones locales
+            local: Ruta con las ediciones locales
+            current: Ruta vigente, con los cambios de otra conexión
+            
+        Returns:
+            Ruta combinada
+        """
+        base_ids = set(base.client_ids)
+        local_ids = set(local.client_ids)
+        current_ids = set(current.client_ids)
+        removed = base_ids - local_ids
+        
+        # Orden local, sin lo que quitó la otra parte (salvo lo agregado
+        # aquí), y al final lo que agregó la otra parte
+        client_ids = [c for c in local.client_ids if c in current_ids or c not in base_ids]
+        client_ids += [c for c in current.client_ids if c not in local_ids and c not in removed]
+        
+        merged = _copy(current)
+        merged.client_ids = client_ids
+        for name in _ROUTE_ATTRIBUTES:
+            if getattr(local, name) != getattr(base, name):
+                setattr(merged, name, getattr(local, name))
+        merged.metrics = local.metrics if client_ids == local.client_ids else None
+        return merged
+    
+    def _flush_route(self, route_id: str) -> None:
+        """Guarda las ediciones pendientes de una ruta antes de escribirla directamente."""
+        if route_id in self._pending:
+            self.flush()
+    
+    def _overlay(
+        self,
+        routes: List[Route],
+        matches: Callable[[Route], bool],
+        sort_key: Callable[[Route], Any]
+    ) -> List[Route]:
+        """
+        Reemplaza en un listado las rutas con ediciones pendientes y agrega
+        las que ahora cumplen el filtro.
+        """
+        if not self._pending:
+            return routes
+        
+        listed = {route.id for route in routes}
+        merged = [
+            _copy(self._pending[route.id].route) if route.id in self._pending else route
+            for route in routes
+        ]
+        merged += [
+            _copy(pending.route) for route_id, pending in self._pending.items()
+            if route_id not in listed
+        ]
+        return sorted((route for route in merged if matches(route)), key=sort_key)
+    
+    def save(self, route: Route) -> None:
+        with self._lock:
+            self._repository.save(route)
+    
+    def update(self, route: Route, expected_version: Optional[int] = None) -> None:
+        """
+        Registra la ruta editada. Fuera de una transacción explícita la
+        escritura se difiere; el compare-and-swap se aplica igual, contra la
+        versión pendiente o la guardada.
+        
+        Args:
+            route: La ruta a actualizar
+            expected_version: Versión esperada; None = route.version
+            
+        Raises:
+            ValueError: Si la ruta no existe
+            ConcurrentModificationError: Si la ruta cambió desde que se leyó
+        """
+        with self._lock:
+            if self._in_transaction:
+                self._repository.update(route, expected_version)
+                return
+            
+            if expected_version is None:
+                expected_version = route.version
+            
+            pending = self._pending.get(route.id)
+            if pending is not None:
+                base = pending.base
+                stored_version = pending.route.version
+            else:
+                stored = self._repository.find_by_id(route.id)
+                if stored is None:
+                    raise ValueError(f"Ruta {route.id} no encontrada para actualizar")
+                base = stored
+                stored_version = stored.version
+            
+            if stored_version != expected_version:
+                raise ConcurrentModificationError(route.id, expected_version)
+            
+            route.version += 1
+            self._pending[route.id] = _PendingWrite(base=base, route=_copy(route))
+    
+    def move_stop(
+        self,
+        route_id: str,
+        client_id: str,
+        before: Optional[str],
+        after: Optional[str],
+        expected_version: Optional[int] = None,
+        metrics: Optional[RouteMetrics] = None
+    ) -> None:
+        with self._lock:
+            self._flush_route(route_id)
+            self._repository.move_stop(route_id, client_id, before, after, expected_version, metrics)
+    
+    def delete(self, route_id: str) -> None:
+        with self._lock:
+            self._pending.pop(route_id, None)
+            self._repository.delete(route_id)
+    
+    def add_lineage(self, parent_ids: List[str], child_ids: List[str], operation: str) -> None:
+        with self._lock:
+            self._repository.add_lineage(parent_ids, child_ids, operation)
+    
+    def archive_inactive_routes(self, older_than_days: int) -> int:
+        with self._lock:
+            self.flush()
+            return self._repository.archive_inactive_routes(older_than_days)
+    
+    def find_by_id(self, route_id: str) -> Optional[Route]:
+        with self._lock:
+            pending = self._pending.get(route_id)
+            if pending is not None:
+                return _copy(pending.route)
+            return self._repository.find_by_id(route_id)
+    
+    def get_all(self) -> List[Route]:
+        with self._lock:
+            return self._overlay(
+                self._repository.get_all(),
+                lambda route: route.is_active,
+                lambda route: route.name
+            )
+    
+    def get_all_including_inactive(self) -> List[Route]:
+        with self._lock:
+            return self._overlay(
+                self._repository.get_all_including_inactive(),
+                lambda route: True,
+                lambda route: (not route.is_active, route.name)
+            )
+    
+    def get_by_cedis_and_day(self, cedis_id: str, day_of_week: str) -> List[Route]:
+        with self._lock:
+            day = day_of_week.upper()
+            return self._overlay(
+                self._repository.get_by_cedis_and_day(cedis_id, day_of_week),
+                lambda route: route.is_active and route.cedis_id == cedis_id and route.day_of_week == day,
+                lambda route: route.name
+            )
+    
+    def get_summaries(self, include_inactive: bool = False) -> List[RouteSummary]:
+        with self._lock:
+            summaries = self._repository.get_summaries(include_inactive)
+            if not self._pending:
+                return summaries
+            
+            pending = {
+                route_id: RouteSummary(
+                    id=route.id,
+                    name=route.name,
+                    cedis_id=route.cedis_id,
+                    day_of_week=route.day_of_week,
+                    client_count=len(route.client_ids),
+                    is_active=route.is_active,
+                    version=route.version,
+                    metrics=route.metrics
+                )
+                for route_id, route in ((i, p.route) for i, p in self._pending.items())
+            }
+            listed = {summary.id for summary in summaries}
+            merged = [pending.get(summary.id, summary) for summary in summaries]
+            merged += [summary for route_id, summary in pending.items() if route_id not in listed]
+            return sorted(
+                (summary for summary in merged if include_inactive or summary.is_active),
+                key=lambda summary: (not summary.is_active, summary.name)
+            )
+    
+    def find_client_routes(
+        self,
+        cedis_id: str,
+        day_of_week: str,
+        client_ids: Iterable[str]
+    ) -> Dict[str, List[str]]:
+        with self._lock:
+            self.flush()
+            return self._repository.find_client_routes(cedis_id, day_of_week, client_ids)
+    
+    def find_conflicts(self, cedis_id: str, day_of_week: str) -> List[ClientConflict]:
+        with self._lock:
+            self.flush()
+            return self._repository.find_conflicts(cedis_id, day_of_week)
+    
+    def search_routes(self, query: str, limit: int = 20) -> List[RouteSummary]:
+        with self._lock:
+            self.flush()
+            return self._repository.search_routes(query, limit)
+    
+    def get_statistics(self, filters: RouteStatisticsFilter) -> RouteStatistics:
+        with self._lock:
+            self.flush()
+            return self._repository.get_statistics(filters)
+    
+    def changes_since(self, seq: ChangeCursor, limit: int = 100) -> List[RouteChange]:
+        with self._lock:
+            self.flush()
+            return self._repository.changes_since(seq, limit)
+    
+    def get_ancestors(self, route_id: str) -> List[RouteLineageEdge]:
+        with self._lock:
+            return self._repository.get_ancestors(route_id)
+    
+    def get_descendants(self, route_id: str) -> List[RouteLineageEdge]:
+        with self._lock:
+            return self._repository.get_descendants(route_id)
+    
+    def begin_transaction(self) -> None:
+        """
+        Guarda lo pendiente e inicia una transacción: dentro de ella las
+        escrituras van directo al repositorio subyacente.
+        """
+        with self._lock:
+            self.flush()
+            self._repository.begin_transaction()
+            self._in_transaction = True
+    
+    def commit_transaction(self) -> None:
+        with self._lock:
+            self._in_transaction = False
+            self._repository.commit_transaction()
+    
+    def rollback_transaction(self) -> None:
+        with self._lock:
+            self._in_transaction = False
+            self._repository.rollback_transaction()
+    
+    def close(self) -> None:
+        """
+        Detiene el hilo de guardado, guarda lo pendiente y cierra el
+        repositorio subyacente.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        atexit.unregister(self.flush)
+        close = getattr(self._repository, 'close', None)
+        if close is not None:
+            close()
@@ -4,9 +4,10 @@ Interface web para administradores del sistema Yedistribuciones.
 RNF-RUT-01: Interface de usuario simple e intuitiva.
 """
 import streamlit as st
-from typing import Optional
+from datetime import time
+from typing import Optional, Sequence, Tuple
 from src.application.services.route_service import RouteService
-from src.application.dtos import CreateRouteDTO
+from src.application.dtos import CreateRouteDTO, RegisterClientDTO, RouteSummaryDTO
 
 
 def run_ui(route_service: RouteService) -> None:
@@ -34,7 +35,11 @@ def run_ui(route_service: RouteService) -> None:
             "✏️ Gestionar Clientes en Ruta",
             "✂️ Dividir Ruta",
             "🔗 Fusionar Rutas",
-            "🔍 Buscar Ruta por CEDIS/Día"
+            "🔍 Buscar Ruta por CEDIS/Día",
+            "📍 Clientes y Sugerencias",
+            "🗓️ Planificación Semanal",
+            "🧪 Sandbox de Planificación",
+            "📊 Tablero de Gestión"
         ]
     )
     
@@ -51,6 +56,80 @@ def run_ui(route_service: RouteService) -> None:
         merge_routes_view(route_service)
     elif menu == "🔍 Buscar Ruta por CEDIS/Día":
         search_routes_view(route_service)
+    elif menu == "📍 Clientes y Sugerencias":
+        clients_view(route_service)
+    elif menu == "🗓️ Planificación Semanal":
+        weekly_plan_view(route_service)
+    elif menu == "🧪 Sandbox de Planificación":
+        sandbox_view(route_service)
+    elif menu == "📊 Tablero de Gestión":
+        dashboard_view(route_service)
+
+
+def select_route(service: RouteService, label: str, key: str) -> Optional[RouteSummaryDTO]:
+    """
+    Selector de ruta con búsqueda mientras se escribe.
+    Solo carga las mejores coincidencias en lugar de todas las rutas activas.
+    
+    Args:
+        service: Servicio de rutas
+        label: Etiqueta del campo de búsqueda
+        key: Prefijo único para las claves de los widgets
+        
+    Returns:
+        Resumen de la ruta elegida o None si aún no hay selección
+    """
+    query = st.text_input(
+        f"🔎 {label}",
+        key=f"{key}_query",
+        placeholder="Nombre, CEDIS o ID de cliente"
+    )
+    
+    if not query.strip():
+        st.caption("Escriba para buscar entre las rutas activas")
+        return None
+    
+    matches = service.search_routes(query, limit=20)
+    
+    if not matches:
+        st.info("No hay rutas activas que coincidan con la búsqueda.")
+        return None
+    
+    options = {
+        f"{r.name} - {r.cedis_id} - {r.day_of_week} ({r.client_count} clientes, {r.id[:8]}...)": r
+        for r in matches
+    }
+    selected = st.selectbox("Resultados:", list(options.keys()), key=f"{key}_result")
+    
+    return options[selected]
+
+
+def show_warnings(warnings: Sequence[str]) -> None:
+    """
+    Muestra las restricciones operativas que incumple una operación.
+    Se guardan en la sesión para que sobrevivan a st.rerun().
+    """
+    st.session_state["route_warnings"] = list(warnings)
+
+
+def flush_warnings() -> None:
+    """Muestra (una sola vez) las advertencias guardadas en la sesión."""
+    for warning in st.session_state.pop("route_warnings", []):
+        st.warning(f"⚠️ {warning}")
+
+
+def format_minutes(minutes: float) -> str:
+    """Formatea minutos desde medianoche como HH:MM."""
+    minutes = int(round(minutes))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def format_metrics(distance_km: Optional[float], duration_minutes: Optional[float]) -> Tuple[str, str]:
+    """Formatea distancia y duración guardadas; "—" si aún no se calcularon."""
+    if distance_km is None or duration_minutes is None:
+        return "—", "—"
+    minutes = int(round(duration_minutes))
+    return f"{distance_km:.1f} km", f"{minutes // 60} h {minutes % 60:02d} min"
 
 
 def view_all_routes(service: RouteService) -> None:
@@ -63,7 +142,7 @@ def view_all_routes(service: RouteService) -> None:
     include_inactive = st.checkbox("Mostrar rutas inactivas", value=False)
     
     try:
-        routes = service.get_all_routes(include_inactive=include_inactive)
+        routes = service.get_route_summaries(include_inactive=include_inactive)
         
         if not routes:
             st.info("No hay rutas registradas en el sistema.")
@@ -74,14 +153,18 @@ def view_all_routes(service: RouteService) -> None:
         
         # Preparar datos para la tabla
         data = []
-        for route in routes:
+        for summary in routes:
+            # Métricas guardadas con la ruta: no se recalculan al listar
+            distance, duration = format_metrics(summary.distance_km, summary.duration_minutes)
             data.append({
-                "ID": route.id[:8] + "...",  # Mostrar solo parte del ID
-                "Nombre": route.name,
-                "CEDIS": route.cedis_id,
-                "Día": route.day_of_week,
-                "Clientes": route.client_count,
-                "Estado": "✅ Activa" if route.is_active else "❌ Inactiva"
+                "ID": summary.id[:8] + "...",  # Mostrar solo parte del ID
+                "Nombre": summary.name,
+                "CEDIS": summary.cedis_id,
+                "Día": summary.day_of_week,
+                "Clientes": summary.client_count,
+                "Distancia": distance,
+                "Duración": duration,
+                "Estado": "✅ Activa" if summary.is_active else "❌ Inactiva"
             })
         
         st.dataframe(data, use_container_width=True)
@@ -118,15 +201,143 @@ def view_all_routes(service: RouteService) -> None:
                         "Nombre": route.name,
                         "CEDIS": route.cedis_id,
                         "Día": route.day_of_week,
-                        "Clientes": route.client_ids,
+                        "Clientes": list(route.client_ids),
                         "Total Clientes": route.client_count,
+                        "Distancia y duración": " / ".join(
+                            format_metrics(route.distance_km, route.duration_minutes)
+                        ),
                         "Activa": route.is_active
                     })
+                    show_route_schedule(service, route_id)
+                    show_route_simulation(service, route_id)
+                    show_route_lineage(service, route_id)
+        
+        # Archivo de rutas inactivas antiguas
+        if include_inactive:
+            st.markdown("---")
+            st.subheader("Archivar Rutas Inactivas")
+            older_than_days = st.number_input(
+                "Días sin modificaciones",
+                min_value=0,
+                value=30,
+                step=1
+            )
+            if st.button("🗄️ Archivar"):
+                archived = service.archive_inactive_routes(int(older_than_days))
+                st.success(f"{archived} ruta(s) archivada(s)")
     
     except Exception as e:
         st.error(f"Error al cargar rutas: {str(e)}")
 
 
+def show_route_schedule(service: RouteService, route_id: str) -> None:
+    """
+    Muestra la hora estimada de atención y la carga en cada parada.
+    """
+    schedule = service.get_route_schedule(route_id)
+    
+    st.markdown("#### 🕒 Programación Estimada")
+    
+    if not schedule.stops:
+        st.write("*La ruta no tiene paradas*")
+        return
+    
+    st.dataframe([
+        {
+            "Parada": idx,
+            "Cliente": stop.client_id,
+            "Llegada": format_minutes(stop.arrival),
+            "Atención": format_minutes(stop.start),
+            "Salida": format_minutes(stop.departure),
+            "Carga acumulada": stop.load_after
+        }
+        for idx, stop in enumerate(schedule.stops, 1)
+    ], use_container_width=True)
+    st.caption(f"Fin estimado: {format_minutes(schedule.end_time)} | Carga total: {schedule.total_load:g}")
+    
+    for violation in schedule.violations:
+        st.warning(f"⚠️ {violation}")
+
+
+def show_route_simulation(service: RouteService, route_id: str) -> None:
+    """
+    Muestra las llegadas y el fin de la ruta con tiempos variables
+    (simulación Monte Carlo) y la probabilidad de exceder el turno.
+    """
+    st.markdown("#### 🎲 Simulación de Ejecución")
+    
+    try:
+        simulation = service.simulate_route(route_id)
+    except ImportError as e:
+        st.info(str(e))
+        return
+    
+    if not simulation.stops:
+        st.write("*La ruta no tiene paradas*")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Fin estimado", format_minutes(simulation.planned_end))
+    col2.metric(
+        "Fin simulado (P10 - P90)",
+        f"{format_minutes(simulation.end_p10)} - {format_minutes(simulation.end_p90)}"
+    )
+    col3.metric(
+        "Prob. de exceder el turno",
+        f"{simulation.overrun_probability:.0%}" if simulation.shift_end is not None else "Sin límite"
+    )
+    
+    st.dataframe([
+        {
+            "Parada": idx,
+            "Cliente": stop.client_id,
+            "Llegada estimada": format_minutes(stop.planned_arrival),
+            "P10": format_minutes(stop.arrival_p10),
+            "P50": format_minutes(stop.arrival_p50),
+            "P90": format_minutes(stop.arrival_p90),
+            "Prob. fuera de ventana": f"{stop.late_probability:.0%}"
+        }
+        for idx, stop in enumerate(simulation.stops, 1)
+    ], use_container_width=True)
+    st.caption(f"{simulation.replications} replicaciones con tiempos de viaje y atención variables")
+
+
+def show_route_lineage(service: RouteService, route_id: str) -> None:
+    """
+    Muestra de qué rutas proviene una ruta y qué rutas surgieron de ella.
+    """
+    lineage = service.get_route_lineage(route_id)
+    
+    st.markdown("#### 🧬 Linaje de la Ruta")
+    
+    if not lineage.ancestors and not lineage.descendants:
+        st.write("*La ruta no proviene de divisiones ni fusiones*")
+        return
+    
+    # Resolver los nombres con una sola consulta de resúmenes, sin cargar clientes
+    known = {summary.id: summary.name for summary in service.get_route_summaries(include_inactive=True)}
+    names = {
+        related_id: known.get(related_id, related_id[:8] + "...")
+        for edge in lineage.ancestors + lineage.descendants
+        for related_id in (edge.parent_id, edge.child_id)
+    }
+    
+    operation_labels = {"DIVIDE": "✂️ División", "MERGE": "🔗 Fusión"}
+    
+    for title, edges in (("Proviene de", lineage.ancestors), ("Dio origen a", lineage.descendants)):
+        if edges:
+            st.markdown(f"**{title}:**")
+            st.dataframe([
+                {
+                    "Generación": edge.depth,
+                    "Origen": names[edge.parent_id],
+                    "Resultado": names[edge.child_id],
+                    "Operación": operation_labels.get(edge.operation, edge.operation)
+                }
+                for edge in edges
+            ], use_container_width=True)
+
+
 def create_route_view(service: RouteService) -> None:
     """
     RF-RUT-01: Crear una nueva ruta.
@@ -149,6 +360,19 @@ def create_route_view(service: RouteService) -> None:
                 ["LUNES", "MARTES", "MIÉRCOLES", "JUEVES", "VIERNES", "SÁBADO", "DOMINGO"]
             )
         
+        st.markdown("**Restricciones operativas (opcionales)**")
+        col3, col4, col5 = st.columns(3)
+        
+        with col3:
+            capacity = st.number_input("Capacidad del vehículo (0 = sin límite)", min_value=0.0, value=0.0)
+        
+        with col4:
+            shift_start = st.time_input("Hora de salida", value=time(8, 0))
+        
+        with col5:
+            shift_hours = st.number_input("Duración del turno en horas (0 = sin límite)",
+                                          min_value=0.0, max_value=24.0, value=0.0, step=0.5)
+        
         st.markdown("*Campos obligatorios*")
         
         submitted = st.form_submit_button("✅ Crear Ruta", use_container_width=True)
@@ -161,7 +385,10 @@ def create_route_view(service: RouteService) -> None:
                     dto = CreateRouteDTO(
                         name=route_name,
                         cedis_id=cedis,
-                        day_of_week=day
+                        day_of_week=day,
+                        capacity=capacity or None,
+                        shift_start=shift_start.hour * 60 + shift_start.minute,
+                        shift_minutes=int(shift_hours * 60) or None
                     )
                     
                     created_route = service.create_route(dto)
@@ -182,22 +409,21 @@ def manage_clients_view(service: RouteService) -> None:
     st.header("✏️ Gestionar Clientes en Ruta")
     
     try:
-        routes = service.get_all_routes(include_inactive=False)
+        selected_route = select_route(service, "Buscar Ruta", key="manage_clients")
         
-        if not routes:
-            st.warning("No hay rutas activas. Cree una ruta primero.")
-            return
-        
-        route_options = {f"{r.name} - {r.day_of_week}": r.id for r in routes}
-        selected_route_name = st.selectbox("Seleccionar Ruta:", list(route_options.keys()))
-        
-        if selected_route_name:
-            route_id = route_options[selected_route_name]
+        if selected_route:
+            route_id = selected_route.id
             route = service.get_route_by_id(route_id)
             
             if route:
                 st.subheader(f"Ruta: {route.name}")
-                st.info(f"CEDIS: {route.cedis_id} | Día: {route.day_of_week}")
+                st.info(
+                    f"CEDIS: {route.cedis_id} | Día: {route.day_of_week} | "
+                    f"Capacidad: {route.capacity or 'sin límite'} | "
+                    f"Salida: {format_minutes(route.shift_start)}"
+                    + (f" | Turno: {route.shift_minutes} min" if route.shift_minutes else "")
+                )
+                flush_warnings()
                 
                 # Mostrar clientes actuales
                 st.markdown("### Clientes en la Ruta (en orden):")
@@ -213,11 +439,21 @@ def manage_clients_view(service: RouteService) -> None:
                 with st.form("add_client_form"):
                     st.subheader("➕ Agregar Cliente")
                     new_client_id = st.text_input("ID del Cliente", placeholder="Ej: CLI_001")
+                    new_position = st.number_input(
+                        "Posición en la ruta",
+                        min_value=1,
+                        max_value=route.client_count + 1,
+                        value=route.client_count + 1
+                    )
                     add_submitted = st.form_submit_button("Agregar Cliente")
                     
                     if add_submitted and new_client_id:
                         try:
-                            service.assign_client_to_route(route_id, new_client_id)
+                            if new_position > route.client_count:
+                                updated = service.assign_client_to_route(route_id, new_client_id)
+                            else:
+                                updated = service.insert_client_at(route_id, new_client_id, int(new_position) - 1)
+                            show_warnings(updated.warnings)
                             st.success(f"Cliente {new_client_id} agregado!")
                             st.rerun()
                         except ValueError as e:
@@ -228,7 +464,7 @@ def manage_clients_view(service: RouteService) -> None:
                     st.markdown("---")
                     with st.form("remove_client_form"):
                         st.subheader("➖ Eliminar Cliente")
-                        client_to_remove = st.selectbox("Cliente a eliminar:", route.client_ids)
+                        client_to_remove = st.selectbox("Cliente a eliminar:", list(route.client_ids))
                         remove_submitted = st.form_submit_button("Eliminar Cliente")
                         
                         if remove_submitted:
@@ -239,13 +475,89 @@ def manage_clients_view(service: RouteService) -> None:
                             except ValueError as e:
                                 st.error(str(e))
                 
+                # Mover cliente a otra ruta
+                if route.client_ids:
+                    st.markdown("---")
+                    st.subheader("↔️ Mover Cliente a Otra Ruta")
+                    target_route = select_route(service, "Ruta destino", key="move_client_target")
+                    
+                    if target_route:
+                        with st.form("move_client_form"):
+                            client_to_move = st.selectbox("Cliente a mover:", list(route.client_ids))
+                            target_position = st.number_input(
+                                f"Posición en {target_route.name}",
+                                min_value=1,
+                                max_value=target_route.client_count + 1,
+                                value=target_route.client_count + 1
+                            )
+                            move_submitted = st.form_submit_button("Mover Cliente")
+                            
+                            if move_submitted:
+                                try:
+                                    _, target = service.move_client(
+                                        client_to_move,
+                                        route_id,
+                                        target_route.id,
+                                        position=int(target_position) - 1
+                                    )
+                                    show_warnings(target.warnings)
+                                    st.success(f"Cliente {client_to_move} movido a {target_route.name}!")
+                                    st.rerun()
+                                except ValueError as e:
+                                    st.error(str(e))
+                
                 # Reordenar clientes
                 if len(route.client_ids) > 1:
                     st.markdown("---")
+                    with st.form("move_stop_form"):
+                        st.subheader("↕️ Mover una Parada")
+                        
+                        version_key = f"move_stop_version_{route_id}"
+                        seen_version = st.session_state.get(version_key, route.version)
+                        st.session_state[version_key] = route.version
+                        
+                        stop_to_move = st.selectbox("Parada:", options=list(route.client_ids))
+                        stop_after = st.selectbox(
+                            "Colocar antes de:",
+                            options=list(route.client_ids) + ["(al final)"]
+                        )
+                        
+                        if st.form_submit_button("Mover Parada"):
+                            try:
+                                before: Optional[str]
+                                after: Optional[str]
+                                if stop_after == "(al final)":
+                                    before, after = route.client_ids[-1], None
+                                else:
+                                    index = route.client_ids.index(stop_after)
+                                    before = route.client_ids[index - 1] if index > 0 else None
+                                    after = stop_after
+                                if before == stop_to_move:
+                                    # El vecino anterior es la propia parada
+                                    index = route.client_ids.index(stop_to_move)
+                                    before = route.client_ids[index - 1] if index > 0 else None
+                                service.move_stop(
+                                    route_id,
+                                    stop_to_move,
+                                    before,
+                                    after,
+                                    expected_version=seen_version
+                                )
+                                st.success(f"Parada {stop_to_move} movida!")
+                                st.rerun()
+                            except ValueError as e:
+                                st.error(str(e))
+                    
                     with st.form("reorder_clients_form"):
                         st.subheader("🔄 Reordenar Clientes")
                         st.info("Ingrese los IDs de clientes en el orden deseado, separados por comas")
                         
+                        # Versión que vio el usuario en la ejecución anterior
+                        # (al enviar el formulario, Streamlit vuelve a leer la ruta)
+                        version_key = f"reorder_version_{route_id}"
+                        seen_version = st.session_state.get(version_key, route.version)
+                        st.session_state[version_key] = route.version
+                        
                         current_order = ", ".join(route.client_ids)
                         new_order_input = st.text_area(
                             "Nuevo Orden:",
@@ -258,7 +570,12 @@ def manage_clients_view(service: RouteService) -> None:
                         if reorder_submitted:
                             try:
                                 new_order = [c.strip() for c in new_order_input.split(",")]
-                                service.reorder_clients_in_route(route_id, new_order)
+                                updated = service.reorder_clients_in_route(
+                                    route_id,
+                                    new_order,
+                                    expected_version=seen_version
+                                )
+                                show_warnings(updated.warnings)
                                 st.success("Orden de clientes actualizado!")
                                 st.rerun()
                             except ValueError as e:
@@ -275,68 +592,63 @@ def divide_route_view(service: RouteService) -> None:
     st.header("✂️ Dividir Ruta")
     
     try:
-        routes = service.get_all_routes(include_inactive=False)
+        selected_route = select_route(service, "Buscar Ruta a Dividir", key="divide_route")
         
-        if not routes:
-            st.warning("No hay rutas activas para dividir.")
+        if selected_route is None:
             return
         
-        # Filtrar rutas con al menos 2 clientes
-        dividable_routes = [r for r in routes if r.client_count >= 2]
-        
-        if not dividable_routes:
-            st.warning("No hay rutas con suficientes clientes (mínimo 2) para dividir.")
+        # Solo se pueden dividir rutas con al menos 2 clientes
+        if selected_route.client_count < 2:
+            st.warning("La ruta no tiene suficientes clientes (mínimo 2) para dividir.")
             return
         
         with st.form("divide_route_form"):
-            route_options = {f"{r.name} ({r.client_count} clientes)": r.id for r in dividable_routes}
-            selected_route = st.selectbox("Seleccionar Ruta a Dividir:", list(route_options.keys()))
+            route_id = selected_route.id
+            route = service.get_route_by_id(route_id)
             
-            if selected_route:
-                route_id = route_options[selected_route]
-                route = service.get_route_by_id(route_id)
+            if route:
+                st.info(f"Clientes actuales: {', '.join(route.client_ids)}")
                 
-                if route:
-                    st.info(f"Clientes actuales: {', '.join(route.client_ids)}")
-                    
-                    split_point = st.slider(
-                        "Punto de División (índice)",
-                        min_value=1,
-                        max_value=route.client_count - 1,
-                        value=route.client_count // 2
-                    )
-                    
-                    st.markdown(f"**Ruta A tendrá:** {split_point} clientes")
-                    st.markdown(f"**Ruta B tendrá:** {route.client_count - split_point} clientes")
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        name_a = st.text_input("Nombre Ruta A *", value=f"{route.name}_A")
-                    
-                    with col2:
-                        name_b = st.text_input("Nombre Ruta B *", value=f"{route.name}_B")
-                    
-                    submitted = st.form_submit_button("✂️ Dividir Ruta", use_container_width=True)
-                    
-                    if submitted:
-                        try:
-                            route_a, route_b = service.divide_route_use_case(
-                                route_id_to_split=route_id,
-                                split_point=split_point,
-                                new_route_name_a=name_a,
-                                new_route_name_b=name_b
-                            )
-                            
-                            st.success("✅ Ruta dividida exitosamente!")
-                            st.info(f"**Ruta A:** {route_a.name} con {route_a.client_count} clientes")
-                            st.info(f"**Ruta B:** {route_b.name} con {route_b.client_count} clientes")
-                            st.warning(f"La ruta original '{route.name}' ha sido desactivada")
-                            
-                        except ValueError as e:
-                            st.error(f"Error: {str(e)}")
-                        except Exception as e:
-                            st.error(f"Error inesperado: {str(e)}")
+                split_point = st.slider(
+                    "Punto de División (índice)",
+                    min_value=1,
+                    max_value=route.client_count - 1,
+                    value=route.client_count // 2
+                )
+                
+                st.markdown(f"**Ruta A tendrá:** {split_point} clientes")
+                st.markdown(f"**Ruta B tendrá:** {route.client_count - split_point} clientes")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    name_a = st.text_input("Nombre Ruta A *", value=f"{route.name}_A")
+                
+                with col2:
+                    name_b = st.text_input("Nombre Ruta B *", value=f"{route.name}_B")
+                
+                submitted = st.form_submit_button("✂️ Dividir Ruta", use_container_width=True)
+                
+                if submitted:
+                    try:
+                        route_a, route_b = service.divide_route_use_case(
+                            route_id_to_split=route_id,
+                            split_point=split_point,
+                            new_route_name_a=name_a,
+                            new_route_name_b=name_b
+                        )
+                        
+                        st.success("✅ Ruta dividida exitosamente!")
+                        st.info(f"**Ruta A:** {route_a.name} con {route_a.client_count} clientes")
+                        st.info(f"**Ruta B:** {route_b.name} con {route_b.client_count} clientes")
+                        st.warning(f"La ruta original '{route.name}' ha sido desactivada")
+                        for warning in route_a.warnings + route_b.warnings:
+                            st.warning(f"⚠️ {warning}")
+                        
+                    except ValueError as e:
+                        st.error(f"Error: {str(e)}")
+                    except Exception as e:
+                        st.error(f"Error inesperado: {str(e)}")
     
     except Exception as e:
         st.error(f"Error: {str(e)}")
@@ -349,49 +661,36 @@ def merge_routes_view(service: RouteService) -> None:
     st.header("🔗 Fusionar Rutas")
     
     try:
-        routes = service.get_all_routes(include_inactive=False)
+        col1, col2 = st.columns(2)
         
-        if len(routes) < 2:
-            st.warning("Se necesitan al menos 2 rutas activas para fusionar.")
-            return
+        with col1:
+            route_a = select_route(service, "Primera Ruta", key="route_a")
+        
+        with col2:
+            route_b = select_route(service, "Segunda Ruta", key="route_b")
         
         with st.form("merge_routes_form"):
-            route_options = {f"{r.name} - {r.cedis_id} - {r.day_of_week}": r.id for r in routes}
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                route_a_name = st.selectbox("Primera Ruta:", list(route_options.keys()), key="route_a")
-            
-            with col2:
-                route_b_name = st.selectbox("Segunda Ruta:", list(route_options.keys()), key="route_b")
-            
             merged_name = st.text_input("Nombre de la Ruta Fusionada *", placeholder="Ej: Ruta Fusionada Norte")
             
-            if route_a_name and route_b_name:
-                route_a_id = route_options[route_a_name]
-                route_b_id = route_options[route_b_name]
-                
-                route_a = service.get_route_by_id(route_a_id)
-                route_b = service.get_route_by_id(route_b_id)
-                
-                if route_a and route_b:
-                    st.info(f"**Ruta A:** {route_a.client_count} clientes")
-                    st.info(f"**Ruta B:** {route_b.client_count} clientes")
-                    st.info(f"**Total estimado:** ~{route_a.client_count + route_b.client_count} clientes (sin duplicados)")
+            if route_a and route_b:
+                st.info(f"**Ruta A:** {route_a.client_count} clientes")
+                st.info(f"**Ruta B:** {route_b.client_count} clientes")
+                st.info(f"**Total estimado:** ~{route_a.client_count + route_b.client_count} clientes (sin duplicados)")
             
             submitted = st.form_submit_button("🔗 Fusionar Rutas", use_container_width=True)
             
             if submitted:
                 if not merged_name:
                     st.error("Por favor ingrese un nombre para la ruta fusionada")
-                elif route_a_name == route_b_name:
+                elif not route_a or not route_b:
+                    st.error("Debe seleccionar las dos rutas a fusionar")
+                elif route_a.id == route_b.id:
                     st.error("Debe seleccionar dos rutas diferentes")
                 else:
                     try:
                         merged_route = service.merge_routes_use_case(
-                            route_id_a=route_options[route_a_name],
-                            route_id_b=route_options[route_b_name],
+                            route_id_a=route_a.id,
+                            route_id_b=route_b.id,
                             new_merged_route_name=merged_name
                         )
                         
@@ -399,6 +698,8 @@ def merge_routes_view(service: RouteService) -> None:
                         st.info(f"**Nueva Ruta:** {merged_route.name}")
                         st.info(f"**Total de clientes:** {merged_route.client_count}")
                         st.warning("Las rutas originales han sido desactivadas")
+                        for warning in merged_route.warnings:
+                            st.warning(f"⚠️ {warning}")
                         
                     except ValueError as e:
                         st.error(f"Error de validación: {str(e)}")
@@ -455,3 +756,372 @@ def search_routes_view(service: RouteService) -> None:
                 
                 except Exception as e:
                     st.error(f"Error en la búsqueda: {str(e)}")
+
+
+
+def clients_view(service: RouteService) -> None:
+    """
+    Registro de clientes geocodificados y sugerencia de rutas para ellos.
+    """
+    st.header("📍 Clientes y Sugerencias de Ruta")
+    
+    with st.form("register_client_form"):
+        st.subheader("Registrar / Actualizar Cliente")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            client_id = st.text_input("ID del Cliente *", placeholder="Ej: CLI_001")
+            client_name = st.text_input("Nombre *")
+            address = st.text_input("Dirección *")
+            cedis_id = st.text_input("CEDIS *", placeholder="Ej: CEDIS_BOG_01")
+        with col2:
+            latitude = st.number_input("Latitud", min_value=-90.0, max_value=90.0,
+                                       value=0.0, format="%.6f")
+            longitude = st.number_input("Longitud", min_value=-180.0, max_value=180.0,
+                                        value=0.0, format="%.6f")
+            phone = st.text_input("Teléfono")
+            email = st.text_input("Email")
+        
+        col3, col4, col5 = st.columns(3)
+        with col3:
+            demand = st.number_input("Demanda por visita", min_value=0.0, value=0.0)
+            service_minutes = st.number_input("Minutos de atención", min_value=0.0, value=0.0)
+        with col4:
+            has_window = st.checkbox("Tiene ventana de entrega")
+            window_start = st.time_input("Desde", value=time(8, 0))
+        with col5:
+            window_end = st.time_input("Hasta", value=time(12, 0))
+        
+        col6, col7 = st.columns([1, 3])
+        with col6:
+            visit_frequency = st.number_input("Visitas por semana", min_value=1, max_value=7, value=1)
+        with col7:
+            allowed_days = st.multiselect(
+                "Días permitidos (vacío = cualquiera)",
+                ["LUNES", "MARTES", "MIÉRCOLES", "JUEVES", "VIERNES", "SÁBADO", "DOMINGO"]
+            )
+        
+        if st.form_submit_button("Guardar Cliente"):
+            try:
+                # (0, 0) se interpreta como "sin coordenadas"
+                geocoded = (latitude, longitude) != (0.0, 0.0)
+                client = service.register_client(RegisterClientDTO(
+                    id=client_id.strip(),
+                    name=client_name,
+                    address=address,
+                    cedis_id=cedis_id.strip(),
+                    latitude=latitude if geocoded else None,
+                    longitude=longitude if geocoded else None,
+                    phone=phone or None,
+                    email=email or None,
+                    demand=demand,
+                    service_minutes=service_minutes,
+                    window_start=window_start.hour * 60 + window_start.minute if has_window else None,
+                    window_end=window_end.hour * 60 + window_end.minute if has_window else None,
+                    visit_frequency=int(visit_frequency),
+                    allowed_days=tuple(allowed_days)
+                ))
+                st.success(f"Cliente {client.id} guardado")
+            except ValueError as e:
+                st.error(str(e))
+    
+    st.markdown("---")
+    st.subheader("🧭 Sugerir Ruta para un Cliente")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        suggest_client = st.text_input("ID del Cliente", key="suggest_client")
+    with col2:
+        suggest_day = st.selectbox(
+            "Día de la Semana",
+            ["LUNES", "MARTES", "MIÉRCOLES", "JUEVES", "VIERNES", "SÁBADO", "DOMINGO"],
+            key="suggest_day"
+        )
+    with col3:
+        suggest_k = st.number_input("Rutas a sugerir", min_value=1, max_value=10, value=3)
+    
+    if st.button("Sugerir Rutas") and suggest_client.strip():
+        try:
+            suggestions = service.suggest_routes_for_client(
+                suggest_client.strip(), suggest_day, k=int(suggest_k)
+            )
+            if not suggestions:
+                st.info("No hay rutas activas con clientes cercanos ese día.")
+            else:
+                st.dataframe([
+                    {
+                        "Ruta": suggestion.route_name,
+                        "Posición": suggestion.position + 1,
+                        "Km adicionales": round(suggestion.added_km, 2),
+                        "Cliente más cercano": suggestion.nearest_client_id,
+                        "Distancia (km)": round(suggestion.nearest_distance_km, 2)
+                    }
+                    for suggestion in suggestions
+                ], use_container_width=True)
+        except ValueError as e:
+            st.error(str(e))
+
+
+def weekly_plan_view(service: RouteService) -> None:
+    """
+    Planificación semanal: nivela las paradas de un CEDIS entre los días
+    según la frecuencia de visita y los días permitidos de sus clientes.
+    """
+    st.header("🗓️ Planificación Semanal")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        cedis_id = st.text_input("CEDIS", placeholder="Ej: CEDIS_BOG_01", key="plan_cedis")
+    with col2:
+        change_penalty = st.slider(
+            "Preferencia por no mover clientes", min_value=0.0, max_value=3.0, value=0.5, step=0.25,
+            help="Paradas por ruta de desnivel que se toleran para mantener los días actuales"
+        )
+    
+    col3, col4 = st.columns(2)
+    preview = col3.button("👁️ Ver Propuesta")
+    apply = col4.button("✅ Aplicar Plan", type="primary")
+    
+    if not (preview or apply) or not cedis_id.strip():
+        return
+    
+    try:
+        plan = service.plan_week(cedis_id.strip(), apply=apply, change_penalty=change_penalty)
+        
+        if plan.applied:
+            st.success("Plan aplicado a las rutas")
+        
+        st.subheader("Paradas por día")
+        st.dataframe([
+            {
+                "Día": day.day_of_week,
+                "Rutas": day.routes,
+                "Paradas actuales": day.stops_before,
+                "Paradas con el plan": day.stops_after
+            }
+            for day in plan.days
+        ], use_container_width=True)
+        
+        changes = [visit for visit in plan.visits if visit.is_change]
+        st.subheader(f"Visitas que cambian: {len(changes)}")
+        if changes:
+            st.dataframe([
+                {"Cliente": visit.client_id, "Día": visit.day_of_week, "Ruta": visit.route_name}
+                for visit in changes
+            ], use_container_width=True)
+        
+        for message in plan.unplanned:
+            st.warning(f"Sin planificar: {message}")
+        for warning in plan.warnings:
+            st.warning(f"⚠️ {warning}")
+    
+    except Exception as e:
+        st.error(f"Error al planificar: {str(e)}")
+
+
+# Etiquetas de las operaciones del comparador de planes
+EDIT_LABELS = {
+    "SPLIT": "División",
+    "MERGE": "Fusión",
+    "ADD_ROUTE": "Ruta nueva",
+    "REPLACE_ROUTE": "Ruta recreada",
+    "REMOVE_ROUTE": "Ruta retirada",
+    "ADD_STOP": "Parada agregada",
+    "REMOVE_STOP": "Parada quitada",
+    "MOVE_STOP": "Parada movida",
+    "REORDER_STOP": "Parada reordenada",
+}
+
+
+def sandbox_view(service: RouteService) -> None:
+    """
+    Sandbox de planificación: prueba divisiones y fusiones sobre una copia
+    de las rutas de un CEDIS y día, muestra las diferencias con la base y
+    confirma o descarta la alternativa.
+    """
+    st.header("🧪 Sandbox de Planificación")
+    
+    sandbox = st.session_state.get("planning_sandbox")
+    
+    if sandbox is None:
+        col1, col2 = st.columns(2)
+        with col1:
+            cedis_id = st.text_input("CEDIS", placeholder="Ej: CEDIS_BOG_01", key="sandbox_cedis")
+        with col2:
+            day = st.selectbox(
+                "Día de la Semana",
+                ["LUNES", "MARTES", "MIÉRCOLES", "JUEVES", "VIERNES", "SÁBADO", "DOMINGO"],
+                key="sandbox_day"
+            )
+        if st.button("🧪 Abrir Sandbox", type="primary") and cedis_id.strip():
+            try:
+                st.session_state["planning_sandbox"] = service.open_sandbox(cedis_id.strip(), day)
+                st.rerun()
+            except ValueError as e:
+                st.error(f"Error: {str(e)}")
+        return
+    
+    st.info(f"Alternativa para {sandbox.cedis_id} - {sandbox.day_of_week}. La base no cambia hasta confirmar.")
+    
+    try:
+        plan = sandbox.plan()
+        routes = {f"{route.name} ({route.client_count} clientes)": route for route in plan.routes}
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            with st.form("sandbox_divide_form"):
+                st.subheader("✂️ Dividir")
+                label = st.selectbox("Ruta:", list(routes.keys()), key="sandbox_divide_route")
+                split_point = st.number_input("Punto de División (índice)", min_value=1, value=1)
+                name_a = st.text_input("Nombre Ruta A *")
+                name_b = st.text_input("Nombre Ruta B *")
+                if st.form_submit_button("Dividir en el Sandbox") and label:
+                    try:
+                        sandbox.service.divide_route_use_case(routes[label].id, int(split_point), name_a, name_b)
+                        st.rerun()
+                    except ValueError as e:
+                        st.error(f"Error: {str(e)}")
+        with col2:
+            with st.form("sandbox_merge_form"):
+                st.subheader("🔗 Fusionar")
+                label_a = st.selectbox("Primera Ruta:", list(routes.keys()), key="sandbox_merge_a")
+                label_b = st.selectbox("Segunda Ruta:", list(routes.keys()), key="sandbox_merge_b")
+                merged_name = st.text_input("Nombre de la Ruta Fusionada *")
+                if st.form_submit_button("Fusionar en el Sandbox") and label_a and label_b:
+                    try:
+                        sandbox.service.merge_routes_use_case(routes[label_a].id, routes[label_b].id, merged_name)
+                        st.rerun()
+                    except ValueError as e:
+                        st.error(f"Error: {str(e)}")
+        
+        distance, duration = format_metrics(plan.distance_km, plan.duration_minutes)
+        metric1, metric2, metric3, metric4 = st.columns(4)
+        metric1.metric("Rutas", len(plan.routes))
+        metric2.metric("Paradas", plan.total_stops)
+        metric3.metric("Distancia", distance)
+        metric4.metric("Conflictos", plan.conflicts)
+        
+        # Diferencias con la base
+        diff = sandbox.diff()
+        st.subheader(f"Cambios frente a la base ({diff.unchanged_routes} rutas sin cambios)")
+        if diff.route_edits:
+            st.dataframe([
+                {
+                    "Operación": EDIT_LABELS.get(edit.operation, edit.operation),
+                    "Antes": ", ".join(edit.before_routes),
+                    "Después": ", ".join(edit.after_routes)
+                }
+                for edit in diff.route_edits
+            ], use_container_width=True)
+        if diff.stop_edits:
+            st.dataframe([
+                {
+                    "Operación": EDIT_LABELS.get(edit.operation, edit.operation),
+                    "Cliente": edit.client_id,
+                    "Desde": edit.from_route or "",
+                    "Hacia": edit.route or "",
+                    "Posición": "" if edit.position is None else edit.position + 1
+                }
+                for edit in diff.stop_edits
+            ], use_container_width=True)
+        if not diff.route_edits and not diff.stop_edits:
+            st.success("La alternativa es igual a la base.")
+    
+    except Exception as e:
+        st.error(f"Error en el sandbox: {str(e)}")
+    
+    col1, col2 = st.columns(2)
+    if col1.button("✅ Confirmar Alternativa", type="primary"):
+        try:
+            changed = sandbox.commit()
+            st.session_state.pop("planning_sandbox")
+            st.success(f"Alternativa confirmada: {changed} rutas escritas")
+        except ValueError as e:
+            st.error(f"No se pudo confirmar: {str(e)}")
+    if col2.button("🗑️ Descartar"):
+        st.session_state.pop("planning_sandbox")
+        st.rerun()
+
+
+def dashboard_view(service: RouteService) -> None:
+    """
+    Tablero de gestión con indicadores de rutas activas.
+    Los datos provienen de estadísticas materializadas, no de recorrer rutas.
+    """
+    st.header("📊 Tablero de Gestión")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        cedis_filter = st.text_input("CEDIS (opcional)", placeholder="Ej: CEDIS_BOG_01")
+    
+    with col2:
+        day_filter = st.selectbox(
+            "Día de la Semana",
+            ["TODOS", "LUNES", "MARTES", "MIÉRCOLES", "JUEVES", "VIERNES", "SÁBADO", "DOMINGO"]
+        )
+    
+    with col3:
+        top_n = st.number_input("Rutas más grandes a mostrar", min_value=0, max_value=50, value=5)
+    
+    try:
+        statistics = service.get_statistics(
+            cedis_id=cedis_filter or None,
+            day_of_week=None if day_filter == "TODOS" else day_filter,
+            top_n=int(top_n)
+        )
+        
+        if not statistics.groups:
+            st.info("No hay rutas activas para los filtros seleccionados.")
+            return
+        
+        metric1, metric2, metric3 = st.columns(3)
+        metric1.metric("Rutas activas", statistics.total_active_routes)
+        metric2.metric("Paradas", statistics.total_stops)
+        metric3.metric("Promedio de paradas por ruta", f"{statistics.average_stops_per_route:.1f}")
+        
+        st.subheader("Por CEDIS y Día")
+        st.dataframe([
+            {
+                "CEDIS": group.cedis_id,
+                "Día": group.day_of_week,
+                "Rutas": group.active_routes,
+                "Paradas": group.total_stops,
+                "Promedio": round(group.average_stops_per_route, 1)
+            }
+            for group in statistics.groups
+        ], use_container_width=True)
+        
+        if statistics.largest_routes:
+            st.subheader("Rutas más grandes")
+            st.dataframe([
+                {
+                    "Nombre": route.name,
+                    "CEDIS": route.cedis_id,
+                    "Día": route.day_of_week,
+                    "Clientes": route.client_count,
+                    "Distancia": format_metrics(route.distance_km, route.duration_minutes)[0]
+                }
+                for route in statistics.largest_routes
+            ], use_container_width=True)
+    
+    except Exception as e:
+        st.error(f"Error al cargar estadísticas: {str(e)}")
+    
+    # Auditoría de clientes asignados a varias rutas el mismo día
+    if cedis_filter and day_filter != "TODOS":
+        st.subheader("⚠️ Clientes en varias rutas el mismo día")
+        try:
+            conflicts = service.find_conflicts(cedis_filter, day_filter)
+            if not conflicts:
+                st.success("No hay clientes duplicados para este CEDIS y día.")
+            else:
+                st.dataframe([
+                    {
+                        "Cliente": conflict.client_id,
+                        "Rutas": ", ".join(route_id[:8] + "..." for route_id in conflict.route_ids)
+                    }
+                    for conflict in conflicts
+                ], use_container_width=True)
+        except Exception as e:
+            st.error(f"Error al auditar asignaciones: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,589 @@
+"""
+Tests de los casos de uso de RouteService.
+Usan el adaptador SQLite sobre una base de datos en memoria.
+"""
+import sqlite3
+
+import pytest
+from src.domain.exceptions import (
+    ConcurrentModificationError, DuplicateClientAssignmentError, RouteConstraintViolationError
+)
+from src.domain.services.route_cost import RouteCost
+from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+from src.infrastructure.persistence.sqlite_client_repository import SqliteClientRepository
+from src.infrastructure.persistence.in_memory_route_repository import InMemoryRouteRepository
+from src.application.services.route_service import RouteService
+from src.application.dtos import ClientIdsView, CreateRouteDTO, RegisterClientDTO
+
+
+class CompetingWriterRepository(SqliteRouteRepository):
+    """
+    Repositorio que simula a otro despachador escribiendo la misma ruta
+    entre la lectura y la escritura de los primeros `conflicts` intentos.
+    """
+    
+    def __init__(self, connection: sqlite3.Connection, competing_client_ids, conflicts: int) -> None:
+        super().__init__(connection)
+        self._competing_client_ids = list(competing_client_ids)
+        self._conflicts = conflicts
+    
+    def update(self, route):
+        if self._conflicts > 0:
+            self._conflicts -= 1
+            other = self.find_by_id(route.id)
+            other.add_client(self._competing_client_ids.pop(0))
+            super().update(other)
+            self.commit_transaction()
+        super().update(route)
+
+
+class FailingCommitRepository(SqliteRouteRepository):
+    """Repositorio cuyo siguiente commit falla como si la base estuviera bloqueada."""
+    
+    fail_next_commit = False
+    
+    def commit_transaction(self):
+        if self.fail_next_commit:
+            self.fail_next_commit = False
+            raise sqlite3.OperationalError("database is locked")
+        super().commit_transaction()
+
+
+def create_route(service: RouteService) -> str:
+    """Crea una ruta vacía y retorna su ID."""
+    return service.create_route(CreateRouteDTO("Ruta Norte", "CEDIS_BOG_01", "lunes")).id
+
+
+class TestOptimisticConcurrency:
+    """Tests del manejo de conflictos de versión en el servicio."""
+    
+    def test_assign_retries_and_reapplies(self):
+        """Agregar un cliente se reaplica sobre la versión más reciente."""
+        repo = CompetingWriterRepository(sqlite3.connect(":memory:"), ["CLI_900"], conflicts=1)
+        service = RouteService(repo)
+        route_id = create_route(service)
+        
+        route = service.assign_client_to_route(route_id, "CLI_001")
+        
+        assert route.client_ids == ["CLI_900", "CLI_001"]
+        assert service.get_route_by_id(route_id).client_ids == ["CLI_900", "CLI_001"]
+        assert service.conflict_retries == 1
+    
+    def test_assign_raises_when_retries_exhausted(self):
+        """Sin reintentos disponibles el conflicto llega al llamador."""
+        repo = CompetingWriterRepository(sqlite3.connect(":memory:"), ["CLI_900"], conflicts=1)
+        service = RouteService(repo, max_conflict_retries=0)
+        route_id = create_route(service)
+        
+        with pytest.raises(ConcurrentModificationError):
+            service.assign_client_to_route(route_id, "CLI_001")
+        assert service.get_route_by_id(route_id).client_ids == ["CLI_900"]
+        assert service.conflict_retries == 0
+    
+    def test_failed_write_is_rolled_back(self):
+        """Un error distinto de un conflicto no deja la escritura pendiente."""
+        repo = FailingCommitRepository(sqlite3.connect(":memory:"))
+        service = RouteService(repo)
+        route_id = create_route(service)
+        
+        repo.fail_next_commit = True
+        with pytest.raises(sqlite3.OperationalError):
+            service.assign_client_to_route(route_id, "CLI_001")
+        create_route(service)
+        
+        assert service.get_route_by_id(route_id).client_ids == []
+    
+    def test_reorder_with_stale_version_raises_conflict(self):
+        """Un reordenamiento calculado sobre una versión vieja se rechaza."""
+        service = RouteService(SqliteRouteRepository(sqlite3.connect(":memory:")))
+        route_id = create_route(service)
+        service.assign_client_to_route(route_id, "CLI_001")
+        seen = service.assign_client_to_route(route_id, "CLI_002")
+        service.remove_client_from_route(route_id, "CLI_001")
+        service.assign_client_to_route(route_id, "CLI_001")
+        
+        with pytest.raises(ConcurrentModificationError):
+            service.reorder_clients_in_route(
+                route_id, ["CLI_002", "CLI_001"], expected_version=seen.version
+            )
+
+
+class TestReadOnlyDTOs:
+    """Tests de los DTOs de lectura."""
+    
+    def test_route_dto_is_read_only(self):
+        """Los clientes del DTO no se pueden modificar."""
+        service = RouteService(SqliteRouteRepository(sqlite3.connect(":memory:")))
+        route_id = create_route(service)
+        route = service.assign_client_to_route(route_id, "CLI_001")
+        
+        assert route.client_ids == ["CLI_001"]
+        assert not hasattr(route.client_ids, "append")
+        with pytest.raises(AttributeError):
+            route.name = "Otra"
+    
+    def test_client_ids_view_is_live_and_unhashable(self):
+        """La vista refleja la lista que envuelve, así que no se puede hashear."""
+        client_ids = ["CLI_001"]
+        view = ClientIdsView(client_ids)
+        client_ids.append("CLI_002")
+        
+        assert view == ["CLI_001", "CLI_002"]
+        assert tuple(view) == ("CLI_001", "CLI_002")
+        with pytest.raises(TypeError):
+            hash(view)
+    
+    def test_summaries_match_full_routes(self):
+        """Los resúmenes reportan los mismos totales sin cargar los clientes."""
+        service = RouteService(SqliteRouteRepository(sqlite3.connect(":memory:")))
+        route_id = create_route(service)
+        service.assign_client_to_route(route_id, "CLI_001")
+        service.assign_client_to_route(route_id, "CLI_002")
+        
+        summary, = service.get_route_summaries()
+        
+        assert summary.id == route_id
+        assert summary.client_count == 2
+        assert not hasattr(summary, "client_ids")
+
+
+class TestMoveClient:
+    """Tests del movimiento atómico de clientes entre rutas."""
+    
+    def setup_method(self):
+        """Dos rutas con clientes."""
+        self.service = RouteService(SqliteRouteRepository(sqlite3.connect(":memory:")))
+        self.route_a = create_route(self.service)
+        self.route_b = create_route(self.service)
+        for client_id in ["CLI_001", "CLI_002"]:
+            self.service.assign_client_to_route(self.route_a, client_id)
+        for client_id in ["CLI_010", "CLI_011"]:
+            self.service.assign_client_to_route(self.route_b, client_id)
+    
+    def test_move_client_to_position(self):
+        """El cliente sale del origen y entra en la posición indicada."""
+        source, target = self.service.move_client("CLI_002", self.route_a, self.route_b, position=1)
+        
+        assert source.client_ids == ["CLI_001"]
+        assert target.client_ids == ["CLI_010", "CLI_002", "CLI_011"]
+        assert self.service.get_route_by_id(self.route_b).client_ids == ["CLI_010", "CLI_002", "CLI_011"]
+    
+    def test_failed_move_changes_nothing(self):
+        """Si la inserción falla, el cliente permanece en la ruta de origen."""
+        with pytest.raises(ValueError, match="Posición inválida"):
+            self.service.move_client("CLI_002", self.route_a, self.route_b, position=9)
+        
+        assert self.service.get_route_by_id(self.route_a).client_ids == ["CLI_001", "CLI_002"]
+        assert self.service.get_route_by_id(self.route_b).client_ids == ["CLI_010", "CLI_011"]
+    
+    def test_move_within_same_route(self):
+        """Mover dentro de la misma ruta cambia solo la posición."""
+        source, target = self.service.move_client("CLI_002", self.route_a, self.route_a, position=0)
+        
+        assert source.client_ids == target.client_ids == ["CLI_002", "CLI_001"]
+    
+    def test_move_stop_checks_version_seen(self):
+        """Mover una parada sobre una versión vieja se rechaza sin cambios."""
+        seen_version = self.service.get_route_by_id(self.route_a).version
+        
+        moved = self.service.move_stop(self.route_a, "CLI_002", None, "CLI_001", seen_version)
+        
+        assert moved.client_ids == ["CLI_002", "CLI_001"]
+        with pytest.raises(ConcurrentModificationError):
+            self.service.move_stop(self.route_a, "CLI_001", None, "CLI_002", seen_version)
+        assert self.service.get_route_by_id(self.route_a).client_ids == ["CLI_002", "CLI_001"]
+
+
+class TestUniqueDailyClients:
+    """Tests de la unicidad diaria de clientes entre rutas."""
+    
+    def setup_method(self):
+        """Dos rutas del mismo CEDIS y día con la unicidad activada."""
+        self.service = RouteService(
+            SqliteRouteRepository(sqlite3.connect(":memory:")),
+            enforce_unique_daily_clients=True
+        )
+        self.route_a = create_route(self.service)
+        self.route_b = create_route(self.service)
+        for client_id in ["CLI_001", "CLI_002", "CLI_003"]:
+            self.service.assign_client_to_route(self.route_a, client_id)
+    
+    def test_assign_to_second_route_is_rejected(self):
+        """Un cliente no puede quedar en dos rutas activas el mismo día."""
+        with pytest.raises(DuplicateClientAssignmentError) as error:
+            self.service.assign_client_to_route(self.route_b, "CLI_002")
+        
+        assert error.value.route_ids == [self.route_a]
+        assert self.service.get_route_by_id(self.route_b).client_ids == []
+    
+    def test_move_divide_and_merge_are_allowed(self):
+        """Las operaciones que retiran al cliente de su ruta no generan conflicto."""
+        self.service.move_client("CLI_003", self.route_a, self.route_b)
+        route_x, route_y = self.service.divide_route_use_case(self.route_a, 1, "X", "Y")
+        self.service.merge_routes_use_case(route_y.id, self.route_b, "Z")
+        
+        assert self.service.find_conflicts("CEDIS_BOG_01", "lunes") == []
+    
+    def test_reactivation_is_rejected_when_clients_moved(self):
+        """Reactivar una ruta cuyos clientes ya atiende otra ruta se rechaza."""
+        self.service.deactivate_route(self.route_a)
+        self.service.assign_client_to_route(self.route_b, "CLI_001")
+        
+        with pytest.raises(DuplicateClientAssignmentError):
+            self.service.activate_route(self.route_a)
+        assert not self.service.get_route_by_id(self.route_a).is_active
+    
+    def test_audit_without_enforcement(self):
+        """Sin la unicidad activada, los duplicados se detectan con la auditoría."""
+        service = RouteService(self.service._repository)
+        service.assign_client_to_route(self.route_b, "CLI_002")
+        
+        conflict, = service.find_conflicts("CEDIS_BOG_01", "LUNES")
+        assert conflict.client_id == "CLI_002"
+        assert sorted(conflict.route_ids) == sorted([self.route_a, self.route_b])
+
+
+class TestRouteSuggestions:
+    """Tests de la sugerencia de rutas para clientes nuevos."""
+    
+    def setup_method(self):
+        """Dos rutas del lunes: una al norte y otra al sur."""
+        conn = sqlite3.connect(":memory:")
+        self.service = RouteService(
+            SqliteRouteRepository(conn),
+            client_repository=SqliteClientRepository(conn)
+        )
+        self.north = create_route(self.service)
+        self.south = create_route(self.service)
+        stops = {
+            self.north: [("CLI_N1", 4.70), ("CLI_N2", 4.72)],
+            self.south: [("CLI_S1", 4.60), ("CLI_S2", 4.62)]
+        }
+        for route_id, clients in stops.items():
+            for client_id, latitude in clients:
+                self.register(client_id, latitude)
+                self.service.assign_client_to_route(route_id, client_id)
+    
+    def register(self, client_id, latitude):
+        self.service.register_client(RegisterClientDTO(
+            id=client_id, name=client_id, address="Calle 1", cedis_id="CEDIS_BOG_01",
+            latitude=latitude, longitude=-74.1
+        ))
+    
+    def test_routes_ranked_by_insertion_cost(self):
+        """La ruta más cercana va primero, con la posición de inserción."""
+        self.register("CLI_NEW", 4.71)
+        
+        best, other = self.service.suggest_routes_for_client("CLI_NEW", "lunes", k=2)
+        
+        assert (best.route_id, best.position) == (self.north, 1)
+        assert best.added_km == pytest.approx(0.0, abs=1e-6)
+        assert other.route_id == self.south
+    
+    def test_index_follows_new_clients(self):
+        """Los clientes registrados después de construir el índice se consideran."""
+        self.register("CLI_NEW", 4.63)
+        assert self.service.suggest_routes_for_client("CLI_NEW", "LUNES", k=1)[0].route_id == self.south
+        
+        # Un nuevo cliente, muy cerca, se suma a una tercera ruta
+        third = create_route(self.service)
+        self.register("CLI_NEAR", 4.6301)
+        self.service.assign_client_to_route(third, "CLI_NEAR")
+        
+        assert self.service.suggest_routes_for_client("CLI_NEW", "LUNES", k=1)[0].route_id == third
+    
+    def test_client_without_coordinates_is_rejected(self):
+        """Sin coordenadas no hay sugerencias."""
+        self.service.register_client(RegisterClientDTO(
+            id="CLI_X", name="X", address="Calle 1", cedis_id="CEDIS_BOG_01"
+        ))
+        
+        with pytest.raises(ValueError, match="coordenadas"):
+            self.service.suggest_routes_for_client("CLI_X", "LUNES")
+
+
+class TestRouteConstraints:
+    """Tests de capacidad, ventanas y turno en los casos de uso."""
+    
+    def make_service(self, enforce):
+        conn = sqlite3.connect(":memory:")
+        service = RouteService(
+            SqliteRouteRepository(conn),
+            client_repository=SqliteClientRepository(conn),
+            enforce_route_constraints=enforce
+        )
+        for client_id, demand, window_end in [("CLI_001", 6, None), ("CLI_002", 3, None),
+                                              ("CLI_003", 5, 485)]:
+            service.register_client(RegisterClientDTO(
+                id=client_id, name=client_id, address="Calle 1", cedis_id="CEDIS_BOG_01",
+                demand=demand, service_minutes=10, window_end=window_end
+            ))
+        route_id = service.create_route(
+            CreateRouteDTO("Ruta Norte", "CEDIS_BOG_01", "lunes", capacity=10, shift_minutes=240)
+        ).id
+        return service, route_id
+    
+    def test_violations_are_warnings_by_default(self):
+        """Sin aplicar restricciones, la operación procede con advertencias."""
+        service, route_id = self.make_service(enforce=False)
+        service.assign_client_to_route(route_id, "CLI_001")
+        
+        route = service.assign_client_to_route(route_id, "CLI_003")
+        
+        assert route.client_ids == ["CLI_001", "CLI_003"]
+        assert [w.split(":")[0] for w in route.warnings] == ["Capacidad excedida", "El cliente CLI_003 se atendería a las 08"]
+    
+    def test_enforced_constraints_reject_and_divide_checks_parts(self):
+        """Al aplicarlas, la inserción se rechaza; dividir verifica cada parte."""
+        service, route_id = self.make_service(enforce=True)
+        service.assign_client_to_route(route_id, "CLI_001")
+        service.assign_client_to_route(route_id, "CLI_002")
+        
+        with pytest.raises(RouteConstraintViolationError, match="Capacidad"):
+            service.insert_client_at(route_id, "CLI_003", 0)
+        
+        route_a, route_b = service.divide_route_use_case(route_id, 1, "A", "B")
+        assert route_a.warnings == route_b.warnings == ()
+        assert route_a.capacity == 10
+        
+        moved = service.insert_client_at(route_b.id, "CLI_003", 0)
+        schedule = service.get_route_schedule(moved.id)
+        assert [s.client_id for s in schedule.stops] == ["CLI_003", "CLI_002"]
+        assert (schedule.total_load, schedule.end_time, schedule.violations) == (8, 500, [])
+    
+    
+    def test_simulation_brackets_the_schedule(self):
+        """Sin variabilidad la simulación es la programación; con ella, la rodea."""
+        pytest.importorskip("numpy")
+        service, route_id = self.make_service(enforce=False)
+        for client_id in ("CLI_001", "CLI_003"):
+            service.assign_client_to_route(route_id, client_id)
+        
+        fixed = service.simulate_route(route_id, replications=10, travel_cv=0, service_cv=0)
+        assert [(s.arrival_p10, s.arrival_p90, s.late_probability) for s in fixed.stops] == [
+            (480, 480, 0.0), (490, 490, 1.0)
+        ]
+        assert (fixed.planned_end, fixed.end_p50, fixed.shift_end, fixed.overrun_probability) == (500, 500, 720, 0.0)
+        
+        varied = service.simulate_route(route_id, replications=4000, service_cv=0.5, seed=3)
+        assert varied.end_p10 < varied.planned_end < varied.end_p90
+        assert varied.mean_end == pytest.approx(500, abs=0.5)
+        # CLI_003 se atiende a tiempo si la atención de CLI_001 dura hasta 5 min
+        assert 0 < 1 - varied.stops[1].late_probability < 0.2
+        
+        with pytest.raises(ValueError, match="no encontrada"):
+            service.simulate_route("NO_EXISTE")
+
+
+class TestRouteMetrics:
+    """Tests de las métricas de costo guardadas con cada ruta."""
+    
+    def setup_method(self):
+        conn = sqlite3.connect(":memory:")
+        self.service = RouteService(
+            SqliteRouteRepository(conn),
+            client_repository=SqliteClientRepository(conn)
+        )
+        for i in range(6):
+            self.service.register_client(RegisterClientDTO(
+                id=f"CLI_{i}", name=f"Cliente {i}", address="Calle 1", cedis_id="CEDIS_BOG_01",
+                latitude=4.60 + 0.01 * i, longitude=-74.1 + 0.003 * (i % 2), service_minutes=5
+            ))
+        self.route_id = create_route(self.service)
+    
+    def assert_metrics_match(self, route_id):
+        """Las métricas guardadas coinciden con recalcular la ruta completa."""
+        route = self.service.get_route_by_id(route_id)
+        expected = RouteCost(self.service._stop_profiles(list(route.client_ids))).metrics
+        summary = next(s for s in self.service.get_route_summaries(True) if s.id == route_id)
+        
+        assert route.distance_km == pytest.approx(expected.distance_km)
+        assert summary.distance_km == pytest.approx(expected.distance_km)
+        assert summary.duration_minutes == pytest.approx(expected.duration_minutes)
+    
+    def test_metrics_follow_every_edit(self):
+        """Cada caso de uso actualiza las métricas sin recalcular la ruta."""
+        for client_id in ["CLI_0", "CLI_2", "CLI_1"]:
+            self.service.assign_client_to_route(self.route_id, client_id)
+        self.assert_metrics_match(self.route_id)
+        
+        self.service.insert_client_at(self.route_id, "CLI_3", 1)
+        self.assert_metrics_match(self.route_id)
+        
+        self.service.move_stop(self.route_id, "CLI_1", "CLI_0", "CLI_3")
+        self.assert_metrics_match(self.route_id)
+        
+        self.service.move_client("CLI_3", self.route_id, self.route_id, 0)
+        self.assert_metrics_match(self.route_id)
+        
+        route = self.service.remove_client_from_route(self.route_id, "CLI_2")
+        self.assert_metrics_match(self.route_id)
+        assert self.service._costs[self.route_id][0] == route.version
+        
+        self.service.reorder_clients_in_route(self.route_id, ["CLI_0", "CLI_1", "CLI_3"])
+        self.assert_metrics_match(self.route_id)
+    
+    def test_schedule_is_advanced_after_each_edit(self):
+        """Las asignaciones sucesivas reutilizan la programación en caché."""
+        builds = []
+        build = self.service._route_schedule
+        self.service._route_schedule = lambda route: builds.append(route.id) or build(route)
+        
+        for client_id in ["CLI_0", "CLI_1", "CLI_2", "CLI_3"]:
+            self.service.assign_client_to_route(self.route_id, client_id)
+        route = self.service.insert_client_at(self.route_id, "CLI_4", 1)
+        
+        assert builds == [self.route_id]
+        version, schedule = self.service._schedules[self.route_id]
+        assert version == route.version
+        assert [s.client_id for s in schedule.stops] == list(route.client_ids)
+    
+    def test_divide_and_merge_derive_metrics(self):
+        """Dividir y fusionar calculan las métricas desde los tramos guardados."""
+        other = create_route(self.service)
+        for client_id in ["CLI_0", "CLI_1", "CLI_2", "CLI_3"]:
+            self.service.assign_client_to_route(self.route_id, client_id)
+        self.service.assign_client_to_route(other, "CLI_5")
+        self.service.move_client("CLI_3", self.route_id, other, 0)
+        self.assert_metrics_match(self.route_id)
+        self.assert_metrics_match(other)
+        
+        route_a, route_b = self.service.divide_route_use_case(self.route_id, 2, "A", "B")
+        self.assert_metrics_match(route_a.id)
+        self.assert_metrics_match(route_b.id)
+        
+        merged = self.service.merge_routes_use_case(route_b.id, other, "Fusionada")
+        self.assert_metrics_match(merged.id)
+    
+    def test_metrics_unknown_without_client_repository(self):
+        """Sin repositorio de clientes las métricas quedan sin calcular."""
+        service = RouteService(SqliteRouteRepository(sqlite3.connect(":memory:")))
+        route = service.assign_client_to_route(create_route(service), "CLI_0")
+        
+        assert route.distance_km is None
+        assert service.get_route_summaries()[0].duration_minutes is None
+
+
+class TestWeeklyPlan:
+    """Tests de la planificación semanal de un CEDIS."""
+    
+    def setup_method(self):
+        """Todos los clientes están hoy en la ruta del lunes."""
+        conn = sqlite3.connect(":memory:")
+        self.service = RouteService(
+            SqliteRouteRepository(conn),
+            client_repository=SqliteClientRepository(conn)
+        )
+        self.routes = {
+            day: self.service.create_route(CreateRouteDTO(f"Ruta {day}", "CEDIS_BOG_01", day)).id
+            for day in ["LUNES", "MIÉRCOLES", "VIERNES"]
+        }
+        for i in range(6):
+            self.service.register_client(RegisterClientDTO(
+                id=f"CLI_{i}", name=f"Cliente {i}", address="Calle 1", cedis_id="CEDIS_BOG_01",
+                visit_frequency=3 if i == 0 else 1,
+                allowed_days=("viernes",) if i == 1 else ()
+            ))
+            if i != 0:
+                self.service.assign_client_to_route(self.routes["LUNES"], f"CLI_{i}")
+        # Cliente sin perfil: el plan no lo mueve
+        self.service.assign_client_to_route(self.routes["LUNES"], "CLI_EXTERNO")
+    
+    def test_preview_levels_days_without_writing(self):
+        """La propuesta nivela los días y no modifica las rutas."""
+        plan = self.service.plan_week("CEDIS_BOG_01")
+        
+        assert [(d.day_of_week, d.stops_before, d.stops_after) for d in plan.days] == [
+            ("LUNES", 6, 3), ("MIÉRCOLES", 0, 3), ("VIERNES", 0, 3)
+        ]
+        visits = {(v.client_id, v.day_of_week) for v in plan.visits}
+        assert {("CLI_0", day) for day in self.routes} <= visits
+        assert ("CLI_1", "VIERNES") in visits
+        assert not plan.applied
+        assert self.service.get_route_by_id(self.routes["LUNES"]).client_count == 6
+    
+    def test_apply_rewrites_routes(self):
+        """Al aplicar, cada cliente queda en las rutas de sus días."""
+        plan = self.service.plan_week("CEDIS_BOG_01", apply=True)
+        
+        for visit in plan.visits:
+            assert visit.client_id in self.service.get_route_by_id(visit.route_id).client_ids
+        monday = self.service.get_route_by_id(self.routes["LUNES"])
+        assert "CLI_EXTERNO" in monday.client_ids
+        assert "CLI_1" not in monday.client_ids
+        assert sorted(r.client_count for r in self.service.get_all_routes()) == [3, 3, 3]
+
+
+class TestPlanningSandbox:
+    """Tests de los sandboxes de planificación."""
+    
+    def setup_method(self):
+        """Dos rutas del mismo día con espacio de trabajo en memoria."""
+        self.repository = SqliteRouteRepository(sqlite3.connect(":memory:"))
+        self.service = RouteService(self.repository, workspace_factory=InMemoryRouteRepository)
+        self.route_a = create_route(self.service)
+        self.route_b = create_route(self.service)
+        for client_id in ["CLI_001", "CLI_002", "CLI_003"]:
+            self.service.assign_client_to_route(self.route_a, client_id)
+        self.service.assign_client_to_route(self.route_b, "CLI_004")
+    
+    def test_alternatives_do_not_touch_the_database(self):
+        """Las operaciones del sandbox y de sus bifurcaciones quedan aisladas."""
+        statements = []
+        self.repository._conn.set_trace_callback(statements.append)
+        sandbox = self.service.open_sandbox("CEDIS_BOG_01", "lunes")
+        
+        divided = sandbox.fork()
+        divided.service.divide_route_use_case(self.route_a, 1, "Norte A", "Norte B")
+        merged = sandbox.fork()
+        merged.service.merge_routes_use_case(self.route_a, self.route_b, "Norte y Sur")
+        
+        assert [p.total_stops for p in (sandbox.plan(), divided.plan(), merged.plan())] == [4, 4, 4]
+        assert [len(p.routes) for p in (sandbox.plan(), divided.plan(), merged.plan())] == [2, 3, 1]
+        assert [p.changed_routes for p in (sandbox.plan(), divided.plan(), merged.plan())] == [0, 3, 3]
+        assert not any(s.lstrip().upper().startswith(("INSERT", "UPDATE")) for s in statements)
+    
+    def test_commit_writes_chosen_plan_with_lineage(self):
+        """Confirmar escribe las rutas y el linaje de la alternativa elegida."""
+        sandbox = self.service.open_sandbox("CEDIS_BOG_01", "LUNES")
+        route_a, route_b = sandbox.service.divide_route_use_case(self.route_a, 1, "Norte A", "Norte B")
+        merged = sandbox.service.merge_routes_use_case(route_b.id, self.route_b, "Norte B y Sur")
+        
+        assert sandbox.commit() == 5
+        
+        active = {r.name: r.client_ids for r in self.service.get_routes_by_cedis_and_day("CEDIS_BOG_01", "LUNES")}
+        assert active == {"Norte A": ["CLI_001"], "Norte B y Sur": ["CLI_002", "CLI_003", "CLI_004"]}
+        ancestors = {edge.parent_id for edge in self.service.get_route_lineage(merged.id).ancestors}
+        assert ancestors == {route_b.id, self.route_b, self.route_a}
+        with pytest.raises(ValueError):
+            sandbox.commit()
+    
+    def test_commit_fails_when_base_changed(self):
+        """Si una ruta de la base cambió, no se escribe nada."""
+        sandbox = self.service.open_sandbox("CEDIS_BOG_01", "LUNES")
+        other = sandbox.fork()
+        sandbox.service.divide_route_use_case(self.route_a, 1, "Norte A", "Norte B")
+        other.service.divide_route_use_case(self.route_a, 2, "Norte C", "Norte D")
+        sandbox.commit()
+        
+        with pytest.raises(ConcurrentModificationError):
+            other.commit()
+        
+        names = sorted(r.name for r in self.service.get_all_routes())
+        assert names == ["Norte A", "Norte B", "Ruta Norte"]
+    
+    def test_diff_reports_operations_against_base_and_alternatives(self):
+        """El diff resume la división como una operación y compara alternativas."""
+        sandbox = self.service.open_sandbox("CEDIS_BOG_01", "LUNES")
+        divided = sandbox.fork()
+        divided.service.divide_route_use_case(self.route_a, 1, "Norte A", "Norte B")
+        moved = sandbox.fork()
+        moved.service.move_stop(self.route_a, "CLI_003", before=None, after="CLI_001")
+        
+        split = divided.diff()
+        assert [(e.operation, e.after_routes) for e in split.route_edits] == [("SPLIT", ["Norte A", "Norte B"])]
+        assert split.stop_edits == [] and split.unchanged_routes == 1
+        assert [(e.operation, e.client_id, e.position) for e in moved.diff().stop_edits] == [
+            ("REORDER_STOP", "CLI_003", 0)
+        ]
+        assert moved.diff(against=moved).route_edits == moved.diff(against=moved).stop_edits == []
@@ -0,0 +1,131 @@
+"""
+Tests del costo incremental de rutas.
+"""
+import random
+
+import pytest
+from src.domain.services.route_cost import RouteCost
+from src.domain.services.route_schedule import StopProfile
+
+
+def stop(client_id, location=None, service=0.0):
+    """Crea un perfil de parada de prueba."""
+    return StopProfile(client_id, service_minutes=service, location=location)
+
+
+def random_stops(rng, n):
+    """Paradas aleatorias; algunas sin ubicación."""
+    return [
+        stop(
+            f"CLI_{i:03d}",
+            None if rng.random() < 0.2 else (4.6 + rng.random() * 0.1, -74.1 + rng.random() * 0.1),
+            rng.choice([0.0, 5.0, 10.0])
+        )
+        for i in range(n)
+    ]
+
+
+class TestRouteCost:
+    """Tests para las métricas de ruta y sus diferencias en O(1)."""
+    
+    def test_metrics(self):
+        """La duración suma el viaje a la velocidad promedio y la atención."""
+        cost = RouteCost([stop("A", (0.0, 0.0), 10), stop("B", (0.0, 0.1), 5)], speed_kmh=60)
+        
+        assert cost.distance_km == pytest.approx(11.12, abs=0.01)
+        assert cost.metrics.duration_minutes == pytest.approx(cost.distance_km + 15)
+    
+    def test_stops_without_location_add_no_distance(self):
+        """Los tramos hacia una parada sin ubicación no cuentan."""
+        cost = RouteCost([stop("A", (0.0, 0.0)), stop("B"), stop("C", (0.0, 0.1))])
+        
+        assert cost.distance_km == 0.0
+        assert len(cost) == 3
+    
+    def test_invalid_moves(self):
+        """Las posiciones y segmentos fuera de rango se rechazan."""
+        cost = RouteCost([stop("A"), stop("B")])
+        
+        with pytest.raises(ValueError):
+            cost.insertion_delta(stop("C"), 3)
+        with pytest.raises(ValueError):
+            cost.removal_delta(2)
+        with pytest.raises(ValueError):
+            cost.two_opt_delta(1, 1)
+    
+    def test_deltas_match_full_recompute(self):
+        """Cada diferencia coincide con recalcular la ruta modificada."""
+        rng = random.Random(7)
+        
+        for _ in range(200):
+            stops = random_stops(rng, rng.randint(1, 8))
+            cost = RouteCost(stops)
+            n = len(stops)
+            new = stop("CLI_NEW", (4.65, -74.05), 7.0)
+            
+            position = rng.randint(0, n)
+            expected = RouteCost(stops[:position] + [new] + stops[position:])
+            assert cost.distance_km + cost.insertion_delta(new, position) == pytest.approx(expected.distance_km)
+            
+            position = rng.randrange(n)
+            expected = RouteCost(stops[:position] + stops[position + 1:])
+            assert cost.distance_km + cost.removal_delta(position) == pytest.approx(expected.distance_km)
+            
+            source, target = rng.randrange(n), rng.randrange(n)
+            moved = stops[:source] + stops[source + 1:]
+            moved.insert(target, stops[source])
+            assert cost.distance_km + cost.relocation_delta(source, target) == pytest.approx(
+                RouteCost(moved).distance_km
+            )
+            
+            if n >= 2:
+                first = rng.randrange(n - 1)
+                last = rng.randrange(first + 1, n)
+                reversed_stops = stops[:first] + stops[first:last + 1][::-1] + stops[last + 1:]
+                assert cost.distance_km + cost.two_opt_delta(first, last) == pytest.approx(
+                    RouteCost(reversed_stops).distance_km
+                )
+    
+    def test_applied_moves_keep_totals_exact(self):
+        """Una secuencia de movimientos aplicados equivale a reconstruir el costo."""
+        rng = random.Random(11)
+        stops = random_stops(rng, 6)
+        cost = RouteCost(stops)
+        
+        for i in range(300):
+            n = len(stops)
+            move = rng.choice(["insert", "remove", "relocate", "two_opt"]) if n >= 2 else "insert"
+            if move == "insert":
+                new = random_stops(rng, 1)[0]
+                position = rng.randint(0, n)
+                cost.insert(new, position)
+                stops.insert(position, new)
+            elif move == "remove":
+                position = rng.randrange(n)
+                cost.remove(position)
+                stops.pop(position)
+            elif move == "relocate":
+                source, target = rng.randrange(n), rng.randrange(n)
+                cost.relocate(source, target)
+                stops.insert(target, stops.pop(source))
+            else:
+                first = rng.randrange(n - 1)
+                last = rng.randrange(first + 1, n)
+                cost.two_opt(first, last)
+                stops[first:last + 1] = stops[first:last + 1][::-1]
+            
+            expected = RouteCost(stops)
+            assert cost.metrics.distance_km == pytest.approx(expected.distance_km)
+            assert cost.metrics.duration_minutes == pytest.approx(expected.metrics.duration_minutes)
+    
+    def test_split_and_concatenation(self):
+        """Dividir y concatenar no recalculan distancias y coinciden con la ruta completa."""
+        rng = random.Random(3)
+        stops = random_stops(rng, 7)
+        whole = RouteCost(stops)
+        head, tail = RouteCost(stops[:3]), RouteCost(stops[3:])
+        
+        metrics_a, metrics_b = whole.split(3)
+        assert metrics_a.distance_km == pytest.approx(head.distance_km)
+        assert metrics_b.duration_minutes == pytest.approx(tail.metrics.duration_minutes)
+        assert head.concatenation(tail).distance_km == pytest.approx(whole.distance_km)
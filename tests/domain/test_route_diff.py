@@ -0,0 +1,95 @@
+"""
+Tests del comparador de planes de rutas.
+"""
+import random
+
+from src.domain.models.route import Route
+from src.domain.services.route_diff import (
+    ADD_ROUTE, ADD_STOP, MERGE, MOVE_STOP, REMOVE_STOP, REORDER_STOP, REPLACE_ROUTE, SPLIT,
+    RouteEdit, StopEdit, diff_route_plans, longest_increasing_run
+)
+
+
+def route(route_id, client_ids, is_active=True):
+    return Route(route_id, f"Ruta {route_id}", "CEDIS_BOG_01", "LUNES", list(client_ids), is_active=is_active)
+
+
+class TestRouteDiff:
+    """Tests para las operaciones reportadas entre dos planes."""
+    
+    def test_identical_plans_have_no_edits(self):
+        """Sin cambios solo se cuentan las rutas iguales."""
+        plan = [route("R1", ["A", "B"]), route("R2", ["C"])]
+        
+        diff = diff_route_plans(plan, plan)
+        
+        assert diff.is_empty
+        assert diff.unchanged_routes == 2
+    
+    def test_reorder_reports_minimal_moves(self):
+        """Mover una parada al final reporta solo esa parada."""
+        diff = diff_route_plans([route("R1", ["A", "B", "C", "D"])], [route("R1", ["B", "C", "D", "A"])])
+        
+        assert diff.stop_edits == [StopEdit(REORDER_STOP, "A", "R1", "R1", 3)]
+    
+    def test_moves_between_routes_additions_and_removals(self):
+        """Una parada que cambia de ruta es un movimiento, no un alta y una baja."""
+        before = [route("R1", ["A", "B"]), route("R2", ["C"])]
+        after = [route("R1", ["A"]), route("R2", ["C", "B", "D"])]
+        
+        diff = diff_route_plans(before, after)
+        
+        assert diff.route_edits == []
+        assert diff.stop_edits == [
+            StopEdit(MOVE_STOP, "B", "R2", "R1", 1),
+            StopEdit(ADD_STOP, "D", "R2", None, 2),
+        ]
+        assert diff_route_plans(after, before).stop_edits == [
+            StopEdit(MOVE_STOP, "B", "R1", "R2", 1),
+            StopEdit(REMOVE_STOP, "D", None, "R2", None),
+        ]
+    
+    def test_split_and_merge_absorb_their_moves(self):
+        """División y fusión se reportan como una operación sobre rutas."""
+        before = [route("R1", ["A", "B", "C", "D"]), route("R2", ["E"]), route("R3", ["F"])]
+        after = [
+            route("R1", ["A", "B", "C", "D"], is_active=False),
+            route("N1", ["A", "B"]), route("N2", ["C", "D"]), route("N3", ["F", "E"])
+        ]
+        
+        diff = diff_route_plans(before, after)
+        
+        assert diff.route_edits == [
+            RouteEdit(SPLIT, ("R1",), ("N1", "N2")),
+            RouteEdit(MERGE, ("R2", "R3"), ("N3",)),
+        ]
+        assert diff.stop_edits == []
+    
+    def test_recreated_route_is_a_replacement(self):
+        """Una ruta recreada con otro ID solo reporta los cambios de sus paradas."""
+        diff = diff_route_plans([route("R1", ["A", "B"])], [route("N1", ["A", "B"]), route("N2", ["C"])])
+        
+        assert diff.route_edits == [RouteEdit(REPLACE_ROUTE, ("R1",), ("N1",)), RouteEdit(ADD_ROUTE, (), ("N2",))]
+        assert diff.stop_edits == [StopEdit(ADD_STOP, "C", "N2", None, 0)]
+    
+    def test_large_plans_match_brute_force_counts(self):
+        """Con miles de rutas, cada reordenamiento aleatorio reporta el mínimo de paradas."""
+        rng = random.Random(7)
+        before, after, expected = [], [], 0
+        for r in range(2000):
+            clients = [f"C{r}_{i}" for i in range(40)]
+            shuffled = list(clients)
+            i, j = rng.randrange(40), rng.randrange(40)
+            shuffled.insert(j, shuffled.pop(i))
+            expected += 0 if shuffled == clients else 1
+            before.append(route(f"R{r}", clients))
+            after.append(route(f"R{r}", shuffled))
+        
+        diff = diff_route_plans(before, after)
+        
+        assert len(diff.stop_edits) == expected
+        assert diff.unchanged_routes == 2000 - expected
+    
+    def test_longest_increasing_run_skips_new_elements(self):
+        """Las posiciones negativas nunca forman parte de la subsecuencia."""
+        assert longest_increasing_run([2, -1, 0, 1, 3]) == [2, 3, 4]
@@ -217,6 +217,28 @@ class TestRouteDomainModel:
         with pytest.raises(ValueError, match="mismos clientes"):
             route.reorder_clients(["CLI_001", "CLI_002", "CLI_003", "CLI_004"])
 
+    
+    def test_insert_client_at_position(self):
+        """Test de inserción de cliente en una posición."""
+        route = Route(
+            id="route-001",
+            name="Ruta Norte",
+            cedis_id="CEDIS_BOG_01",
+            day_of_week="LUNES",
+            client_ids=["CLI_001", "CLI_003"]
+        )
+        
+        route.insert_client("CLI_002", 1)
+        route.insert_client("CLI_004", 3)
+        
+        assert route.client_ids == ["CLI_001", "CLI_002", "CLI_003", "CLI_004"]
+        
+        with pytest.raises(ValueError, match="Posición inválida"):
+            route.insert_client("CLI_005", 5)
+        
+        with pytest.raises(ValueError, match="ya está en la ruta"):
+            route.insert_client("CLI_001", 0)
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
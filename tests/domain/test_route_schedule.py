@@ -0,0 +1,112 @@
+"""
+Tests de la programación de rutas: capacidad, ventanas de entrega y turno.
+"""
+import random
+
+import pytest
+from src.domain.services.route_schedule import RouteSchedule, StopProfile
+
+
+def stop(client_id, demand=0.0, service=0.0, window=(None, None), location=None):
+    """Crea un perfil de parada de prueba."""
+    return StopProfile(client_id, demand, service, window[0], window[1], location)
+
+
+class TestRouteSchedule:
+    """Tests para los agregados por prefijo y las verificaciones rápidas."""
+    
+    def test_times_and_slack(self):
+        """Se espera a que abra la ventana y la holgura limita el retraso."""
+        schedule = RouteSchedule([
+            stop("CLI_001", service=10),
+            stop("CLI_002", service=10, window=(540, 560)),
+            stop("CLI_003", service=10, window=(None, 600))
+        ], shift_start=480)
+        
+        assert schedule.start == [480, 540, 550]
+        assert schedule.forward_slack[0] == 70  # 50 de espera + 20 de la ventana de CLI_002
+        assert schedule.violations() == []
+    
+    def test_insertion_respects_later_windows(self):
+        """Una inserción que retrasa una ventana cerrada se reporta."""
+        schedule = RouteSchedule([
+            stop("CLI_001", service=10, window=(None, 500)),
+            stop("CLI_002", service=10, window=(None, 510))
+        ], shift_start=480)
+        
+        assert schedule.insertion_violations(stop("CLI_NEW", service=5), 1) == []
+        assert schedule.insertion_violations(stop("CLI_NEW", service=30), 1)
+        assert schedule.insertion_violations(stop("CLI_NEW", service=30), 2) == []
+    
+    def test_capacity_and_shift(self):
+        """La carga y el fin del turno se verifican en cada operación."""
+        schedule = RouteSchedule(
+            [stop("CLI_001", demand=6, service=60), stop("CLI_002", demand=3, service=60)],
+            capacity=10, shift_start=480, shift_minutes=150
+        )
+        
+        assert schedule.insertion_violations(stop("CLI_NEW", demand=2), 2)[0].startswith("Capacidad")
+        assert "turno" in schedule.insertion_violations(stop("CLI_NEW", service=40), 2)[0]
+        
+        first, second = schedule.split_violations(1)
+        assert (first, second) == ([], [])
+        
+        other = RouteSchedule([stop("CLI_003", demand=2, service=10)],
+                              capacity=10, shift_start=480, shift_minutes=150)
+        assert len(schedule.concatenation_violations(other)) == 1
+    
+    def test_fast_checks_match_full_rescheduling(self):
+        """Las verificaciones O(1) coinciden con reprogramar la ruta completa."""
+        rng = random.Random(11)
+        
+        def random_stop(client_id):
+            window_start = rng.choice([None, rng.randint(480, 700)])
+            window_end = rng.choice([None, (window_start or 480) + rng.randint(30, 300)])
+            location = (4.6 + rng.uniform(-0.05, 0.05), -74.1 + rng.uniform(-0.05, 0.05))
+            return stop(client_id, rng.randint(1, 5), rng.randint(5, 20),
+                        (window_start, window_end), location)
+        
+        for _ in range(300):
+            stops = [random_stop(f"CLI_{i}") for i in range(rng.randint(2, 8))]
+            limits = dict(capacity=25, shift_start=480, shift_minutes=rng.choice([None, 300]))
+            schedule = RouteSchedule(stops, **limits)
+            if schedule.violations():
+                continue
+            
+            new_stop = random_stop("CLI_NEW")
+            position = rng.randint(0, len(stops))
+            full = RouteSchedule(stops[:position] + [new_stop] + stops[position:], **limits)
+            assert bool(schedule.insertion_violations(new_stop, position)) == bool(full.violations())
+            
+            split = rng.randint(1, len(stops) - 1)
+            first, second = schedule.split_violations(split)
+            assert bool(first) == bool(RouteSchedule(stops[:split], **limits).violations())
+            assert bool(second) == bool(RouteSchedule(stops[split:], **limits).violations())
+    
+    def test_applied_moves_match_full_rescheduling(self):
+        """Insertar, quitar y mover paradas deja los mismos agregados que reprogramar."""
+        rng = random.Random(3)
+        stops = [
+            stop(f"CLI_{i}", rng.randint(1, 5), rng.randint(5, 20),
+                 (rng.choice([None, 540]), rng.choice([None, 720])),
+                 (4.6 + rng.uniform(-0.05, 0.05), -74.1 + rng.uniform(-0.05, 0.05)))
+            for i in range(8)
+        ]
+        limits = dict(capacity=25, shift_start=480, shift_minutes=240)
+        schedule = RouteSchedule(stops[:5], **limits)
+        
+        schedule.insert(stops[5], 2)
+        schedule.insert(stops[6], 6)
+        schedule.remove(0)
+        schedule.relocate(4, 1)
+        schedule.relocate(0, 3)
+        
+        full = RouteSchedule(schedule.stops, **limits)
+        for name in ("load", "start", "departure", "forward_slack", "late_before", "late_from"):
+            assert getattr(schedule, name) == pytest.approx(getattr(full, name)), name
+        assert schedule.violations() == full.violations()
+    
+    def test_invalid_position(self):
+        """La posición de inserción debe existir."""
+        with pytest.raises(ValueError, match="Posición inválida"):
+            RouteSchedule([]).insertion_violations(stop("CLI_NEW"), 1)
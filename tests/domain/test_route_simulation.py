@@ -0,0 +1,81 @@
+"""
+Tests de la simulación Monte Carlo de rutas.
+"""
+import pytest
+
+from src.domain.services.route_schedule import RouteSchedule, StopProfile
+from src.domain.services.route_simulation import (
+    FIXED, GAMMA, LOGNORMAL, UNIFORM, TimeDistribution, simulate_schedule
+)
+
+np = pytest.importorskip("numpy")
+
+# Paradas a ~11 km una de otra sobre el mismo meridiano
+STOPS = [
+    StopProfile(f"CLI_{i}", service_minutes=10, location=(4.60 + 0.1 * i, -74.1))
+    for i in range(5)
+]
+
+
+class TestTimeDistribution:
+    """Tests de los factores muestreados."""
+    
+    @pytest.mark.parametrize("kind", [LOGNORMAL, GAMMA, UNIFORM])
+    def test_factors_have_unit_mean_and_requested_cv(self, kind):
+        """Cada distribución conserva la media y respeta el coeficiente de variación."""
+        factors = TimeDistribution(kind, 0.3).sample(np.random.default_rng(1), (200000, 1))
+        
+        assert factors.mean() == pytest.approx(1, abs=0.005)
+        assert factors.std() == pytest.approx(0.3, abs=0.005)
+        assert factors.min() >= 0
+    
+    def test_invalid_settings_are_rejected(self):
+        """Distribución desconocida, cv negativo o uniforme con tiempos negativos."""
+        for kind, cv in [("normal", 0.2), (GAMMA, -0.1), (UNIFORM, 0.6)]:
+            with pytest.raises(ValueError):
+                TimeDistribution(kind, cv)
+
+
+class TestSimulateSchedule:
+    """Tests de la simulación de una ruta."""
+    
+    def test_fixed_times_reproduce_the_schedule(self):
+        """Sin variabilidad, todos los percentiles son la programación determinista."""
+        schedule = RouteSchedule(STOPS, shift_minutes=150)
+        
+        simulation = simulate_schedule(schedule, TimeDistribution(FIXED), TimeDistribution(FIXED), replications=5)
+        
+        for stop, arrival in zip(simulation.stops, schedule.arrival):
+            assert stop.arrival == pytest.approx((arrival,) * 3)
+        assert simulation.end_time == pytest.approx((schedule.end_time,) * 3)
+        assert simulation.overrun_probability == 0.0
+    
+    def test_windows_wait_and_shift_overrun(self):
+        """Con ventanas se espera su apertura; el turno se excede según la variabilidad."""
+        stops = list(STOPS)
+        stops[2] = StopProfile("CLI_2", service_minutes=10, window_start=560, window_end=580,
+                               location=STOPS[2].location)
+        schedule = RouteSchedule(stops, shift_minutes=schedule_end(stops) - 480)
+        
+        simulation = simulate_schedule(schedule, replications=5000, seed=11)
+        
+        # Las paradas anteriores a la ventana rara vez llegan después de su apertura
+        assert simulation.stops[2].arrival[2] < 560
+        assert simulation.stops[3].arrival[0] > 560 + 10
+        # El turno termina justo en el fin determinista: cerca de la mitad se excede
+        assert 0.3 < simulation.overrun_probability < 0.7
+        assert simulation.mean_end_time == pytest.approx(schedule.end_time, abs=1)
+    
+    def test_same_seed_reproduces_and_empty_route_ends_at_start(self):
+        """La semilla hace reproducible la simulación; una ruta vacía termina al salir."""
+        schedule = RouteSchedule(STOPS)
+        
+        assert simulate_schedule(schedule, seed=5) == simulate_schedule(schedule, seed=5)
+        assert simulate_schedule(RouteSchedule([])).end_time == (480, 480, 480)
+        with pytest.raises(ValueError, match="replicaciones"):
+            simulate_schedule(schedule, replications=0)
+
+
+def schedule_end(stops):
+    """Fin determinista de las paradas sin límite de turno."""
+    return RouteSchedule(stops).end_time
@@ -0,0 +1,74 @@
+"""
+Tests de los servicios de dominio geográficos:
+índice espacial en rejilla e inserción más barata.
+"""
+import random
+
+import pytest
+from src.domain.services.route_geometry import cheapest_insertion, haversine_km
+from src.domain.services.spatial_index import SpatialGridIndex
+
+
+class TestSpatialGridIndex:
+    """Tests para el índice espacial en rejilla."""
+    
+    def test_nearest_matches_brute_force(self):
+        """Los vecinos coinciden con una búsqueda exhaustiva."""
+        rng = random.Random(7)
+        points = {
+            f"CLI_{i:03d}": (4.65 + rng.uniform(-0.05, 0.05), -74.1 + rng.uniform(-0.05, 0.05))
+            for i in range(300)
+        }
+        index = SpatialGridIndex(4.65, cell_km=0.5)
+        for client_id, (latitude, longitude) in points.items():
+            index.add(client_id, latitude, longitude)
+        
+        query = (4.66, -74.09)
+        expected = sorted(points, key=lambda client_id: haversine_km(query, points[client_id]))[:5]
+        
+        assert [client_id for client_id, _ in index.nearest(*query, k=5)] == expected
+    
+    def test_add_moves_and_remove_forgets(self):
+        """Agregar un punto existente lo mueve; quitarlo lo excluye."""
+        index = SpatialGridIndex(4.65)
+        index.add("CLI_001", 4.60, -74.10)
+        index.add("CLI_002", 4.70, -74.10)
+        index.add("CLI_001", 4.70, -74.10)
+        
+        assert len(index) == 2
+        assert index.nearest(4.70, -74.10, k=2)[1][1] == pytest.approx(0.0)
+        
+        index.remove("CLI_002")
+        assert index.nearest(4.60, -74.10, k=2) == [("CLI_001", pytest.approx(11.12, abs=0.01))]
+    
+    def test_accept_filter_skips_points(self):
+        """Los puntos rechazados por el filtro no cuentan como vecinos."""
+        index = SpatialGridIndex(4.65)
+        index.add("CLI_001", 4.650, -74.10)
+        index.add("CLI_002", 4.651, -74.10)
+        index.add("CLI_003", 4.700, -74.10)
+        
+        nearest = index.nearest(4.650, -74.10, k=2, accept=lambda client_id: client_id != "CLI_001")
+        
+        assert [client_id for client_id, _ in nearest] == ["CLI_002", "CLI_003"]
+
+
+class TestCheapestInsertion:
+    """Tests para la inserción más barata en un recorrido abierto."""
+    
+    def test_inserts_between_closest_pair(self):
+        """Un punto sobre el recorrido se inserta sin casi agregar distancia."""
+        stops = [(4.60, -74.10), (4.61, -74.10), (4.62, -74.10)]
+        
+        position, added_km = cheapest_insertion(stops, (4.615, -74.10))
+        
+        assert position == 2
+        assert added_km == pytest.approx(0.0, abs=1e-6)
+    
+    def test_inserts_at_ends_and_in_empty_routes(self):
+        """Fuera del recorrido se agrega al extremo más cercano."""
+        stops = [(4.60, -74.10), (4.61, -74.10)]
+        
+        assert cheapest_insertion(stops, (4.59, -74.10))[0] == 0
+        assert cheapest_insertion(stops, (4.62, -74.10))[0] == 2
+        assert cheapest_insertion([], (4.62, -74.10)) == (0, 0.0)
@@ -0,0 +1,107 @@
+"""
+Tests del planificador semanal.
+"""
+import random
+
+from src.domain.services.weekly_planner import PlannedRoute, VisitRequest, WeeklyPlanner
+
+WORK_DAYS = ['LUNES', 'MARTES', 'MIÉRCOLES', 'JUEVES', 'VIERNES', 'SÁBADO']
+
+
+def week_routes(routes_per_day=2, **overrides):
+    """Rutas de lunes a sábado."""
+    return [
+        PlannedRoute(f"{day}_{i}", day, **overrides)
+        for day in WORK_DAYS
+        for i in range(routes_per_day)
+    ]
+
+
+class TestWeeklyPlanner:
+    """Tests para la elección de días y rutas."""
+    
+    def test_visits_are_spread_across_the_week(self):
+        """Dos y tres visitas por semana quedan separadas."""
+        plan = WeeklyPlanner(week_routes()).plan([
+            VisitRequest("CLI_2X", frequency=2),
+            VisitRequest("CLI_3X", frequency=3)
+        ])
+        
+        two = [WORK_DAYS.index(day) for day in plan.assignments["CLI_2X"]]
+        three = sorted(WORK_DAYS.index(day) for day in plan.assignments["CLI_3X"])
+        assert len(two) == 2 and abs(two[0] - two[1]) >= 3
+        assert len(three) == 3 and all(b - a >= 2 for a, b in zip(three, three[1:]))
+    
+    def test_overloaded_day_is_leveled(self):
+        """Los clientes de un lunes sobrecargado se reparten en la semana."""
+        requests = [
+            VisitRequest(f"CLI_{i:03d}", current_routes=(("LUNES", "LUNES_0"),))
+            for i in range(60)
+        ]
+        
+        plan = WeeklyPlanner(week_routes()).plan(requests)
+        
+        # La penalización por cambio tolera media parada por ruta de desnivel
+        assert max(plan.route_stops.values()) - min(plan.route_stops.values()) <= 2
+        assert plan.route_stops["LUNES_0"] + plan.route_stops["LUNES_1"] <= 11
+        # Quien sigue el lunes conserva su ruta
+        monday = [c for c, days in plan.assignments.items() if "LUNES" in days]
+        assert sum(plan.assignments[c]["LUNES"] == "LUNES_0" for c in monday) == plan.route_stops["LUNES_0"]
+    
+    def test_balanced_plan_is_stable(self):
+        """Un plan ya nivelado no mueve a nadie."""
+        requests = [
+            VisitRequest(f"CLI_{i:03d}", current_routes=((day, f"{day}_{i // 6 % 2}"),))
+            for i, day in ((i, WORK_DAYS[i % 6]) for i in range(48))
+        ]
+        
+        plan = WeeklyPlanner(week_routes()).plan(requests)
+        
+        assert all(
+            tuple(plan.assignments[r.client_id].items()) == r.current_routes for r in requests
+        )
+    
+    def test_balanced_week_with_one_route_per_day_is_unchanged(self):
+        """Con la semana ya nivelada ningún cliente cambia de día."""
+        routes = [PlannedRoute("RL", "LUNES"), PlannedRoute("RJ", "JUEVES")]
+        requests = [
+            VisitRequest(f"{prefix}{i:02d}", current_routes=((day, route_id),))
+            for prefix, day, route_id in (("A", "LUNES", "RL"), ("B", "JUEVES", "RJ"))
+            for i in range(10)
+        ]
+        
+        plan = WeeklyPlanner(routes).plan(requests)
+        
+        assert plan.assignments == {
+            r.client_id: dict(r.current_routes) for r in requests
+        }
+    
+    def test_allowed_days_and_capacity(self):
+        """Se respetan los días permitidos y la capacidad de las rutas."""
+        routes = [PlannedRoute("LUNES_0", "LUNES", capacity=10), PlannedRoute("LUNES_1", "LUNES", capacity=10),
+                  PlannedRoute("MARTES_0", "MARTES")]
+        plan = WeeklyPlanner(routes).plan([
+            VisitRequest("CLI_A", allowed_days=("LUNES",), demand=8),
+            VisitRequest("CLI_B", allowed_days=("LUNES",), demand=8),
+            VisitRequest("CLI_C", frequency=2, allowed_days=("LUNES", "JUEVES"),
+                         current_routes=(("LUNES", "LUNES_0"),))
+        ])
+        
+        assert {plan.assignments["CLI_A"]["LUNES"], plan.assignments["CLI_B"]["LUNES"]} == {"LUNES_0", "LUNES_1"}
+        assert plan.warnings == []
+        # Sin jueves con rutas, CLI_C no se puede planificar y se queda donde está
+        assert "CLI_C" in plan.unplanned
+        assert plan.assignments["CLI_C"] == {"LUNES": "LUNES_0"}
+    
+    def test_thousands_of_clients(self):
+        """Miles de clientes con frecuencias mixtas quedan nivelados por ruta."""
+        rng = random.Random(5)
+        requests = [
+            VisitRequest(f"CLI_{i:05d}", frequency=rng.choice([1, 1, 2, 3]))
+            for i in range(5000)
+        ]
+        
+        plan = WeeklyPlanner(week_routes(routes_per_day=10)).plan(requests)
+        
+        assert sum(plan.route_stops.values()) == sum(r.frequency for r in requests)
+        assert max(plan.route_stops.values()) - min(plan.route_stops.values()) <= 2
@@ -0,0 +1,201 @@
+"""
+Tests del repositorio de rutas en memoria.
+Los de paridad ejecutan los mismos pasos contra SQLite en memoria y
+contra el repositorio particionado por CEDIS.
+"""
+import sqlite3
+
+import pytest
+from src.domain.exceptions import ConcurrentModificationError
+from src.domain.models.route import Route
+from src.domain.models.route_change import RouteChange
+from src.domain.models.route_statistics import RouteStatisticsFilter
+from src.infrastructure.persistence.in_memory_route_repository import InMemoryRouteRepository
+from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+from src.infrastructure.persistence.sharded_route_repository import ShardedRouteRepository
+from src.application.services.route_service import RouteService
+
+
+def vars_of(state):
+    """Tablas de un estado por nombre."""
+    return {name: getattr(state, name) for name in state.__slots__}
+
+
+class FakeClock:
+    """Reloj controlado por el test, en segundos desde la época."""
+    
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def repository():
+    """Repositorio en memoria con tres rutas confirmadas."""
+    return InMemoryRouteRepository([
+        Route("route-001", "Ruta Norte", "CEDIS_BOG_01", "LUNES", ["CLI_001", "CLI_002"]),
+        Route("route-002", "Ruta Sur", "CEDIS_BOG_01", "LUNES", ["CLI_002", "CLI_003"]),
+        Route("route-003", "Ruta Centro", "CEDIS_BOG_01", "MARTES", ["CLI_001"]),
+    ])
+
+
+@pytest.fixture(params=["memory", "sqlite", "sharded"])
+def any_repository(request, tmp_path):
+    """Cada implementación del puerto, vacía."""
+    if request.param == "memory":
+        return InMemoryRouteRepository()
+    if request.param == "sharded":
+        return ShardedRouteRepository.in_directory(tmp_path)
+    return SqliteRouteRepository(sqlite3.connect(":memory:"))
+
+
+class TestInMemoryRouteRepository:
+    """Tests para los índices y las transacciones en memoria."""
+    
+    def test_indexes_follow_updates(self, repository):
+        """Los índices por grupo y por cliente reflejan cada escritura."""
+        route = repository.find_by_id("route-002")
+        route.remove_client("CLI_002")
+        route.add_client("CLI_004")
+        repository.update(route)
+        repository.commit_transaction()
+        
+        assert repository.find_client_routes("CEDIS_BOG_01", "lunes", ["CLI_002", "CLI_004", "CLI_009"]) == {
+            "CLI_002": ["route-001"],
+            "CLI_004": ["route-002"],
+        }
+        
+        route.deactivate()
+        repository.update(route)
+        repository.commit_transaction()
+        
+        assert [r.id for r in repository.get_by_cedis_and_day("CEDIS_BOG_01", "LUNES")] == ["route-001"]
+        assert repository.find_client_routes("CEDIS_BOG_01", "LUNES", ["CLI_004"]) == {}
+    
+    def test_rollback_restores_committed_state(self, repository):
+        """Un rollback descarta rutas, índices y cambios de la transacción."""
+        repository.begin_transaction()
+        route = repository.find_by_id("route-001")
+        route.add_client("CLI_003")
+        repository.update(route)
+        repository.delete("route-003")
+        repository.save(Route("route-004", "Ruta Oeste", "CEDIS_BOG_01", "LUNES", ["CLI_003"]))
+        
+        assert len(repository.find_conflicts("CEDIS_BOG_01", "LUNES")) == 2
+        repository.rollback_transaction()
+        
+        assert repository.find_by_id("route-001").client_ids == ["CLI_001", "CLI_002"]
+        assert repository.find_by_id("route-001").version == 1
+        assert repository.find_by_id("route-003") is not None
+        assert repository.find_by_id("route-004") is None
+        assert [c.client_id for c in repository.find_conflicts("CEDIS_BOG_01", "LUNES")] == ["CLI_002"]
+        assert repository.changes_since("") == []
+    
+    def test_returned_routes_do_not_alias_stored_ones(self, repository):
+        """Modificar una ruta leída no cambia la guardada."""
+        route = repository.find_by_id("route-001")
+        route.add_client("CLI_009")
+        
+        assert repository.find_by_id("route-001").client_ids == ["CLI_001", "CLI_002"]
+        assert repository.find_client_routes("CEDIS_BOG_01", "LUNES", ["CLI_009"]) == {}
+    
+    def test_write_in_fork_does_not_copy_tables(self, repository):
+        """Una escritura en un bifurcado solo guarda las claves que cambia."""
+        shared = {name: table._layers[-1] for name, table in vars_of(repository._state).items()}
+        forked = repository.fork()
+        
+        route = forked.find_by_id("route-001")
+        route.add_client("CLI_009")
+        forked.update(route)
+        forked.commit_transaction()
+        
+        assert list(forked._state.routes._layers[0]) == ["route-001"]
+        assert list(forked._state.clients._layers[0]) == ["CLI_009"]
+        assert forked._state.parents._layers[0] == {}
+        for name, table in vars_of(forked._state).items():
+            assert table._layers[-1] is shared[name]
+        assert repository.find_client_routes("CEDIS_BOG_01", "LUNES", ["CLI_009"]) == {}
+        assert forked.find_client_routes("CEDIS_BOG_01", "LUNES", ["CLI_009"]) == {"CLI_009": ["route-001"]}
+    
+    def test_repeated_forks_keep_their_own_writes(self, repository):
+        """Los bifurcados en cadena se aplanan sin mezclar sus escrituras."""
+        forks = [repository]
+        for i in range(20):
+            forked = forks[-1].fork()
+            if i == 0:
+                forked.delete("route-003")
+            forked.save(Route(f"route-1{i:02d}", f"Ruta {i}", "CEDIS_BOG_01", "MARTES"))
+            forked.commit_transaction()
+            forks.append(forked)
+        
+        assert forks[-1]._state.routes.depth <= InMemoryRouteRepository._MAX_LAYERS + 1
+        assert [len(f.get_all()) for f in forks] == [3] + [i + 3 for i in range(20)]
+        assert repository.find_by_id("route-003") is not None
+        assert forks[-1].find_by_id("route-003") is None
+    
+    def test_archive_uses_last_write_time(self):
+        """Se archivan las rutas inactivas sin escrituras recientes."""
+        clock = FakeClock()
+        repository = InMemoryRouteRepository(clock=clock)
+        repository.save(Route("route-001", "Vieja", "CEDIS_BOG_01", "LUNES", is_active=False))
+        clock.now += 10 * 86400
+        repository.save(Route("route-002", "Reciente", "CEDIS_BOG_01", "LUNES", is_active=False))
+        repository.commit_transaction()
+        
+        assert repository.archive_inactive_routes(older_than_days=5) == 1
+        assert repository.archive_inactive_routes(older_than_days=5) == 0
+        assert [s.id for s in repository.get_summaries(include_inactive=True)] == ["route-002", "route-001"]
+
+
+class TestRouteRepositoryParity:
+    """Ambas implementaciones responden igual a los mismos casos de uso."""
+    
+    def test_service_operations_match(self, any_repository):
+        """División, estadísticas, conflictos, linaje y registro de cambios."""
+        service = RouteService(repository=any_repository)
+        for route in (
+            Route("route-001", "Ruta Norte", "CEDIS_BOG_01", "LUNES", ["CLI_001", "CLI_002", "CLI_003"]),
+            Route("route-002", "Ruta Sur", "CEDIS_BOG_01", "LUNES", ["CLI_003"]),
+        ):
+            any_repository.save(route)
+        any_repository.commit_transaction()
+        
+        route_a, route_b = service.divide_route_use_case("route-001", 2, "Norte A", "Norte B")
+        service.move_stop(route_a.id, "CLI_002", before=None, after="CLI_001")
+        
+        assert [r.client_ids for r in any_repository.get_by_cedis_and_day("CEDIS_BOG_01", "LUNES")] == [
+            ["CLI_002", "CLI_001"], ["CLI_003"], ["CLI_003"]
+        ]
+        assert [(c.client_id, c.route_ids) for c in any_repository.find_conflicts("CEDIS_BOG_01", "LUNES")] == [
+            ("CLI_003", tuple(sorted([route_b.id, "route-002"])))
+        ]
+        statistics = any_repository.get_statistics(RouteStatisticsFilter(day_of_week="lunes", top_n=1))
+        assert [(g.active_routes, g.total_stops) for g in statistics.groups] == [(3, 4)]
+        assert [s.id for s in statistics.largest_routes] == [route_a.id]
+        assert [e.parent_id for e in any_repository.get_ancestors(route_b.id)] == ["route-001"]
+        assert [r.name for r in any_repository.get_all_including_inactive()] == [
+            "Norte A", "Norte B", "Ruta Sur", "Ruta Norte"
+        ]
+        second = any_repository.changes_since("", limit=2)[-1].seq
+        assert [c.operation for c in any_repository.changes_since(second)] == [
+            RouteChange.UPDATE, RouteChange.INSERT, RouteChange.INSERT, RouteChange.UPDATE
+        ]
+        assert {s.id for s in any_repository.search_routes("nor")} == {route_a.id, route_b.id}
+        assert {s.id for s in any_repository.search_routes("nor -")} == {route_a.id, route_b.id}
+    
+    def test_stale_update_is_rejected(self, any_repository):
+        """El compare-and-swap de versión falla igual en ambas."""
+        any_repository.save(Route("route-001", "Ruta Norte", "CEDIS_BOG_01", "LUNES"))
+        any_repository.commit_transaction()
+        first = any_repository.find_by_id("route-001")
+        second = any_repository.find_by_id("route-001")
+        any_repository.update(first)
+        any_repository.commit_transaction()
+        
+        with pytest.raises(ConcurrentModificationError):
+            any_repository.update(second)
+        any_repository.rollback_transaction()
+        
+        assert any_repository.find_by_id("route-001").version == 2
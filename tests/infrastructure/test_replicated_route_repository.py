@@ -0,0 +1,107 @@
+"""
+Tests del repositorio con réplica de lectura en memoria.
+Usan un archivo SQLite temporal para que otra conexión pueda escribir.
+"""
+import sqlite3
+
+import pytest
+from src.domain.models.route import Route
+from src.infrastructure.persistence.replicated_route_repository import ReplicatedRouteRepository
+from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+from src.application.services.route_service import RouteService
+
+
+class FakeClock:
+    """Reloj controlado por el test."""
+    
+    def __init__(self) -> None:
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Base en archivo con una ruta confirmada."""
+    path = str(tmp_path / "routes.db")
+    writer = SqliteRouteRepository(sqlite3.connect(path))
+    writer.save(Route("route-001", "Ruta Norte", "CEDIS_BOG_01", "LUNES", ["CLI_001"]))
+    writer.commit_transaction()
+    writer.close()
+    return path
+
+
+@pytest.fixture
+def clock():
+    """Reloj que solo avanza cuando el test lo indica."""
+    return FakeClock()
+
+
+@pytest.fixture
+def replicated(db_path, clock):
+    """Repositorio replicado con 5 segundos de antigüedad máxima."""
+    repo = ReplicatedRouteRepository(sqlite3.connect(db_path), max_staleness_seconds=5.0, clock=clock)
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def other_writer(db_path):
+    """Repositorio de otro proceso sobre la misma base."""
+    repo = SqliteRouteRepository(sqlite3.connect(db_path))
+    yield repo
+    repo.close()
+
+
+def add_client_elsewhere(repository: SqliteRouteRepository, client_id: str) -> None:
+    route = repository.find_by_id("route-001")
+    route.add_client(client_id)
+    repository.update(route)
+    repository.commit_transaction()
+
+
+class TestReplicatedRouteRepository:
+    """Tests para la réplica de lectura."""
+    
+    def test_other_writers_are_seen_after_staleness_window(self, replicated, other_writer, clock):
+        """Los cambios de otra conexión aparecen al vencer la antigüedad máxima."""
+        assert replicated.find_by_id("route-001").client_ids == ["CLI_001"]
+        
+        add_client_elsewhere(other_writer, "CLI_002")
+        clock.now = 4.9
+        assert replicated.find_by_id("route-001").client_ids == ["CLI_001"]
+        
+        clock.now = 5.0
+        assert replicated.find_by_id("route-001").client_ids == ["CLI_001", "CLI_002"]
+    
+    def test_reads_do_not_touch_primary_while_fresh(self, replicated, db_path):
+        """Con la réplica vigente, las lecturas no consultan la base principal."""
+        statements = []
+        replicated._primary_conn.set_trace_callback(statements.append)
+        
+        replicated.get_all()
+        replicated.get_summaries()
+        replicated.get_by_cedis_and_day("CEDIS_BOG_01", "LUNES")
+        
+        assert statements == []
+    
+    def test_own_writes_are_visible_immediately(self, replicated):
+        """Quien escribe lee sus cambios sin esperar a que venza la réplica."""
+        service = RouteService(repository=replicated)
+        
+        service.assign_client_to_route("route-001", "CLI_002")
+        
+        assert replicated.find_by_id("route-001").client_ids == ["CLI_001", "CLI_002"]
+        assert [s.client_count for s in replicated.get_summaries()] == [2]
+    
+    def test_stale_read_conflict_is_retried_with_fresh_data(self, replicated, other_writer):
+        """Un conflicto por leer la réplica vieja se resuelve al reintentar."""
+        service = RouteService(repository=replicated, max_conflict_retries=1)
+        replicated.find_by_id("route-001")
+        add_client_elsewhere(other_writer, "CLI_002")
+        
+        route = service.assign_client_to_route("route-001", "CLI_003")
+        
+        assert route.client_ids == ["CLI_001", "CLI_002", "CLI_003"]
+        assert route.version == 3
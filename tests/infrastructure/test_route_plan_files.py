@@ -0,0 +1,109 @@
+"""
+Tests de la exportación e importación masiva de planes de rutas.
+"""
+import sqlite3
+
+import pytest
+from src.domain.models.route import Route
+from src.domain.models.route_metrics import RouteMetrics
+from src.domain.models.route_statistics import RouteStatisticsFilter
+from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+from src.infrastructure.persistence.route_plan_files import (
+    export_route_plan, import_route_plan, read_route_plan
+)
+
+
+def route_fields(route):
+    return (
+        route.id, route.name, route.cedis_id, route.day_of_week, route.client_ids, route.is_active,
+        route.version, route.capacity, route.shift_start, route.shift_minutes, route.metrics
+    )
+
+
+@pytest.fixture
+def source():
+    """Base con rutas activas, inactivas y archivadas."""
+    repository = SqliteRouteRepository(sqlite3.connect(":memory:"))
+    repository.save_many([
+        Route("route-001", "Ruta Norte", "CEDIS_BOG_01", "LUNES", ["CLI_001", "CLI_002", "CLI_003"],
+              capacity=120.5, shift_minutes=540, metrics=RouteMetrics(12.5, 95.0)),
+        Route("route-002", "Ruta Sur, centro", "CEDIS_BOG_01", "LUNES", ["CLI_003"], version=4),
+        Route("route-003", "Ruta Vieja", "CEDIS_MED_01", "MARTES", ["CLI_009"], is_active=False),
+        Route("route-004", "Ruta Vacía", "CEDIS_MED_01", "MARTES"),
+    ])
+    repository.commit_transaction()
+    repository._conn.execute("UPDATE routes SET updated_at = '2000-01-01' WHERE id = 'route-003'")
+    repository.archive_inactive_routes(older_than_days=1)
+    return repository
+
+
+class TestRoutePlanFiles:
+    """Tests del formato CSV y de la carga por lotes."""
+    
+    def test_csv_round_trip_keeps_routes_and_derived_indexes(self, source, tmp_path):
+        """Un plan exportado e importado queda igual, con estadísticas y asignaciones."""
+        assert export_route_plan(source, tmp_path, batch_size=2) == (4, 5)
+        
+        target = SqliteRouteRepository(sqlite3.connect(":memory:"))
+        assert import_route_plan(target, tmp_path, batch_size=3) == (4, 5)
+        
+        expected = sorted(map(route_fields, source.get_all_including_inactive()))
+        assert sorted(map(route_fields, target.get_all_including_inactive())) == expected
+        statistics = target.get_statistics(RouteStatisticsFilter())
+        assert [(g.cedis_id, g.active_routes, g.total_stops) for g in statistics.groups] == [
+            ("CEDIS_BOG_01", 2, 4), ("CEDIS_MED_01", 1, 0)
+        ]
+        assert [c.route_ids for c in target.find_conflicts("CEDIS_BOG_01", "LUNES")] == [
+            ("route-001", "route-002")
+        ]
+        assert target.find_client_routes("CEDIS_MED_01", "MARTES", ["CLI_009"]) == {}
+        assert [s.id for s in target.search_routes("centro")] == ["route-002"]
+    
+    def test_invalid_route_rolls_back_the_import(self, source, tmp_path):
+        """Un cliente repetido se rechaza con las invariantes de Route."""
+        export_route_plan(source, tmp_path)
+        # Las rutas archivadas se exportan al final: route-004 va antes que route-003
+        lines = (tmp_path / "stops.csv").read_text(encoding="utf-8").splitlines()
+        lines[5:5] = ["route-004,0,CLI_001", "route-004,1,CLI_001"]
+        (tmp_path / "stops.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        
+        with pytest.raises(ValueError, match="CLI_001 ya está en la ruta"):
+            list(read_route_plan(tmp_path))
+        target = SqliteRouteRepository(sqlite3.connect(":memory:"))
+        with pytest.raises(ValueError):
+            import_route_plan(target, tmp_path, batch_size=2)
+        
+        assert target.get_all_including_inactive() == []
+    
+    def test_stops_out_of_order_are_rejected(self, source, tmp_path):
+        """Las paradas deben seguir el orden de las rutas y de sus posiciones."""
+        export_route_plan(source, tmp_path)
+        lines = (tmp_path / "stops.csv").read_text(encoding="utf-8").splitlines()
+        lines[1], lines[2] = lines[2], lines[1]
+        (tmp_path / "stops.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        
+        with pytest.raises(ValueError, match="posición"):
+            list(read_route_plan(tmp_path))
+    
+    def test_misplaced_stop_saves_no_routes(self, source, tmp_path):
+        """Una parada fuera de lugar no deja guardadas las rutas siguientes sin paradas."""
+        export_route_plan(source, tmp_path)
+        lines = (tmp_path / "stops.csv").read_text(encoding="utf-8").splitlines()
+        lines.insert(1, lines.pop())
+        (tmp_path / "stops.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        
+        target = SqliteRouteRepository(sqlite3.connect(":memory:"))
+        with pytest.raises(ValueError, match="fuera de orden"):
+            import_route_plan(target, tmp_path, batch_size=1)
+        
+        assert target.get_all_including_inactive() == []
+    
+    @pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+    def test_columnar_round_trip(self, source, tmp_path, file_format):
+        """Parquet y Arrow IPC guardan los mismos datos (requieren pyarrow)."""
+        pytest.importorskip("pyarrow")
+        export_route_plan(source, tmp_path, file_format, batch_size=2)
+        
+        routes = list(read_route_plan(tmp_path, file_format, batch_size=2))
+        
+        assert sorted(map(route_fields, routes)) == sorted(map(route_fields, source.get_all_including_inactive()))
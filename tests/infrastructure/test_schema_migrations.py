@@ -0,0 +1,69 @@
+"""
+Tests del versionado del esquema SQLite.
+Se ejecutan contra una base de datos en memoria.
+"""
+import sqlite3
+
+import pytest
+from src.infrastructure.persistence.schema_migrations import MIGRATIONS, Migration, migrate
+from src.infrastructure.persistence.sqlite_client_repository import SqliteClientRepository
+from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+
+
+def user_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+class TestSchemaMigrations:
+    """Tests para el ejecutor de migraciones."""
+    
+    def test_new_database_is_migrated_once(self):
+        """Una base nueva recibe todas las migraciones y después ninguna."""
+        conn = sqlite3.connect(":memory:")
+        
+        assert migrate(conn) == len(MIGRATIONS)
+        assert user_version(conn) == MIGRATIONS[-1].version
+        assert migrate(conn) == 0
+    
+    def test_opening_current_schema_runs_no_ddl(self):
+        """Con el esquema al día, crear los repositorios no ejecuta DDL."""
+        conn = sqlite3.connect(":memory:")
+        SqliteRouteRepository(conn)
+        statements = []
+        conn.set_trace_callback(statements.append)
+        
+        SqliteRouteRepository(conn)
+        SqliteClientRepository(conn)
+        
+        assert not any(
+            keyword in statement.upper()
+            for statement in statements
+            for keyword in ("CREATE", "ALTER", "DROP", "BEGIN")
+        )
+    
+    def test_failed_migration_is_rolled_back(self):
+        """Un paso que falla no deja cambios ni avanza la versión."""
+        def broken(cursor: sqlite3.Cursor) -> None:
+            cursor.execute("CREATE TABLE half_done (id INTEGER)")
+            raise RuntimeError("fallo")
+        
+        conn = sqlite3.connect(":memory:")
+        migrations = (
+            Migration(1, "Tabla inicial", lambda cursor: cursor.execute("CREATE TABLE first (id INTEGER)")),
+            Migration(2, "Paso roto", broken),
+        )
+        
+        with pytest.raises(RuntimeError):
+            migrate(conn, migrations)
+        
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert tables == {"first"}
+        assert user_version(conn) == 1
+    
+    def test_newer_schema_is_rejected(self):
+        """Una base con un esquema más nuevo que el código no se modifica."""
+        conn = sqlite3.connect(":memory:")
+        conn.execute(f"PRAGMA user_version = {MIGRATIONS[-1].version + 1}")
+        
+        with pytest.raises(ValueError):
+            SqliteRouteRepository(conn)
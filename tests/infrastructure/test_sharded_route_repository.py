@@ -0,0 +1,108 @@
+"""
+Tests del repositorio particionado por CEDIS.
+"""
+import sqlite3
+
+import pytest
+from src.domain.models.route import Route
+from src.domain.models.route_statistics import RouteStatisticsFilter
+from src.infrastructure.persistence.sharded_route_repository import ShardedRouteRepository, shard_file_stem
+from src.application.services.route_service import RouteService
+from src.application.dtos import CreateRouteDTO
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """Rutas de dos CEDIS, cada uno en su archivo."""
+    repository = ShardedRouteRepository.in_directory(tmp_path)
+    repository.save_many([
+        Route("bog-1", "Bogotá Norte", "CEDIS_BOG_01", "LUNES", ["CLI_001", "CLI_002", "CLI_003"]),
+        Route("med-1", "Medellín Centro", "CEDIS_MED_01", "LUNES", ["CLI_010"]),
+        Route("bog-2", "Bogotá Sur", "CEDIS_BOG_01", "LUNES", ["CLI_003"]),
+        Route("med-2", "Medellín Alto", "CEDIS_MED_01", "MARTES", ["CLI_011", "CLI_012"], is_active=False),
+    ])
+    repository.commit_transaction()
+    yield repository
+    repository.close()
+
+
+class TestShardedRouteRepository:
+    """Tests del enrutamiento por CEDIS y de las consultas combinadas."""
+    
+    def test_each_cedis_has_its_own_file(self, repository, tmp_path):
+        """Las rutas quedan solo en el archivo de su CEDIS."""
+        for cedis_id, route_ids in (("CEDIS_BOG_01", ["bog-1", "bog-2"]), ("CEDIS_MED_01", ["med-1", "med-2"])):
+            conn = sqlite3.connect(tmp_path / f"{cedis_id}.db")
+            assert [row[0] for row in conn.execute("SELECT id FROM routes ORDER BY id")] == route_ids
+            conn.close()
+        
+        reopened = ShardedRouteRepository.in_directory(tmp_path)
+        assert reopened.find_by_id("med-2").cedis_id == "CEDIS_MED_01"
+        assert shard_file_stem("CEDIS/BOG 01") != shard_file_stem("CEDIS_BOG_01")
+        reopened.close()
+    
+    def test_fan_out_reads_keep_the_single_database_order(self, repository):
+        """Listados, estadísticas y búsqueda combinan los shards en orden."""
+        assert [r.name for r in repository.get_all()] == ["Bogotá Norte", "Bogotá Sur", "Medellín Centro"]
+        assert [s.id for s in repository.get_summaries(include_inactive=True)] == [
+            "bog-1", "bog-2", "med-1", "med-2"
+        ]
+        statistics = repository.get_statistics(RouteStatisticsFilter(top_n=2))
+        assert [(g.cedis_id, g.total_stops) for g in statistics.groups] == [
+            ("CEDIS_BOG_01", 4), ("CEDIS_MED_01", 1)
+        ]
+        assert [s.id for s in statistics.largest_routes] == ["bog-1", "bog-2"]
+        assert {s.id for s in repository.search_routes("centro")} == {"med-1"}
+        assert [c.client_id for c in repository.find_conflicts("CEDIS_BOG_01", "LUNES")] == ["CLI_003"]
+        assert repository.find_conflicts("CEDIS_CAL_01", "LUNES") == []
+    
+    def test_write_lock_on_one_cedis_does_not_block_another(self, repository, tmp_path):
+        """Una transacción abierta en un CEDIS no detiene las escrituras de otro."""
+        other = ShardedRouteRepository.in_directory(
+            tmp_path, connect=lambda path: sqlite3.connect(path, timeout=0, check_same_thread=False)
+        )
+        repository.begin_transaction()
+        route = repository.find_by_id("bog-1")
+        route.add_client("CLI_004")
+        repository.update(route)
+        
+        service = RouteService(other)
+        created = service.create_route(CreateRouteDTO("Medellín Norte", "CEDIS_MED_01", "LUNES"))
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            service.create_route(CreateRouteDTO("Bogotá Este", "CEDIS_BOG_01", "LUNES"))
+        other.rollback_transaction()
+        repository.commit_transaction()
+        
+        assert repository.find_by_id(created.id).name == "Medellín Norte"
+        assert repository.find_by_id("bog-1").client_ids[-1] == "CLI_004"
+        other.close()
+    
+    def test_change_feed_resumes_every_shard(self, repository):
+        """La secuencia empaquetada retoma cada shard donde quedó."""
+        seen, seq = [], ""
+        while True:
+            page = repository.changes_since(seq, limit=3)
+            if not page:
+                break
+            assert all(a.seq < b.seq for a, b in zip(page, page[1:]))
+            seen.extend(change.route_id for change in page)
+            seq = page[-1].seq
+        
+        repository.delete("med-2")
+        repository.commit_transaction()
+        
+        assert sorted(seen) == ["bog-1", "bog-2", "med-1", "med-2"]
+        assert [(c.route_id, c.operation) for c in repository.changes_since(seq)] == [("med-2", "DELETE")]
+    
+    def test_change_cursor_survives_storage(self, repository):
+        """El cursor se guarda y se recupera sin perder precisión."""
+        seq = repository.changes_since("")[-1].seq
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE sync_state (cursor)")
+        conn.execute("INSERT INTO sync_state VALUES (?)", (seq,))
+        stored, = conn.execute("SELECT cursor FROM sync_state").fetchone()
+        
+        assert stored == seq
+        assert repository.changes_since(stored) == []
+        with pytest.raises(ValueError, match="Cursor"):
+            repository.changes_since("no-es-un-cursor")
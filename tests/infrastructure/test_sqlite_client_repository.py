@@ -0,0 +1,58 @@
+"""
+Tests del adaptador SQLite del repositorio de clientes.
+Se ejecutan contra una base de datos en memoria.
+"""
+import sqlite3
+
+import pytest
+from src.domain.models.client import Client
+from src.infrastructure.persistence.sqlite_client_repository import SqliteClientRepository
+
+
+@pytest.fixture
+def repository():
+    """Repositorio SQLite sobre una base de datos en memoria."""
+    return SqliteClientRepository(sqlite3.connect(":memory:"))
+
+
+def make_client(client_id: str, cedis_id: str = "CEDIS_BOG_01", **kwargs) -> Client:
+    """Crea un cliente de prueba."""
+    return Client(id=client_id, name=f"Tienda {client_id}", address="Calle 1",
+                  cedis_id=cedis_id, **kwargs)
+
+
+class TestSqliteClientRepository:
+    """Tests para la persistencia de clientes."""
+    
+    def test_save_replaces_existing_profile(self, repository):
+        """Guardar un cliente existente actualiza sus datos."""
+        repository.save(make_client("CLI_001"))
+        repository.save(make_client("CLI_001", latitude=4.65, longitude=-74.1))
+        
+        client = repository.find_by_id("CLI_001")
+        
+        assert (client.latitude, client.longitude) == (4.65, -74.1)
+        assert client.is_geocoded
+    
+    def test_find_by_ids_and_cedis(self, repository):
+        """Las búsquedas por lote y por CEDIS omiten lo que no coincide."""
+        repository.save(make_client("CLI_001"))
+        repository.save(make_client("CLI_002", cedis_id="CEDIS_MED_01"))
+        
+        assert set(repository.find_by_ids(["CLI_001", "CLI_002", "CLI_404"])) == {"CLI_001", "CLI_002"}
+        assert [c.id for c in repository.get_by_cedis("CEDIS_BOG_01")] == ["CLI_001"]
+    
+    def test_coordinates_must_come_together(self):
+        """Una latitud sin longitud es inválida."""
+        with pytest.raises(ValueError, match="juntas"):
+            make_client("CLI_001", latitude=4.65)
+    
+    def test_weekly_profile_round_trip(self, repository):
+        """La frecuencia y los días permitidos se conservan."""
+        repository.save(make_client("CLI_001", visit_frequency=2, allowed_days=("LUNES", "JUEVES")))
+        
+        client = repository.find_by_id("CLI_001")
+        
+        assert (client.visit_frequency, client.allowed_days) == (2, ("LUNES", "JUEVES"))
+        with pytest.raises(ValueError, match="no alcanzan"):
+            make_client("CLI_002", visit_frequency=3, allowed_days=("LUNES",))
@@ -0,0 +1,608 @@
+"""
+Tests del adaptador SQLite del repositorio de rutas.
+Se ejecutan contra una base de datos en memoria.
+"""
+import sqlite3
+from array import array
+
+import pytest
+from src.domain.models.route import Route
+from src.domain.models.route_metrics import RouteMetrics
+from src.domain.models.route_statistics import RouteStatisticsFilter
+from src.domain.exceptions import ConcurrentModificationError
+from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+from src.application.services.route_service import RouteService
+
+
+@pytest.fixture
+def repository():
+    """Repositorio SQLite sobre una base de datos en memoria."""
+    repo = SqliteRouteRepository(sqlite3.connect(":memory:"))
+    yield repo
+    repo.close()
+
+
+def make_route(route_id: str, client_ids=None) -> Route:
+    """Crea una ruta de prueba."""
+    return Route(
+        id=route_id,
+        name=f"Ruta {route_id}",
+        cedis_id="CEDIS_BOG_01",
+        day_of_week="LUNES",
+        client_ids=list(client_ids or [])
+    )
+
+
+class TestChangeFeed:
+    """Tests para el registro de cambios (change feed)."""
+    
+    def test_writes_are_recorded_in_order(self, repository):
+        """Cada escritura agrega un cambio con secuencia creciente."""
+        route = make_route("route-001")
+        repository.save(route)
+        route.add_client("CLI_001")
+        repository.update(route)
+        repository.delete(route.id)
+        
+        changes = repository.changes_since("")
+        
+        assert [c.operation for c in changes] == ["INSERT", "UPDATE", "DELETE"]
+        assert all(c.route_id == "route-001" for c in changes)
+        assert [c.seq for c in changes] == sorted(c.seq for c in changes)
+    
+    def test_changes_since_returns_only_deltas(self, repository):
+        """Solo se retornan los cambios posteriores a la secuencia dada."""
+        repository.save(make_route("route-001"))
+        repository.save(make_route("route-002"))
+        repository.save(make_route("route-003"))
+        
+        first_page = repository.changes_since("", limit=2)
+        second_page = repository.changes_since(first_page[-1].seq, limit=2)
+        
+        assert [c.route_id for c in first_page] == ["route-001", "route-002"]
+        assert [c.route_id for c in second_page] == ["route-003"]
+    
+    def test_rollback_discards_changes(self, repository):
+        """Un rollback también descarta las entradas del registro."""
+        repository.begin_transaction()
+        repository.save(make_route("route-001"))
+        repository.rollback_transaction()
+        
+        assert repository.changes_since("") == []
+    
+    def test_divide_records_all_writes(self, repository):
+        """La división registra la desactivación y las dos rutas nuevas."""
+        service = RouteService(repository)
+        repository.save(make_route("route-001", ["CLI_001", "CLI_002"]))
+        repository.commit_transaction()
+        last_seq = repository.changes_since("")[-1].seq
+        
+        route_a, route_b = service.divide_route_use_case("route-001", 1, "A", "B")
+        changes = service.get_changes_since(last_seq)
+        
+        assert [(c.route_id, c.operation) for c in changes] == [
+            ("route-001", "UPDATE"),
+            (route_a.id, "INSERT"),
+            (route_b.id, "INSERT")
+        ]
+    
+    def test_invalid_limit_raises_error(self, repository):
+        """El límite debe ser positivo."""
+        with pytest.raises(ValueError, match="límite"):
+            repository.changes_since("", limit=0)
+
+
+class TestOptimisticConcurrency:
+    """Tests para el control de concurrencia optimista por versión."""
+    
+    def test_update_increments_version(self, repository):
+        """Cada actualización incrementa la versión almacenada."""
+        route = make_route("route-001")
+        repository.save(route)
+        
+        route.add_client("CLI_001")
+        repository.update(route)
+        
+        assert route.version == 2
+        assert repository.find_by_id("route-001").version == 2
+    
+    def test_stale_update_raises_conflict(self, repository):
+        """Una escritura sobre una versión obsoleta no sobrescribe la fila."""
+        repository.save(make_route("route-001"))
+        first = repository.find_by_id("route-001")
+        second = repository.find_by_id("route-001")
+        
+        first.add_client("CLI_001")
+        repository.update(first)
+        second.add_client("CLI_002")
+        
+        with pytest.raises(ConcurrentModificationError):
+            repository.update(second)
+        assert repository.find_by_id("route-001").client_ids == ["CLI_001"]
+    
+    def test_update_missing_route_raises_value_error(self, repository):
+        """Actualizar una ruta inexistente no es un conflicto."""
+        with pytest.raises(ValueError, match="no encontrada"):
+            repository.update(make_route("route-404"))
+
+
+class TestRouteLineage:
+    """Tests para el grafo de linaje de divisiones y fusiones."""
+    
+    def test_divide_and_merge_record_lineage(self, repository):
+        """Las rutas resultantes conocen su origen en varias generaciones."""
+        service = RouteService(repository)
+        repository.save(make_route("route-001", ["CLI_001", "CLI_002", "CLI_003"]))
+        repository.save(make_route("route-002", ["CLI_004"]))
+        repository.commit_transaction()
+        
+        route_a, route_b = service.divide_route_use_case("route-001", 1, "A", "B")
+        merged = service.merge_routes_use_case(route_b.id, "route-002", "AB")
+        
+        ancestors = {(e.parent_id, e.child_id, e.depth) for e in repository.get_ancestors(merged.id)}
+        assert ancestors == {
+            (route_b.id, merged.id, 1),
+            ("route-002", merged.id, 1),
+            ("route-001", route_b.id, 2)
+        }
+        
+        descendants = repository.get_descendants("route-001")
+        assert [e.depth for e in descendants] == [1, 1, 2]
+        assert {(e.child_id, e.operation, e.depth) for e in descendants} == {
+            (route_a.id, "DIVIDE", 1),
+            (route_b.id, "DIVIDE", 1),
+            (merged.id, "MERGE", 2)
+        }
+    
+    def test_lineage_is_rolled_back_with_failed_merge(self, repository):
+        """Si la fusión falla, no queda ninguna arista registrada."""
+        service = RouteService(repository)
+        repository.save(make_route("route-001", ["CLI_001"]))
+        repository.commit_transaction()
+        
+        with pytest.raises(ValueError):
+            service.merge_routes_use_case("route-001", "route-404", "AB")
+        
+        assert repository.get_descendants("route-001") == []
+    
+    def test_deep_history_is_linear(self, repository):
+        """Una cadena larga de generaciones se recorre completa."""
+        for generation in range(1, 300):
+            repository.add_lineage([f"r{generation - 1}"], [f"r{generation}"], "DIVIDE")
+        
+        ancestors = repository.get_ancestors("r299")
+        
+        assert len(ancestors) == 299
+        assert ancestors[-1].parent_id == "r0"
+        assert ancestors[-1].depth == 299
+
+
+class TestClientKeyDictionary:
+    """Tests para el almacenamiento de clientes como claves enteras."""
+    
+    def test_stops_reference_integer_keys(self, repository):
+        """Cada parada guarda la clave entera y el ID externo se guarda una sola vez."""
+        repository.save(make_route("route-001", ["CLI_001", "CLI_002"]))
+        repository.save(make_route("route-002", ["CLI_002", "CLI_003"]))
+        
+        stop_keys = [row[0] for row in repository._conn.execute(
+            "SELECT client_key FROM route_stops WHERE route_id = 'route-002' ORDER BY sort_key"
+        )]
+        dictionary_size = repository._conn.execute("SELECT COUNT(*) FROM client_keys").fetchone()[0]
+        
+        assert all(isinstance(key, int) for key in stop_keys)
+        assert dictionary_size == 3
+    
+    def test_loaded_ids_are_shared(self, repository):
+        """Un mismo cliente en varias rutas es un único objeto en memoria."""
+        repository.save(make_route("route-001", ["CLI_001", "CLI_002"]))
+        repository.save(make_route("route-002", ["CLI_002"]))
+        repository.commit_transaction()
+        
+        cold = SqliteRouteRepository(repository._conn)
+        route_a, route_b = cold.get_all()
+        
+        assert route_a.client_ids == ["CLI_001", "CLI_002"]
+        assert route_a.client_ids[1] is route_b.client_ids[0]
+    
+    def test_rollback_forgets_new_keys(self, repository):
+        """Las claves asignadas en una transacción revertida no quedan en caché."""
+        repository.begin_transaction()
+        repository.save(make_route("route-001", ["CLI_001"]))
+        repository.rollback_transaction()
+        
+        repository.save(make_route("route-002", ["CLI_002"]))
+        repository.save(make_route("route-003", ["CLI_001"]))
+        
+        assert repository.find_by_id("route-002").client_ids == ["CLI_002"]
+        cold = SqliteRouteRepository(repository._conn)
+        assert cold.find_by_id("route-002").client_ids == ["CLI_002"]
+        assert cold.find_by_id("route-003").client_ids == ["CLI_001"]
+    
+    def test_legacy_json_column_is_migrated(self):
+        """Las bases con client_ids en JSON se convierten al abrirse."""
+        conn = sqlite3.connect(":memory:")
+        conn.execute("""
+            CREATE TABLE routes (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                cedis_id TEXT NOT NULL,
+                day_of_week TEXT NOT NULL,
+                client_ids TEXT NOT NULL,
+                is_active INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        conn.execute(
+            "INSERT INTO routes VALUES ('route-001', 'Ruta', 'CEDIS_BOG_01', 'LUNES', '[\"CLI_001\", \"CLI_002\"]', 1)"
+        )
+        conn.commit()
+        
+        repo = SqliteRouteRepository(conn)
+        
+        route = repo.find_by_id("route-001")
+        assert route.client_ids == ["CLI_001", "CLI_002"]
+        assert route.version == 1
+
+
+class TestStopOrdering:
+    """Tests para las paradas ordenadas por claves fraccionales."""
+    
+    @staticmethod
+    def sort_keys(repository, route_id):
+        return dict(
+            (repository._client_ids_by_key[row[1]], row[0])
+            for row in repository._conn.execute(
+                "SELECT sort_key, client_key FROM route_stops WHERE route_id = ?", (route_id,)
+            )
+        )
+    
+    def test_update_rewrites_only_changed_stops(self, repository):
+        """Mover una parada con update conserva las claves de las demás."""
+        repository.save(make_route("route-001", ["CLI_001", "CLI_002", "CLI_003", "CLI_004"]))
+        before = self.sort_keys(repository, "route-001")
+        
+        route = repository.find_by_id("route-001")
+        route.reorder_clients(["CLI_002", "CLI_003", "CLI_001", "CLI_004"])
+        route.add_client("CLI_005")
+        route.remove_client("CLI_004")
+        repository.update(route)
+        
+        after = self.sort_keys(repository, "route-001")
+        assert repository.find_by_id("route-001").client_ids == ["CLI_002", "CLI_003", "CLI_001", "CLI_005"]
+        assert after["CLI_002"] == before["CLI_002"]
+        assert after["CLI_003"] == before["CLI_003"]
+        assert after["CLI_001"] != before["CLI_001"]
+    
+    def test_move_stop_writes_one_row(self, repository):
+        """move_stop cambia solo la clave de la parada movida y la versión."""
+        repository.save(make_route("route-001", ["CLI_001", "CLI_002", "CLI_003"]))
+        before = self.sort_keys(repository, "route-001")
+        
+        repository.move_stop("route-001", "CLI_003", "CLI_001", "CLI_002", expected_version=1)
+        
+        route = repository.find_by_id("route-001")
+        after = self.sort_keys(repository, "route-001")
+        assert route.client_ids == ["CLI_001", "CLI_003", "CLI_002"]
+        assert route.version == 2
+        assert [c for c in after if after[c] != before[c]] == ["CLI_003"]
+    
+    def test_move_stop_validates_neighbors_and_version(self, repository):
+        """Los vecinos deben ser consecutivos y la versión la esperada."""
+        repository.save(make_route("route-001", ["CLI_001", "CLI_002", "CLI_003", "CLI_004"]))
+        
+        with pytest.raises(ValueError, match="consecutivos"):
+            repository.move_stop("route-001", "CLI_004", "CLI_001", "CLI_003")
+        with pytest.raises(ConcurrentModificationError):
+            repository.move_stop("route-001", "CLI_003", None, "CLI_001", expected_version=7)
+    
+    def test_metrics_are_stored_with_the_route(self, repository):
+        """Las métricas se leen en rutas y resúmenes; move_stop las reemplaza."""
+        route = make_route("route-001", ["CLI_001", "CLI_002"])
+        route.metrics = RouteMetrics(distance_km=3.5, duration_minutes=17.0)
+        repository.save(route)
+        
+        assert repository.find_by_id("route-001").metrics == route.metrics
+        assert repository.get_summaries()[0].metrics == route.metrics
+        
+        moved = RouteMetrics(distance_km=4.0, duration_minutes=18.0)
+        repository.move_stop("route-001", "CLI_002", None, "CLI_001", metrics=moved)
+        repository.move_stop("route-001", "CLI_001", None, "CLI_002")
+        assert repository.find_by_id("route-001").metrics == moved
+    
+    def test_long_keys_are_renormalized_later(self, repository):
+        """Las claves algo largas no se renormalizan en cada commit."""
+        repository.save(make_route("route-001", ["CLI_A", "CLI_B", "CLI_C"]))
+        repository.commit_transaction()
+        
+        # Alternar las dos últimas paradas inserta siempre tras CLI_A
+        for i in range(40):
+            repository.move_stop("route-001", "CLI_C", "CLI_A", "CLI_B")
+            repository.move_stop("route-001", "CLI_B", "CLI_A", "CLI_C")
+        repository.commit_transaction()
+        
+        longest_key = "SELECT MAX(LENGTH(sort_key)) FROM route_stops"
+        assert list(repository._routes_to_renormalize) == ["route-001"]
+        assert repository._conn.execute(longest_key).fetchone()[0] > SqliteRouteRepository._MAX_SORT_KEY_LENGTH
+        
+        repository.renormalize_sort_keys()
+        
+        assert repository._routes_to_renormalize == {}
+        assert repository._conn.execute(longest_key).fetchone()[0] <= SqliteRouteRepository._MAX_SORT_KEY_LENGTH
+        assert repository.find_by_id("route-001").client_ids == ["CLI_A", "CLI_B", "CLI_C"]
+    
+    def test_very_long_keys_are_renormalized_on_commit(self, repository):
+        """Tras muchas inserciones en el mismo hueco el commit acorta las claves."""
+        repository.save(make_route("route-001", ["CLI_A", "CLI_B", "CLI_C"]))
+        repository.commit_transaction()
+        
+        for i in range(250):
+            repository.move_stop("route-001", "CLI_C", "CLI_A", "CLI_B")
+            repository.move_stop("route-001", "CLI_B", "CLI_A", "CLI_C")
+        assert repository._routes_to_renormalize["route-001"] > SqliteRouteRepository._RENORMALIZE_KEY_LENGTH
+        repository.commit_transaction()
+        
+        longest = repository._conn.execute("SELECT MAX(LENGTH(sort_key)) FROM route_stops").fetchone()[0]
+        assert longest <= SqliteRouteRepository._MAX_SORT_KEY_LENGTH
+        assert repository.find_by_id("route-001").client_ids == ["CLI_A", "CLI_B", "CLI_C"]
+    
+    def test_packed_column_is_migrated(self):
+        """Las bases con arreglos empaquetados pasan a una fila por parada."""
+        conn = sqlite3.connect(":memory:")
+        conn.executescript("""
+            CREATE TABLE client_keys (key INTEGER PRIMARY KEY, client_id TEXT NOT NULL UNIQUE);
+            INSERT INTO client_keys VALUES (1, 'CLI_001'), (2, 'CLI_002');
+            CREATE TABLE routes (
+                id TEXT PRIMARY KEY, name TEXT NOT NULL, cedis_id TEXT NOT NULL,
+                day_of_week TEXT NOT NULL, client_keys BLOB NOT NULL,
+                is_active INTEGER NOT NULL DEFAULT 1, version INTEGER NOT NULL DEFAULT 1
+            );
+        """)
+        conn.execute(
+            "INSERT INTO routes VALUES ('route-001', 'Ruta', 'CEDIS_BOG_01', 'LUNES', ?, 1, 4)",
+            (array('I', [2, 1]).tobytes(),)
+        )
+        conn.commit()
+        
+        repo = SqliteRouteRepository(conn)
+        
+        route = repo.find_by_id("route-001")
+        assert route.client_ids == ["CLI_002", "CLI_001"]
+        assert route.version == 4
+        group, = repo.get_statistics(RouteStatisticsFilter()).groups
+        assert group.total_stops == 2
+
+
+class TestDailyAssignments:
+    """Tests para el índice de asignaciones diarias de clientes."""
+    
+    def test_find_conflicts_lists_all_routes(self, repository):
+        """Un cliente en dos rutas activas del mismo día es un conflicto."""
+        repository.save(make_route("route-001", ["CLI_001", "CLI_002"]))
+        repository.save(make_route("route-002", ["CLI_002", "CLI_003"]))
+        other_day = make_route("route-003", ["CLI_001"])
+        other_day.day_of_week = "MARTES"
+        repository.save(other_day)
+        
+        conflict, = repository.find_conflicts("CEDIS_BOG_01", "lunes")
+        
+        assert conflict.client_id == "CLI_002"
+        assert conflict.route_ids == ("route-001", "route-002")
+    
+    def test_index_follows_stops_and_activation(self, repository):
+        """Quitar la parada o desactivar la ruta resuelve el conflicto."""
+        repository.save(make_route("route-001", ["CLI_001", "CLI_002"]))
+        repository.save(make_route("route-002", ["CLI_002"]))
+        
+        route = repository.find_by_id("route-002")
+        route.deactivate()
+        repository.update(route)
+        assert repository.find_conflicts("CEDIS_BOG_01", "LUNES") == []
+        
+        route.activate()
+        repository.update(route)
+        assert repository.find_client_routes("CEDIS_BOG_01", "LUNES", ["CLI_002", "CLI_404"]) == {
+            "CLI_002": ["route-001", "route-002"]
+        }
+        
+        route.remove_client("CLI_002")
+        repository.update(route)
+        repository.delete("route-001")
+        assert repository.find_client_routes("CEDIS_BOG_01", "LUNES", ["CLI_001", "CLI_002"]) == {}
+
+
+class TestRouteStatistics:
+    """Tests para las estadísticas materializadas por triggers."""
+    
+    def test_statistics_follow_writes(self, repository):
+        """Las inserciones, cambios, desactivaciones y borrados ajustan los totales."""
+        repository.save(make_route("route-001", ["CLI_001", "CLI_002"]))
+        repository.save(make_route("route-002", ["CLI_003"]))
+        route = repository.find_by_id("route-002")
+        route.add_client("CLI_004")
+        route.add_client("CLI_005")
+        repository.update(route)
+        
+        group, = repository.get_statistics(RouteStatisticsFilter()).groups
+        assert (group.active_routes, group.total_stops) == (2, 5)
+        
+        route.deactivate()
+        repository.update(route)
+        repository.delete("route-001")
+        
+        assert repository.get_statistics(RouteStatisticsFilter()).groups == []
+    
+    def test_statistics_match_full_scan(self, repository):
+        """Los agregados coinciden con recorrer todas las rutas."""
+        service = RouteService(repository)
+        for i in range(6):
+            repository.save(Route(
+                id=f"route-{i}",
+                name=f"Ruta {i}",
+                cedis_id="CEDIS_BOG_01" if i % 2 else "CEDIS_MED_01",
+                day_of_week="LUNES" if i < 3 else "MARTES",
+                client_ids=[f"CLI_{i}_{j}" for j in range(i + 2)]
+            ))
+        repository.commit_transaction()
+        service.divide_route_use_case("route-5", 3, "A", "B")
+        
+        statistics = service.get_statistics(cedis_id="CEDIS_BOG_01", top_n=2)
+        routes = [r for r in service.get_all_routes() if r.cedis_id == "CEDIS_BOG_01"]
+        
+        assert statistics.total_active_routes == len(routes)
+        assert statistics.total_stops == sum(r.client_count for r in routes)
+        assert [r.client_count for r in statistics.largest_routes] == [5, 4]
+    
+    def test_existing_routes_are_counted_on_first_open(self, repository):
+        """La tabla materializada se puebla con las rutas previas."""
+        repository.save(make_route("route-001", ["CLI_001"]))
+        # Base creada antes de las estadísticas y del versionado del esquema
+        repository._conn.execute("DROP TABLE route_stats")
+        repository._conn.execute("PRAGMA user_version = 0")
+        repository.commit_transaction()
+        
+        reopened = SqliteRouteRepository(repository._conn)
+        
+        group, = reopened.get_statistics(RouteStatisticsFilter(day_of_week="lunes")).groups
+        assert (group.active_routes, group.total_stops) == (1, 1)
+
+
+class TestRouteSearch:
+    """Tests para la búsqueda de rutas con FTS5."""
+    
+    def test_search_by_name_prefix_cedis_and_client(self, repository):
+        """Se encuentra una ruta por prefijo de nombre, CEDIS o cliente."""
+        repository.save(Route("route-001", "Ruta Norte", "CEDIS_BOG_01", "LUNES", ["CLI_001"]))
+        repository.save(Route("route-002", "Ruta Sur", "CEDIS_MED_01", "LUNES", ["CLI_002"]))
+        
+        assert [r.id for r in repository.search_routes("nor")] == ["route-001"]
+        assert [r.id for r in repository.search_routes("cedis_med")] == ["route-002"]
+        assert [r.id for r in repository.search_routes("CLI_002")] == ["route-002"]
+        assert {r.id for r in repository.search_routes("ruta")} == {"route-001", "route-002"}
+    
+    def test_search_follows_updates_and_deactivation(self, repository):
+        """El índice refleja los cambios de clientes y omite rutas inactivas."""
+        repository.save(make_route("route-001", ["CLI_001"]))
+        route = repository.find_by_id("route-001")
+        route.remove_client("CLI_001")
+        route.add_client("CLI_777")
+        repository.update(route)
+        
+        assert repository.search_routes("CLI_001") == []
+        assert [r.client_count for r in repository.search_routes("CLI_777")] == [1]
+        
+        route.deactivate()
+        repository.update(route)
+        assert repository.search_routes("CLI_777") == []
+    
+    def test_updating_a_route_keeps_entries_of_similar_ids(self, repository):
+        """Reemplazar la entrada de 'abc' no toca las de 'ABC' ni 'abc.d'."""
+        for route_id in ("abc", "ABC", "abc.d"):
+            repository.save(make_route(route_id, ["CLI_001"]))
+        
+        route = repository.find_by_id("abc")
+        route.add_client("CLI_002")
+        repository.update(route)
+        repository.delete("abc.d")
+        
+        assert sorted(r.id for r in repository.search_routes("CLI_001")) == ["ABC", "abc"]
+        assert [r.id for r in repository.search_routes("CLI_002")] == ["abc"]
+    
+    def test_search_entries_survive_vacuum(self, repository):
+        """El índice usa la clave entera explícita de routes, que VACUUM conserva."""
+        for route_id in ("route-001", "route-002", "route-003"):
+            repository.save(make_route(route_id, [f"CLI_{route_id[-1]}"]))
+        repository.delete("route-001")
+        repository.commit_transaction()
+        repository._conn.execute("VACUUM")
+        
+        route = repository.find_by_id("route-003")
+        route.add_client("CLI_009")
+        repository.update(route)
+        
+        key, = repository._conn.execute("SELECT key FROM routes WHERE id = 'route-003'").fetchone()
+        assert [r.id for r in repository.search_routes("CLI_009")] == ["route-003"]
+        assert [r.id for r in repository.search_routes("CLI_2")] == ["route-002"]
+        rows = repository._conn.execute(
+            "SELECT route_id FROM routes_fts WHERE rowid = ?", (key,)
+        ).fetchall()
+        assert [row[0] for row in rows] == ["route-003"]
+    
+    def test_search_respects_limit_and_ignores_symbols(self, repository):
+        """El límite acota los resultados y los símbolos no rompen la consulta."""
+        for i in range(5):
+            repository.save(make_route(f"route-00{i}"))
+        
+        assert len(repository.search_routes("ruta", limit=3)) == 3
+        assert repository.search_routes('"*()') == []
+
+
+class TestRouteArchive:
+    """Tests para el archivo de rutas inactivas."""
+    
+    def _deactivate(self, repository, route_id: str, days_ago: int) -> None:
+        route = repository.find_by_id(route_id)
+        route.deactivate()
+        repository.update(route)
+        repository._conn.execute(
+            "UPDATE routes SET updated_at = datetime('now', ?) WHERE id = ?",
+            (f"-{days_ago} days", route_id)
+        )
+    
+    def test_only_old_inactive_routes_are_archived(self, repository):
+        """Las rutas activas y las inactivas recientes se quedan en la tabla principal."""
+        repository.save(make_route("route-001", ["CLI_001"]))
+        repository.save(make_route("route-002", ["CLI_002", "CLI_003"]))
+        repository.save(make_route("route-003", ["CLI_004"]))
+        self._deactivate(repository, "route-002", days_ago=40)
+        self._deactivate(repository, "route-003", days_ago=5)
+        
+        assert repository.archive_inactive_routes(30) == 1
+        
+        main_ids = [row[0] for row in repository._conn.execute("SELECT id FROM routes ORDER BY id")]
+        assert main_ids == ["route-001", "route-003"]
+        archived = repository.find_by_id("route-002")
+        assert archived.client_ids == ["CLI_002", "CLI_003"]
+        assert not archived.is_active
+        assert [r.id for r in repository.get_all_including_inactive()] == [
+            "route-001", "route-002", "route-003"
+        ]
+        assert [s.client_count for s in repository.get_summaries(include_inactive=True)] == [1, 2, 1]
+        assert [r.id for r in repository.get_all()] == ["route-001"]
+    
+    def test_updating_archived_route_restores_it(self, repository):
+        """Reactivar una ruta archivada la devuelve con sus paradas."""
+        repository.save(make_route("route-001", ["CLI_001", "CLI_002"]))
+        self._deactivate(repository, "route-001", days_ago=40)
+        repository.archive_inactive_routes(30)
+        
+        route = repository.find_by_id("route-001")
+        route.activate()
+        repository.update(route)
+        
+        assert repository.find_client_routes("CEDIS_BOG_01", "LUNES", ["CLI_002"]) == {
+            "CLI_002": ["route-001"]
+        }
+        assert repository._conn.execute("SELECT COUNT(*) FROM routes_archive").fetchone()[0] == 0
+        assert repository.find_by_id("route-001").version == route.version
+    
+    def test_archived_route_can_be_deleted(self, repository):
+        """Eliminar una ruta archivada la borra del archivo."""
+        repository.save(make_route("route-001"))
+        self._deactivate(repository, "route-001", days_ago=40)
+        repository.archive_inactive_routes(30)
+        
+        repository.delete("route-001")
+        
+        assert repository.find_by_id("route-001") is None
+        with pytest.raises(ValueError):
+            repository.delete("route-001")
+    
+    def test_active_lookups_use_partial_indexes(self, repository):
+        """Las consultas de rutas activas se resuelven con índices parciales."""
+        plan = " ".join(row[3] for row in repository._conn.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT id FROM routes
+            WHERE cedis_id = 'CEDIS_BOG_01' AND day_of_week = 'LUNES' AND is_active = 1
+        """))
+        
+        assert "idx_routes_active_cedis_day" in plan
@@ -0,0 +1,186 @@
+"""
+Tests del repositorio con escritura diferida.
+Usan un archivo SQLite temporal para que otra conexión pueda escribir.
+"""
+import sqlite3
+
+import pytest
+from src.domain.exceptions import ConcurrentModificationError
+from src.domain.models.route import Route
+from src.infrastructure.persistence.sqlite_route_repository import SqliteRouteRepository
+from src.infrastructure.persistence.write_behind_route_repository import (
+    WriteBehindFlushError,
+    WriteBehindRouteRepository,
+)
+from src.application.services.route_service import RouteService
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Base en archivo con una ruta confirmada."""
+    path = str(tmp_path / "routes.db")
+    writer = SqliteRouteRepository(sqlite3.connect(path))
+    writer.save(Route("route-001", "Ruta Norte", "CEDIS_BOG_01", "LUNES", ["CLI_001"]))
+    writer.commit_transaction()
+    writer.close()
+    return path
+
+
+@pytest.fixture
+def connection(db_path):
+    """Conexión que el hilo de guardado puede usar."""
+    return sqlite3.connect(db_path, check_same_thread=False)
+
+
+@pytest.fixture
+def write_behind(connection):
+    """Repositorio con escritura diferida sin hilo de guardado."""
+    inner = SqliteRouteRepository(connection)
+    repo = WriteBehindRouteRepository(inner, background=False)
+    yield repo
+    repo.close()
+
+
+class FailingUpdateRepository(SqliteRouteRepository):
+    """Repositorio que no puede guardar ciertas rutas."""
+    
+    def __init__(self, connection, failing_ids):
+        super().__init__(connection)
+        self.failing_ids = set(failing_ids)
+    
+    def update(self, route, expected_version=None):
+        if route.id in self.failing_ids:
+            raise sqlite3.OperationalError("disk I/O error")
+        return super().update(route, expected_version=expected_version)
+
+
+@pytest.fixture
+def other_writer(db_path):
+    """Repositorio de otro proceso sobre la misma base."""
+    repo = SqliteRouteRepository(sqlite3.connect(db_path))
+    yield repo
+    repo.close()
+
+
+def stored_route(db_path: str) -> Route:
+    repo = SqliteRouteRepository(sqlite3.connect(db_path))
+    try:
+        return repo.find_by_id("route-001")
+    finally:
+        repo.close()
+
+
+class TestWriteBehindRouteRepository:
+    """Tests para la escritura diferida."""
+    
+    def test_successive_edits_are_coalesced_into_one_update(self, write_behind, connection, db_path):
+        """Varias asignaciones seguidas terminan en un solo UPDATE."""
+        service = RouteService(repository=write_behind)
+        statements = []
+        connection.set_trace_callback(statements.append)
+        
+        for client_id in ("CLI_002", "CLI_003", "CLI_004"):
+            service.assign_client_to_route("route-001", client_id)
+        service.remove_client_from_route("route-001", "CLI_003")
+        
+        assert stored_route(db_path).client_ids == ["CLI_001"]
+        assert write_behind.flush() == 1
+        
+        updates = [s for s in statements if s.lstrip().upper().startswith("UPDATE ROUTES")]
+        assert len(set(updates)) == 1
+        stored = stored_route(db_path)
+        assert stored.client_ids == ["CLI_001", "CLI_002", "CLI_004"]
+        assert stored.version == 5
+    
+    def test_reads_see_pending_writes(self, write_behind):
+        """Las lecturas devuelven las ediciones aún no guardadas."""
+        service = RouteService(repository=write_behind)
+        
+        service.assign_client_to_route("route-001", "CLI_002")
+        
+        assert write_behind.pending_count == 1
+        assert write_behind.find_by_id("route-001").client_ids == ["CLI_001", "CLI_002"]
+        assert [r.client_ids for r in write_behind.get_by_cedis_and_day("CEDIS_BOG_01", "lunes")] == [
+            ["CLI_001", "CLI_002"]
+        ]
+        assert [s.client_count for s in write_behind.get_summaries()] == [2]
+    
+    def test_stale_version_is_rejected_before_flush(self, write_behind):
+        """El compare-and-swap se aplica contra la versión pendiente."""
+        stale = write_behind.find_by_id("route-001")
+        route = write_behind.find_by_id("route-001")
+        route.add_client("CLI_002")
+        write_behind.update(route)
+        
+        stale.add_client("CLI_003")
+        with pytest.raises(ConcurrentModificationError):
+            write_behind.update(stale)
+    
+    def test_transaction_flushes_pending_writes(self, write_behind, db_path):
+        """Iniciar una transacción guarda lo pendiente antes de escribir."""
+        service = RouteService(repository=write_behind)
+        service.assign_client_to_route("route-001", "CLI_002")
+        
+        route_a, route_b = service.divide_route_use_case("route-001", 1, "Norte A", "Norte B")
+        
+        assert write_behind.pending_count == 0
+        assert route_a.client_ids == ["CLI_001"]
+        assert route_b.client_ids == ["CLI_002"]
+        stored = stored_route(db_path)
+        assert stored.client_ids == ["CLI_001", "CLI_002"]
+        assert not stored.is_active
+    
+    def test_close_flushes_pending_writes(self, connection, db_path):
+        """Un cierre ordenado no pierde ediciones confirmadas."""
+        repo = WriteBehindRouteRepository(SqliteRouteRepository(connection), flush_interval_seconds=60)
+        RouteService(repository=repo).assign_client_to_route("route-001", "CLI_002")
+        
+        repo.close()
+        
+        assert stored_route(db_path).client_ids == ["CLI_001", "CLI_002"]
+    
+    def test_failed_route_does_not_block_the_others(self, connection, db_path):
+        """Un guardado fallido no descarta las demás rutas pendientes."""
+        inner = FailingUpdateRepository(connection, failing_ids=["route-001"])
+        inner.save(Route("route-002", "Ruta Sur", "CEDIS_BOG_01", "LUNES", ["CLI_010"]))
+        inner.save(Route("route-003", "Ruta Este", "CEDIS_BOG_01", "LUNES", ["CLI_020"]))
+        inner.commit_transaction()
+        repo = WriteBehindRouteRepository(inner, background=False)
+        service = RouteService(repository=repo)
+        for route_id, client_id in (("route-001", "CLI_002"), ("route-002", "CLI_011"), ("route-003", "CLI_021")):
+            service.assign_client_to_route(route_id, client_id)
+        
+        with pytest.raises(WriteBehindFlushError) as error:
+            repo.flush()
+        
+        assert list(error.value.errors) == ["route-001"]
+        assert repo.pending_count == 1
+        assert repo.find_by_id("route-001").client_ids == ["CLI_001", "CLI_002"]
+        reader = SqliteRouteRepository(sqlite3.connect(db_path))
+        try:
+            assert reader.find_by_id("route-002").client_ids == ["CLI_010", "CLI_011"]
+            assert reader.find_by_id("route-003").client_ids == ["CLI_020", "CLI_021"]
+        finally:
+            reader.close()
+        
+        inner.failing_ids.clear()
+        assert repo.flush() == 1
+        repo.close()
+        assert stored_route(db_path).client_ids == ["CLI_001", "CLI_002"]
+    
+    def test_concurrent_change_is_rebased(self, write_behind, other_writer, db_path):
+        """Si otra conexión cambió la ruta, se conservan ambos cambios."""
+        service = RouteService(repository=write_behind)
+        service.assign_client_to_route("route-001", "CLI_002")
+        
+        route = other_writer.find_by_id("route-001")
+        route.add_client("CLI_003")
+        other_writer.update(route)
+        other_writer.commit_transaction()
+        
+        write_behind.flush()
+        
+        stored = stored_route(db_path)
+        assert stored.client_ids == ["CLI_001", "CLI_002", "CLI_003"]
+        assert stored.version == 3
+        assert write_behind.rebased_writes == 1